@@ -3,6 +3,7 @@
 под возможности устройства пользователя (ПК/ноутбук без дискретной видеокарты)
 """
 import os
+import time
 import psutil
 import torch
 import logging
@@ -12,6 +13,8 @@ from enum import Enum
 from dataclasses import dataclass
 from transformers import AutoModel, AutoTokenizer, pipeline, BitsAndBytesConfig
 
+from core.ai_management.model_residency_manager import ModelResidencyManager, get_residency_manager, model_residency_key
+
 logger = logging.getLogger(__name__)
 
 
@@ -47,12 +50,16 @@ class DeviceProfile:
 class AdaptiveModelLoader:
     """
     Интеллектуальная система загрузки моделей с автоматической адаптацией
-    под возможности устройства пользователя
+    под возможности устройства пользователя. Загруженные модели учитываются
+    в общем бюджете памяти процесса (ModelResidencyManager).
     """
 
-    def __init__(self, base_model_dir: str = "ai/models"):
+    RESIDENCY_OWNER = "adaptive_model_loader"
+
+    def __init__(self, base_model_dir: str = "ai/models", residency: Optional[ModelResidencyManager] = None):
         self.base_model_dir = Path(base_model_dir)
         self.device_profile = self._detect_device_capabilities()
+        self.residency = residency or get_residency_manager()
         self.loaded_models: Dict[str, Any] = {}
         self.model_variants: Dict[str, Dict[str, str]] = self._define_model_variants()
 
@@ -170,29 +177,49 @@ class AdaptiveModelLoader:
                 # Автоматический фолбэк на доступный вариант
                 model_path, detected_variant = self.get_optimal_variant(model_type)
                 logger.warning(f"⚠️ Вариант {variant_name} недоступен для {model_type}, используется {detected_variant.value}")
+                variant = detected_variant
+            else:
+                variant = force_variant
         else:
             model_path, variant = self.get_optimal_variant(model_type)
 
-        # Проверка существования модели на диске
+        # Модель уже загружена (этим или другим загрузчиком под тем же ключом)
         full_path = self.base_model_dir / model_path
+        quantization = "none" if variant == ModelVariant.FULL else variant.value
+        key = model_residency_key(str(full_path), model_type, quantization)
+        on_evict = lambda model: self._release_model(model_type, model)
+        resident = self.residency.get(key, owner=self.RESIDENCY_OWNER, on_evict=on_evict)
+        if resident is not None:
+            self.loaded_models[model_type] = {"model": resident, "variant": variant.value, "residency_key": key}
+            return resident
+
+        # Проверка существования модели на диске
         if not full_path.exists():
             logger.info(f"📥 Модель {model_path} отсутствует, запускается автоматическая загрузка...")
             await self._download_model(model_type, variant)
 
         # Загрузка модели с оптимальными параметрами
         logger.info(f"⚙️ Загрузка модели {model_type} ({variant.value}) для устройства {self.device_profile.capability.value}")
+        self.residency.reserve(*self.residency.known_footprint(key))
 
         try:
-            if model_type == "embedding":
-                return self._load_embedding_model(full_path, variant)
-            elif model_type == "textgen":
-                return self._load_textgen_model(full_path, variant)
-            elif model_type == "translation":
-                return self._load_translation_model(full_path, variant)
-            elif model_type == "whisper":
-                return self._load_whisper_model(full_path, variant)
-            else:
-                raise ValueError(f"❌ Неизвестный тип модели: {model_type}")
+            started = time.monotonic()
+            with self.residency.measure() as measured:
+                if model_type == "embedding":
+                    model = self._load_embedding_model(full_path, variant)
+                elif model_type == "textgen":
+                    model = self._load_textgen_model(full_path, variant)
+                elif model_type == "translation":
+                    model = self._load_translation_model(full_path, variant)
+                elif model_type == "whisper":
+                    model = self._load_whisper_model(full_path, variant)
+                else:
+                    raise ValueError(f"❌ Неизвестный тип модели: {model_type}")
+
+            self.loaded_models[model_type] = {"model": model, "variant": variant.value, "residency_key": key}
+            self.residency.admit(key, model, time.monotonic() - started, owner=self.RESIDENCY_OWNER,
+                                 on_evict=on_evict, measured=measured)
+            return model
 
         except RuntimeError as e:
             if "out of memory" in str(e).lower() or "cuda out of memory" in str(e).lower():
@@ -464,25 +491,25 @@ class AdaptiveModelLoader:
 
         return estimates
 
+    def _release_model(self, model_type: str, model: Any):
+        """Освобождение модели, вытесненной менеджером резидентности"""
+        entry = self.loaded_models.get(model_type)
+        if entry is not None and entry["model"] is model:
+            del self.loaded_models[model_type]
+            logger.info(f"📤 Модель {model_type} выгружена из памяти для освобождения ресурсов")
+
     async def cleanup_memory(self):
-        """Очистка памяти от неиспользуемых моделей"""
+        """Очистка памяти от моделей, повторное использование которых маловероятно"""
+        # Решение о выгрузке принимает общий менеджер резидентности по той же
+        # оценке ценности, что и при нехватке бюджета
+        trimmed = self.residency.trim()
+        if trimmed:
+            logger.info(f"📤 Выгружены редко используемые модели: {', '.join(trimmed)}")
+
         if torch.cuda.is_available():
             torch.cuda.empty_cache()
             logger.info("🧹 Очистка кэша CUDA выполнена")
 
-        # Выгрузка моделей, не использовавшихся более 15 минут
-        current_time = psutil.time()
-        models_to_unload = []
-
-        for model_name, model_info in self.loaded_models.items():
-            last_used = model_info.get("last_used", 0)
-            if current_time - last_used > 900:  # 15 минут
-                models_to_unload.append(model_name)
-
-        for model_name in models_to_unload:
-            del self.loaded_models[model_name]
-            logger.info(f"📤 Модель {model_name} выгружена из памяти для освобождения ресурсов")
-
     def health_check(self) -> Dict[str, Any]:
         """Проверка здоровья системы загрузки моделей"""
         return {
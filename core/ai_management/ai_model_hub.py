@@ -22,7 +22,7 @@ from sentence_transformers import SentenceTransformer
 from core.ai_management.lazy_model_loader import LazyModelLoader
 from core.ai_management.model_registry import ModelRegistry
 from core.monitoring.metrics_collector import MetricsCollector
-from core.security.encryption_engine import EncryptionEngine
+from core.ai_management.mmap_model_cache import MmapModelCache, UnsupportedModelError, encryption_key_from_settings
 
 
 class ModelProvider(Enum):
@@ -81,17 +81,20 @@ class AIModelHub:
     - Приоритизацию по частоте использования
     """
 
+    RESIDENCY_OWNER = "ai_model_hub"
+
     def __init__(self, config_path: str = "config/ai_config.json"):
         self.config_path = config_path
         self.models: Dict[str, Dict[str, Any]] = {}
         self.model_configs: Dict[str, ModelConfig] = {}
         self.usage_stats: Dict[str, int] = {}  # model_id -> usage_count
         self.health_metrics: Dict[str, ModelHealthMetrics] = {}
-        self.lazy_loader = LazyModelLoader()
         self.model_registry = ModelRegistry()
         self.metrics_collector = MetricsCollector()
-        self.encryption_engine = EncryptionEngine()
         self._lock = threading.RLock()
+        # Общий загрузчик процесса: второй экземпляр над тем же каталогом
+        # ломал бы single-flight; ключ шифрования он читает из того же конфига
+        self.lazy_loader = LazyModelLoader.get_instance(self.config_path)
         self._load_configs()
         self._initialize_cache()
 
@@ -105,6 +108,7 @@ class AIModelHub:
             self.default_provider = ModelProvider(config_data.get('default_provider', 'local'))
             self.fallback_enabled = config_data.get('fallback_enabled', True)
             self.max_concurrent_models = config_data.get('max_concurrent_models', 3)
+            self.disk_cache_settings = config_data.get('caching', {}).get('model_disk_cache', {})
 
             # Загрузка конфигураций отдельных моделей
             for model_id, cfg in config_data.get('models', {}).items():
@@ -118,7 +122,8 @@ class AIModelHub:
                     min_vram_gb=cfg.get('min_vram_gb', 0.0),
                     fallback_model=cfg.get('fallback_model'),
                     cache_ttl_hours=cfg.get('cache_ttl_hours', 24),
-                    quantization=cfg.get('quantization', 'none'),
+                    # Без явного значения — точность, выбранная StrategySelector
+                    quantization=cfg.get('quantization') or self.lazy_loader.default_quantization(cfg['task_type']),
                     language=cfg.get('language', 'ru')
                 )
 
@@ -133,6 +138,11 @@ class AIModelHub:
         self.cache_dir = Path("data/cache/models")
         self.cache_dir.mkdir(parents=True, exist_ok=True)
         self.cache_index_path = self.cache_dir / "cache_index.json"
+        self.model_cache = MmapModelCache(
+            str(self.cache_dir),
+            encryption_key=encryption_key_from_settings(self.disk_cache_settings),
+            chunk_size=int(self.disk_cache_settings.get('chunk_size_mb', 4) * 1024 ** 2)
+        )
 
         if self.cache_index_path.exists():
             with open(self.cache_index_path, 'r', encoding='utf-8') as f:
@@ -268,11 +278,22 @@ class AIModelHub:
 
     def _load_or_get_cached_model(self, model_id: str, force_reload: bool = False) -> Any:
         """Загрузка модели с использованием кэша на диске"""
+        config = self.model_configs[model_id]
+        residency_key = self.lazy_loader.residency_key(config.local_path or model_id, config.task_type.value,
+                                                       config.quantization)
+        on_evict = lambda model: self._release_model(model_id, model)
+
+        # 0. Модель уже в памяти процесса (загружена хабом или другим загрузчиком)
+        if not force_reload:
+            model = self.lazy_loader.residency.get(residency_key, owner=self.RESIDENCY_OWNER, on_evict=on_evict)
+            if model is not None:
+                self.models[model_id] = model
+                return model
+
         # 1. Проверить кэш на диске
         cache_key = self._generate_cache_key(model_id)
-        cache_path = self.cache_dir / f"{cache_key}.pt"
 
-        if not force_reload and cache_path.exists():
+        if not force_reload and self.model_cache.contains(cache_key):
             cache_info = self.cache_index["models"].get(cache_key)
             if cache_info:
                 # Проверить TTL кэша
@@ -281,18 +302,19 @@ class AIModelHub:
                 if datetime.now() - cache_time < ttl:
                     try:
                         self._logger.info(f"Загрузка модели {model_id} из кэша на диске")
-                        # Загрузка зашифрованного кэша
-                        encrypted_data = cache_path.read_bytes()
-                        decrypted_data = self.encryption_engine.decrypt(encrypted_data)
-                        model = torch.load(decrypted_data, map_location='cpu')
-                        self.models[model_id] = model
-                        self._update_health_metrics(model_id, success=True)
-                        return model
+                        started = time.time()
+                        # Веса отображаются в память и читаются по мере обращения
+                        model = self.model_cache.load(cache_key)
+                        if model is not None:
+                            self.models[model_id] = model
+                            self.lazy_loader.residency.admit(residency_key, model, time.time() - started,
+                                                             owner=self.RESIDENCY_OWNER, on_evict=on_evict)
+                            self._update_health_metrics(model_id, success=True)
+                            return model
                     except Exception as e:
                         self._logger.warning(f"Ошибка загрузки из кэша: {e}. Загрузка заново...")
 
-        # 2. Загрузка через ленивый загрузчик
-        config = self.model_configs[model_id]
+        # 2. Загрузка через ленивый загрузчик (регистрирует модель в менеджере резидентности)
         model = self.lazy_loader.load_model(
             model_id=model_id,
             model_path=config.local_path or model_id,
@@ -302,6 +324,8 @@ class AIModelHub:
         )
 
         self.models[model_id] = model
+        # Ссылка хаба отпускается при вытеснении модели
+        self.lazy_loader.residency.subscribe(residency_key, self.RESIDENCY_OWNER, on_evict)
 
         # 3. Сохранение в кэш на диск (асинхронно)
         self._cache_model_to_disk(model_id, model, cache_key)
@@ -309,6 +333,11 @@ class AIModelHub:
         self._update_health_metrics(model_id, success=True)
         return model
 
+    def _release_model(self, model_id: str, model: Any):
+        """Освобождение ссылки хаба на модель, вытесненную менеджером резидентности"""
+        if self.models.get(model_id) is model:
+            self.models.pop(model_id, None)
+
     def _generate_cache_key(self, model_id: str) -> str:
         """Генерация уникального ключа кэша для модели"""
         config = self.model_configs[model_id]
@@ -321,26 +350,15 @@ class AIModelHub:
 
         def _save_task():
             try:
-                cache_path = self.cache_dir / f"{cache_key}.pt"
-
-                # Сериализация модели
-                buffer = torch.io.BytesIO()
-                torch.save(model, buffer)
-                buffer.seek(0)
-                model_bytes = buffer.read()
-
-                # Шифрование перед сохранением
-                encrypted = self.encryption_engine.encrypt(model_bytes)
-
-                # Сохранение на диск
-                cache_path.write_bytes(encrypted)
+                # Потоковая запись весов (safetensors, хэши тензоров, шифрование по блокам)
+                size = self.model_cache.store(cache_key, model, model_id)
 
                 # Обновление индекса кэша
                 with self._lock:
                     self.cache_index["models"][cache_key] = {
                         "model_id": model_id,
                         "timestamp": datetime.now().isoformat(),
-                        "size_bytes": len(encrypted),
+                        "size_bytes": size,
                         "quantization": self.model_configs[model_id].quantization
                     }
 
@@ -351,8 +369,10 @@ class AIModelHub:
                     with open(self.cache_index_path, 'w', encoding='utf-8') as f:
                         json.dump(self.cache_index, f, indent=2, ensure_ascii=False)
 
-                self._logger.info(f"Модель {model_id} сохранена в кэш: {cache_path}")
+                self._logger.info(f"Модель {model_id} сохранена в кэш: {self.cache_dir / cache_key}")
 
+            except UnsupportedModelError as e:
+                self._logger.debug(f"Модель {model_id} не кэшируется на диск: {e}")
             except Exception as e:
                 self._logger.error(f"Ошибка сохранения модели в кэш: {e}")
 
@@ -376,15 +396,13 @@ class AIModelHub:
                 if total_size <= max_bytes * 0.8:  # Оставить 20% запаса
                     break
 
-                cache_path = self.cache_dir / f"{cache_key}.pt"
-                if cache_path.exists():
-                    try:
-                        cache_path.unlink()
-                        total_size -= info["size_bytes"]
-                        del self.cache_index["models"][cache_key]
-                        self._logger.info(f"Удален кэш модели {info['model_id']} для освобождения места")
-                    except Exception as e:
-                        self._logger.warning(f"Ошибка удаления кэша {cache_key}: {e}")
+                try:
+                    self.model_cache.remove(cache_key)
+                    total_size -= info["size_bytes"]
+                    del self.cache_index["models"][cache_key]
+                    self._logger.info(f"Удален кэш модели {info['model_id']} для освобождения места")
+                except Exception as e:
+                    self._logger.warning(f"Ошибка удаления кэша {cache_key}: {e}")
 
             self.cache_index["total_size_mb"] = total_size / (1024 ** 2)
 
@@ -0,0 +1,243 @@
+"""
+Сервер микро-батчинга инференса локальных моделей.
+
+Сервисы вызывают модели по одному входу за раз, и локальные
+transformers-пайплайны не получают выигрыша от батчей. Сервер собирает
+конкурентные запросы к одной модели в динамические микро-батчи:
+
+- батч отправляется, как только набрано max_batch_size входов или с момента
+  первого запроса прошло max_wait_ms миллисекунд;
+- пока модель считает один батч, новые запросы копятся в очереди и уходят
+  следующим батчем, поэтому под нагрузкой батчи растут сами;
+- инференс выполняется в выделенном пуле потоков (или процессов), event loop
+  не блокируется; результаты возвращаются ожидающим вызовам по порядку входов;
+- одновременно у модели считается не больше одного батча (экземпляр модели
+  не обязан быть потокобезопасным).
+
+Для пула процессов функция батча должна сериализоваться pickle (функция
+уровня модуля), а модель — загружаться в дочернем процессе (initializer пула).
+
+Пример:
+    server = get_inference_server()
+    server.register_pipeline("sentiment:roberta", sentiment_pipeline)
+    prediction = await server.infer("sentiment:roberta", "Great job, thanks!")
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+BatchFn = Callable[[List[Any]], List[Any]]
+
+
+def _percentile(values: Deque[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class _ModelBatcher:
+    """Очередь запросов и цикл формирования батчей одной модели"""
+
+    def __init__(self, model_id: str, batch_fn: BatchFn, executor: Executor,
+                 max_batch_size: int, max_wait_ms: float, latency_window: int = 1000):
+        self.model_id = model_id
+        self.batch_fn = batch_fn
+        self.executor = executor
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000
+
+        # Очередь и цикл привязаны к event loop первого запроса
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+        self.stats = {"requests": 0, "batches": 0, "errors": 0}
+        self._batch_sizes: Counter = Counter()
+        self._queue_latency: Deque[float] = deque(maxlen=latency_window)
+        self._inference_latency: Deque[float] = deque(maxlen=latency_window)
+
+    def _ensure_worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run(), name=f"InferenceBatcher:{self.model_id}")
+
+    async def submit(self, item: Any) -> Any:
+        self._ensure_worker()
+        future = self._loop.create_future()
+        self._queue.put_nowait((item, future, time.monotonic()))
+        self.stats["requests"] += 1
+        return await future
+
+    async def _collect(self) -> List[Tuple[Any, asyncio.Future, float]]:
+        """Первый запрос ждется без ограничения, остальные — до max_wait от него"""
+        batch = [await self._queue.get()]
+        deadline = self._loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            timeout = deadline - self._loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        # Вызовы, отмененные во время ожидания, в батч не попадают
+        return [entry for entry in batch if not entry[1].done()]
+
+    async def _run(self) -> None:
+        try:
+            while True:
+                batch = await self._collect()
+                if batch:
+                    await self._execute(batch)
+        except asyncio.CancelledError:
+            while self._queue is not None and not self._queue.empty():
+                _, future, _ = self._queue.get_nowait()
+                if not future.done():
+                    future.set_exception(RuntimeError(f"Inference batcher for {self.model_id} is closed"))
+            raise
+
+    async def _execute(self, batch: List[Tuple[Any, asyncio.Future, float]]) -> None:
+        started = time.monotonic()
+        inputs = [item for item, _, _ in batch]
+        try:
+            outputs = await self._loop.run_in_executor(self.executor, self.batch_fn, inputs)
+            outputs = list(outputs)
+            if len(outputs) != len(inputs):
+                raise RuntimeError(f"Model {self.model_id} returned {len(outputs)} outputs for {len(inputs)} inputs")
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Ошибка батча модели {self.model_id} ({len(inputs)} входов): {e}")
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        finished = time.monotonic()
+        self.stats["batches"] += 1
+        self._batch_sizes[len(batch)] += 1
+        self._inference_latency.append(finished - started)
+        for (_, future, enqueued_at), output in zip(batch, outputs):
+            self._queue_latency.append(started - enqueued_at)
+            if not future.done():
+                future.set_result(output)
+
+    async def close(self) -> None:
+        if self._worker is not None and not self._worker.done():
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        self._worker = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        batches = self.stats["batches"]
+        items = sum(size * count for size, count in self._batch_sizes.items())
+        return {
+            **self.stats,
+            "avg_batch_size": round(items / batches, 2) if batches else 0.0,
+            "batch_sizes": dict(sorted(self._batch_sizes.items())),
+            "queue_ms": {
+                "avg": round(sum(self._queue_latency) / len(self._queue_latency) * 1000, 2) if self._queue_latency else 0.0,
+                "p95": round(_percentile(self._queue_latency, 0.95) * 1000, 2),
+            },
+            "inference_ms": {
+                "avg": round(sum(self._inference_latency) / len(self._inference_latency) * 1000, 2) if self._inference_latency else 0.0,
+                "p95": round(_percentile(self._inference_latency, 0.95) * 1000, 2),
+            },
+        }
+
+
+class BatchInferenceServer:
+    """Микро-батчинг запросов к локальным моделям с инференсом вне event loop"""
+
+    def __init__(self,
+                 max_batch_size: int = 32,
+                 max_wait_ms: float = 5.0,
+                 max_workers: int = 2,
+                 executor: Optional[Executor] = None):
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._owns_executor = executor is None
+        self.executor = executor or ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="inference")
+        self._batchers: Dict[str, _ModelBatcher] = {}
+
+    def register(self,
+                 model_id: str,
+                 batch_fn: BatchFn,
+                 max_batch_size: Optional[int] = None,
+                 max_wait_ms: Optional[float] = None) -> None:
+        """
+        Регистрация модели. batch_fn получает список входов и возвращает список
+        результатов той же длины. Повторная регистрация заменяет функцию.
+        """
+        previous = self._batchers.get(model_id)
+        if previous is not None and previous._worker is not None:
+            previous._worker.cancel()
+        self._batchers[model_id] = _ModelBatcher(
+            model_id, batch_fn, self.executor,
+            max_batch_size or self.max_batch_size,
+            self.max_wait_ms if max_wait_ms is None else max_wait_ms,
+        )
+
+    def register_pipeline(self, model_id: str, pipeline: Callable, max_batch_size: Optional[int] = None,
+                          max_wait_ms: Optional[float] = None, **call_kwargs) -> None:
+        """Регистрация transformers-пайплайна: батч передается списком за один вызов"""
+        def batch_fn(inputs: List[Any]) -> List[Any]:
+            return pipeline(inputs, batch_size=len(inputs), **call_kwargs)
+
+        self.register(model_id, batch_fn, max_batch_size, max_wait_ms)
+
+    def is_registered(self, model_id: str) -> bool:
+        return model_id in self._batchers
+
+    async def infer(self, model_id: str, item: Any) -> Any:
+        batcher = self._batchers.get(model_id)
+        if batcher is None:
+            raise KeyError(f"Модель {model_id} не зарегистрирована на сервере инференса")
+        return await batcher.submit(item)
+
+    async def infer_many(self, model_id: str, items: List[Any]) -> List[Any]:
+        return list(await asyncio.gather(*(self.infer(model_id, item) for item in items)))
+
+    async def unregister(self, model_id: str) -> None:
+        batcher = self._batchers.pop(model_id, None)
+        if batcher is not None:
+            await batcher.close()
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {model_id: batcher.get_stats() for model_id, batcher in self._batchers.items()}
+
+    async def close(self) -> None:
+        for batcher in self._batchers.values():
+            await batcher.close()
+        if self._owns_executor:
+            self.executor.shutdown(wait=False)
+
+
+_server: Optional[BatchInferenceServer] = None
+_server_lock = threading.Lock()
+
+
+def get_inference_server() -> BatchInferenceServer:
+    """Общий сервер инференса процесса"""
+    global _server
+    if _server is None:
+        with _server_lock:
+            if _server is None:
+                _server = BatchInferenceServer()
+    return _server
@@ -14,13 +14,15 @@ Intelligent Model Manager — центральный компонент упра
 import asyncio
 import logging
 import time
-from typing import Dict, Any, Optional, Union, List
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Any, Optional, Union, List
 from pathlib import Path
 
 from core.config.unified_config_manager import UnifiedConfigManager
 from core.performance.intelligent_cache_system import IntelligentCacheSystem
 from core.performance.memory_optimizer import MemoryOptimizer
 from core.ai_management.model_registry import ModelRegistry
+from core.ai_management.model_residency_manager import ModelResidencyManager, get_residency_manager, model_residency_key
 from core.security.advanced_crypto_system import AdvancedCryptoSystem
 from core.monitoring.metrics_collector import MetricsCollector
 
@@ -33,21 +35,26 @@ class IntelligentModelManager:
     """
     Управляет всеми AI-моделями в системе.
     Работает как фабрика + пул + монитор.
+    Бюджет памяти и вытеснение — общие с другими загрузчиками (ModelResidencyManager).
     """
 
+    RESIDENCY_OWNER = "intelligent_model_manager"
+
     def __init__(
         self,
         config: UnifiedConfigManager,
         crypto: AdvancedCryptoSystem,
         cache: Optional[IntelligentCacheSystem] = None,
         memory_optimizer: Optional[MemoryOptimizer] = None,
-        metrics_collector: Optional[MetricsCollector] = None
+        metrics_collector: Optional[MetricsCollector] = None,
+        residency: Optional[ModelResidencyManager] = None
     ):
         self.config = config
         self.crypto = crypto
         self.cache = cache or IntelligentCacheSystem(config)
         self.memory_optimizer = memory_optimizer or MemoryOptimizer(config)
         self.metrics = metrics_collector or MetricsCollector()
+        self.residency = residency or get_residency_manager()
         self.logger = logging.getLogger("IntelligentModelManager")
 
         # Внутренние структуры
@@ -55,6 +62,7 @@ class IntelligentModelManager:
         self._model_load_times: Dict[ModelType, float] = {}
         self._model_usage_count: Dict[ModelType, int] = {}
         self._model_last_used: Dict[ModelType, float] = {}
+        self._residency_keys: Dict[ModelType, str] = {}
 
         # Регистр моделей (содержит метаданные: источник, тип, требования)
         self.registry = ModelRegistry(config)
@@ -94,6 +102,7 @@ class IntelligentModelManager:
         cached = self.cache.get(f"model:{model_name}")
         if cached and not self._is_model_stale(model_name):
             self._update_usage_stats(model_name)
+            self.residency.touch(self._residency_key(model_name))
             self.metrics.increment("ai.model.cache_hit", tags={"model": model_name})
             return cached
 
@@ -104,9 +113,25 @@ class IntelligentModelManager:
         instance = self._loaded_models[model_name]
         self.cache.set(f"model:{model_name}", instance, ttl=3600)  # кэш на 1 час
         self._update_usage_stats(model_name)
+        self.residency.touch(self._residency_key(model_name))
         self.metrics.increment("ai.model.load", tags={"model": model_name})
         return instance
 
+    @asynccontextmanager
+    async def use_model(self, model_name: ModelType) -> AsyncIterator[ModelInstance]:
+        """
+        Модель, закреплённая на время запроса: пока блок выполняется,
+        менеджер резидентности её не вытесняет.
+        """
+        instance = await self.get_model(model_name)
+        key = self._residency_key(model_name)
+        pinned = self.residency.acquire(key) is not None
+        try:
+            yield instance
+        finally:
+            if pinned:
+                self.residency.release(key)
+
     async def _load_model(self, model_name: ModelType) -> None:
         """Загружает модель с учётом типа (локальная / API / плагин)."""
         self.logger.info(f"📥 Loading model: {model_name}")
@@ -115,15 +140,26 @@ class IntelligentModelManager:
         if not model_info:
             raise ValueError(f"Unknown model: {model_name}")
 
-        # Проверка доступности ресурсов
-        required_memory = model_info.get("memory_mb", 1024)
-        if not self.memory_optimizer.can_allocate(required_memory):
-            # Выгружаем наименее используемую модель
-            await self._evict_least_used_model()
+        provider = model_info.get("provider", "local")
+        key = self._residency_key(model_name)
+        on_evict = lambda model: self._release_model(model_name, model)
+        if provider == "local":
+            # Модель уже загружена другим экземпляром менеджера под тем же ключом
+            resident = self.residency.get(key, owner=self.RESIDENCY_OWNER, on_evict=on_evict)
+            if resident is not None:
+                self._loaded_models[model_name] = resident
+                self._model_load_times[model_name] = 0.0
+                self.logger.info(f"♻️ Model '{model_name}' shared from residency manager")
+                return
+
+            # Освобождение общего бюджета памяти: размер с прошлой загрузки или из реестра
+            ram_bytes, vram_bytes = self.residency.known_footprint(key)
+            if not (ram_bytes or vram_bytes):
+                ram_bytes = model_info.get("memory_mb", 1024) * 1024 ** 2
+            self.residency.reserve(ram_bytes, vram_bytes)
 
         try:
             start_time = time.time()
-            provider = model_info.get("provider", "local")
             model_path = model_info.get("path")
             api_key = None
 
@@ -142,7 +178,8 @@ class IntelligentModelManager:
                 if not model_path.exists():
                     raise FileNotFoundError(f"Model path not found: {model_path}")
                 # Используем sandboxed loader
-                instance = await self._load_local_model_safely(model_path, model_name)
+                with self.residency.measure() as measured:
+                    instance = await self._load_local_model_safely(model_path, model_name)
             else:
                 # Поддержка плагинов
                 plugin_class = self._load_plugin_model(provider, model_name)
@@ -150,6 +187,9 @@ class IntelligentModelManager:
 
             self._loaded_models[model_name] = instance
             self._model_load_times[model_name] = time.time() - start_time
+            if provider == "local":
+                self.residency.admit(key, instance, self._model_load_times[model_name], owner=self.RESIDENCY_OWNER,
+                                     on_evict=on_evict, measured=measured)
             self.logger.info(f"✅ Model '{model_name}' loaded in {self._model_load_times[model_name]:.2f}s")
 
         except Exception as e:
@@ -193,22 +233,32 @@ class IntelligentModelManager:
         self._model_usage_count[model_name] = self._model_usage_count.get(model_name, 0) + 1
         self._model_last_used[model_name] = time.time()
 
-    async def _evict_least_used_model(self) -> None:
-        """Выгружает наименее используемую модель для освобождения памяти."""
-        if not self._loaded_models:
+    def _residency_key(self, model_name: ModelType) -> str:
+        """Ключ резидентности по пути, загрузчику и квантованию модели из реестра"""
+        key = self._residency_keys.get(model_name)
+        if key is None:
+            model_info = self.registry.get_model_info(model_name) or {}
+            # Вид объекта определяется загрузчиком, выбранным в _load_local_model_safely
+            loader = "WhisperModelLoader" if "whisper" in model_name else "TransformerModelLoader"
+            key = self._residency_keys[model_name] = model_residency_key(
+                str(model_info.get("path") or model_name), loader, model_info.get("quantization", "none"))
+        return key
+
+    def _release_model(self, model_name: ModelType, instance: ModelInstance) -> None:
+        """Освобождение модели, вытесненной менеджером резидентности (может вызываться из другого потока)"""
+        if self._loaded_models.get(model_name) is not instance:
             return
+        self._loaded_models.pop(model_name, None)
+        self.cache.delete(f"model:{model_name}")
 
-        # Находим модель с минимальным usage и максимальным временем бездействия
-        candidate = min(
-            self._loaded_models.keys(),
-            key=lambda m: (
-                self._model_usage_count.get(m, 0),
-                -self._model_last_used.get(m, 0)  # чем старше — тем приоритетнее выгрузка
-            )
-        )
+        if hasattr(instance, "cleanup"):
+            try:
+                asyncio.get_running_loop().create_task(instance.cleanup())
+            except RuntimeError:
+                self.logger.debug(f"Cleanup модели '{model_name}' пропущен: нет активного event loop")
 
-        self.logger.info(f"📤 Evicting least-used model: {candidate}")
-        await self.unload_model(candidate)
+        self.logger.info(f"📤 Model '{model_name}' evicted by residency manager")
+        self.metrics.increment("ai.model.evicted", tags={"model": model_name})
 
     async def unload_model(self, model_name: ModelType) -> None:
         """Выгружает модель из памяти и очищает кэш."""
@@ -217,6 +267,8 @@ class IntelligentModelManager:
 
         instance = self._loaded_models.pop(model_name)
         self.cache.delete(f"model:{model_name}")
+        # Остальные загрузчики, использующие модель, тоже отпускают ее
+        self.residency.evict(self._residency_key(model_name), reason="unload")
 
         # Вызываем cleanup, если поддерживается
         if hasattr(instance, "cleanup"):
@@ -246,4 +298,7 @@ class IntelligentModelManager:
             "usage_counts": self._model_usage_count,
             "last_used_timestamps": self._model_last_used,
             "memory_usage_mb": self.memory_optimizer.get_current_usage(),
+            "resident_models": [
+                row for row in self.residency.get_dashboard()["models"] if row["owner"] == self.RESIDENCY_OWNER
+            ],
         }
\ No newline at end of file
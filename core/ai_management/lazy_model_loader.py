@@ -1,17 +1,28 @@
 """
 Ленивая загрузка моделей ИИ с приоритизацией по частоте использования
 и адаптивным кэшированием на диск для экономии памяти.
+
+Загрузка не блокирует другие модели: чтение уже загруженной модели идет
+без блокировки, а загрузка выполняется по принципу single-flight — на каждую
+модель заводится future, и все параллельные вызовы ждут одну загрузку.
+Для асинхронного кода есть aload_model() (загрузка в фоновом пуле потоков)
+и предзагрузка prefetch()/prefetch_for_phase(): модели, которые загружались
+во время фазы задачи (TaskPhase), запоминаются и прогреваются заранее, когда
+задача переходит в эту фазу.
 """
 
+import asyncio
+import contextvars
 import json
 import os
 import time
 import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, Any, Optional, List, Tuple
+from typing import Dict, Any, Iterator, Optional, List, Tuple
 from datetime import datetime, timedelta
 import hashlib
-import pickle
 import gc
 
 import torch
@@ -19,7 +30,15 @@ import psutil
 from transformers import AutoModel, AutoTokenizer, pipeline
 from sentence_transformers import SentenceTransformer
 
-from core.security.encryption_engine import EncryptionEngine
+from core.ai_management.mmap_model_cache import MmapModelCache, UnsupportedModelError, encryption_key_from_settings
+from core.ai_management.model_residency_manager import ModelResidencyManager, get_residency_manager, model_residency_key
+from core.ai_management.onnx_backend import OnnxModelBackend, get_onnx_backend
+
+# Фаза задачи, в рамках которой выполняется загрузка (значение TaskPhase);
+# устанавливается менеджером жизненного цикла задач
+current_task_phase: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar(
+    "current_task_phase", default=None
+)
 
 
 class LazyModelLoader:
@@ -29,12 +48,25 @@ class LazyModelLoader:
     - Адаптивного кэширования на диск
     - Автоматической выгрузки редкоиспользуемых моделей
     - Гибридной загрузки (локально/облачно)
+    - Параллельной загрузки разных моделей (single-flight на модель)
+    - Предзагрузки моделей для следующих фаз задач
+    - Общего с другими загрузчиками бюджета памяти (ModelResidencyManager)
     """
 
+    RESIDENCY_OWNER = "lazy_model_loader"
+
+    _instance: Optional["LazyModelLoader"] = None
+    _instance_lock = threading.Lock()
+
     def __init__(self,
                  cache_dir: str = "data/cache/models_lazy",
                  max_memory_percent: float = 70.0,
-                 eviction_threshold_percent: float = 85.0):
+                 eviction_threshold_percent: float = 85.0,
+                 loader_threads: int = 2,
+                 cache_encryption_key: Optional[bytes] = None,
+                 residency: Optional[ModelResidencyManager] = None,
+                 onnx_backend: Optional[OnnxModelBackend] = None,
+                 strategy_selector: Optional[Any] = None):
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(parents=True, exist_ok=True)
         self.max_memory_percent = max_memory_percent
@@ -42,13 +74,51 @@ class LazyModelLoader:
         self.loaded_models: Dict[str, Dict[str, Any]] = {}
         self.usage_stats: Dict[str, Dict[str, Any]] = {}  # model_id -> {last_used, usage_count, load_time}
         self.cache_index_path = self.cache_dir / "cache_index.json"
-        self.encryption_engine = EncryptionEngine()
+        # Учет памяти и вытеснение — общие для всех загрузчиков процесса
+        self.residency = residency or get_residency_manager()
+        # Веса в формате safetensors с отображением в память; шифрование
+        # кэша включается передачей 32-байтного ключа AES
+        self.model_cache = MmapModelCache(str(self.cache_dir), encryption_key=cache_encryption_key)
+        # CPU-инференс в ONNX Runtime (экспорт и int8-квантование кэшируются отдельно)
+        self.onnx_backend = onnx_backend or get_onnx_backend()
+        # Квантование по умолчанию выбирает StrategySelector (точность модели для задачи)
+        self.strategy_selector = strategy_selector
+        # Короткие критические секции (статистика, индекс кэша, выгрузка);
+        # сама загрузка модели под этой блокировкой не выполняется
         self._lock = threading.RLock()
+        # Загрузки в процессе: model_id -> future с моделью
+        self._loading: Dict[str, Future] = {}
+        self._loading_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=loader_threads, thread_name_prefix="model-loader")
         self._load_cache_index()
+        # Фаза задачи -> модели, загружавшиеся в этой фазе (параметры load_model)
+        self.phase_models: Dict[str, Dict[str, Dict[str, Any]]] = self.cache_index.setdefault("phase_models", {})
 
         # Запуск фонового монитора памяти
         self._start_memory_monitor()
 
+    @classmethod
+    def get_instance(cls, config_path: str = "config/ai_config.json") -> "LazyModelLoader":
+        """
+        Общий загрузчик процесса: single-flight работает только внутри одного
+        экземпляра. Ключ шифрования дискового кэша берется из настроек
+        caching.model_disk_cache (config_path учитывается при первом вызове).
+        """
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls(cache_encryption_key=cls._configured_encryption_key(config_path))
+        return cls._instance
+
+    @staticmethod
+    def _configured_encryption_key(config_path: str) -> Optional[bytes]:
+        try:
+            with open(config_path, 'r', encoding='utf-8') as f:
+                settings = json.load(f).get('caching', {}).get('model_disk_cache', {})
+        except FileNotFoundError:
+            settings = {}
+        return encryption_key_from_settings(settings)
+
     def _load_cache_index(self):
         """Загрузка индекса кэша с диска"""
         if self.cache_index_path.exists():
@@ -70,77 +140,257 @@ class LazyModelLoader:
                   model_id: str,
                   model_path: str,
                   task_type: str,
-                  quantization: str = "none",
+                  quantization: Optional[str] = None,
                   provider: str = "local",
                   force_reload: bool = False) -> Any:
         """
         Ленивая загрузка модели с автоматическим управлением памятью.
+        Уже загруженная модель возвращается без блокировок; параллельные
+        вызовы для одной модели ждут одну загрузку, загрузки разных моделей
+        друг друга не блокируют.
 
         Args:
             model_id: Уникальный идентификатор модели
             model_path: Путь к модели (локальный или Hugging Face ID)
             task_type: Тип задачи (для выбора правильного пайплайна)
-            quantization: Уровень квантования ('none', 'int8', 'int4', 'fp16')
+            quantization: Уровень квантования ('none', 'int8', 'int4', 'fp16', 'onnx');
+                на CPU 'int8' и 'onnx' для перевода, эмбеддингов, тональности
+                и классификации исполняются в ONNX Runtime (int8 / fp32);
+                по умолчанию — default_quantization(task_type)
             provider: Провайдер ('local', 'cloud', 'hybrid')
             force_reload: Принудительная перезагрузка даже если модель уже загружена
 
         Returns:
             Загруженная модель или пайплайн
         """
-        with self._lock:
-            # Проверка наличия в памяти
-            if model_id in self.loaded_models and not force_reload:
-                self._update_usage_stats(model_id)
-                return self.loaded_models[model_id]['model']
+        started = time.perf_counter()
+        if quantization is None:
+            quantization = self.default_quantization(task_type)
+        spec = {"model_path": model_path, "task_type": task_type, "quantization": quantization, "provider": provider}
+        self._remember_phase_model(model_id, spec)
+
+        # Проверка наличия в памяти (без блокировки)
+        if not force_reload:
+            entry = self.loaded_models.get(model_id)
+            if entry is not None:
+                self.residency.touch(entry['residency_key'])
+                self._update_usage_stats(model_id, hit_time=time.perf_counter() - started)
+                return entry['model']
+
+        future, owner = self._claim_load(model_id, force_reload)
+        if not owner:
+            # Модель уже загружается другим вызовом — ждем его результат
+            model = future.result()
+            with self._lock:
+                self.usage_stats.setdefault(model_id, self._new_usage_stats())['single_flight_waits'] += 1
+            return model
+
+        try:
+            model = self._load_uncached(model_id, spec, force_reload)
+            future.set_result(model)
+            return model
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._loading_lock:
+                self._loading.pop(model_id, None)
+
+    def _claim_load(self, model_id: str, force_reload: bool) -> Tuple[Future, bool]:
+        """Future загрузки модели; второй элемент — True, если загружать должен вызывающий"""
+        with self._loading_lock:
+            future = self._loading.get(model_id)
+            if future is not None:
+                return future, False
+            entry = self.loaded_models.get(model_id)
+            if entry is not None and not force_reload:
+                # Модель загрузилась, пока вызывающий шел к блокировке
+                future = Future()
+                future.set_result(entry['model'])
+                return future, False
+            future = self._loading[model_id] = Future()
+            return future, True
+
+    def _load_uncached(self, model_id: str, spec: Dict[str, Any], force_reload: bool = False) -> Any:
+        """Загрузка модели из дискового кэша или источника (выполняет один поток на модель)"""
+        key = self.residency_key(spec["model_path"], spec["task_type"], spec["quantization"])
+        on_evict = self._evict_handler(model_id)
+        if not force_reload:
+            # Модель уже загружена другим загрузчиком процесса
+            model = self.residency.get(key, owner=self.RESIDENCY_OWNER, on_evict=on_evict)
+            if model is not None:
+                self._store_loaded(model_id, model, spec, key, load_time=0.0, source="resident")
+                self._update_usage_stats(model_id, first_load=True)
+                self._log(f"Модель {model_id} уже резидентна, повторная загрузка не требуется")
+                return model
 
-            # Проверка доступности памяти и выгрузка редкоиспользуемых моделей при необходимости
-            self._ensure_memory_available()
+        # Освобождение бюджета памяти под модель (по размеру с прошлой загрузки)
+        self._ensure_memory_available(key)
 
-            # Попытка загрузки из кэша на диске
+        start_time = time.time()
+        model = None
+        source = "disk_cache"
+        with self.residency.measure() as measured:
             if not force_reload:
-                cached_model = self._load_from_disk_cache(model_id)
-                if cached_model:
-                    self.loaded_models[model_id] = {
-                        'model': cached_model,
-                        'loaded_at': datetime.now(),
-                        'task_type': task_type,
-                        'quantization': quantization,
-                        'provider': provider
-                    }
-                    self._update_usage_stats(model_id)
-                    self._log(f"Модель {model_id} загружена из дискового кэша")
-                    return cached_model
+                model = self._load_from_disk_cache(model_id)
 
-            # Загрузка с нуля
-            self._log(f"Загрузка модели {model_id} из источника (квантизация: {quantization})")
-            start_time = time.time()
+            if model is None:
+                # Загрузка с нуля
+                source = "source"
+                self._log(f"Загрузка модели {model_id} из источника (квантизация: {spec['quantization']})")
+                try:
+                    model = self._load_model_from_source(spec["model_path"], spec["task_type"],
+                                                         spec["quantization"], spec["provider"])
+                except Exception as e:
+                    self._log(f"Ошибка загрузки модели {model_id}: {e}", level='ERROR')
+                    raise
+        load_time = time.time() - start_time
 
-            try:
-                model = self._load_model_from_source(model_path, task_type, quantization, provider)
-                load_time = time.time() - start_time
-
-                # Сохранение в памяти
-                self.loaded_models[model_id] = {
-                    'model': model,
-                    'loaded_at': datetime.now(),
-                    'task_type': task_type,
-                    'quantization': quantization,
-                    'provider': provider,
-                    'load_time_seconds': load_time
-                }
-
-                # Обновление статистики
-                self._update_usage_stats(model_id, first_load=True, load_time=load_time)
-
-                # Асинхронное сохранение в дисковый кэш
-                self._cache_to_disk_async(model_id, model, quantization)
-
-                self._log(f"Модель {model_id} успешно загружена за {load_time:.2f} сек")
-                return model
+        self._store_loaded(model_id, model, spec, key, load_time, source)
+        self.residency.admit(key, model, load_time_sec=load_time, owner=self.RESIDENCY_OWNER,
+                             on_evict=on_evict, measured=measured)
+
+        # Обновление статистики
+        self._update_usage_stats(model_id, first_load=True, load_time=load_time)
+
+        if source == "source":
+            # Асинхронное сохранение в дисковый кэш
+            self._cache_to_disk_async(model_id, model, spec["quantization"])
+            self._log(f"Модель {model_id} успешно загружена за {load_time:.2f} сек")
+        else:
+            self._log(f"Модель {model_id} загружена из дискового кэша за {load_time:.2f} сек")
+        return model
+
+    def _store_loaded(self, model_id: str, model: Any, spec: Dict[str, Any], key: str,
+                      load_time: float, source: str) -> None:
+        """Сохранение в памяти (запись под блокировкой: выгрузка перебирает словарь)"""
+        with self._lock:
+            self.loaded_models[model_id] = {
+                'model': model,
+                'loaded_at': datetime.now(),
+                'task_type': spec["task_type"],
+                'quantization': spec["quantization"],
+                'provider': spec["provider"],
+                'load_time_seconds': load_time,
+                'source': source,
+                'residency_key': key
+            }
+
+    @staticmethod
+    def residency_key(model_path: str, task_type: str, quantization: str = "none") -> str:
+        """Ключ модели в менеджере резидентности (общий для загрузчиков одинаковых пайплайнов)"""
+        return model_residency_key(model_path, task_type, quantization)
+
+    def default_quantization(self, task_type: str) -> str:
+        """Квантование, выбранное StrategySelector для задачи; 'none' без селектора"""
+        if self.strategy_selector is None:
+            return "none"
+        try:
+            return self.strategy_selector.select_model_quantization(task_type)
+        except Exception as e:
+            self._log(f"Квантование для {task_type} не выбрано, загрузка без квантования: {e}", level='WARNING')
+            return "none"
+
+    @contextmanager
+    def use_model(self,
+                  model_id: str,
+                  model_path: str,
+                  task_type: str,
+                  quantization: Optional[str] = None,
+                  provider: str = "local") -> Iterator[Any]:
+        """
+        Модель, закрепленная на время запроса: пока блок выполняется,
+        менеджер резидентности ее не вытесняет.
+        """
+        if quantization is None:
+            quantization = self.default_quantization(task_type)
+        key = self.residency_key(model_path, task_type, quantization)
+        while True:
+            model = self.load_model(model_id, model_path, task_type, quantization, provider)
+            if self.residency.acquire(key) is not None:
+                break
+            # Модель вытеснили между загрузкой и закреплением — загружаем снова
+        try:
+            yield model
+        finally:
+            self.residency.release(key)
+
+    async def aload_model(self,
+                          model_id: str,
+                          model_path: str,
+                          task_type: str,
+                          quantization: Optional[str] = None,
+                          provider: str = "local") -> Any:
+        """
+        Асинхронная загрузка: загруженная модель возвращается сразу, иначе загрузка
+        идет в фоновом пуле потоков и event loop не блокируется.
+        """
+        started = time.perf_counter()
+        if quantization is None:
+            quantization = self.default_quantization(task_type)
+        entry = self.loaded_models.get(model_id)
+        if entry is not None:
+            self.residency.touch(entry['residency_key'])
+            self._remember_phase_model(model_id, {"model_path": model_path, "task_type": task_type,
+                                                  "quantization": quantization, "provider": provider})
+            self._update_usage_stats(model_id, hit_time=time.perf_counter() - started)
+            return entry['model']
+
+        in_flight = self._loading.get(model_id)
+        if in_flight is not None:
+            return await asyncio.wrap_future(in_flight)
+
+        # Контекст (фаза задачи) передается в поток загрузки
+        context = contextvars.copy_context()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor,
+            lambda: context.run(self.load_model, model_id, model_path, task_type, quantization, provider)
+        )
+
+    def prefetch(self, models: Dict[str, Dict[str, Any]]) -> List[Future]:
+        """
+        Фоновая загрузка моделей, которые скоро понадобятся.
+
+        Args:
+            models: model_id -> параметры load_model (model_path, task_type, quantization, provider)
+
+        Returns:
+            Futures запущенных загрузок (уже загруженные модели пропускаются)
+        """
+        futures = []
+        for model_id, spec in models.items():
+            if model_id in self.loaded_models or model_id in self._loading:
+                continue
+            futures.append(self._executor.submit(self._prefetch_one, model_id, dict(spec)))
+        return futures
+
+    def _prefetch_one(self, model_id: str, spec: Dict[str, Any]) -> Any:
+        try:
+            model = self.load_model(model_id, **spec)
+            with self._lock:
+                self.usage_stats[model_id]['prefetched'] += 1
+            return model
+        except Exception as e:
+            self._log(f"Предзагрузка модели {model_id} не удалась: {e}", level='WARNING')
+            return None
 
+    def prefetch_for_phase(self, phase: Any) -> List[Future]:
+        """Предзагрузка моделей, которые использовались в фазе задачи (TaskPhase или ее значение)"""
+        phase = getattr(phase, "value", phase)
+        return self.prefetch(dict(self.phase_models.get(phase, {})))
+
+    def _remember_phase_model(self, model_id: str, spec: Dict[str, Any]) -> None:
+        """Запоминает модель за текущей фазой задачи для последующей предзагрузки"""
+        phase = current_task_phase.get()
+        if phase is None or self.phase_models.get(phase, {}).get(model_id) == spec:
+            return
+        with self._lock:
+            self.phase_models.setdefault(phase, {})[model_id] = spec
+            try:
+                self._save_cache_index()
             except Exception as e:
-                self._log(f"Ошибка загрузки модели {model_id}: {e}", level='ERROR')
-                raise
+                self._log(f"Ошибка сохранения индекса кэша: {e}", level='WARNING')
 
     def _load_model_from_source(self,
                               model_path: str,
@@ -150,6 +400,13 @@ class LazyModelLoader:
         """Загрузка модели из исходного источника с применением квантования"""
         device = "cuda" if torch.cuda.is_available() else "cpu"
 
+        if device == "cpu" and quantization in ("int8", "onnx") and self.onnx_backend.supports(task_type):
+            # bitsandbytes работает только с CUDA; на CPU int8 — ONNX Runtime
+            try:
+                return self.onnx_backend.load(model_path, task_type, quantize=quantization == "int8")
+            except Exception as e:
+                self._log(f"ONNX-бэкенд недоступен для {model_path}, загрузка в PyTorch: {e}", level='WARNING')
+
         # Определение типа модели по задаче
         if task_type == "text_generation":
             if quantization == "int8":
@@ -170,6 +427,12 @@ class LazyModelLoader:
         elif task_type == "embeddings":
             return SentenceTransformer(model_path, device=device)
 
+        elif task_type == "sentiment":
+            return pipeline("sentiment-analysis", model=model_path, device=0 if device == "cuda" else -1)
+
+        elif task_type == "classification":
+            return pipeline("text-classification", model=model_path, device=0 if device == "cuda" else -1)
+
         elif task_type == "speech_to_text":
             return pipeline("automatic-speech-recognition", model=model_path, device=0 if device == "cuda" else -1)
 
@@ -177,11 +440,9 @@ class LazyModelLoader:
             raise ValueError(f"Неизвестный тип задачи: {task_type}")
 
     def _load_from_disk_cache(self, model_id: str) -> Optional[Any]:
-        """Загрузка модели из дискового кэша"""
+        """Загрузка модели из дискового кэша (веса отображаются в память)"""
         cache_key = self._generate_cache_key(model_id)
-        cache_file = self.cache_dir / f"{cache_key}.pkl.enc"
-
-        if not cache_file.exists():
+        if not self.model_cache.contains(cache_key):
             return None
 
         # Проверка актуальности кэша (TTL 24 часа)
@@ -195,39 +456,22 @@ class LazyModelLoader:
             return None
 
         try:
-            # Загрузка и расшифровка
-            encrypted_data = cache_file.read_bytes()
-            decrypted_data = self.encryption_engine.decrypt(encrypted_data)
-
-            # Десериализация
-            model_data = pickle.loads(decrypted_data)
-
-            # Восстановление модели из сериализованных данных
-            model = self._reconstruct_model_from_cache(model_data)
-
-            self._log(f"Модель {model_id} успешно загружена из дискового кэша")
+            model = self.model_cache.load(cache_key)
+            if model is not None:
+                self._log(f"Модель {model_id} успешно загружена из дискового кэша")
             return model
 
         except Exception as e:
             self._log(f"Ошибка загрузки из дискового кэша: {e}", level='WARNING')
             # Удаление поврежденного кэша
-            try:
-                cache_file.unlink()
-                self.cache_index["models"].pop(cache_key, None)
+            with self._lock:
+                self.model_cache.remove(cache_key)
+                removed = self.cache_index["models"].pop(cache_key, None)
+                if removed:
+                    self.cache_index["total_size_bytes"] -= removed.get("size_bytes", 0)
                 self._save_cache_index()
-            except:
-                pass
             return None
 
-    def _reconstruct_model_from_cache(self, model_ Dict[str, Any]) -> Any:
-        """Восстановление модели из сериализованных данных кэша"""
-        # Для простоты возвращаем данные как есть - в реальной реализации
-        # потребуется полная сериализация/десериализация модели
-        # В данном примере предполагается, что модель сохраняется через torch.save
-        import io
-        buffer = io.BytesIO(model_data['model_bytes'])
-        return torch.load(buffer, map_location='cpu')
-
     def _cache_to_disk_async(self, model_id: str, model: Any, quantization: str):
         """Асинхронное сохранение модели в дисковый кэш"""
         import threading
@@ -235,33 +479,18 @@ class LazyModelLoader:
         def _save_task():
             try:
                 cache_key = self._generate_cache_key(model_id)
-                cache_file = self.cache_dir / f"{cache_key}.pkl.enc"
-
-                # Сериализация модели
-                model_bytes = self._serialize_model(model)
-                cache_data = {
-                    'model_id': model_id,
-                    'quantization': quantization,
-                    'timestamp': datetime.now().isoformat(),
-                    'model_bytes': model_bytes
-                }
-
-                # Шифрование
-                serialized = pickle.dumps(cache_data)
-                encrypted = self.encryption_engine.encrypt(serialized)
-
-                # Сохранение на диск
-                cache_file.write_bytes(encrypted)
+                size = self.model_cache.store(cache_key, model, model_id)
 
                 # Обновление индекса
                 with self._lock:
+                    previous = self.cache_index["models"].get(cache_key, {})
                     self.cache_index["models"][cache_key] = {
                         "model_id": model_id,
                         "timestamp": datetime.now().isoformat(),
-                        "size_bytes": len(encrypted),
+                        "size_bytes": size,
                         "quantization": quantization
                     }
-                    self.cache_index["total_size_bytes"] += len(encrypted)
+                    self.cache_index["total_size_bytes"] += size - previous.get("size_bytes", 0)
                     self._save_cache_index()
 
                 self._log(f"Модель {model_id} сохранена в дисковый кэш")
@@ -269,93 +498,98 @@ class LazyModelLoader:
                 # Очистка старого кэша если превышен лимит (5 ГБ)
                 self._cleanup_old_cache(max_size_bytes=5 * 1024**3)
 
+            except UnsupportedModelError as e:
+                self._log(f"Модель {model_id} не кэшируется на диск: {e}", level='DEBUG')
             except Exception as e:
                 self._log(f"Ошибка сохранения в дисковый кэш: {e}", level='ERROR')
 
         threading.Thread(target=_save_task, daemon=True).start()
 
-    def _serialize_model(self, model: Any) -> bytes:
-        """Сериализация модели в байты"""
-        import io
-        buffer = io.BytesIO()
-        torch.save(model, buffer)
-        buffer.seek(0)
-        return buffer.read()
-
     def _generate_cache_key(self, model_id: str) -> str:
         """Генерация уникального ключа кэша"""
         # Включение версии для инвалидации кэша при обновлениях
-        version = "v1.0"
+        version = "v2.1"
         key_data = f"{model_id}:{version}"
         return hashlib.sha256(key_data.encode()).hexdigest()[:20]
 
-    def _update_usage_stats(self, model_id: str, first_load: bool = False, load_time: float = 0.0):
-        """Обновление статистики использования модели"""
+    @staticmethod
+    def _new_usage_stats() -> Dict[str, Any]:
         now = datetime.now()
+        return {
+            'last_used': now,
+            'usage_count': 0,
+            'total_load_time': 0.0,
+            'first_loaded': now,
+            'cold_loads': 0,
+            'cache_hits': 0,
+            'total_hit_time': 0.0,
+            'single_flight_waits': 0,
+            'prefetched': 0
+        }
 
-        if model_id not in self.usage_stats:
-            self.usage_stats[model_id] = {
-                'last_used': now,
-                'usage_count': 1,
-                'total_load_time': load_time if first_load else 0.0,
-                'first_loaded': now
-            }
-        else:
-            stats = self.usage_stats[model_id]
-            stats['last_used'] = now
+    def _update_usage_stats(self, model_id: str, first_load: bool = False, load_time: float = 0.0,
+                            hit_time: Optional[float] = None):
+        """Обновление статистики использования модели"""
+        with self._lock:
+            stats = self.usage_stats.get(model_id)
+            if stats is None:
+                stats = self.usage_stats[model_id] = self._new_usage_stats()
+            stats['last_used'] = datetime.now()
             stats['usage_count'] += 1
             if first_load:
+                stats['cold_loads'] += 1
                 stats['total_load_time'] += load_time
+            if hit_time is not None:
+                stats['cache_hits'] += 1
+                stats['total_hit_time'] += hit_time
 
-    def _ensure_memory_available(self):
-        """Обеспечение доступности памяти через выгрузку редкоиспользуемых моделей"""
-        mem = psutil.virtual_memory()
+    def _ensure_memory_available(self, key: Optional[str] = None):
+        """
+        Обеспечение доступности памяти: бюджет под модель освобождается общим
+        менеджером резидентности, при нехватке памяти системы вытесняются
+        модели с наименьшей ценностью удержания
+        """
+        if key is not None:
+            self.residency.reserve(*self.residency.known_footprint(key))
 
-        # Если память заполнена больше порога эвакуации - выгружаем модели
+        mem = psutil.virtual_memory()
         if mem.percent > self.eviction_threshold_percent:
             self._log(f"Память заполнена на {mem.percent}%, начинаем выгрузку моделей", level='WARNING')
+            excess = int((mem.percent - self.max_memory_percent) / 100 * mem.total)
+            freed = self.residency.relieve_pressure(excess)
+            self._log(f"Выгружено моделей на {freed / 1024**2:.0f} МБ для освобождения памяти")
 
-            # Сортировка моделей по частоте использования (редкоиспользуемые первыми)
-            sorted_models = sorted(
-                self.loaded_models.items(),
-                key=lambda x: self.usage_stats.get(x[0], {}).get('usage_count', 0)
-            )
-
-            # Выгрузка моделей пока память не освободится до безопасного уровня
-            for model_id, model_info in sorted_models:
-                if mem.percent <= self.max_memory_percent:
-                    break
-
-                # Выгрузка модели
-                self._unload_model(model_id)
-                self._log(f"Выгружена модель {model_id} для освобождения памяти")
-
-                # Обновление статистики памяти
-                mem = psutil.virtual_memory()
-
-    def _unload_model(self, model_id: str):
-        """Выгрузка модели из памяти с освобождением ресурсов"""
-        if model_id not in self.loaded_models:
-            return
+    def _evict_handler(self, model_id: str):
+        """Обработчик вытеснения модели менеджером резидентности"""
+        return lambda model: self._release_model(model_id, model)
 
-        model_info = self.loaded_models.pop(model_id)
-        model = model_info['model']
+    def _release_model(self, model_id: str, model: Any):
+        """Освобождение ссылки на вытесненную модель (если она не заменена новой загрузкой)"""
+        with self._lock:
+            entry = self.loaded_models.get(model_id)
+            if entry is None or entry['model'] is not model:
+                return
+            self.loaded_models.pop(model_id)
 
-        # Очистка ресурсов в зависимости от типа модели
+        # Перемещение весов на CPU, чтобы VRAM освободилась сразу
         if isinstance(model, torch.nn.Module):
-            model.cpu()  # Перемещение на CPU перед удалением
-            del model
+            model.cpu()
         elif hasattr(model, 'model') and isinstance(model.model, torch.nn.Module):
             model.model.cpu()
-            del model.model
-
-        # Принудительная сборка мусора
-        gc.collect()
-        if torch.cuda.is_available():
-            torch.cuda.empty_cache()
 
         self._log(f"Модель {model_id} выгружена из памяти")
 
+    def _unload_model(self, model_id: str):
+        """Выгрузка модели из памяти у всех загрузчиков с освобождением ресурсов"""
+        entry = self.loaded_models.get(model_id)
+        if entry is None:
+            return
+        if not self.residency.evict(entry['residency_key'], reason="unload"):
+            self._release_model(model_id, entry['model'])
+            gc.collect()
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+
     def _cleanup_old_cache(self, max_size_bytes: int):
         """Очистка старого кэша при превышении лимита размера"""
         if self.cache_index["total_size_bytes"] <= max_size_bytes:
@@ -373,16 +607,14 @@ class LazyModelLoader:
             if total_size <= max_size_bytes * 0.8:  # Оставить 20% запаса
                 break
 
-            cache_file = self.cache_dir / f"{cache_key}.pkl.enc"
-            if cache_file.exists():
-                try:
-                    size = cache_file.stat().st_size
-                    cache_file.unlink()
-                    total_size -= size
-                    self.cache_index["models"].pop(cache_key, None)
-                    self._log(f"Удален дисковый кэш {cache_info['model_id']} ({size / 1024**2:.2f} МБ)")
-                except Exception as e:
-                    self._log(f"Ошибка удаления кэша {cache_key}: {e}", level='WARNING')
+            try:
+                size = self.model_cache.size_bytes(cache_key)
+                self.model_cache.remove(cache_key)
+                total_size -= cache_info.get("size_bytes", size)
+                self.cache_index["models"].pop(cache_key, None)
+                self._log(f"Удален дисковый кэш {cache_info['model_id']} ({size / 1024**2:.2f} МБ)")
+            except Exception as e:
+                self._log(f"Ошибка удаления кэша {cache_key}: {e}", level='WARNING')
 
         self.cache_index["total_size_bytes"] = total_size
         self._save_cache_index()
@@ -398,8 +630,7 @@ class LazyModelLoader:
                 mem = psutil.virtual_memory()
                 if mem.percent > self.eviction_threshold_percent:
                     self._log(f"Монитор памяти: обнаружено высокое использование ({mem.percent}%)", level='WARNING')
-                    with self._lock:
-                        self._ensure_memory_available()
+                    self._ensure_memory_available()
 
         monitor_thread = threading.Thread(target=monitor_loop, daemon=True, name="MemoryMonitor")
         monitor_thread.start()
@@ -413,12 +644,33 @@ class LazyModelLoader:
             'in_memory': model_id in self.loaded_models,
             'usage_count': stats.get('usage_count', 0),
             'last_used': stats.get('last_used'),
-            'load_time_avg': stats.get('total_load_time', 0) / max(stats.get('usage_count', 1), 1),
+            'load_time_avg': stats.get('total_load_time', 0) / max(stats.get('cold_loads', 1), 1),
+            'cold_loads': stats.get('cold_loads', 0),
+            'cache_hits': stats.get('cache_hits', 0),
+            'cache_hit_time_avg_ms': stats.get('total_hit_time', 0) * 1000 / max(stats.get('cache_hits', 1), 1),
+            'single_flight_waits': stats.get('single_flight_waits', 0),
+            'prefetched': stats.get('prefetched', 0),
+            'loading': model_id in self._loading,
+            'load_source': loaded.get('source'),
             'quantization': loaded.get('quantization'),
             'provider': loaded.get('provider'),
             'in_disk_cache': self._generate_cache_key(model_id) in self.cache_index["models"]
         }
 
+    def get_load_report(self) -> Dict[str, Dict[str, float]]:
+        """Время холодной загрузки против попадания в память по всем моделям"""
+        report = {}
+        for model_id in list(self.usage_stats):
+            stats = self.get_model_stats(model_id)
+            report[model_id] = {
+                'cold_load_avg_sec': round(stats['load_time_avg'], 3),
+                'cache_hit_avg_ms': round(stats['cache_hit_time_avg_ms'], 4),
+                'cold_loads': stats['cold_loads'],
+                'cache_hits': stats['cache_hits'],
+                'single_flight_waits': stats['single_flight_waits']
+            }
+        return report
+
     def _log(self, message: str, level: str = 'INFO'):
         """Логирование"""
         timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
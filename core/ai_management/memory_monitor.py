@@ -7,9 +7,10 @@ Triggers alerts or model offloading when thresholds are exceeded.
 Integrates with IntelligentModelManager and IntelligentMonitoringSystem.
 
 Key Features:
-- Real-time memory tracking per model
+- Real-time memory tracking per model (from the shared ModelResidencyManager)
 - Threshold-based alerting
-- Automatic offloading suggestions
+- Automatic offloading of the lowest-value models under system pressure
+- Residency dashboard: budgets, per-model footprint, pins, eviction history
 - Integration with system health metrics
 - Thread-safe operation
 """
@@ -25,6 +26,7 @@ from datetime import datetime
 # Local imports (relative to avoid circular dependencies)
 from ..monitoring.intelligent_monitoring_system import MetricsCollector
 from ..config.unified_config_manager import UnifiedConfigManager
+from .model_residency_manager import ModelResidencyManager, get_residency_manager
 
 logger = logging.getLogger(__name__)
 
@@ -49,7 +51,8 @@ class MemoryMonitor:
         self,
         config_manager: UnifiedConfigManager,
         metrics_collector: Optional[MetricsCollector] = None,
-        on_threshold_exceeded: Optional[Callable[[str, float], None]] = None
+        on_threshold_exceeded: Optional[Callable[[str, float], None]] = None,
+        residency: Optional[ModelResidencyManager] = None
     ):
         """
         Initialize the memory monitor.
@@ -57,10 +60,12 @@ class MemoryMonitor:
         :param config_manager: Unified configuration manager
         :param metrics_collector: Optional external metrics collector
         :param on_threshold_exceeded: Callback when memory threshold is breached
+        :param residency: Model residency manager (process-wide one by default)
         """
         self.config = config_manager.get_section("ai_management.memory_monitor")
         self.metrics_collector = metrics_collector
         self.on_threshold_exceeded = on_threshold_exceeded
+        self.residency = residency or get_residency_manager()
 
         # Internal state
         self._snapshots: Dict[str, ModelMemorySnapshot] = {}
@@ -74,6 +79,15 @@ class MemoryMonitor:
         self.per_model_memory_limit_mb = self.config.get("per_model_memory_limit_mb", 4096.0)
         self.check_interval_seconds = self.config.get("check_interval_seconds", 10)
 
+        # Global model budgets shared by all model loaders
+        ram_budget_mb = self.config.get("model_ram_budget_mb")
+        vram_budget_mb = self.config.get("model_vram_budget_mb")
+        if ram_budget_mb is not None or vram_budget_mb is not None:
+            self.residency.configure(
+                ram_budget_bytes=int(ram_budget_mb * 1024 * 1024) if ram_budget_mb is not None else None,
+                vram_budget_bytes=int(vram_budget_mb * 1024 * 1024) if vram_budget_mb is not None else None,
+            )
+
         logger.info("Intialized MemoryMonitor with config: "
                     f"sys_thresh={self.system_memory_threshold_percent}%, "
                     f"model_limit={self.per_model_memory_limit_mb}MB, "
@@ -137,9 +151,29 @@ class MemoryMonitor:
                 if self.on_threshold_exceeded:
                     self.on_threshold_exceeded("system", system_usage_percent)
 
-            # 3. TODO: Per-model memory tracking (requires model-process mapping)
-            # For now, log placeholder
-            logger.debug("Per-model memory tracking: not implemented (requires GPU/process hooks)")
+                # Offload the models that are cheapest to lose
+                excess_bytes = int((system_usage_percent - self.system_memory_threshold_percent) / 100
+                                   * system_mem.total)
+                freed = self.residency.relieve_pressure(excess_bytes)
+                if freed:
+                    logger.warning(f"Evicted {freed / (1024 * 1024):.1f}MB of models to relieve memory pressure")
+
+        # 3. Per-model memory from the residency manager (snapshots take the lock themselves)
+        resident = self.residency.get_dashboard()["models"]
+        for row in resident:
+            self.record_model_snapshot(
+                row["key"],
+                process_memory_mb=row["ram_mb"],
+                gpu_memory_mb=row["vram_mb"] or None,
+                metadata={"owner": row["owner"], "in_flight": row["in_flight"],
+                          "eviction_score": row["eviction_score"]},
+            )
+        # Drop snapshots of models that have been evicted since the last check
+        resident_keys = {row["key"] for row in resident}
+        with self._lock:
+            for model_id in [model_id for model_id, snapshot in self._snapshots.items()
+                             if "owner" in snapshot.metadata and model_id not in resident_keys]:
+                del self._snapshots[model_id]
 
     def record_model_snapshot(
         self,
@@ -198,6 +232,16 @@ class MemoryMonitor:
         with self._lock:
             return self._snapshots.copy()
 
+    def get_residency_dashboard(self) -> Dict[str, Any]:
+        """
+        Residency dashboard: model budgets and usage, every resident model with
+        its footprint, owners, pins and eviction score, plus recent evictions.
+        """
+        return {
+            "system": self.get_system_memory_status(),
+            **self.residency.get_dashboard(),
+        }
+
     def clear_snapshots(self):
         """Clear all recorded snapshots (e.g., after model unload)."""
         with self._lock:
@@ -0,0 +1,431 @@
+"""
+Дисковый кэш моделей с отображением весов в память (mmap).
+
+Прежний кэш сериализовал весь пайплайн через torch.save/pickle в BytesIO,
+шифровал блоб целиком и при загрузке расшифровывал его в память перед
+torch.load — пиковое потребление памяти втрое превышало размер модели.
+
+Новый формат:
+- веса хранятся в файле формата safetensors (8 байт длины заголовка,
+  JSON-заголовок, данные тензоров подряд); незашифрованный файл читается
+  стандартной библиотекой safetensors;
+- тензоры создаются прямо поверх отображенного файла (torch.frombuffer),
+  без копирования: страницы подгружаются ОС при первом обращении и
+  разделяются со страничным кэшем;
+- для каждого тензора в заголовке хранится SHA-256; проверка выполняется
+  при первом обращении к тензору (или сразу, verify="eager");
+- шифрование необязательное и поблочное (AES-256-GCM, блоки chunk_size):
+  тензор расшифровывается блок за блоком прямо в свой буфер, копии всего
+  файла в памяти не создается. Ключ каждого файла выводится из общего ключа
+  через HKDF со случайной солью, номер блока — nonce, имя тензора и номер
+  блока — связанные данные (перестановка блоков обнаруживается);
+- рядом с весами сохраняются конфигурация и токенайзер transformers, модель
+  собирается без инициализации весов и получает тензоры из файла
+  (assign_state_dict: параметры заменяются тензорами файла по одному,
+  набор ключей обязан совпадать с моделью).
+
+Поддерживаются модели transformers (PreTrainedModel) и их пайплайны;
+для остальных объектов store() выбрасывает UnsupportedModelError.
+"""
+import hashlib
+import json
+import logging
+import math
+import mmap
+import os
+import shutil
+import struct
+import threading
+import time
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+import torch
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+FORMAT_VERSION = "mmap-v1"
+WEIGHTS_FILE = "model.safetensors"
+ENCRYPTED_WEIGHTS_FILE = "model.safetensors.enc"
+MANIFEST_FILE = "manifest.json"
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+GCM_TAG_SIZE = 16
+
+DTYPES = {
+    torch.float64: "F64", torch.float32: "F32", torch.float16: "F16", torch.bfloat16: "BF16",
+    torch.int64: "I64", torch.int32: "I32", torch.int16: "I16", torch.int8: "I8",
+    torch.uint8: "U8", torch.bool: "BOOL",
+}
+TORCH_DTYPES = {name: dtype for dtype, name in DTYPES.items()}
+
+logger = logging.getLogger(__name__)
+
+
+class UnsupportedModelError(TypeError):
+    """Модель нельзя сохранить в формате mmap-кэша"""
+
+
+class IntegrityError(ValueError):
+    """Данные тензора не совпадают с хэшем из заголовка"""
+
+
+def encryption_key_from_settings(settings: Dict[str, Any]) -> Optional[bytes]:
+    """
+    Ключ AES-256 шифрования кэша по настройкам caching.model_disk_cache
+    (hex в переменной окружения encryption_key_ref) или None.
+    """
+    if not settings.get("encrypt", False):
+        return None
+    key_ref = settings.get("encryption_key_ref", "MODEL_CACHE_KEY")
+    key_hex = os.getenv(key_ref)
+    if not key_hex:
+        logger.warning(f"Шифрование кэша моделей включено, но {key_ref} не задан — кэш не шифруется")
+        return None
+    key = bytes.fromhex(key_hex)
+    if len(key) != 32:
+        raise ValueError(f"{key_ref} должен содержать 32-байтный ключ в hex")
+    return key
+
+
+def _file_cipher(key: bytes, salt: bytes) -> AESGCM:
+    file_key = HKDF(algorithm=hashes.SHA256(), length=32, salt=salt, info=b"model-cache").derive(key)
+    return AESGCM(file_key)
+
+
+def _nonce(chunk_index: int) -> bytes:
+    return chunk_index.to_bytes(12, "big")
+
+
+def _encrypted_size(nbytes: int, chunk_size: int) -> int:
+    return nbytes + GCM_TAG_SIZE * max(1, math.ceil(nbytes / chunk_size))
+
+
+def _tensor_bytes(tensor: torch.Tensor) -> memoryview:
+    """Байты тензора без лишних копий (копия только для нечисловых/несмежных тензоров)"""
+    flat = tensor.detach().to("cpu").contiguous().reshape(-1)
+    return memoryview(flat.view(torch.uint8).numpy()).cast("B")
+
+
+def save_state_dict(path: str,
+                    tensors: Dict[str, torch.Tensor],
+                    metadata: Optional[Dict[str, str]] = None,
+                    encryption_key: Optional[bytes] = None,
+                    chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """
+    Потоковая запись тензоров в файл формата safetensors (по одному тензору за раз).
+
+    Returns:
+        Размер файла в байтах
+    """
+    for name, tensor in tensors.items():
+        if tensor.dtype not in DTYPES:
+            raise UnsupportedModelError(f"Тип {tensor.dtype} тензора {name} не поддерживается")
+
+    # Как в safetensors: по убыванию размера элемента, чтобы смещения были выровнены
+    names = sorted(tensors, key=lambda n: (-tensors[n].element_size(), n))
+    salt = os.urandom(16) if encryption_key else b""
+    header: Dict[str, Any] = {}
+    offset = 0
+    for name in names:
+        tensor = tensors[name]
+        nbytes = tensor.numel() * tensor.element_size()
+        stored = _encrypted_size(nbytes, chunk_size) if encryption_key else nbytes
+        header[name] = {"dtype": DTYPES[tensor.dtype], "shape": list(tensor.shape),
+                        "data_offsets": [offset, offset + stored]}
+        offset += stored
+
+    # Хэши известны только после записи: резервируем место хэшами той же длины
+    digests = {name: "0" * 64 for name in names}
+
+    def encode_header() -> bytes:
+        meta = {**(metadata or {}), "format": FORMAT_VERSION, "sha256": json.dumps(digests)}
+        if encryption_key:
+            meta.update({"encryption": "aes-256-gcm-chunked", "salt": salt.hex(), "chunk_size": str(chunk_size)})
+        raw = json.dumps({"__metadata__": meta, **header}, separators=(",", ":")).encode()
+        return raw + b" " * (-len(raw) % 8)
+
+    header_bytes = encode_header()
+    cipher = _file_cipher(encryption_key, salt) if encryption_key else None
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(struct.pack("<Q", len(header_bytes)))
+        f.write(header_bytes)
+        chunk_index = 0
+        for name in names:
+            data = _tensor_bytes(tensors[name])
+            digests[name] = hashlib.sha256(data).hexdigest()
+            if cipher is None:
+                f.write(data)
+                continue
+            for index, start in enumerate(range(0, max(len(data), 1), chunk_size)):
+                aad = f"{name}:{index}".encode()
+                f.write(cipher.encrypt(_nonce(chunk_index), bytes(data[start:start + chunk_size]), aad))
+                chunk_index += 1
+        # Заголовок с настоящими хэшами той же длины записывается на свое место
+        final_header = encode_header()
+        assert len(final_header) == len(header_bytes)
+        f.seek(8)
+        f.write(final_header)
+        f.flush()
+        os.fsync(f.fileno())
+        size = os.fstat(f.fileno()).st_size
+    os.replace(tmp_path, path)
+    return size
+
+
+class MappedStateDict(Mapping):
+    """
+    Словарь тензоров поверх отображенного в память файла.
+    Тензор создается при первом обращении; незашифрованные тензоры
+    разделяют память с файлом.
+    """
+
+    def __init__(self, path: str, encryption_key: Optional[bytes] = None, verify: str = "lazy"):
+        self.path = path
+        self.verify = verify
+        self._file = open(path, "rb")
+        # MAP_PRIVATE: тензоры можно изменять, файл при этом не меняется
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_COPY)
+        header_len = struct.unpack("<Q", self._mmap[:8])[0]
+        header = json.loads(self._mmap[8:8 + header_len])
+        self.metadata: Dict[str, str] = header.pop("__metadata__", {})
+        self._entries: Dict[str, Dict[str, Any]] = header
+        self._data_start = 8 + header_len
+        self._digests: Dict[str, str] = json.loads(self.metadata.get("sha256", "{}"))
+        self._tensors: Dict[str, torch.Tensor] = {}
+
+        self._cipher = None
+        self._chunk_starts: Dict[str, int] = {}
+        if self.metadata.get("encryption"):
+            if not encryption_key:
+                raise ValueError(f"Файл {path} зашифрован, ключ не передан")
+            self._cipher = _file_cipher(encryption_key, bytes.fromhex(self.metadata["salt"]))
+            self._chunk_size = int(self.metadata["chunk_size"])
+            # Номер первого блока каждого тензора (nonce сквозной по файлу)
+            chunk_index = 0
+            for name in sorted(self._entries, key=lambda n: self._entries[n]["data_offsets"][0]):
+                self._chunk_starts[name] = chunk_index
+                chunk_index += max(1, math.ceil(self._plain_size(name) / self._chunk_size))
+
+        if verify == "eager":
+            for name in self._entries:
+                self[name]
+
+    def _plain_size(self, name: str) -> int:
+        entry = self._entries[name]
+        return math.prod(entry["shape"]) * torch.empty((), dtype=TORCH_DTYPES[entry["dtype"]]).element_size()
+
+    def __getitem__(self, name: str) -> torch.Tensor:
+        tensor = self._tensors.get(name)
+        if tensor is None:
+            tensor = self._tensors[name] = self._materialize(name)
+        return tensor
+
+    def _materialize(self, name: str) -> torch.Tensor:
+        entry = self._entries[name]
+        dtype = TORCH_DTYPES[entry["dtype"]]
+        shape = entry["shape"]
+        begin, end = entry["data_offsets"]
+        nbytes = self._plain_size(name)
+
+        if self._cipher is None:
+            if nbytes == 0:
+                return torch.empty(shape, dtype=dtype)
+            start = self._data_start + begin
+            if self.verify != "none":
+                self._check_digest(name, memoryview(self._mmap)[start:start + nbytes])
+            return torch.frombuffer(self._mmap, dtype=dtype, count=math.prod(shape), offset=start).reshape(shape)
+
+        # Поблочная расшифровка прямо в буфер тензора
+        tensor = torch.empty(shape, dtype=dtype)
+        target = memoryview(tensor.reshape(-1).view(torch.uint8).numpy()).cast("B")
+        position = self._data_start + begin
+        written = 0
+        for index in range(max(1, math.ceil(nbytes / self._chunk_size))):
+            plain_len = min(self._chunk_size, nbytes - written)
+            # pread, а не срез отображения: страницы файла не остаются в RSS процесса
+            chunk = os.pread(self._file.fileno(), plain_len + GCM_TAG_SIZE, position)
+            plain = self._cipher.decrypt(_nonce(self._chunk_starts[name] + index), chunk, f"{name}:{index}".encode())
+            target[written:written + plain_len] = plain
+            written += plain_len
+            position += plain_len + GCM_TAG_SIZE
+        # GCM уже гарантирует целостность; хэш дополнительно сверяет исходные данные
+        if self.verify != "none":
+            self._check_digest(name, target)
+        return tensor
+
+    def _check_digest(self, name: str, data: memoryview) -> None:
+        expected = self._digests.get(name)
+        if expected and hashlib.sha256(data).hexdigest() != expected:
+            raise IntegrityError(f"Повреждены данные тензора {name} в {self.path}")
+
+    def __contains__(self, name: object) -> bool:
+        # Без обращения к тензору (Mapping.__contains__ создал бы его)
+        return name in self._entries
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def close(self) -> None:
+        """
+        Закрытие файла. Созданные тензоры остаются рабочими (незашифрованные
+        держат отображение), новые зашифрованные тензоры после закрытия не читаются.
+        """
+        self._file.close()
+
+
+def assign_state_dict(module: torch.nn.Module, state: Mapping) -> None:
+    """
+    Замена параметров и буферов модуля тензорами из state без копирования.
+    В отличие от load_state_dict(assign=True), state не копируется в
+    OrderedDict: каждый тензор запрашивается один раз и сразу становится
+    параметром. Набор ключей и формы проверяются до замены (как strict=True).
+    """
+    expected = module.state_dict(keep_vars=True)
+    missing = [name for name in expected if name not in state]
+    unexpected = [name for name in state if name not in expected]
+    if missing or unexpected:
+        raise IntegrityError(f"Тензоры не совпадают с моделью: отсутствуют {missing}, лишние {unexpected}")
+    for name, current in expected.items():
+        module_path, _, attr = name.rpartition(".")
+        owner = module.get_submodule(module_path)
+        tensor = state[name]
+        if tensor.shape != current.shape:
+            raise IntegrityError(f"Форма тензора {name}: {list(tensor.shape)} вместо {list(current.shape)}")
+        if attr in owner._parameters:
+            owner._parameters[attr] = torch.nn.Parameter(tensor, requires_grad=current.requires_grad)
+        else:
+            owner._buffers[attr] = tensor
+
+
+class MmapModelCache:
+    """
+    Кэш моделей transformers в каталоге: <cache_dir>/<cache_key>/ с манифестом,
+    конфигурацией, токенайзером и файлом весов.
+    """
+
+    def __init__(self,
+                 cache_dir: str,
+                 encryption_key: Optional[bytes] = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 verify: str = "lazy"):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.encryption_key = encryption_key
+        self.chunk_size = chunk_size
+        self.verify = verify
+
+    def _entry_dir(self, cache_key: str) -> Path:
+        return self.cache_dir / cache_key
+
+    def contains(self, cache_key: str) -> bool:
+        return (self._entry_dir(cache_key) / MANIFEST_FILE).exists()
+
+    @staticmethod
+    def _split_model(obj: Any) -> Tuple[Any, Any, Any, Optional[str]]:
+        """(модель, токенайзер, извлекатель признаков, задача пайплайна)"""
+        from transformers import Pipeline, PreTrainedModel
+
+        if isinstance(obj, Pipeline):
+            model, tokenizer, task = obj.model, obj.tokenizer, obj.task
+            feature_extractor = getattr(obj, "feature_extractor", None)
+        elif isinstance(obj, PreTrainedModel):
+            model, tokenizer, feature_extractor, task = obj, None, None, None
+        else:
+            raise UnsupportedModelError(f"Тип {type(obj).__name__} не поддерживается mmap-кэшем")
+        if not isinstance(model, PreTrainedModel) or getattr(model, "is_quantized", False) \
+                or getattr(model, "is_loaded_in_8bit", False) or getattr(model, "is_loaded_in_4bit", False):
+            raise UnsupportedModelError(f"Модель {type(model).__name__} не поддерживается mmap-кэшем")
+        return model, tokenizer, feature_extractor, task
+
+    def store(self, cache_key: str, obj: Any, model_id: str = "") -> int:
+        """
+        Сохранение модели или пайплайна. Запись идет во временный каталог,
+        который затем атомарно заменяет прежнюю запись.
+
+        Returns:
+            Размер записи в байтах
+        """
+        model, tokenizer, feature_extractor, task = self._split_model(obj)
+        target = self._entry_dir(cache_key)
+        staging = self.cache_dir / f".{cache_key}.{os.getpid()}.{threading.get_ident()}.tmp"
+        shutil.rmtree(staging, ignore_errors=True)
+        staging.mkdir(parents=True)
+        try:
+            model.config.save_pretrained(staging)
+            if tokenizer is not None:
+                tokenizer.save_pretrained(staging)
+            if feature_extractor is not None:
+                feature_extractor.save_pretrained(staging)
+            weights_file = ENCRYPTED_WEIGHTS_FILE if self.encryption_key else WEIGHTS_FILE
+            save_state_dict(str(staging / weights_file), model.state_dict(), metadata={"model_id": model_id},
+                            encryption_key=self.encryption_key, chunk_size=self.chunk_size)
+            manifest = {
+                "format": FORMAT_VERSION,
+                "model_id": model_id,
+                "model_class": type(model).__name__,
+                "task": task,
+                "has_tokenizer": tokenizer is not None,
+                "has_feature_extractor": feature_extractor is not None,
+                "weights": weights_file,
+                "encrypted": bool(self.encryption_key),
+                "created_at": time.time(),
+            }
+            (staging / MANIFEST_FILE).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+
+            shutil.rmtree(target, ignore_errors=True)
+            os.replace(staging, target)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        return self.size_bytes(cache_key)
+
+    def load(self, cache_key: str) -> Optional[Any]:
+        """Сборка модели с весами из отображенного файла; None, если записи нет"""
+        directory = self._entry_dir(cache_key)
+        if not self.contains(cache_key):
+            return None
+        manifest = json.loads((directory / MANIFEST_FILE).read_text(encoding="utf-8"))
+        if manifest.get("format") != FORMAT_VERSION:
+            return None
+
+        import transformers
+        from transformers import AutoConfig, AutoFeatureExtractor, AutoTokenizer
+        from transformers.modeling_utils import no_init_weights
+
+        config = AutoConfig.from_pretrained(directory)
+        model_class = getattr(transformers, manifest["model_class"])
+        # Параметры выделяются без инициализации (страницы не затрагиваются)
+        # и сразу заменяются тензорами из файла
+        with no_init_weights():
+            model = model_class._from_config(config)
+        state = MappedStateDict(str(directory / manifest["weights"]), self.encryption_key, self.verify)
+        try:
+            assign_state_dict(model, state)
+        finally:
+            state.close()
+        model.tie_weights()
+        model.eval()
+
+        if not manifest.get("task"):
+            return model
+        tokenizer = AutoTokenizer.from_pretrained(directory) if manifest.get("has_tokenizer") else None
+        feature_extractor = (AutoFeatureExtractor.from_pretrained(directory)
+                             if manifest.get("has_feature_extractor") else None)
+        device = 0 if torch.cuda.is_available() else -1
+        return transformers.pipeline(manifest["task"], model=model, tokenizer=tokenizer,
+                                     feature_extractor=feature_extractor, device=device)
+
+    def size_bytes(self, cache_key: str) -> int:
+        directory = self._entry_dir(cache_key)
+        if not directory.exists():
+            return 0
+        return sum(path.stat().st_size for path in directory.iterdir() if path.is_file())
+
+    def remove(self, cache_key: str) -> None:
+        shutil.rmtree(self._entry_dir(cache_key), ignore_errors=True)
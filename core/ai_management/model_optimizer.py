@@ -17,6 +17,7 @@ Model Optimizer — автоматически улучшает производ
 - Поддерживает горячую замену моделей без остановки системы
 """
 
+import asyncio
 import logging
 import time
 from typing import Dict, Any, Optional, Callable
@@ -25,6 +26,7 @@ from pathlib import Path
 from core.config.unified_config_manager import UnifiedConfigManager
 from core.monitoring.intelligent_monitoring_system import IntelligentMonitoringSystem
 from core.ai_management.model_registry import ModelRegistry
+from core.ai_management.onnx_backend import OnnxModelBackend, get_onnx_backend
 from core.learning.continuous_learning_system import ContinuousLearningSystem
 
 
@@ -40,13 +42,15 @@ class ModelOptimizer:
         monitoring_system: IntelligentMonitoringSystem,
         model_registry: ModelRegistry,
         learning_system: Optional[ContinuousLearningSystem] = None,
-        optimization_interval_seconds: int = 3600  # раз в час
+        optimization_interval_seconds: int = 3600,  # раз в час
+        onnx_backend: Optional[OnnxModelBackend] = None
     ):
         self.config = config_manager
         self.monitoring = monitoring_system
         self.registry = model_registry
         self.learning = learning_system
         self.interval = optimization_interval_seconds
+        self.onnx_backend = onnx_backend or get_onnx_backend()
         self.logger = logging.getLogger("ModelOptimizer")
         self._running = False
         self._last_optimization: Dict[str, float] = {}
@@ -174,17 +178,30 @@ class ModelOptimizer:
         # fallback
         return "quantize"
 
-    async def _apply_quantization(self, model_id: str, metrics: Dict[str, Any]) -> Dict[str, Any]:
-        """Применяет квантование (INT8/FP16) к модели."""
+    async def _apply_quantization(self, model_id: str, metrics: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Квантование в INT8: экспорт модели в ONNX и динамическое квантование
+        весов для ONNX Runtime на CPU (перевод, эмбеддинги, тональность, классификация).
+        """
+        task_type = metrics.get("task_type") or metrics.get("model_type", "unknown")
+        model_path = metrics.get("model_path") or metrics.get("model_name") or model_id
+        if not self.onnx_backend.supports(task_type) or not self.onnx_backend.is_available():
+            self.logger.info("⏭️ INT8/ONNX quantization is not available for %s (task: %s)", model_id, task_type)
+            return None
+
         self.logger.info("🔧 Applying quantization to %s", model_id)
-        # Здесь будет интеграция с ONNX Runtime, TensorRT, или HuggingFace Optimum
-        # Для каркаса — симуляция
+        # Экспорт и квантование занимают минуты — не блокируем event loop
+        await asyncio.to_thread(self.onnx_backend.export, model_path, task_type, True)
+        fp32_size = self.onnx_backend.size_bytes(model_path, task_type, quantize=False)
+        int8_size = self.onnx_backend.size_bytes(model_path, task_type, quantize=True)
         return {
             "strategy": "quantize",
             "new_config": {
                 "precision": "int8",
-                "expected_speedup": 1.8,
-                "expected_memory_reduction": 0.6
+                "quantization": "int8",
+                "inference_backend": "onnxruntime",
+                "onnx_model_dir": str(self.onnx_backend.model_dir(model_path, task_type, quantize=True)),
+                "expected_memory_reduction": round(1 - int8_size / fp32_size, 2) if fp32_size else None
             },
             "status": "applied"
         }
@@ -0,0 +1,480 @@
+"""
+Общий менеджер резидентности моделей с глобальным бюджетом RAM/VRAM.
+
+LazyModelLoader, IntelligentModelManager, AdaptiveModelLoader и AIModelHub
+раньше вели учет загруженных моделей каждый сам по себе: одна и та же модель
+загружалась дважды, а выгрузка одного менеджера освобождала рабочий набор
+другого, не учитывая ссылки, которые держат остальные. Теперь все загрузчики
+регистрируют модели в одном менеджере процесса:
+
+- у каждой модели измеряется занимаемая память (параметры и буферы по
+  устройствам, либо прирост RSS/VRAM процесса при загрузке);
+- при нехватке бюджета выгружается модель с наименьшей ценностью
+  load_time × P(повторного использования) / bytes — дешевые в загрузке,
+  большие и давно не нужные модели уходят первыми;
+- модель с выполняющимися запросами закреплена (pin) и не выгружается;
+- владельцы подписываются на выгрузку: при вытеснении модели все
+  загрузчики, державшие на нее ссылку, получают уведомление и отпускают ее
+  (обработчик сверяет, что его ссылка указывает на вытесненный объект);
+- модель, уже загруженная другим загрузчиком под тем же ключом, берется
+  из менеджера вместо повторной загрузки.
+
+Вероятность повторного использования оценивается по интенсивности обращений:
+rate = uses / max(age, horizon), P = (1 - e^(-rate·horizon)) · e^(-idle/horizon).
+
+Пример:
+    residency = get_residency_manager()
+    model = residency.get(key)
+    if model is None:
+        residency.reserve(*residency.known_footprint(key))
+        model = load()
+        residency.admit(key, model, load_time_sec=..., owner="my_loader",
+                        on_evict=drop)
+    with residency.pin(key):
+        model(inputs)
+"""
+import logging
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+# Обработчик выгрузки получает вытесненную модель
+EvictCallback = Callable[[Any], None]
+
+
+@dataclass
+class ResidentModel:
+    """Учетная запись загруженной модели"""
+    key: str
+    model: Any
+    owner: str
+    ram_bytes: int
+    vram_bytes: int
+    load_time_sec: float
+    loaded_at: float
+    last_used: float
+    uses: int = 0
+    in_flight: int = 0
+    callbacks: Dict[str, EvictCallback] = field(default_factory=dict)
+
+    @property
+    def total_bytes(self) -> int:
+        return self.ram_bytes + self.vram_bytes
+
+
+def estimate_footprint(model: Any) -> Tuple[int, int]:
+    """
+    Память модели (RAM, VRAM) в байтах по параметрам и буферам torch.
+    Пайплайны, словари и объекты с атрибутом model обходятся рекурсивно,
+    общие (связанные) тензоры учитываются один раз.
+    """
+    try:
+        import torch
+    except ImportError:
+        return 0, 0
+
+    seen = set()
+    totals = [0, 0]
+
+    def visit(obj: Any, depth: int = 0) -> None:
+        if obj is None or depth > 3 or id(obj) in seen:
+            return
+        seen.add(id(obj))
+        if isinstance(obj, torch.nn.Module):
+            for tensor in list(obj.parameters()) + list(obj.buffers()):
+                storage = (tensor.device.type, tensor.data_ptr())
+                if storage in seen:
+                    continue
+                seen.add(storage)
+                totals[tensor.device.type == "cuda"] += tensor.numel() * tensor.element_size()
+        elif isinstance(obj, dict):
+            for value in obj.values():
+                visit(value, depth + 1)
+        else:
+            for attr in ("model", "module"):
+                visit(getattr(obj, attr, None), depth + 1)
+
+    visit(model)
+    return totals[0], totals[1]
+
+
+def model_residency_key(model_path: str, task_type: str, quantization: str = "none") -> str:
+    """
+    Ключ модели по ее идентичности, а не по загрузчику: загрузчики, строящие
+    один и тот же объект из тех же файлов, делят одну резидентную копию.
+    task_type описывает вид объекта, поэтому разные по устройству копии
+    одной модели (пайплайн, словарь model/tokenizer) под один ключ не попадают.
+    """
+    return f"{task_type}:{model_path}:{quantization}"
+
+
+def _process_memory() -> Tuple[int, int]:
+    """Текущие RSS процесса и выделенная VRAM"""
+    vram = 0
+    try:
+        import torch
+        if torch.cuda.is_available():
+            vram = torch.cuda.memory_allocated()
+    except ImportError:
+        pass
+    return psutil.Process().memory_info().rss, vram
+
+
+class ModelResidencyManager:
+    """Глобальный учет и вытеснение загруженных моделей в пределах бюджета памяти"""
+
+    def __init__(self,
+                 ram_budget_bytes: int,
+                 vram_budget_bytes: int = 0,
+                 reuse_horizon_sec: float = 600.0,
+                 trim_probability: float = 0.05,
+                 clock: Callable[[], float] = time.monotonic):
+        self.ram_budget_bytes = ram_budget_bytes
+        self.vram_budget_bytes = vram_budget_bytes
+        self.reuse_horizon_sec = reuse_horizon_sec
+        self.trim_probability = trim_probability
+        self._clock = clock
+        self._lock = threading.RLock()
+        self._models: Dict[str, ResidentModel] = {}
+        # Последний измеренный размер модели: оценка перед повторной загрузкой
+        self._footprints: Dict[str, Tuple[int, int]] = {}
+        self.stats = {"admissions": 0, "shared_hits": 0, "evictions": 0, "over_budget_admissions": 0,
+                      "evicted_bytes": 0}
+        self._evictions: Deque[Dict[str, Any]] = deque(maxlen=50)
+
+    def configure(self, ram_budget_bytes: Optional[int] = None, vram_budget_bytes: Optional[int] = None) -> None:
+        """Изменение бюджетов; лишние модели вытесняются сразу"""
+        with self._lock:
+            if ram_budget_bytes is not None:
+                self.ram_budget_bytes = ram_budget_bytes
+            if vram_budget_bytes is not None:
+                self.vram_budget_bytes = vram_budget_bytes
+        self.reserve(0, 0)
+
+    # --- учет моделей -----------------------------------------------------
+
+    def get(self, key: str, owner: Optional[str] = None, on_evict: Optional[EvictCallback] = None) -> Optional[Any]:
+        """
+        Резидентная модель по ключу или None. Владелец, передавший on_evict,
+        подписывается на ее выгрузку (модель загружена другим загрузчиком).
+        """
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is None:
+                return None
+            self._touch(entry)
+            if owner and owner not in entry.callbacks:
+                self.stats["shared_hits"] += 1
+                if on_evict is not None:
+                    entry.callbacks[owner] = on_evict
+            return entry.model
+
+    def subscribe(self, key: str, owner: str, on_evict: EvictCallback) -> bool:
+        """Подписка владельца, получившего модель через другой загрузчик, на ее выгрузку"""
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is None:
+                return False
+            entry.callbacks.setdefault(owner, on_evict)
+            return True
+
+    def touch(self, key: str) -> None:
+        """Учет обращения к модели, найденной загрузчиком в собственном кэше"""
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is not None:
+                self._touch(entry)
+
+    def _touch(self, entry: ResidentModel) -> None:
+        entry.uses += 1
+        entry.last_used = self._clock()
+
+    def is_resident(self, key: str) -> bool:
+        return key in self._models
+
+    def known_footprint(self, key: str) -> Tuple[int, int]:
+        """Измеренный ранее размер модели (RAM, VRAM); (0, 0), если модель не загружалась"""
+        return self._footprints.get(key, (0, 0))
+
+    @contextmanager
+    def measure(self) -> Iterator[Dict[str, int]]:
+        """Прирост RSS и VRAM процесса за время загрузки (запасной способ измерения)"""
+        ram_before, vram_before = _process_memory()
+        delta = {"ram_bytes": 0, "vram_bytes": 0}
+        try:
+            yield delta
+        finally:
+            ram_after, vram_after = _process_memory()
+            delta["ram_bytes"] = max(0, ram_after - ram_before)
+            delta["vram_bytes"] = max(0, vram_after - vram_before)
+
+    def admit(self,
+              key: str,
+              model: Any,
+              load_time_sec: float,
+              owner: str,
+              on_evict: Optional[EvictCallback] = None,
+              ram_bytes: Optional[int] = None,
+              vram_bytes: Optional[int] = None,
+              measured: Optional[Dict[str, int]] = None) -> ResidentModel:
+        """
+        Регистрация загруженной модели. Размер по умолчанию измеряется по
+        тензорам модели, для моделей без тензоров torch берется прирост памяти
+        процесса из measure(); для освобождения бюджета вытесняются другие модели.
+        """
+        if ram_bytes is None or vram_bytes is None:
+            measured_ram, measured_vram = estimate_footprint(model)
+            if not (measured_ram or measured_vram) and measured:
+                measured_ram, measured_vram = measured["ram_bytes"], measured["vram_bytes"]
+            ram_bytes = measured_ram if ram_bytes is None else ram_bytes
+            vram_bytes = measured_vram if vram_bytes is None else vram_bytes
+
+        with self._lock:
+            previous = self._models.get(key)
+            if previous is not None and previous.model is model:
+                if on_evict is not None:
+                    previous.callbacks[owner] = on_evict
+                self._touch(previous)
+                return previous
+
+        # Повторная регистрация другой копии под тем же ключом заменяет прежнюю
+        if previous is not None:
+            self.evict(key, reason="replaced")
+        self.reserve(ram_bytes, vram_bytes)
+
+        now = self._clock()
+        entry = ResidentModel(key=key, model=model, owner=owner, ram_bytes=ram_bytes, vram_bytes=vram_bytes,
+                              load_time_sec=load_time_sec, loaded_at=now, last_used=now, uses=1)
+        if on_evict is not None:
+            entry.callbacks[owner] = on_evict
+        with self._lock:
+            self._models[key] = entry
+            self._footprints[key] = (ram_bytes, vram_bytes)
+            self.stats["admissions"] += 1
+            ram_used, vram_used = self._used()
+            if ram_used > self.ram_budget_bytes or (self.vram_budget_bytes and vram_used > self.vram_budget_bytes):
+                self.stats["over_budget_admissions"] += 1
+                logger.warning(f"Модель {key} загружена сверх бюджета памяти: RAM {ram_used / 1024 ** 2:.0f} МБ "
+                               f"из {self.ram_budget_bytes / 1024 ** 2:.0f} МБ, VRAM {vram_used / 1024 ** 2:.0f} МБ")
+        logger.info(f"Модель {key} резидентна ({owner}): RAM {ram_bytes / 1024 ** 2:.1f} МБ, "
+                    f"VRAM {vram_bytes / 1024 ** 2:.1f} МБ, загрузка {load_time_sec:.2f} сек")
+        return entry
+
+    # --- закрепление ------------------------------------------------------
+
+    def acquire(self, key: str) -> Optional[Any]:
+        """Закрепление модели на время запроса; None, если модель уже выгружена"""
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is None:
+                return None
+            entry.in_flight += 1
+            self._touch(entry)
+            return entry.model
+
+    def release(self, key: str) -> None:
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is not None and entry.in_flight > 0:
+                entry.in_flight -= 1
+
+    @contextmanager
+    def pin(self, key: str) -> Iterator[Optional[Any]]:
+        """Контекст запроса: модель не вытесняется, пока он не завершится"""
+        model = self.acquire(key)
+        try:
+            yield model
+        finally:
+            if model is not None:
+                self.release(key)
+
+    # --- вытеснение -------------------------------------------------------
+
+    def reuse_probability(self, entry: ResidentModel, now: Optional[float] = None) -> float:
+        now = self._clock() if now is None else now
+        horizon = self.reuse_horizon_sec
+        rate = entry.uses / max(now - entry.loaded_at, horizon)
+        idle = max(0.0, now - entry.last_used)
+        return (1 - math.exp(-rate * horizon)) * math.exp(-idle / horizon)
+
+    def eviction_score(self, entry: ResidentModel, now: Optional[float] = None) -> float:
+        """Ценность удержания модели в памяти: load_time × P(reuse) / bytes (меньше — выгружается раньше)"""
+        return entry.load_time_sec * self.reuse_probability(entry, now) / max(entry.total_bytes, 1)
+
+    def _used(self) -> Tuple[int, int]:
+        ram = sum(entry.ram_bytes for entry in self._models.values())
+        vram = sum(entry.vram_bytes for entry in self._models.values())
+        return ram, vram
+
+    def _candidates(self) -> List[ResidentModel]:
+        now = self._clock()
+        unpinned = [entry for entry in self._models.values() if entry.in_flight == 0]
+        return sorted(unpinned, key=lambda entry: self.eviction_score(entry, now))
+
+    def reserve(self, ram_bytes: int = 0, vram_bytes: int = 0) -> bool:
+        """
+        Освобождение бюджета под модель заданного размера.
+
+        Returns:
+            True, если после вытеснения модель помещается в бюджет
+        """
+        victims = []
+        with self._lock:
+            ram_used, vram_used = self._used()
+            ram_over = ram_used + ram_bytes - self.ram_budget_bytes
+            vram_over = vram_used + vram_bytes - self.vram_budget_bytes if self.vram_budget_bytes else 0
+            for entry in self._candidates():
+                if ram_over <= 0 and vram_over <= 0:
+                    break
+                # VRAM освобождают только модели, которые ее занимают
+                if ram_over <= 0 and not entry.vram_bytes:
+                    continue
+                victims.append(entry)
+                ram_over -= entry.ram_bytes
+                vram_over -= entry.vram_bytes
+            fits = ram_over <= 0 and vram_over <= 0
+            for entry in victims:
+                self._detach(entry, "budget")
+        self._notify(victims)
+        return fits
+
+    def relieve_pressure(self, bytes_to_free: int) -> int:
+        """Вытеснение моделей с наименьшей ценностью при нехватке памяти системы"""
+        victims = []
+        with self._lock:
+            for entry in self._candidates():
+                if bytes_to_free <= 0:
+                    break
+                victims.append(entry)
+                bytes_to_free -= entry.total_bytes
+            for entry in victims:
+                self._detach(entry, "system_pressure")
+        self._notify(victims)
+        return sum(entry.total_bytes for entry in victims)
+
+    def trim(self) -> List[str]:
+        """Выгрузка моделей, повторное использование которых маловероятно"""
+        victims = []
+        with self._lock:
+            now = self._clock()
+            for entry in self._candidates():
+                if self.reuse_probability(entry, now) < self.trim_probability:
+                    victims.append(entry)
+            for entry in victims:
+                self._detach(entry, "idle")
+        self._notify(victims)
+        return [entry.key for entry in victims]
+
+    def evict(self, key: str, reason: str = "manual") -> bool:
+        """Выгрузка модели у всех владельцев (закрепление не учитывается)"""
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is None:
+                return False
+            self._detach(entry, reason)
+        self._notify([entry])
+        return True
+
+    def _detach(self, entry: ResidentModel, reason: str) -> None:
+        self._models.pop(entry.key, None)
+        self.stats["evictions"] += 1
+        self.stats["evicted_bytes"] += entry.total_bytes
+        self._evictions.append({
+            "key": entry.key,
+            "owner": entry.owner,
+            "reason": reason,
+            "bytes": entry.total_bytes,
+            "score": self.eviction_score(entry),
+            "at": time.time(),
+        })
+
+    def _notify(self, victims: List[ResidentModel]) -> None:
+        """Уведомление владельцев вне блокировки: обработчики берут собственные блокировки"""
+        if not victims:
+            return
+        for entry in victims:
+            model, entry.model = entry.model, None
+            for owner, callback in entry.callbacks.items():
+                try:
+                    callback(model)
+                except Exception as e:
+                    logger.warning(f"Ошибка выгрузки модели {entry.key} у {owner}: {e}")
+            logger.info(f"Модель {entry.key} вытеснена из памяти ({entry.total_bytes / 1024 ** 2:.1f} МБ)")
+        _release_device_memory()
+
+    # --- отчетность -------------------------------------------------------
+
+    def get_dashboard(self) -> Dict[str, Any]:
+        """Резидентные модели, бюджеты и история вытеснений"""
+        with self._lock:
+            now = self._clock()
+            ram_used, vram_used = self._used()
+            models = [{
+                "key": entry.key,
+                "owner": entry.owner,
+                "shared_with": sorted(owner for owner in entry.callbacks if owner != entry.owner),
+                "ram_mb": round(entry.ram_bytes / 1024 ** 2, 1),
+                "vram_mb": round(entry.vram_bytes / 1024 ** 2, 1),
+                "load_time_sec": round(entry.load_time_sec, 3),
+                "uses": entry.uses,
+                "in_flight": entry.in_flight,
+                "pinned": entry.in_flight > 0,
+                "idle_sec": round(now - entry.last_used, 1),
+                "reuse_probability": round(self.reuse_probability(entry, now), 3),
+                "eviction_score": self.eviction_score(entry, now),
+            } for entry in self._models.values()]
+            return {
+                "ram_budget_mb": round(self.ram_budget_bytes / 1024 ** 2, 1),
+                "ram_used_mb": round(ram_used / 1024 ** 2, 1),
+                "vram_budget_mb": round(self.vram_budget_bytes / 1024 ** 2, 1),
+                "vram_used_mb": round(vram_used / 1024 ** 2, 1),
+                "models": sorted(models, key=lambda row: row["eviction_score"]),
+                "recent_evictions": list(self._evictions),
+                **self.stats,
+            }
+
+
+def _release_device_memory() -> None:
+    import gc
+    gc.collect()
+    try:
+        import torch
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+    except ImportError:
+        pass
+
+
+def _default_budgets() -> Tuple[int, int]:
+    """60% RAM узла и 90% VRAM первой видеокарты"""
+    ram_budget = int(psutil.virtual_memory().total * 0.6)
+    vram_budget = 0
+    try:
+        import torch
+        if torch.cuda.is_available():
+            vram_budget = int(torch.cuda.get_device_properties(0).total_memory * 0.9)
+    except ImportError:
+        pass
+    return ram_budget, vram_budget
+
+
+_manager: Optional[ModelResidencyManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_residency_manager() -> ModelResidencyManager:
+    """Общий менеджер резидентности процесса"""
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                _manager = ModelResidencyManager(*_default_budgets())
+    return _manager
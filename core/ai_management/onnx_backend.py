@@ -0,0 +1,309 @@
+# AI_FREELANCE_AUTOMATION/core/ai_management/onnx_backend.py
+"""
+ONNX Runtime — CPU-бэкенд инференса для локальных моделей.
+
+Модели перевода, эмбеддингов, тональности и классификации экспортируются
+в ONNX (HuggingFace Optimum), веса динамически квантуются в int8
+(onnxruntime.quantization) и исполняются в ONNX Runtime с настроенными
+потоками intra/inter-op. На CPU это заменяет eager PyTorch и пути int8/int4
+через bitsandbytes, которые работают только с CUDA.
+
+Экспорт и квантование выполняются один раз на модель, результат хранится
+в cache_dir/<ключ модели>/{fp32,int8}; последующие загрузки только открывают
+сессии ONNX Runtime.
+
+Зависимости опциональные: pip install optimum[onnxruntime]
+"""
+
+import importlib.util
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import hashlib
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+logger = logging.getLogger("OnnxModelBackend")
+
+# task_type загрузчика -> (класс ORTModel из optimum.onnxruntime, задача пайплайна transformers)
+ONNX_TASKS: Dict[str, tuple] = {
+    "translation": ("ORTModelForSeq2SeqLM", "translation"),
+    "embeddings": ("ORTModelForFeatureExtraction", None),
+    "sentiment": ("ORTModelForSequenceClassification", "sentiment-analysis"),
+    "classification": ("ORTModelForSequenceClassification", "text-classification"),
+}
+
+POOLING_FILE = "onnx_pooling.json"
+MANIFEST_FILE = "onnx_manifest.json"
+
+
+def _require_onnx():
+    """Импорт optimum.onnxruntime и onnxruntime (опциональные зависимости)"""
+    try:
+        import onnxruntime
+        import optimum.onnxruntime as optimum_ort
+    except ImportError as e:
+        raise ImportError("❌ Требуется установка: pip install optimum[onnxruntime]") from e
+    return onnxruntime, optimum_ort
+
+
+def _physical_cores() -> int:
+    try:
+        import psutil
+        cores = psutil.cpu_count(logical=False)
+    except ImportError:
+        cores = None
+    return cores or os.cpu_count() or 1
+
+
+class OnnxSentenceEncoder:
+    """
+    Замена SentenceTransformer поверх ORTModelForFeatureExtraction:
+    тот же метод encode(), пулинг и нормализация из конфигурации
+    sentence-transformers (1_Pooling, 2_Normalize) модели.
+    """
+
+    def __init__(self, model: Any, tokenizer: Any, pooling: Optional[Dict[str, Any]] = None):
+        self.model = model
+        self.tokenizer = tokenizer
+        pooling = pooling or {}
+        self.pooling_mode = pooling.get("mode", "mean")
+        self.normalize = pooling.get("normalize", False)
+        self.max_seq_length = pooling.get("max_seq_length") or getattr(tokenizer, "model_max_length", 512)
+        if self.max_seq_length > 8192:
+            # У части токенизаторов model_max_length не задан (очень большое значение)
+            self.max_seq_length = 512
+
+    def encode(self,
+               sentences: Union[str, List[str]],
+               batch_size: int = 32,
+               convert_to_numpy: bool = True,
+               convert_to_tensor: bool = False,
+               normalize_embeddings: bool = False,
+               **kwargs) -> Any:
+        """Эмбеддинги предложений (совместимо с SentenceTransformer.encode)"""
+        import numpy as np
+
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        batches = []
+        for start in range(0, len(texts), batch_size):
+            inputs = self.tokenizer(texts[start:start + batch_size], padding=True, truncation=True,
+                                    max_length=self.max_seq_length, return_tensors="np")
+            hidden = np.asarray(self.model(**inputs).last_hidden_state, dtype=np.float32)
+            batches.append(self._pool(hidden, inputs["attention_mask"]))
+        embeddings = np.concatenate(batches) if batches else np.zeros((0, 0), dtype=np.float32)
+
+        if self.normalize or normalize_embeddings:
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings = embeddings / np.clip(norms, 1e-12, None)
+        if single:
+            embeddings = embeddings[0]
+        if convert_to_tensor:
+            import torch
+            return torch.from_numpy(embeddings)
+        return embeddings
+
+    def _pool(self, hidden: Any, attention_mask: Any) -> Any:
+        import numpy as np
+
+        if self.pooling_mode == "cls":
+            return hidden[:, 0]
+        mask = attention_mask[..., None].astype(hidden.dtype)
+        if self.pooling_mode == "max":
+            return np.where(mask > 0, hidden, -1e9).max(axis=1)
+        return (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+
+class OnnxModelBackend:
+    """
+    Экспорт моделей в ONNX, динамическое int8-квантование и загрузка
+    в ONNX Runtime на CPU.
+
+    Потоки: intra-op = физические ядра / число одновременно работающих
+    моделей (без переподписки CPU), inter-op = 1 — графы трансформеров
+    последовательные, параллелизм между операторами только добавляет
+    переключения контекста.
+    """
+
+    def __init__(self,
+                 cache_dir: str = "data/cache/onnx",
+                 intra_op_threads: Optional[int] = None,
+                 inter_op_threads: int = 1,
+                 concurrent_models: int = 1):
+        self.cache_dir = Path(cache_dir)
+        self.intra_op_threads = intra_op_threads or max(1, _physical_cores() // max(1, concurrent_models))
+        self.inter_op_threads = inter_op_threads
+        # Спин-ожидание потоков ORT выгодно только когда ядра не делятся с другими моделями
+        self.allow_spinning = concurrent_models <= 1
+        # Экспорт и квантование одной модели выполняются одним потоком
+        self._export_locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+
+    @staticmethod
+    def is_available() -> bool:
+        """Установлены ли optimum[onnxruntime] и onnxruntime"""
+        return (importlib.util.find_spec("onnxruntime") is not None
+                and importlib.util.find_spec("optimum") is not None)
+
+    @staticmethod
+    def supports(task_type: str) -> bool:
+        return task_type in ONNX_TASKS
+
+    def session_options(self) -> Any:
+        """Параметры сессии ONNX Runtime для CPU"""
+        onnxruntime, _ = _require_onnx()
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = self.intra_op_threads
+        options.inter_op_num_threads = self.inter_op_threads
+        options.execution_mode = onnxruntime.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.add_session_config_entry("session.intra_op.allow_spinning", "1" if self.allow_spinning else "0")
+        return options
+
+    def model_dir(self, model_path: str, task_type: str, quantize: bool = True) -> Path:
+        key = hashlib.sha256(f"{task_type}:{model_path}".encode()).hexdigest()[:20]
+        return self.cache_dir / key / ("int8" if quantize else "fp32")
+
+    def load(self, model_path: str, task_type: str, quantize: bool = True) -> Any:
+        """
+        Пайплайн ONNX Runtime для модели (экспорт и квантование при первом вызове).
+
+        Для translation/sentiment/classification возвращается пайплайн
+        transformers поверх ORT-модели, для embeddings — OnnxSentenceEncoder.
+        """
+        if not self.supports(task_type):
+            raise ValueError(f"Задача {task_type} не поддерживается ONNX-бэкендом")
+        _, optimum_ort = _require_onnx()
+        from transformers import AutoTokenizer, pipeline
+
+        target = self.export(model_path, task_type, quantize)
+        model_class, pipeline_task = ONNX_TASKS[task_type]
+        model = getattr(optimum_ort, model_class).from_pretrained(
+            str(target), provider="CPUExecutionProvider", session_options=self.session_options()
+        )
+        tokenizer = AutoTokenizer.from_pretrained(str(target))
+
+        if task_type == "embeddings":
+            pooling_path = target / POOLING_FILE
+            pooling = json.loads(pooling_path.read_text()) if pooling_path.exists() else None
+            return OnnxSentenceEncoder(model, tokenizer, pooling)
+        return pipeline(pipeline_task, model=model, tokenizer=tokenizer)
+
+    def export(self, model_path: str, task_type: str, quantize: bool = True) -> Path:
+        """Экспорт в ONNX (и квантование в int8); возвращает каталог готовой модели"""
+        target = self.model_dir(model_path, task_type, quantize)
+        if target.exists():
+            return target
+
+        # Блокировка на модель, а не на каталог: fp32-экспорт общий для
+        # загрузок с квантованием и без, и выполняться должен один раз
+        with self._export_lock(str(target.parent)):
+            if target.exists():
+                return target
+            fp32_dir = self.model_dir(model_path, task_type, quantize=False)
+            fp32_dir.parent.mkdir(parents=True, exist_ok=True)
+            if not fp32_dir.exists():
+                self._export_fp32(model_path, task_type, fp32_dir)
+            if quantize:
+                self._quantize_dir(fp32_dir, target)
+        return target
+
+    def _export_lock(self, key: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._export_locks.setdefault(key, threading.Lock())
+
+    def _export_fp32(self, model_path: str, task_type: str, target: Path) -> None:
+        _, optimum_ort = _require_onnx()
+        from transformers import AutoTokenizer
+
+        logger.info(f"📦 Экспорт {model_path} ({task_type}) в ONNX")
+        model_class, _ = ONNX_TASKS[task_type]
+        staging = Path(tempfile.mkdtemp(prefix=".staging-", dir=target.parent.parent))
+        try:
+            model = getattr(optimum_ort, model_class).from_pretrained(model_path, export=True)
+            model.save_pretrained(str(staging))
+            AutoTokenizer.from_pretrained(model_path).save_pretrained(str(staging))
+            if task_type == "embeddings":
+                (staging / POOLING_FILE).write_text(json.dumps(self._sentence_pooling(model_path)))
+            self._write_manifest(staging, model_path, task_type, quantized=False)
+            os.replace(staging, target)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+    def _quantize_dir(self, source: Path, target: Path) -> None:
+        """Динамическое квантование весов каждого графа в int8 (активации квантуются на лету)"""
+        _require_onnx()
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        logger.info(f"🗜️ Квантование {source} в int8")
+        staging = Path(tempfile.mkdtemp(prefix=".staging-", dir=target.parent.parent))
+        try:
+            for path in source.iterdir():
+                if path.suffix == ".onnx":
+                    quantize_dynamic(str(path), str(staging / path.name), weight_type=QuantType.QInt8)
+                elif path.is_file() and path.name != MANIFEST_FILE and not path.name.endswith(".onnx_data"):
+                    shutil.copy2(path, staging / path.name)
+            manifest = json.loads((source / MANIFEST_FILE).read_text())
+            self._write_manifest(staging, manifest["model_path"], manifest["task_type"], quantized=True)
+            os.replace(staging, target)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+    @staticmethod
+    def _sentence_pooling(model_path: str) -> Dict[str, Any]:
+        """Пулинг и нормализация из конфигурации модулей sentence-transformers"""
+        from transformers.utils import cached_file
+
+        def read(name: str) -> Optional[Any]:
+            path = cached_file(model_path, name, _raise_exceptions_for_missing_entries=False)
+            return json.loads(Path(path).read_text()) if path else None
+
+        modules = read("modules.json") or []
+        pooling = {"mode": "mean", "normalize": any(m.get("type", "").endswith("Normalize") for m in modules)}
+        pooling_module = next((m for m in modules if m.get("type", "").endswith("Pooling")), None)
+        if pooling_module:
+            config = read(f"{pooling_module['path']}/config.json") or {}
+            if config.get("pooling_mode_cls_token"):
+                pooling["mode"] = "cls"
+            elif config.get("pooling_mode_max_tokens"):
+                pooling["mode"] = "max"
+        sentence_config = read("sentence_bert_config.json") or {}
+        if sentence_config.get("max_seq_length"):
+            pooling["max_seq_length"] = sentence_config["max_seq_length"]
+        return pooling
+
+    @staticmethod
+    def _write_manifest(directory: Path, model_path: str, task_type: str, quantized: bool) -> None:
+        onnxruntime, _ = _require_onnx()
+        (directory / MANIFEST_FILE).write_text(json.dumps({
+            "model_path": model_path,
+            "task_type": task_type,
+            "quantization": "dynamic_int8" if quantized else "none",
+            "onnxruntime_version": onnxruntime.__version__,
+            "created_at": datetime.now().isoformat(),
+        }, indent=2))
+
+    def size_bytes(self, model_path: str, task_type: str, quantize: bool = True) -> int:
+        directory = self.model_dir(model_path, task_type, quantize)
+        if not directory.exists():
+            return 0
+        return sum(path.stat().st_size for path in directory.iterdir() if path.is_file())
+
+
+_backend: Optional[OnnxModelBackend] = None
+_backend_lock = threading.Lock()
+
+
+def get_onnx_backend() -> OnnxModelBackend:
+    """ONNX-бэкенд процесса (общий кэш экспортированных моделей)"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = OnnxModelBackend()
+    return _backend
@@ -120,19 +120,30 @@ class AutoFreelancerCore:
                 logger.error(f"💥 Ошибка при получении заказов с {platform_name}: {e}")
                 audit_logger.log("PLATFORM_ERROR", f"{platform_name}: {str(e)}")
 
-        if not all_new_jobs:
+        if all_new_jobs:
+            # 2-3. Анализ, фильтрация и ставки
+            await self.process_new_jobs(all_new_jobs)
+        else:
             logger.debug("📭 Новых заказов не найдено.")
-            return
 
-        # 2. Анализируем и фильтруем заказы
-        analyzed_jobs = await self.job_analyzer.analyze_jobs(all_new_jobs)
+        # 4. Обрабатываем активные заказы (выполнение, коммуникация, сдача)
+        await self._process_active_jobs()
+
+        # 5. Обрабатываем завершённые заказы (оплата, пост-обслуживание)
+        await self._finalize_completed_jobs()
+
+    async def process_new_jobs(self, jobs: List[Dict[str, Any]]) -> None:
+        """
+        Анализ, фильтрация и решение о ставке по новым заказам.
+        Вызывается из основного цикла и планировщиком после сканирования платформ.
+        """
+        analyzed_jobs = await self.job_analyzer.analyze_jobs(jobs)
         filtered_jobs = [j for j in analyzed_jobs if j.get("is_relevant", False)]
 
         if not filtered_jobs:
             logger.info("🧹 Все заказы отфильтрованы как нерелевантные.")
             return
 
-        # 3. Принимаем решения по каждому заказу
         for job in filtered_jobs:
             decision = await self.decision_engine.evaluate_job(job)
             if decision["should_bid"]:
@@ -140,12 +151,6 @@ class AutoFreelancerCore:
             else:
                 logger.info(f"⏭️ Отказ от участия в заказе {job['id']}: {decision.get('reason')}")
 
-        # 4. Обрабатываем активные заказы (выполнение, коммуникация, сдача)
-        await self._process_active_jobs()
-
-        # 5. Обрабатываем завершённые заказы (оплата, пост-обслуживание)
-        await self._finalize_completed_jobs()
-
     async def _submit_bid(self, job: Dict[str, Any], decision: Dict[str, Any]) -> None:
         """Отправить ставку на заказ."""
         try:
@@ -0,0 +1,221 @@
+"""
+Граф выполнения артефактов заказа (копирайтинг, перевод, редактирование и т.д.).
+
+Независимые артефакты выполняются параллельно, зависимые — после завершения
+своих зависимостей. Одновременные вызовы каждого ИИ-сервиса ограничиваются
+общим лимитером, у каждого артефакта свой таймаут, а сбой одной ветви
+не прерывает остальные: итоговый отчет содержит частичные результаты.
+Событие остановки (например, потеря аренды блокировки заказа) отменяет
+незавершенные артефакты.
+"""
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceConcurrencyLimiter:
+    """
+    Ограничение числа одновременных вызовов по имени сервиса.
+    Один экземпляр разделяется всеми графами процесса, поэтому лимит
+    действует на все заказы, а не на один граф.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, int]] = None, default_limit: int = 4):
+        self.limits = dict(limits or {})
+        self.default_limit = default_limit
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._active: Dict[str, int] = {}
+
+    def _semaphore(self, service: str) -> asyncio.Semaphore:
+        semaphore = self._semaphores.get(service)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.limits.get(service, self.default_limit))
+            self._semaphores[service] = semaphore
+        return semaphore
+
+    @asynccontextmanager
+    async def limit(self, service: str):
+        async with self._semaphore(service):
+            self._active[service] = self._active.get(service, 0) + 1
+            try:
+                yield
+            finally:
+                self._active[service] -= 1
+
+    def utilization(self) -> Dict[str, Dict[str, int]]:
+        return {
+            service: {"active": self._active.get(service, 0),
+                      "limit": self.limits.get(service, self.default_limit)}
+            for service in self._semaphores
+        }
+
+
+@dataclass
+class DeliverableNode:
+    """Узел графа: артефакт, сервис, который его производит, и зависимости"""
+    name: str
+    service: str
+    run: Callable[[Dict[str, Any]], Awaitable[Any]]  # получает результаты зависимостей
+    depends_on: Tuple[str, ...] = ()
+    timeout: Optional[float] = None
+
+
+@dataclass
+class DeliverableOutcome:
+    """Результат выполнения одного артефакта"""
+    name: str
+    status: str  # 'completed', 'failed', 'timeout', 'skipped', 'cancelled'
+    result: Any = None
+    error: Optional[str] = None
+    duration: float = 0.0
+
+    @property
+    def succeeded(self) -> bool:
+        return self.status == "completed"
+
+
+@dataclass
+class GraphExecutionReport:
+    """Сводный отчет о выполнении графа с частичными результатами"""
+    outcomes: Dict[str, DeliverableOutcome] = field(default_factory=dict)
+    wall_time: float = 0.0
+
+    @property
+    def results(self) -> Dict[str, Any]:
+        return {name: o.result for name, o in self.outcomes.items() if o.succeeded}
+
+    @property
+    def failed(self) -> List[DeliverableOutcome]:
+        return [o for o in self.outcomes.values() if not o.succeeded]
+
+    @property
+    def success(self) -> bool:
+        return not self.failed
+
+    @property
+    def partial(self) -> bool:
+        return bool(self.failed) and bool(self.results)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "wall_time": self.wall_time,
+            "deliverables": {
+                name: {"status": o.status, "error": o.error, "duration": o.duration}
+                for name, o in self.outcomes.items()
+            },
+        }
+
+
+class DeliverableGraph:
+    """Граф артефактов одного заказа"""
+
+    def __init__(self, limiter: ServiceConcurrencyLimiter, default_timeout: Optional[float] = None):
+        self.limiter = limiter
+        self.default_timeout = default_timeout
+        self.nodes: Dict[str, DeliverableNode] = {}
+
+    def add(self, node: DeliverableNode) -> "DeliverableGraph":
+        if node.name in self.nodes:
+            raise ValueError(f"Артефакт '{node.name}' уже добавлен в граф")
+        self.nodes[node.name] = node
+        return self
+
+    def _validate(self):
+        for node in self.nodes.values():
+            for dep in node.depends_on:
+                if dep not in self.nodes:
+                    raise ValueError(f"Артефакт '{node.name}' зависит от неизвестного '{dep}'")
+
+        # Поиск циклов обходом в глубину
+        state: Dict[str, int] = {}  # 1 — в обработке, 2 — обработан
+
+        def visit(name: str):
+            if state.get(name) == 2:
+                return
+            if state.get(name) == 1:
+                raise ValueError(f"Циклическая зависимость артефактов через '{name}'")
+            state[name] = 1
+            for dep in self.nodes[name].depends_on:
+                visit(dep)
+            state[name] = 2
+
+        for name in self.nodes:
+            visit(name)
+
+    async def run(self, stop: Optional[asyncio.Event] = None) -> GraphExecutionReport:
+        """
+        Выполнение всех артефактов с максимально возможным параллелизмом.
+
+        Args:
+            stop: Событие остановки; когда оно установлено, незавершенные
+                артефакты отменяются и попадают в отчет со статусом 'cancelled'
+        """
+        self._validate()
+        started = time.monotonic()
+        report = GraphExecutionReport()
+        tasks: Dict[str, asyncio.Task] = {}
+
+        async def execute(node: DeliverableNode) -> DeliverableOutcome:
+            inputs = {}
+            for dep in node.depends_on:
+                dep_outcome = await tasks[dep]
+                if not dep_outcome.succeeded:
+                    return DeliverableOutcome(
+                        name=node.name, status="skipped",
+                        error=f"зависимость '{dep}' не выполнена ({dep_outcome.status})"
+                    )
+                inputs[dep] = dep_outcome.result
+
+            timeout = node.timeout if node.timeout is not None else self.default_timeout
+            async with self.limiter.limit(node.service):
+                node_started = time.monotonic()
+                try:
+                    result = await asyncio.wait_for(node.run(inputs), timeout=timeout)
+                    status, error = "completed", None
+                except asyncio.TimeoutError:
+                    result, status, error = None, "timeout", f"превышен таймаут {timeout}с"
+                except Exception as e:
+                    logger.error(f"Ошибка выполнения артефакта '{node.name}': {e}", exc_info=True)
+                    result, status, error = None, "failed", str(e)
+                duration = time.monotonic() - node_started
+
+            return DeliverableOutcome(node.name, status, result, error, duration)
+
+        for node in self.nodes.values():
+            tasks[node.name] = asyncio.ensure_future(execute(node))
+
+        pending = set(tasks.values())
+        stop_waiter = asyncio.ensure_future(stop.wait()) if stop is not None else None
+        try:
+            while pending:
+                waiting = (pending | {stop_waiter}) if stop_waiter is not None else pending
+                done, _ = await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+                pending -= done
+                if stop_waiter is not None and stop_waiter in done:
+                    break
+            if pending:
+                logger.warning(f"Выполнение графа остановлено, отменяются артефакты: "
+                               f"{', '.join(n for n, t in tasks.items() if t in pending)}")
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+        except asyncio.CancelledError:
+            for task in tasks.values():
+                task.cancel()
+            raise
+        finally:
+            if stop_waiter is not None:
+                stop_waiter.cancel()
+
+        report.outcomes = {
+            name: (DeliverableOutcome(name, "cancelled", error="выполнение графа остановлено")
+                   if task.cancelled() else task.result())
+            for name, task in tasks.items()
+        }
+        report.wall_time = time.monotonic() - started
+        return report
@@ -0,0 +1,314 @@
+"""
+Подсистема распределенных блокировок заказов.
+
+Уровни блокировки:
+1. Локальный asyncio.Lock на ключ — конкуренция внутри процесса не доходит до Redis.
+2. Redis-блокировка с арендой (SET NX PX), ограниченным ожиданием захвата
+   и экспоненциальным backoff с джиттером.
+3. Fencing token — монотонно растущий номер, выдаваемый при каждом захвате.
+   Хранилища отклоняют запись с токеном меньше уже виденного, поэтому
+   «проснувшийся» владелец с истекшей арендой не может перезаписать результат.
+
+Аренды продлевает один фоновый LockWatchdog на процесс.
+"""
+import asyncio
+import logging
+import random
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# KEYS[1] — ключ блокировки, KEYS[2] — счетчик fencing token; ARGV[1] — владелец, ARGV[2] — аренда (мс)
+ACQUIRE_SCRIPT = """
+if redis.call("set", KEYS[1], ARGV[1], "NX", "PX", ARGV[2]) then
+    return redis.call("incr", KEYS[2])
+else
+    return 0
+end
+"""
+
+RELEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+else
+    return 0
+end
+"""
+
+EXTEND_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("pexpire", KEYS[1], ARGV[2])
+else
+    return 0
+end
+"""
+
+
+class LockAcquisitionTimeout(TimeoutError):
+    """Не удалось захватить блокировку за отведенное время ожидания"""
+    pass
+
+
+class LockLostError(RuntimeError):
+    """Аренда блокировки истекла или была перехвачена другим владельцем"""
+    pass
+
+
+class DistributedLock:
+    """
+    Распределенная блокировка через Redis для предотвращения гонок данных
+    при параллельной обработке одного заказа
+    """
+
+    def __init__(self, redis_client: Any, lock_key: str, timeout: int = 30,
+                 wait_timeout: float = 0.0, retry_interval: float = 0.05,
+                 max_retry_interval: float = 1.0):
+        """
+        Args:
+            timeout: Аренда блокировки в секундах
+            wait_timeout: Максимальное ожидание захвата (0 — одна попытка)
+            retry_interval: Начальная пауза между попытками
+            max_retry_interval: Верхняя граница паузы между попытками
+        """
+        self.redis = redis_client
+        self.lock_key = f"lock:task:{lock_key}"
+        self.fence_key = f"lock:fence:{lock_key}"
+        self.timeout = timeout
+        self.wait_timeout = wait_timeout
+        self.retry_interval = retry_interval
+        self.max_retry_interval = max_retry_interval
+        self.lock_value = str(uuid.uuid4())
+        self.acquired = False
+        self.fencing_token: Optional[int] = None
+        self.lost = asyncio.Event()
+        self.attempts = 0
+
+    async def _try_acquire(self) -> bool:
+        self.attempts += 1
+        token = await self.redis.eval(
+            ACQUIRE_SCRIPT, 2, self.lock_key, self.fence_key, self.lock_value, int(self.timeout * 1000)
+        )
+        if token:
+            self.fencing_token = int(token)
+            self.acquired = True
+            self.lost.clear()
+        return self.acquired
+
+    async def acquire(self) -> bool:
+        """
+        Захват блокировки с ограниченным ожиданием.
+        Паузы между попытками растут экспоненциально, со случайным джиттером
+        (full jitter), чтобы конкурирующие воркеры не синхронизировались.
+        """
+        deadline = time.monotonic() + self.wait_timeout
+        backoff = self.retry_interval
+
+        while True:
+            if await self._try_acquire():
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            await asyncio.sleep(min(random.uniform(0, backoff), remaining))
+            backoff = min(backoff * 2, self.max_retry_interval)
+
+    async def extend(self) -> bool:
+        """Продление аренды блокировки (только если она всё ещё наша)"""
+        if not self.acquired:
+            return False
+
+        try:
+            extended = await self.redis.eval(
+                EXTEND_SCRIPT, 1, self.lock_key, self.lock_value, int(self.timeout * 1000)
+            )
+        except Exception as e:
+            logger.warning(f"Ошибка продления блокировки {self.lock_key}: {str(e)}")
+            return False
+
+        if not extended:
+            logger.error(f"Блокировка {self.lock_key} утеряна: аренда истекла или перехвачена")
+            self.acquired = False
+            self.lost.set()
+        return bool(extended)
+
+    async def release(self):
+        """Освобождение блокировки (только если мы её захватили)"""
+        if not self.acquired:
+            return
+
+        try:
+            await self.redis.eval(RELEASE_SCRIPT, 1, self.lock_key, self.lock_value)
+        except Exception as e:
+            logger.warning(f"Ошибка освобождения блокировки {self.lock_key}: {str(e)}")
+        finally:
+            self.acquired = False
+
+    @property
+    def is_lost(self) -> bool:
+        return self.lost.is_set()
+
+    async def __aenter__(self):
+        if not await self.acquire():
+            raise LockAcquisitionTimeout(
+                f"Не удалось захватить блокировку {self.lock_key} за {self.wait_timeout}с"
+            )
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.release()
+
+
+class LockWatchdog:
+    """
+    Фоновое продление аренд всех удерживаемых блокировок процесса.
+    Проверка выполняется каждые check_interval секунд; аренда продлевается,
+    когда прошла треть её срока с последнего продления.
+    """
+
+    def __init__(self, check_interval: float = 1.0,
+                 on_lost: Optional[Callable[[DistributedLock], None]] = None):
+        self.check_interval = check_interval
+        self.on_lost = on_lost
+        self._leases: Dict[str, DistributedLock] = {}
+        self._renewed_at: Dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"extensions": 0, "lost": 0}
+
+    def watch(self, lock: DistributedLock) -> None:
+        self._leases[lock.lock_value] = lock
+        self._renewed_at[lock.lock_value] = time.monotonic()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="LockWatchdog")
+
+    def unwatch(self, lock: DistributedLock) -> None:
+        self._leases.pop(lock.lock_value, None)
+        self._renewed_at.pop(lock.lock_value, None)
+
+    async def _run(self):
+        while self._leases:
+            await asyncio.sleep(self.check_interval)
+            now = time.monotonic()
+            due = [
+                lock for value, lock in list(self._leases.items())
+                if now - self._renewed_at.get(value, now) >= lock.timeout / 3
+            ]
+            if not due:
+                continue
+            results = await asyncio.gather(*(lock.extend() for lock in due), return_exceptions=True)
+            for lock, extended in zip(due, results):
+                if extended is True:
+                    self._renewed_at[lock.lock_value] = time.monotonic()
+                    self.stats["extensions"] += 1
+                elif lock.is_lost or not lock.acquired:
+                    self.stats["lost"] += 1
+                    self.unwatch(lock)
+                    if self.on_lost:
+                        self.on_lost(lock)
+
+    async def stop(self):
+        self._leases.clear()
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    @property
+    def active_leases(self) -> int:
+        return len(self._leases)
+
+
+class LockManager:
+    """
+    Менеджер блокировок заказов: локальный уровень asyncio + Redis + watchdog.
+
+    Пример:
+        async with lock_manager.lock(job_id) as lease:
+            await db.update_task_status(job_id, "in_progress", fencing_token=lease.fencing_token)
+    """
+
+    def __init__(self, redis_client: Any, lease_timeout: int = 300, wait_timeout: float = 10.0,
+                 retry_interval: float = 0.05, max_retry_interval: float = 1.0,
+                 watchdog: Optional[LockWatchdog] = None):
+        self.redis = redis_client
+        self.lease_timeout = lease_timeout
+        self.wait_timeout = wait_timeout
+        self.retry_interval = retry_interval
+        self.max_retry_interval = max_retry_interval
+        self.watchdog = watchdog or LockWatchdog(check_interval=max(min(lease_timeout / 6, 5.0), 0.05))
+        self._local_locks: Dict[str, asyncio.Lock] = {}
+        self._local_waiters: Dict[str, int] = {}
+        self.stats = {"acquired": 0, "timeouts": 0, "local_contention": 0, "redis_attempts": 0}
+
+    @asynccontextmanager
+    async def lock(self, key: str, wait_timeout: Optional[float] = None) -> AsyncIterator[DistributedLock]:
+        wait_timeout = self.wait_timeout if wait_timeout is None else wait_timeout
+        deadline = time.monotonic() + wait_timeout
+
+        local = self._local_locks.get(key)
+        if local is None:
+            local = self._local_locks[key] = asyncio.Lock()
+        self._local_waiters[key] = self._local_waiters.get(key, 0) + 1
+
+        try:
+            try:
+                if not local.locked():
+                    # Быстрый путь: захват свободного asyncio.Lock не уступает управление
+                    await local.acquire()
+                elif wait_timeout <= 0:
+                    raise asyncio.TimeoutError()
+                else:
+                    self.stats["local_contention"] += 1
+                    await asyncio.wait_for(local.acquire(), timeout=wait_timeout)
+            except asyncio.TimeoutError:
+                self.stats["timeouts"] += 1
+                raise LockAcquisitionTimeout(
+                    f"Блокировка {key} удерживается в этом процессе дольше {wait_timeout}с"
+                )
+
+            try:
+                lease = DistributedLock(
+                    self.redis, key, timeout=self.lease_timeout,
+                    wait_timeout=max(deadline - time.monotonic(), 0),
+                    retry_interval=self.retry_interval,
+                    max_retry_interval=self.max_retry_interval
+                )
+                acquired = await lease.acquire()
+                self.stats["redis_attempts"] += lease.attempts
+                if not acquired:
+                    self.stats["timeouts"] += 1
+                    raise LockAcquisitionTimeout(
+                        f"Не удалось захватить блокировку {lease.lock_key} за {wait_timeout}с"
+                    )
+
+                self.stats["acquired"] += 1
+                self.watchdog.watch(lease)
+                try:
+                    yield lease
+                finally:
+                    self.watchdog.unwatch(lease)
+                    await lease.release()
+            finally:
+                local.release()
+        finally:
+            self._local_waiters[key] -= 1
+            if not self._local_waiters[key]:
+                del self._local_waiters[key]
+                self._local_locks.pop(key, None)
+
+    @property
+    def held_keys(self) -> List[str]:
+        return [key for key, lock in self._local_locks.items() if lock.locked()]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "held": len(self.held_keys),
+            "watched_leases": self.watchdog.active_leases,
+            **{f"watchdog_{k}": v for k, v in self.watchdog.stats.items()},
+        }
@@ -13,6 +13,7 @@ from core.ai_management.intelligent_model_manager import IntelligentModelManager
 from core.config.unified_config_manager import UnifiedConfigManager
 from core.monitoring.intelligent_monitoring_system import IntelligentMonitoringSystem
 from core.security.audit_logger import AuditLogger
+from platforms.job_dedup_index import JobDedupIndex, get_job_dedup_index
 
 logger = logging.getLogger("JobAnalyzer")
 
@@ -50,12 +51,14 @@ class JobAnalyzer:
         config: UnifiedConfigManager,
         ai_manager: IntelligentModelManager,
         monitoring: Optional[IntelligentMonitoringSystem] = None,
-        audit_logger: Optional[AuditLogger] = None
+        audit_logger: Optional[AuditLogger] = None,
+        dedup_index: Optional[JobDedupIndex] = None
     ):
         self.config = config
         self.ai_manager = ai_manager
         self.monitoring = monitoring or IntelligentMonitoringSystem(config)
         self.audit_logger = audit_logger or AuditLogger()
+        self.dedup_index = dedup_index or get_job_dedup_index()
         self._load_rules()
 
         logger.info("✅ JobAnalyzer initialized")
@@ -73,10 +76,20 @@ class JobAnalyzer:
         """
         Анализирует один заказ.
 
+        Каждый уникальный заказ анализируется один раз: повторный вызов для уже
+        проанализированной канонической копии возвращает результат из индекса дедупликации.
+
         :param job_data: Словарь с данными заказа (title, description, budget, deadline и т.д.)
         :return: JobAnalysisResult — структурированная оценка
         """
         job_id = job_data.get("id", "unknown")
+        cached = self.dedup_index.get_analysis(job_data)
+        if cached is not None:
+            if self.monitoring:
+                self.monitoring.record_metric("job.analysis_cache_hits", 1)
+            logger.debug(f"♻️ Job {job_id} already analyzed, reusing result")
+            return cached
+
         try:
             logger.debug(f"🔍 Starting analysis of job {job_id}")
 
@@ -122,9 +135,12 @@ class JobAnalyzer:
                 }
             )
 
+            self.dedup_index.store_analysis(job_data, result)
+
             # Метрики мониторинга
             if self.monitoring:
                 self.monitoring.record_metric("job.analyzed", 1)
+                self.monitoring.record_metric("job.dedup_ratio", self.dedup_index.dedup_ratio)
                 self.monitoring.record_metric("job.relevance.avg", relevance)
                 self.monitoring.record_metric("job.profitability.avg", profitability)
 
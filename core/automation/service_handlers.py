@@ -0,0 +1,255 @@
+"""
+Реестр обработчиков задач FreelanceWorker.
+
+Раньше воркер на каждую задачу заново импортировал модуль сервиса и вызывал
+атрибут класса, поэтому загруженные модели и прогретые кэши не переживали
+задачу. Реестр создает экземпляр каждого сервиса один раз на процесс,
+прогревает его при старте (initialize() сервиса и модели из конфигурации)
+и переиспользует между задачами.
+
+Для каждого типа задачи регистрируются:
+- factory — создание экземпляра сервиса;
+- call — адаптер «экземпляр + payload задачи -> вызов метода сервиса»;
+- warmup — необязательный прогрев (загрузка моделей, подключений).
+
+Метрики по обработчикам: число вызовов, ошибки, задержка (avg/p95) и
+пропускная способность за последнюю минуту; отчет о прогреве — какие
+сервисы и модели загружены при старте и сколько это заняло.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+from core.automation.task_scheduler import _percentile
+
+logger = logging.getLogger(__name__)
+
+THROUGHPUT_WINDOW = 60.0
+
+ServiceFactory = Callable[[], Any]
+HandlerCall = Callable[[Any, Dict[str, Any]], Awaitable[Any]]
+WarmupHook = Callable[[Any], Awaitable[Any]]
+
+
+@dataclass
+class ServiceHandler:
+    """Обработчик одного типа задач и его метрики"""
+    task_type: str
+    factory: ServiceFactory
+    call: HandlerCall
+    warmup: Optional[WarmupHook] = None
+    models: Tuple[str, ...] = ()  # модели, загружаемые при прогреве
+
+    instance: Any = None
+    warm: bool = False
+    warmup_ms: float = 0.0
+    loaded_models: Dict[str, float] = field(default_factory=dict)  # модель -> время загрузки, мс
+    warmup_error: Optional[str] = None
+    calls: int = 0
+    errors: int = 0
+    latency: Deque[float] = field(default_factory=lambda: deque(maxlen=1000))
+    finished_at: Deque[float] = field(default_factory=lambda: deque(maxlen=10000))
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+    def get_stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        recent = sum(1 for finished in self.finished_at if now - finished <= THROUGHPUT_WINDOW)
+        return {
+            "warm": self.warm,
+            "calls": self.calls,
+            "errors": self.errors,
+            "error_rate": round(self.errors / self.calls, 3) if self.calls else 0.0,
+            "latency_ms": {
+                "avg": round(sum(self.latency) / len(self.latency) * 1000, 1) if self.latency else 0.0,
+                "p95": round(_percentile(self.latency, 0.95) * 1000, 1),
+            },
+            "throughput_per_min": recent,
+        }
+
+
+class ServiceHandlerRegistry:
+    """
+    Пример:
+        registry = ServiceHandlerRegistry()
+        registry.register("translation", lambda: TranslationService(config),
+                          lambda service, payload: service.translate(**payload))
+        await registry.warm_up()                  # при старте воркера
+        result = await registry.dispatch("translation", payload)
+    """
+
+    def __init__(self):
+        self._handlers: Dict[str, ServiceHandler] = {}
+        self.startup_report: List[Dict[str, Any]] = []
+
+    def register(self,
+                 task_type: str,
+                 factory: ServiceFactory,
+                 call: HandlerCall,
+                 warmup: Optional[WarmupHook] = None,
+                 models: Iterable[str] = ()) -> None:
+        self._handlers[task_type] = ServiceHandler(task_type, factory, call, warmup, tuple(models))
+
+    def has(self, task_type: str) -> bool:
+        return task_type in self._handlers
+
+    @property
+    def task_types(self) -> List[str]:
+        return list(self._handlers)
+
+    async def _ensure_ready(self, handler: ServiceHandler) -> Any:
+        """Создает и прогревает экземпляр один раз; параллельные задачи ждут первую"""
+        if handler.warm:
+            return handler.instance
+        async with handler.lock:
+            if handler.warm:
+                return handler.instance
+            started = time.monotonic()
+            if handler.instance is None:
+                handler.instance = handler.factory()
+            if handler.warmup:
+                await handler.warmup(handler.instance)
+            model_manager = getattr(handler.instance, "model_manager", None)
+            for model_name in handler.models:
+                if model_name in handler.loaded_models:
+                    continue
+                model_started = time.monotonic()
+                await model_manager.get_model(model_name)
+                handler.loaded_models[model_name] = round((time.monotonic() - model_started) * 1000, 1)
+            handler.warmup_ms = round((time.monotonic() - started) * 1000, 1)
+            handler.warmup_error = None
+            handler.warm = True
+            return handler.instance
+
+    async def warm_up(self, task_types: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Прогрев сервисов при старте. Ошибка прогрева не останавливает воркер:
+        сервис попробует инициализироваться снова при первой задаче.
+        """
+        selected = [self._handlers[t] for t in (task_types or self._handlers) if t in self._handlers]
+
+        async def warm(handler: ServiceHandler) -> None:
+            try:
+                await self._ensure_ready(handler)
+            except Exception as e:
+                handler.warmup_error = f"{type(e).__name__}: {e}"
+                logger.warning(f"Прогрев обработчика {handler.task_type} не удался: {e}")
+
+        await asyncio.gather(*(warm(handler) for handler in selected))
+        self.startup_report = [
+            {
+                "task_type": handler.task_type,
+                "service": type(handler.instance).__name__ if handler.instance is not None else None,
+                "warm": handler.warm,
+                "warmup_ms": handler.warmup_ms,
+                "models": dict(handler.loaded_models),
+                "error": handler.warmup_error,
+            }
+            for handler in selected
+        ]
+        return self.startup_report
+
+    def format_startup_report(self) -> str:
+        lines = ["Прогрев обработчиков задач:"]
+        for entry in self.startup_report:
+            if entry["warm"]:
+                models = ", ".join(f"{name} ({ms} мс)" for name, ms in entry["models"].items()) or "—"
+                lines.append(f"  ✅ {entry['task_type']}: {entry['service']} за {entry['warmup_ms']} мс, модели: {models}")
+            else:
+                lines.append(f"  ⚠️ {entry['task_type']}: не прогрет ({entry['error']})")
+        return "\n".join(lines)
+
+    async def dispatch(self, task_type: str, payload: Dict[str, Any]) -> Any:
+        """Выполнение задачи прогретым экземпляром сервиса"""
+        handler = self._handlers.get(task_type)
+        if handler is None:
+            raise KeyError(f"Нет обработчика для задач типа {task_type}")
+        instance = await self._ensure_ready(handler)
+
+        started = time.monotonic()
+        handler.calls += 1
+        try:
+            return await handler.call(instance, payload)
+        except Exception:
+            handler.errors += 1
+            raise
+        finally:
+            finished = time.monotonic()
+            handler.latency.append(finished - started)
+            handler.finished_at.append(finished)
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {task_type: handler.get_stats() for task_type, handler in self._handlers.items()}
+
+    async def shutdown(self) -> None:
+        """Освобождение ресурсов сервисов, у которых есть shutdown()"""
+        for handler in self._handlers.values():
+            shutdown = getattr(handler.instance, "shutdown", None)
+            if shutdown is None:
+                continue
+            try:
+                result = shutdown()
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as e:
+                logger.warning(f"Ошибка остановки сервиса {handler.task_type}: {e}")
+            handler.instance = None
+            handler.warm = False
+
+
+def build_default_registry(config: Any,
+                           locate: Callable[[str], Any],
+                           preload_models: Optional[Dict[str, List[str]]] = None) -> ServiceHandlerRegistry:
+    """
+    Обработчики стандартных типов задач воркера.
+    Payload задачи передается в метод сервиса как именованные аргументы;
+    locate(name) возвращает зависимость из ServiceLocator (или None).
+    Модули сервисов импортируются при первом создании экземпляра.
+    """
+    preload_models = preload_models or {}
+    registry = ServiceHandlerRegistry()
+
+    def transcription():
+        from services.ai_services.transcription_service import TranscriptionService
+        return TranscriptionService(config)
+
+    def translation():
+        from services.ai_services.translation_service import TranslationService
+        return TranslationService(config=config)
+
+    def copywriting():
+        from services.ai_services.copywriting_service import CopywritingService
+        return CopywritingService(config, locate("ai_manager"))
+
+    def communication():
+        from core.communication.empathetic_communicator import EmpatheticCommunicator
+        return EmpatheticCommunicator(config=config, audit_logger=locate("audit_logger"))
+
+    def payment():
+        from core.payment.enhanced_payment_processor import EnhancedPaymentProcessor
+        return EnhancedPaymentProcessor(config, locate("crypto"), locate("monitoring"),
+                                        locate("audit_logger"), locate("database"))
+
+    def quality_check():
+        from core.automation.quality_controller import QualityController
+        return QualityController(config)
+
+    async def initialize(service):
+        # initialize() части сервисов сообщает о неудаче через False вместо исключения
+        if await service.initialize() is False:
+            raise RuntimeError(f"{type(service).__name__}.initialize() failed")
+
+    registry.register("transcription", transcription, lambda s, p: s.transcribe(**p),
+                      warmup=initialize, models=preload_models.get("transcription", ()))
+    registry.register("translation", translation, lambda s, p: s.translate(**p),
+                      models=preload_models.get("translation", ()))
+    registry.register("copywriting", copywriting, lambda s, p: s.generate(**p),
+                      models=preload_models.get("copywriting", ()))
+    registry.register("communication", communication, lambda s, p: s.generate_response(**p),
+                      warmup=initialize, models=preload_models.get("communication", ()))
+    registry.register("payment", payment, lambda s, p: s.create_invoice(**p), warmup=initialize)
+    registry.register("quality_check", quality_check, lambda s, p: s.assess_and_correct(**p),
+                      models=preload_models.get("quality_check", ()))
+    return registry
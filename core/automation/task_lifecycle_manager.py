@@ -17,6 +17,7 @@ from dataclasses import dataclass, asdict
 from core.automation.job_analyzer import JobAnalyzer
 from core.automation.decision_engine import DecisionEngine
 from core.automation.task_orchestrator import TaskOrchestrator
+from core.ai_management.lazy_model_loader import LazyModelLoader, current_task_phase
 from core.automation.quality_controller import QualityController
 from core.automation.reputation_manager import ReputationManager
 from core.payment.enhanced_payment_processor import EnhancedPaymentProcessor
@@ -101,6 +102,8 @@ class TaskLifecycleManager:
         }
         self.active_tasks: Dict[str, TaskState] = {}
         self._lock = asyncio.Lock()
+        # Модели, загружавшиеся в фазе, запоминаются и предзагружаются при входе в нее
+        self.model_loader = LazyModelLoader.get_instance()
 
     def _init_bidding_engine(self):
         """Инициализация движка подачи предложений"""
@@ -159,6 +162,7 @@ class TaskLifecycleManager:
         logger.info(f"Запущен новый жизненный цикл задачи {task_id} для заказа {job_id}")
 
         # Запуск асинхронной обработки
+        self._prefetch_models(TaskPhase.DISCOVERY)
         asyncio.create_task(self._process_task_lifecycle(task_state))
 
         return task_state
@@ -180,8 +184,12 @@ class TaskLifecycleManager:
                 continue
 
             try:
-                # Выполнение фазы
-                result = await self._execute_phase(phase_handler, task_state)
+                # Выполнение фазы (загрузки моделей в ней привязываются к фазе)
+                phase_token = current_task_phase.set(current_phase.value)
+                try:
+                    result = await self._execute_phase(phase_handler, task_state)
+                finally:
+                    current_task_phase.reset(phase_token)
 
                 if result.success:
                     # Успешное завершение фазы — переход к следующей
@@ -294,11 +302,22 @@ class TaskLifecycleManager:
             task_state.phase_start_time = datetime.now(timezone.utc)
             task_state.phase_attempts = 0
             logger.info(f"Задача {task_state.task_id} перешла в фазу {next_phase.value}")
+            self._prefetch_models(next_phase)
         else:
             # Завершение жизненного цикла
             task_state.current_phase = TaskPhase.COMPLETED
             logger.info(f"Жизненный цикл задачи {task_state.task_id} успешно завершен")
 
+    def _prefetch_models(self, phase: TaskPhase):
+        """
+        Фоновая предзагрузка моделей для фазы и наиболее вероятной следующей за ней
+        (успешный путь), чтобы холодная загрузка не приходилась на выполнение фазы
+        """
+        expected_next = self._get_next_phase(phase, {"suitable": True, "accepted": True})
+        for predicted in (phase, expected_next):
+            if predicted is not None:
+                self.model_loader.prefetch_for_phase(predicted)
+
     def _get_next_phase(self, current_phase: TaskPhase, phase_result: Any) -> Optional[TaskPhase]:
         """
         Логика переходов между фазами с учетом результатов текущей фазы
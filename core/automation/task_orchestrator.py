@@ -7,9 +7,18 @@ import json
 import time
 from typing import Dict, Any, Optional, List
 from datetime import datetime, timezone
-import uuid
 from redis import asyncio as aioredis  # Для распределенных локов
 from core.services.base_service import BaseService, ExecutionContext, ServiceResult
+from core.automation.distributed_lock import (
+    DistributedLock,
+    LockAcquisitionTimeout,
+    LockManager,
+)
+from core.automation.deliverable_graph import (
+    DeliverableGraph,
+    DeliverableNode,
+    ServiceConcurrencyLimiter,
+)
 from core.ai_management.lazy_model_loader import LazyModelLoader
 from services.ai_services.copywriting_service import CopywritingService
 from services.ai_services.translation_service import TranslationService
@@ -18,73 +27,33 @@ from services.storage.database_service import DatabaseService
 logger = logging.getLogger(__name__)
 
 
-class DistributedLock:
-    """
-    Распределенная блокировка через Redis для предотвращения гонок данных
-    при параллельной обработке одного заказа
-    """
-
-    def __init__(self, redis_client: aioredis.Redis, lock_key: str, timeout: int = 30):
-        self.redis = redis_client
-        self.lock_key = f"lock:task:{lock_key}"
-        self.timeout = timeout
-        self.lock_value = str(uuid.uuid4())
-        self.acquired = False
-
-    async def acquire(self) -> bool:
-        """Попытка захвата блокировки с таймаутом"""
-        # Используем SET с опциями NX (только если ключ не существует) и PX (таймаут в мс)
-        result = await self.redis.set(
-            self.lock_key,
-            self.lock_value,
-            nx=True,
-            px=self.timeout * 1000
-        )
-        self.acquired = bool(result)
-        return self.acquired
-
-    async def release(self):
-        """Освобождение блокировки (только если мы её захватили)"""
-        if not self.acquired:
-            return
-
-        # Lua скрипт для атомарной проверки и удаления
-        lua_script = """
-        if redis.call("get", KEYS[1]) == ARGV[1] then
-            return redis.call("del", KEYS[1])
-        else
-            return 0
-        end
-        """
-
-        try:
-            await self.redis.eval(lua_script, 1, self.lock_key, self.lock_value)
-        except Exception as e:
-            logger.warning(f"Ошибка освобождения блокировки {self.lock_key}: {str(e)}")
-        finally:
-            self.acquired = False
-
-    async def __aenter__(self):
-        if not await self.acquire():
-            raise TimeoutError(f"Не удалось захватить блокировку {self.lock_key} за {self.timeout}с")
-        return self
-
-    async def __aexit__(self, exc_type, exc_val, exc_tb):
-        await self.release()
-
-
 class TaskOrchestrator(BaseService):
     """
     Оркестратор задач с защитой от гонок данных и поддержкой распределенной обработки
     """
 
+    # Аренда распределенной блокировки заказа; продлевается watchdog'ом, пока задача выполняется
+    LOCK_TIMEOUT = 300
+    # Максимальное ожидание захвата блокировки заказа
+    LOCK_WAIT_TIMEOUT = 10.0
+    # Лимиты одновременных вызовов ИИ-сервисов на процесс
+    DEFAULT_SERVICE_LIMITS = {"copywriting": 4, "translation": 4}
+    # Таймаут на один артефакт
+    DELIVERABLE_TIMEOUT = 600
+
     def __init__(self, db_service: DatabaseService, redis_client: aioredis.Redis):
         super().__init__(service_name="task_orchestrator")
         self.db_service = db_service
         self.redis_client = redis_client
         self.copywriting_service = CopywritingService()
         self.translation_service = TranslationService()
-        self._task_locks: Dict[str, asyncio.Lock] = {}  # Локальные блокировки для задач
+        # Локальные asyncio-блокировки + Redis-аренды с fencing token
+        self.lock_manager = LockManager(
+            redis_client,
+            lease_timeout=self.LOCK_TIMEOUT,
+            wait_timeout=self.LOCK_WAIT_TIMEOUT
+        )
+        self.service_limiter = ServiceConcurrencyLimiter(self.DEFAULT_SERVICE_LIMITS)
 
     async def _load_dependencies(self):
         """Инициализация зависимостей"""
@@ -110,13 +79,11 @@ class TaskOrchestrator(BaseService):
                 rollback_required=True
             )
 
-        # 1. Захват распределенной блокировки для этого заказа
-        lock = DistributedLock(self.redis_client, job_id, timeout=300)  # 5 минут на выполнение
-
+        # 1. Захват блокировки заказа: сначала локальной, затем распределенной
         try:
-            async with lock:
+            async with self.lock_manager.lock(job_id) as lease:
                 # 2. Проверка, не выполняется ли уже эта задача
-                if not await self._can_start_task(job_id, context):
+                if not await self._can_start_task(job_id, context, lease):
                     return ServiceResult.failure(
                         error=f"Задача для заказа {job_id} уже выполняется или завершена",
                         error_type="TaskAlreadyRunningError",
@@ -126,20 +93,38 @@ class TaskOrchestrator(BaseService):
                     )
 
                 # 3. Маркировка задачи как "в процессе"
-                await self._mark_task_in_progress(job_id, context)
+                await self._mark_task_in_progress(job_id, context, lease)
+
+                # 4. Выполнение основной логики (аренду продлевает watchdog)
+                started = time.time()
+                # Потеря аренды останавливает граф артефактов: результат всё равно не будет записан
+                result = await self._execute_business_logic(context, job_id, job_details, bid_result,
+                                                            stop=lease.lost)
+                if not isinstance(result, ServiceResult):
+                    result = ServiceResult.success(
+                        data=result, context=context, execution_time=time.time() - started
+                    )
 
-                # 4. Выполнение основной логики
-                result = await self._execute_business_logic(context, job_id, job_details, bid_result)
+                if lease.is_lost:
+                    # Запись статуса всё равно будет отклонена по fencing token
+                    return ServiceResult.failure(
+                        error=f"Блокировка заказа {job_id} утеряна во время выполнения",
+                        error_type="LockLostError",
+                        stack_trace="",
+                        context=context,
+                        execution_time=0.0,
+                        rollback_required=True
+                    )
 
                 # 5. Маркировка завершения
                 if result.success:
-                    await self._mark_task_completed(job_id, context, result.data)
+                    await self._mark_task_completed(job_id, context, result.data, lease)
                 else:
-                    await self._mark_task_failed(job_id, context, result.error)
+                    await self._mark_task_failed(job_id, context, result.error, lease)
 
                 return result
 
-        except TimeoutError as e:
+        except LockAcquisitionTimeout as e:
             return ServiceResult.failure(
                 error=f"Таймаут блокировки для заказа {job_id}: {str(e)}",
                 error_type="LockTimeoutError",
@@ -148,27 +133,42 @@ class TaskOrchestrator(BaseService):
                 execution_time=0.0,
                 rollback_required=True
             )
-        except Exception as e:
-            # Обеспечение освобождения блокировки даже при исключениях
-            await lock.release()
-            raise
 
-    async def _can_start_task(self, job_id: str, context: ExecutionContext) -> bool:
-        """Проверка возможности запуска задачи"""
+    async def _can_start_task(self, job_id: str, context: ExecutionContext, lease: DistributedLock) -> bool:
+        """
+        Проверка возможности запуска задачи.
+
+        Статус 'in_progress' при захваченной нами блокировке означает, что аренда
+        прежнего исполнителя истекла (процесс упал или завис): задача перехватывается,
+        а запись прежнего исполнителя будет отклонена по fencing token.
+        """
         # Проверка в БД
         task_status = await self.db_service.get_task_status(job_id)
+        if not task_status:
+            return True
+
+        status = task_status.get('status')
+        if status == 'in_progress':
+            previous_token = task_status.get('fencing_token')
+            if previous_token is None or int(previous_token) < lease.fencing_token:
+                logger.warning(
+                    f"Заказ {job_id}: аренда исполнителя {task_status.get('worker_id')} истекла, "
+                    f"задача перехвачена (fencing token {previous_token} -> {lease.fencing_token})"
+                )
+                return True
 
-        if task_status and task_status.get('status') in ['in_progress', 'completed', 'failed']:
-            logger.warning(f"Заказ {job_id} уже имеет статус: {task_status.get('status')}")
+        if status in ['in_progress', 'completed', 'failed']:
+            logger.warning(f"Заказ {job_id} уже имеет статус: {status}")
             return False
 
         return True
 
-    async def _mark_task_in_progress(self, job_id: str, context: ExecutionContext):
+    async def _mark_task_in_progress(self, job_id: str, context: ExecutionContext, lease: DistributedLock):
         """Маркировка задачи как выполняемой"""
         await self.db_service.update_task_status(
             job_id=job_id,
             status='in_progress',
+            fencing_token=lease.fencing_token,
             started_at=datetime.now(timezone.utc),
             worker_id=context.correlation_id,
             metadata={
@@ -185,15 +185,18 @@ class TaskOrchestrator(BaseService):
             json.dumps({
                 "status": "in_progress",
                 "worker_id": context.correlation_id,
+                "fencing_token": lease.fencing_token,
                 "started_at": time.time()
             })
         )
 
-    async def _mark_task_completed(self, job_id: str, context: ExecutionContext, result_data: Any):
+    async def _mark_task_completed(self, job_id: str, context: ExecutionContext, result_data: Any,
+                                   lease: DistributedLock):
         """Маркировка успешного завершения задачи"""
         await self.db_service.update_task_status(
             job_id=job_id,
             status='completed',
+            fencing_token=lease.fencing_token,
             completed_at=datetime.now(timezone.utc),
             result=result_data
         )
@@ -201,18 +204,21 @@ class TaskOrchestrator(BaseService):
         # Удаление из Redis
         await self.redis_client.delete(f"task:status:{job_id}")
 
-    async def _mark_task_failed(self, job_id: str, context: ExecutionContext, error: str):
+    async def _mark_task_failed(self, job_id: str, context: ExecutionContext, error: str,
+                                lease: DistributedLock):
         """Маркировка неудачного завершения задачи"""
         await self.db_service.update_task_status(
             job_id=job_id,
             status='failed',
+            fencing_token=lease.fencing_token,
             failed_at=datetime.now(timezone.utc),
             error=error,
             error_type="ExecutionError"
         )
 
     async def _execute_business_logic(self, context: ExecutionContext, job_id: str,
-                                    job_details: Dict[str, Any], bid_result: Dict[str, Any]) -> Any:
+                                    job_details: Dict[str, Any], bid_result: Dict[str, Any],
+                                    stop: Optional[asyncio.Event] = None) -> Any:
         """
         Основная бизнес-логика выполнения задачи
         """
@@ -220,36 +226,25 @@ class TaskOrchestrator(BaseService):
         requirements = job_details.get('requirements', {})
         deliverables_required = requirements.get('deliverables', [])
 
-        # Выполнение каждого типа работ
-        deliverables = {}
-
-        for deliverable_type in deliverables_required:
-            if deliverable_type == 'copywriting':
-                content = await self.copywriting_service.generate_content(
-                    prompt=job_details.get('description', ''),
-                    tone=bid_result.get('proposed_tone', 'professional'),
-                    length=job_details.get('word_count', 500),
-                    context=context
-                )
-                deliverables['copywriting'] = content
-
-            elif deliverable_type == 'translation':
-                source_text = job_details.get('source_text', '')
-                target_lang = job_details.get('target_language', 'ru')
-
-                translation = await self.translation_service.translate_text(
-                    text=source_text,
-                    target_language=target_lang,
-                    context=context
-                )
-                deliverables['translation'] = translation
-
-            elif deliverable_type == 'editing':
-                text_to_edit = job_details.get('text_to_edit', '')
-                editing_style = job_details.get('editing_style', 'proofreading')
-
-                edited = await self._perform_editing(text_to_edit, editing_style, context)
-                deliverables['editing'] = edited
+        # Независимые артефакты выполняются параллельно
+        graph = self._build_deliverable_graph(context, job_details, bid_result, deliverables_required)
+        report = await graph.run(stop=stop)
+        deliverables = report.results
+
+        if not report.success:
+            failed = ', '.join(f"{o.name} ({o.status}: {o.error})" for o in report.failed)
+            logger.warning(f"Заказ {job_id}: не выполнены артефакты {failed}")
+            result = ServiceResult.failure(
+                error=f"Не выполнены артефакты: {failed}",
+                error_type="DeliverableExecutionError",
+                stack_trace="",
+                context=context,
+                execution_time=report.wall_time,
+                rollback_required=not deliverables
+            )
+            # Частичные результаты сохраняются для повторного запуска и отчета
+            result.data = {"partial_deliverables": deliverables, "execution_report": report.to_dict()}
+            return result
 
         # Валидация результатов
         validation = await self._validate_deliverables(deliverables, requirements)
@@ -266,6 +261,44 @@ class TaskOrchestrator(BaseService):
 
         return deliverables
 
+    def _build_deliverable_graph(self, context: ExecutionContext, job_details: Dict[str, Any],
+                                 bid_result: Dict[str, Any],
+                                 deliverables_required: List[str]) -> DeliverableGraph:
+        """Построение графа артефактов заказа"""
+        graph = DeliverableGraph(self.service_limiter, default_timeout=self.DELIVERABLE_TIMEOUT)
+
+        for deliverable_type in dict.fromkeys(deliverables_required):
+            if deliverable_type == 'copywriting':
+                async def produce_copywriting(_inputs):
+                    return await self.copywriting_service.generate_content(
+                        prompt=job_details.get('description', ''),
+                        tone=bid_result.get('proposed_tone', 'professional'),
+                        length=job_details.get('word_count', 500),
+                        context=context
+                    )
+                graph.add(DeliverableNode('copywriting', 'copywriting', produce_copywriting))
+
+            elif deliverable_type == 'translation':
+                async def produce_translation(_inputs):
+                    return await self.translation_service.translate_text(
+                        text=job_details.get('source_text', ''),
+                        target_language=job_details.get('target_language', 'ru'),
+                        context=context
+                    )
+                graph.add(DeliverableNode('translation', 'translation', produce_translation))
+
+            elif deliverable_type == 'editing':
+                async def produce_editing(_inputs):
+                    return await self._perform_editing(
+                        job_details.get('text_to_edit', ''),
+                        job_details.get('editing_style', 'proofreading'),
+                        context
+                    )
+                # Редактирование выполняется сервисом копирайтинга
+                graph.add(DeliverableNode('editing', 'copywriting', produce_editing))
+
+        return graph
+
     async def _perform_editing(self, text: str, style: str, context: ExecutionContext) -> str:
         """Выполнение редактирования текста"""
         # Простая реализация — в продакшене использовать полноценный сервис
@@ -324,5 +357,7 @@ class TaskOrchestrator(BaseService):
         return {
             **base_health,
             "redis_connected": redis_healthy,
-            "active_tasks": len(self._task_locks)
+            "active_tasks": len(self.lock_manager.held_keys),
+            "locks": self.lock_manager.get_stats(),
+            "service_concurrency": self.service_limiter.utilization()
         }
\ No newline at end of file
@@ -0,0 +1,500 @@
+"""
+Долговременные очереди задач FreelanceWorker.
+
+Очередь в памяти процесса теряет задачи при падении воркера и не позволяет
+запускать несколько воркеров. Бэкенды хранят задачи вне процесса:
+
+- SQLiteTaskQueue — один узел, несколько процессов (SQLite в режиме WAL,
+  захват задач в транзакции BEGIN IMMEDIATE);
+- RedisStreamsTaskQueue — несколько узлов (Redis Streams с группой
+  потребителей);
+- InMemoryTaskQueue — та же семантика в памяти, для тестов.
+
+Общая семантика — доставка «хотя бы один раз»:
+
+- claim() выдает пачку задач и скрывает их на visibility_timeout; если воркер
+  не подтвердил задачу (ack) за это время, она снова становится доступной
+  другим воркерам. Длинные задачи продлевают аренду через extend();
+- nack() возвращает задачу в очередь (в т.ч. с задержкой и обновленной
+  спецификацией — счетчиком повторов);
+- ключ идемпотентности (по умолчанию task_id) не дает поставить одну задачу
+  дважды в течение idempotency_ttl;
+- квитанция (receipt) привязана к конкретной выдаче: подтверждение от воркера,
+  чья аренда истекла и задача выдана другому, игнорируется (SQLite, память).
+
+Порядок внутри пачки по приоритету обеспечивает локальный TaskScheduler.
+"""
+import itertools
+import json
+import logging
+import os
+import socket
+import time
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+from services.storage.sqlite_pool import SQLiteConnectionPool
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_PATH = "data/queue/tasks.db"
+DEFAULT_IDEMPOTENCY_TTL = 24 * 3600.0
+
+
+@dataclass
+class ClaimedTask:
+    """Выданная воркеру задача"""
+    receipt: str
+    task_spec: Dict[str, Any]
+    deliveries: int  # сколько раз задача выдавалась (больше 1 — повторная доставка)
+
+
+def _idempotency_key(task_spec: Dict[str, Any], idempotency_key: Optional[str]) -> str:
+    return str(idempotency_key or task_spec.get("idempotency_key") or task_spec["task_id"])
+
+
+class TaskQueueBackend(ABC):
+    """Интерфейс долговременной очереди задач"""
+
+    def __init__(self, idempotency_ttl: float = DEFAULT_IDEMPOTENCY_TTL):
+        self.idempotency_ttl = idempotency_ttl
+        self.stats = {"enqueued": 0, "duplicates": 0, "claimed": 0, "redelivered": 0,
+                      "acked": 0, "nacked": 0, "claim_calls": 0}
+
+    async def open(self) -> None:
+        """Подготовка хранилища; по умолчанию ничего не требуется (необязательный хук)"""
+        return None
+
+    async def close(self) -> None:
+        """Освобождение соединений; по умолчанию ничего не требуется (необязательный хук)"""
+        return None
+
+    @abstractmethod
+    async def enqueue(self, task_spec: Dict[str, Any], idempotency_key: Optional[str] = None) -> bool:
+        """Постановка задачи; False — задача с таким ключом уже ставилась"""
+
+    @abstractmethod
+    async def claim(self, max_tasks: int, visibility_timeout: float) -> List[ClaimedTask]:
+        """Захват до max_tasks доступных задач на visibility_timeout секунд"""
+
+    @abstractmethod
+    async def ack(self, receipts: Sequence[str]) -> None:
+        """Подтверждение выполнения (задачи удаляются из очереди)"""
+
+    @abstractmethod
+    async def nack(self, receipt: str, task_spec: Optional[Dict[str, Any]] = None, delay: float = 0.0) -> None:
+        """Возврат задачи в очередь через delay секунд (с обновленной спецификацией)"""
+
+    @abstractmethod
+    async def extend(self, receipts: Sequence[str], visibility_timeout: float) -> None:
+        """Продление аренды выполняющихся задач"""
+
+    @abstractmethod
+    async def depth(self) -> int:
+        """Число неподтвержденных задач (доступных и захваченных)"""
+
+    def _count_claimed(self, claimed: List[ClaimedTask]) -> None:
+        self.stats["claim_calls"] += 1
+        self.stats["claimed"] += len(claimed)
+        self.stats["redelivered"] += sum(1 for task in claimed if task.deliveries > 1)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"backend": type(self).__name__, **self.stats}
+
+
+# ------------------------------------------------------------------ память
+
+class _Message:
+    __slots__ = ("task_spec", "priority", "seq", "visible_at", "deliveries", "token")
+
+    def __init__(self, task_spec: Dict[str, Any], seq: int):
+        self.task_spec = task_spec
+        self.priority = task_spec.get("priority", 0)
+        self.seq = seq
+        self.visible_at = time.monotonic()
+        self.deliveries = 0
+        self.token: Optional[str] = None
+
+
+class InMemoryTaskQueue(TaskQueueBackend):
+    """Очередь в памяти процесса с семантикой долговременных бэкендов (для тестов)"""
+
+    def __init__(self, idempotency_ttl: float = DEFAULT_IDEMPOTENCY_TTL):
+        super().__init__(idempotency_ttl)
+        self._messages: Dict[str, _Message] = {}
+        self._keys: Dict[str, float] = {}
+        self._seq = itertools.count(1)
+
+    @staticmethod
+    def _split(receipt: str) -> List[str]:
+        return receipt.split(":", 1)
+
+    async def enqueue(self, task_spec: Dict[str, Any], idempotency_key: Optional[str] = None) -> bool:
+        now = time.monotonic()
+        key = _idempotency_key(task_spec, idempotency_key)
+        if self._keys.get(key, 0) > now:
+            self.stats["duplicates"] += 1
+            return False
+        self._keys[key] = now + self.idempotency_ttl
+        seq = next(self._seq)
+        self._messages[str(seq)] = _Message(json.loads(json.dumps(task_spec, default=str)), seq)
+        self.stats["enqueued"] += 1
+        return True
+
+    async def claim(self, max_tasks: int, visibility_timeout: float) -> List[ClaimedTask]:
+        now = time.monotonic()
+        visible = sorted((m for m in self._messages.values() if m.visible_at <= now),
+                         key=lambda m: (-m.priority, m.seq))[:max_tasks]
+        token = uuid.uuid4().hex
+        claimed = []
+        for message in visible:
+            message.visible_at = now + visibility_timeout
+            message.deliveries += 1
+            message.token = token
+            claimed.append(ClaimedTask(f"{message.seq}:{token}", dict(message.task_spec), message.deliveries))
+        self._count_claimed(claimed)
+        return claimed
+
+    def _owned(self, receipt: str) -> Optional[_Message]:
+        message_id, token = self._split(receipt)
+        message = self._messages.get(message_id)
+        return message if message is not None and message.token == token else None
+
+    async def ack(self, receipts: Sequence[str]) -> None:
+        for receipt in receipts:
+            if self._owned(receipt) is not None:
+                del self._messages[self._split(receipt)[0]]
+                self.stats["acked"] += 1
+
+    async def nack(self, receipt: str, task_spec: Optional[Dict[str, Any]] = None, delay: float = 0.0) -> None:
+        message = self._owned(receipt)
+        if message is None:
+            return
+        if task_spec is not None:
+            message.task_spec = json.loads(json.dumps(task_spec, default=str))
+        message.visible_at = time.monotonic() + delay
+        message.token = None
+        self.stats["nacked"] += 1
+
+    async def extend(self, receipts: Sequence[str], visibility_timeout: float) -> None:
+        for receipt in receipts:
+            message = self._owned(receipt)
+            if message is not None:
+                message.visible_at = time.monotonic() + visibility_timeout
+
+    async def depth(self) -> int:
+        return len(self._messages)
+
+
+# ------------------------------------------------------------------ SQLite
+
+class SQLiteTaskQueue(TaskQueueBackend):
+    """
+    Очередь в SQLite (WAL) для одного узла: несколько процессов-воркеров
+    работают с одним файлом, захват пачки — одна транзакция UPDATE ... RETURNING.
+    Время видимости хранится в часах реального времени, чтобы быть общим
+    для процессов.
+    """
+
+    def __init__(self, path: str = DEFAULT_QUEUE_PATH, idempotency_ttl: float = DEFAULT_IDEMPOTENCY_TTL,
+                 pool: Optional[SQLiteConnectionPool] = None):
+        super().__init__(idempotency_ttl)
+        self.path = path
+        self.pool = pool or SQLiteConnectionPool(path, readers=1)
+
+    async def open(self) -> None:
+        await self.pool.open()
+
+        async def create_schema(conn):
+            await conn.execute("""
+                CREATE TABLE IF NOT EXISTS task_queue (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    task_type TEXT NOT NULL,
+                    priority INTEGER NOT NULL DEFAULT 0,
+                    task_spec TEXT NOT NULL,
+                    visible_at REAL NOT NULL,
+                    deliveries INTEGER NOT NULL DEFAULT 0,
+                    claim_token TEXT,
+                    created_at REAL NOT NULL
+                )
+            """)
+            await conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_task_queue_visible ON task_queue (visible_at)"
+            )
+            await conn.execute("""
+                CREATE TABLE IF NOT EXISTS task_queue_keys (
+                    key TEXT PRIMARY KEY,
+                    expires_at REAL NOT NULL
+                )
+            """)
+
+        await self.pool.write(create_schema)
+
+    async def close(self) -> None:
+        await self.pool.close()
+
+    @staticmethod
+    def _split(receipt: str) -> List[Any]:
+        task_id, token = receipt.split(":", 1)
+        return [int(task_id), token]
+
+    async def enqueue(self, task_spec: Dict[str, Any], idempotency_key: Optional[str] = None) -> bool:
+        key = _idempotency_key(task_spec, idempotency_key)
+        now = time.time()
+
+        async def operation(conn):
+            # Живой ключ не перезаписывается: rowcount 0 — дубликат
+            cursor = await conn.execute(
+                "INSERT INTO task_queue_keys (key, expires_at) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET expires_at = excluded.expires_at "
+                "WHERE task_queue_keys.expires_at < ?",
+                (key, now + self.idempotency_ttl, now),
+            )
+            if cursor.rowcount == 0:
+                return False
+            await conn.execute(
+                "INSERT INTO task_queue (task_type, priority, task_spec, visible_at, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (task_spec["type"], int(task_spec.get("priority", 0)),
+                 json.dumps(task_spec, ensure_ascii=False, default=str), now, now),
+            )
+            return True
+
+        added = await self.pool.write(operation)
+        self.stats["enqueued" if added else "duplicates"] += 1
+        return added
+
+    async def claim(self, max_tasks: int, visibility_timeout: float) -> List[ClaimedTask]:
+        token = uuid.uuid4().hex
+        now = time.time()
+
+        async def operation(conn):
+            cursor = await conn.execute(
+                "UPDATE task_queue SET visible_at = ?, deliveries = deliveries + 1, claim_token = ? "
+                "WHERE id IN (SELECT id FROM task_queue WHERE visible_at <= ? "
+                "ORDER BY priority DESC, id LIMIT ?) "
+                "RETURNING id, priority, task_spec, deliveries",
+                (now + visibility_timeout, token, now, max_tasks),
+            )
+            return await cursor.fetchall()
+
+        # RETURNING не сохраняет порядок подзапроса
+        rows = sorted(await self.pool.write(operation), key=lambda row: (-row[1], row[0]))
+        claimed = [ClaimedTask(f"{row[0]}:{token}", json.loads(row[2]), row[3]) for row in rows]
+        self._count_claimed(claimed)
+        return claimed
+
+    async def ack(self, receipts: Sequence[str]) -> None:
+        if not receipts:
+            return
+        now = time.time()
+
+        async def operation(conn):
+            await conn.executemany("DELETE FROM task_queue WHERE id = ? AND claim_token = ?",
+                                   [self._split(receipt) for receipt in receipts])
+            # Попутно удаляются истекшие ключи идемпотентности
+            await conn.execute("DELETE FROM task_queue_keys WHERE expires_at < ?", (now,))
+
+        await self.pool.write(operation)
+        self.stats["acked"] += len(receipts)
+
+    async def nack(self, receipt: str, task_spec: Optional[Dict[str, Any]] = None, delay: float = 0.0) -> None:
+        spec_json = json.dumps(task_spec, ensure_ascii=False, default=str) if task_spec is not None else None
+
+        async def operation(conn):
+            await conn.execute(
+                "UPDATE task_queue SET visible_at = ?, task_spec = COALESCE(?, task_spec), claim_token = NULL "
+                "WHERE id = ? AND claim_token = ?",
+                (time.time() + delay, spec_json, *self._split(receipt)),
+            )
+
+        await self.pool.write(operation)
+        self.stats["nacked"] += 1
+
+    async def extend(self, receipts: Sequence[str], visibility_timeout: float) -> None:
+        if not receipts:
+            return
+        visible_at = time.time() + visibility_timeout
+
+        async def operation(conn):
+            await conn.executemany("UPDATE task_queue SET visible_at = ? WHERE id = ? AND claim_token = ?",
+                                   [(visible_at, *self._split(receipt)) for receipt in receipts])
+
+        await self.pool.write(operation)
+
+    async def depth(self) -> int:
+        async with self.pool.reader() as conn:
+            cursor = await conn.execute("SELECT COUNT(*) FROM task_queue")
+            row = await cursor.fetchone()
+        return row[0]
+
+
+# ------------------------------------------------------------------- Redis
+
+# KEYS[1] — отложенные задачи (sorted set), KEYS[2] — поток; ARGV[1] — текущее время, ARGV[2] — лимит
+PROMOTE_DELAYED_SCRIPT = """
+local items = redis.call("ZRANGEBYSCORE", KEYS[1], "-inf", ARGV[1], "LIMIT", 0, ARGV[2])
+for _, item in ipairs(items) do
+    redis.call("ZREM", KEYS[1], item)
+    redis.call("XADD", KEYS[2], "*", "task", item)
+end
+return #items
+"""
+
+
+class RedisStreamsTaskQueue(TaskQueueBackend):
+    """
+    Очередь на Redis Streams (Redis 6.2+) для нескольких узлов.
+
+    Воркеры — потребители одной группы: новые задачи читаются XREADGROUP,
+    задачи упавших воркеров (без подтверждения дольше visibility_timeout)
+    перехватываются XAUTOCLAIM. Отложенные повторы ждут в sorted set и
+    переносятся в поток Lua-скриптом атомарно.
+    Потоки упорядочены по времени поступления; приоритет учитывается
+    локальным планировщиком внутри захваченной пачки.
+    """
+
+    def __init__(self,
+                 redis: Any = None,
+                 url: str = "redis://localhost:6379/0",
+                 stream: str = "freelance:tasks",
+                 group: str = "freelance-workers",
+                 consumer: Optional[str] = None,
+                 idempotency_ttl: float = DEFAULT_IDEMPOTENCY_TTL):
+        super().__init__(idempotency_ttl)
+        self.redis = redis
+        self.url = url
+        self.stream = stream
+        self.group = group
+        self.consumer = consumer or f"{socket.gethostname()}:{os.getpid()}"
+        self.delayed_key = f"{stream}:delayed"
+        self._promote_delayed = None
+
+    async def open(self) -> None:
+        if self.redis is None:
+            from redis import asyncio as aioredis
+            self.redis = aioredis.from_url(self.url, decode_responses=True)
+        try:
+            await self.redis.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except Exception as e:
+            if "BUSYGROUP" not in str(e):  # группа уже создана другим воркером
+                raise
+        self._promote_delayed = self.redis.register_script(PROMOTE_DELAYED_SCRIPT)
+
+    async def close(self) -> None:
+        if self.redis is not None:
+            await self.redis.close()
+
+    def _key(self, key: str) -> str:
+        return f"{self.stream}:key:{key}"
+
+    async def enqueue(self, task_spec: Dict[str, Any], idempotency_key: Optional[str] = None) -> bool:
+        key = self._key(_idempotency_key(task_spec, idempotency_key))
+        if not await self.redis.set(key, 1, nx=True, ex=int(self.idempotency_ttl)):
+            self.stats["duplicates"] += 1
+            return False
+        try:
+            await self.redis.xadd(self.stream, {"task": json.dumps(task_spec, ensure_ascii=False, default=str)})
+        except Exception:
+            await self.redis.delete(key)
+            raise
+        self.stats["enqueued"] += 1
+        return True
+
+    async def _deliveries(self, message_id: str) -> int:
+        pending = await self.redis.xpending_range(self.stream, self.group, min=message_id, max=message_id, count=1)
+        return pending[0]["times_delivered"] if pending else 1
+
+    async def claim(self, max_tasks: int, visibility_timeout: float) -> List[ClaimedTask]:
+        await self._promote_delayed(keys=[self.delayed_key, self.stream], args=[time.time(), 100])
+
+        claimed: List[ClaimedTask] = []
+        # Задачи воркеров, не подтвердивших их за visibility_timeout
+        reclaimed = await self.redis.xautoclaim(self.stream, self.group, self.consumer,
+                                                min_idle_time=int(visibility_timeout * 1000),
+                                                start_id="0-0", count=max_tasks)
+        for message_id, fields in reclaimed[1]:
+            if fields:  # удаленная запись возвращается без полей
+                claimed.append(ClaimedTask(message_id, json.loads(fields["task"]),
+                                           await self._deliveries(message_id)))
+
+        if len(claimed) < max_tasks:
+            response = await self.redis.xreadgroup(self.group, self.consumer, {self.stream: ">"},
+                                                   count=max_tasks - len(claimed))
+            for _, messages in response or []:
+                claimed.extend(ClaimedTask(message_id, json.loads(fields["task"]), 1)
+                               for message_id, fields in messages)
+
+        self._count_claimed(claimed)
+        return claimed
+
+    async def ack(self, receipts: Sequence[str]) -> None:
+        if not receipts:
+            return
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.xack(self.stream, self.group, *receipts)
+            pipe.xdel(self.stream, *receipts)
+            await pipe.execute()
+        self.stats["acked"] += len(receipts)
+
+    async def nack(self, receipt: str, task_spec: Optional[Dict[str, Any]] = None, delay: float = 0.0) -> None:
+        if task_spec is None:
+            entries = await self.redis.xrange(self.stream, min=receipt, max=receipt)
+            if not entries:
+                return
+            task_json = entries[0][1]["task"]
+        else:
+            task_json = json.dumps(task_spec, ensure_ascii=False, default=str)
+
+        async with self.redis.pipeline(transaction=True) as pipe:
+            if delay > 0:
+                pipe.zadd(self.delayed_key, {task_json: time.time() + delay})
+            else:
+                pipe.xadd(self.stream, {"task": task_json})
+            pipe.xack(self.stream, self.group, receipt)
+            pipe.xdel(self.stream, receipt)
+            await pipe.execute()
+        self.stats["nacked"] += 1
+
+    async def extend(self, receipts: Sequence[str], visibility_timeout: float) -> None:
+        if receipts:
+            # XCLAIM тем же потребителем сбрасывает время простоя записи
+            await self.redis.xclaim(self.stream, self.group, self.consumer, 0, list(receipts), justid=True)
+
+    async def depth(self) -> int:
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.xlen(self.stream)
+            pipe.zcard(self.delayed_key)
+            stream_length, delayed = await pipe.execute()
+        return stream_length + delayed
+
+
+def create_task_queue_backend(options: Optional[Dict[str, Any]] = None) -> Optional[TaskQueueBackend]:
+    """
+    Бэкенд по конфигурации worker.queue:
+        {"backend": "sqlite", "path": "data/queue/tasks.db"}
+        {"backend": "redis", "url": "redis://...", "stream": "freelance:tasks"}
+        {"backend": "memory"}
+        {"backend": "local"} — без долговременной очереди (только в памяти воркера),
+                               по умолчанию, если бэкенд не указан
+    """
+    options = dict(options or {})
+    backend = options.pop("backend", "local")
+    idempotency_ttl = options.pop("idempotency_ttl", DEFAULT_IDEMPOTENCY_TTL)
+    if backend == "local":
+        return None
+    if backend == "memory":
+        return InMemoryTaskQueue(idempotency_ttl=idempotency_ttl)
+    if backend == "sqlite":
+        return SQLiteTaskQueue(path=options.get("path", DEFAULT_QUEUE_PATH), idempotency_ttl=idempotency_ttl)
+    if backend == "redis":
+        return RedisStreamsTaskQueue(
+            url=options.get("url", "redis://localhost:6379/0"),
+            stream=options.get("stream", "freelance:tasks"),
+            group=options.get("group", "freelance-workers"),
+            consumer=options.get("consumer"),
+            idempotency_ttl=idempotency_ttl,
+        )
+    raise ValueError(f"Неизвестный бэкенд очереди задач: {backend}")
@@ -0,0 +1,326 @@
+"""
+Планировщик задач фонового воркера.
+
+Заменяет неограниченную FIFO-очередь FreelanceWorker:
+
+- приоритет с «старением»: эффективный приоритет задачи растет на 1 за каждые
+  aging_interval секунд ожидания, поэтому низкоприоритетные задачи не голодают.
+  Все задачи стареют с одной скоростью, и порядок двух задач от текущего времени
+  не зависит — ключ кучи вычисляется один раз при постановке;
+- лимит одновременного выполнения по типу задачи (например, 1 транскрибация,
+  8 копирайтингов): задача типа без свободного слота пропускается, и следующей
+  выдается лучшая задача другого типа;
+- ограниченная очередь: put() ждет свободного места (backpressure), а по
+  таймауту выбрасывает asyncio.QueueFull;
+- повторы с экспоненциальной задержкой и джиттером вместо немедленной
+  постановки в хвост;
+- очередь недоставленных задач (DLQ) в JSONL-файле, из которой задачи можно
+  вернуть в работу;
+- метрики: глубина очереди по типам, время ожидания и выполнения (avg/p95).
+"""
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DEAD_LETTER_PATH = "data/state/dead_letter_queue.jsonl"
+
+# Лимиты одновременного выполнения по типу задачи
+DEFAULT_TYPE_CONCURRENCY = {
+    "transcription": 1,
+    "translation": 4,
+    "copywriting": 8,
+    "communication": 8,
+    "payment": 2,
+    "quality_check": 4,
+}
+
+
+def _percentile(values: Deque[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class TaskScheduler:
+    """
+    Пример:
+        scheduler = TaskScheduler(type_concurrency={"transcription": 1})
+        await scheduler.put(task_spec)            # ждет, если очередь заполнена
+        task_spec = await scheduler.get(timeout=5.0)
+        try:
+            ...
+        except Exception as e:
+            if not await scheduler.retry(task_spec, e):
+                ...                               # задача в DLQ
+        finally:
+            await scheduler.task_done(task_spec)
+    """
+
+    def __init__(self,
+                 max_queue_size: int = 1000,
+                 type_concurrency: Optional[Dict[str, int]] = None,
+                 default_concurrency: int = 4,
+                 aging_interval: float = 30.0,
+                 retry_base_delay: float = 2.0,
+                 retry_max_delay: float = 300.0,
+                 dead_letter_path: Optional[str] = DEFAULT_DEAD_LETTER_PATH,
+                 latency_window: int = 1000):
+        """
+        Args:
+            max_queue_size: Максимум задач в очереди (включая ожидающие повтора)
+            type_concurrency: Лимиты одновременного выполнения по типу задачи
+            default_concurrency: Лимит для типов, не указанных в type_concurrency
+            aging_interval: За сколько секунд ожидания приоритет растет на 1
+            retry_base_delay: Задержка первого повтора (удваивается с каждой попыткой)
+            retry_max_delay: Максимальная задержка повтора
+            dead_letter_path: JSONL-файл недоставленных задач (None — без сохранения)
+            latency_window: Сколько последних измерений задержки хранить для метрик
+        """
+        self.max_queue_size = max_queue_size
+        self.type_concurrency = {**DEFAULT_TYPE_CONCURRENCY, **(type_concurrency or {})}
+        self.default_concurrency = default_concurrency
+        self.aging_interval = aging_interval
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.dead_letter_path = Path(dead_letter_path) if dead_letter_path else None
+        # Файл DLQ дописывается и переписывается в потоках пула
+        self._dead_letter_lock = threading.Lock()
+
+        # Кучи готовых задач по типу: (ключ старения, порядковый номер, время постановки, задача)
+        self._ready: Dict[str, List[Tuple[float, int, float, Dict[str, Any]]]] = {}
+        # Задачи, ожидающие повтора: (время готовности, порядковый номер, задача)
+        self._delayed: List[Tuple[float, int, Dict[str, Any]]] = []
+        self._running: Dict[str, int] = {}
+        self._started: Dict[str, float] = {}
+        self._queued = 0
+        self._seq = itertools.count()
+        self._condition = asyncio.Condition()
+
+        self._wait_latency: Deque[float] = deque(maxlen=latency_window)
+        self._run_latency: Deque[float] = deque(maxlen=latency_window)
+        self.stats = {"enqueued": 0, "completed": 0, "retried": 0, "dead_lettered": 0,
+                      "rejected": 0, "backpressure_waits": 0}
+
+    # ------------------------------------------------------- настройка
+
+    def concurrency_limit(self, task_type: str) -> int:
+        return self.type_concurrency.get(task_type, self.default_concurrency)
+
+    def set_concurrency(self, task_type: str, limit: int) -> None:
+        """Изменение лимита типа (действует для следующих выдач задач)"""
+        self.type_concurrency[task_type] = max(1, int(limit))
+
+    # --------------------------------------------------------- очередь
+
+    def _push_ready(self, task_spec: Dict[str, Any]) -> None:
+        now = time.monotonic()
+        # Чем меньше ключ, тем раньше задача: priority + ожидание / aging_interval
+        key = now / self.aging_interval - float(task_spec.get("priority", 0))
+        heapq.heappush(self._ready.setdefault(task_spec["type"], []), (key, next(self._seq), now, task_spec))
+
+    async def put(self, task_spec: Dict[str, Any], timeout: Optional[float] = None) -> None:
+        """
+        Постановка задачи. Если очередь заполнена, производитель ждет
+        освобождения места; по истечении timeout выбрасывается asyncio.QueueFull.
+        """
+        async with self._condition:
+            if self._queued >= self.max_queue_size:
+                self.stats["backpressure_waits"] += 1
+                try:
+                    await asyncio.wait_for(
+                        self._condition.wait_for(lambda: self._queued < self.max_queue_size), timeout
+                    )
+                except asyncio.TimeoutError:
+                    self.stats["rejected"] += 1
+                    raise asyncio.QueueFull(f"Очередь задач заполнена ({self.max_queue_size})") from None
+            self._push_ready(task_spec)
+            self._queued += 1
+            self.stats["enqueued"] += 1
+            self._condition.notify_all()
+
+    def _promote_delayed(self, now: float) -> None:
+        while self._delayed and self._delayed[0][0] <= now:
+            _, _, task_spec = heapq.heappop(self._delayed)
+            self._push_ready(task_spec)
+
+    def _pop_runnable(self) -> Optional[Tuple[float, Dict[str, Any]]]:
+        best_type = None
+        for task_type, heap in self._ready.items():
+            if not heap or self._running.get(task_type, 0) >= self.concurrency_limit(task_type):
+                continue
+            if best_type is None or heap[0] < self._ready[best_type][0]:
+                best_type = task_type
+        if best_type is None:
+            return None
+        _, _, enqueued_at, task_spec = heapq.heappop(self._ready[best_type])
+        return enqueued_at, task_spec
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Следующая задача с учетом приоритета и лимитов типов; None — если за
+        timeout не появилось задачи, которую можно запустить.
+        Слот типа занят до вызова task_done().
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout if timeout is not None else None
+        async with self._condition:
+            while True:
+                now = time.monotonic()
+                self._promote_delayed(now)
+                entry = self._pop_runnable()
+                if entry is not None:
+                    enqueued_at, task_spec = entry
+                    self._queued -= 1
+                    self._running[task_spec["type"]] = self._running.get(task_spec["type"], 0) + 1
+                    self._started[task_spec["task_id"]] = now
+                    self._wait_latency.append(now - enqueued_at)
+                    self._condition.notify_all()
+                    return task_spec
+
+                waits = []
+                if self._delayed:
+                    waits.append(self._delayed[0][0] - now)
+                if deadline is not None:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        return None
+                    waits.append(remaining)
+                try:
+                    await asyncio.wait_for(self._condition.wait(), min(waits) if waits else None)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def task_done(self, task_spec: Dict[str, Any]) -> None:
+        """Освобождение слота типа после выполнения (успешного или нет)"""
+        async with self._condition:
+            task_type = task_spec["type"]
+            self._running[task_type] = max(0, self._running.get(task_type, 0) - 1)
+            started = self._started.pop(task_spec["task_id"], None)
+            if started is not None:
+                self._run_latency.append(time.monotonic() - started)
+            self.stats["completed"] += 1
+            self._condition.notify_all()
+
+    # -------------------------------------------------- повторы и DLQ
+
+    def retry_delay(self, retry_count: int) -> float:
+        """Экспоненциальная задержка с джиттером (50–100% от расчетной)"""
+        delay = min(self.retry_max_delay, self.retry_base_delay * 2 ** retry_count)
+        return delay * random.uniform(0.5, 1.0)
+
+    async def retry(self, task_spec: Dict[str, Any], error: BaseException) -> bool:
+        """
+        Повтор задачи после задержки. Повторы не ограничиваются размером
+        очереди (иначе воркер мог бы заблокироваться на собственной задаче).
+
+        Returns:
+            False, если попытки исчерпаны и задача перенесена в DLQ
+        """
+        retry_count = task_spec.get("retry_count", 0)
+        if retry_count >= task_spec.get("max_retries", 3):
+            await self.dead_letter(task_spec, error)
+            return False
+
+        delay = self.retry_delay(retry_count)
+        task_spec["retry_count"] = retry_count + 1
+        async with self._condition:
+            heapq.heappush(self._delayed, (time.monotonic() + delay, next(self._seq), task_spec))
+            self._queued += 1
+            self.stats["retried"] += 1
+            self._condition.notify_all()
+        logger.info(f"Повтор задачи {task_spec['task_id']} через {delay:.1f} сек "
+                    f"(попытка {retry_count + 2})")
+        return True
+
+    async def dead_letter(self, task_spec: Dict[str, Any], error: BaseException) -> None:
+        """Перенос задачи в DLQ"""
+        self.stats["dead_lettered"] += 1
+        record = {"task": task_spec, "error": repr(error), "failed_at": time.time()}
+        if self.dead_letter_path:
+            await asyncio.to_thread(self._append_dead_letter, record)
+        logger.warning(f"Задача {task_spec.get('task_id')} перенесена в DLQ: {error!r}")
+
+    def _append_dead_letter(self, record: Dict[str, Any]) -> None:
+        try:
+            with self._dead_letter_lock:
+                self.dead_letter_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.dead_letter_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        except Exception as e:
+            logger.error(f"Не удалось сохранить задачу в DLQ: {e}")
+
+    def dead_letters(self) -> List[Dict[str, Any]]:
+        """Записи DLQ (задача, ошибка, время отказа)"""
+        with self._dead_letter_lock:
+            return self._read_dead_letters()
+
+    def _read_dead_letters(self) -> List[Dict[str, Any]]:
+        if not self.dead_letter_path or not self.dead_letter_path.exists():
+            return []
+        records = []
+        with open(self.dead_letter_path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    records.append(json.loads(line))
+        return records
+
+    def _take_dead_letters(self, task_ids: Optional[List[str]]) -> List[Dict[str, Any]]:
+        """Извлечение записей из DLQ: файл переписывается без них под той же блокировкой, что и дозапись"""
+        with self._dead_letter_lock:
+            records = self._read_dead_letters()
+            replay = [r for r in records if task_ids is None or r["task"].get("task_id") in task_ids]
+            if self.dead_letter_path and replay:
+                keep = [r for r in records if r not in replay]
+                tmp_path = self.dead_letter_path.with_suffix(".tmp")
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    f.writelines(json.dumps(r, ensure_ascii=False, default=str) + "\n" for r in keep)
+                os.replace(tmp_path, self.dead_letter_path)
+            return replay
+
+    async def replay_dead_letters(self, task_ids: Optional[List[str]] = None) -> int:
+        """
+        Возврат задач из DLQ в очередь со сброшенным счетчиком повторов.
+
+        Args:
+            task_ids: Какие задачи вернуть (по умолчанию — все)
+        """
+        replay = await asyncio.to_thread(self._take_dead_letters, task_ids)
+        for record in replay:
+            await self.put({**record["task"], "retry_count": 0})
+        return len(replay)
+
+    # --------------------------------------------------------- метрики
+
+    def qsize(self) -> int:
+        return self._queued
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Глубина очереди, занятость слотов по типам и задержки (мс)"""
+        return {
+            **self.stats,
+            "depth": self._queued,
+            "ready": {task_type: len(heap) for task_type, heap in self._ready.items() if heap},
+            "delayed": len(self._delayed),
+            "running": {task_type: count for task_type, count in self._running.items() if count},
+            "utilization": round(self._queued / self.max_queue_size, 3),
+            "wait_ms": {
+                "avg": round(sum(self._wait_latency) / len(self._wait_latency) * 1000, 1) if self._wait_latency else 0.0,
+                "p95": round(_percentile(self._wait_latency, 0.95) * 1000, 1),
+            },
+            "run_ms": {
+                "avg": round(sum(self._run_latency) / len(self._run_latency) * 1000, 1) if self._run_latency else 0.0,
+                "p95": round(_percentile(self._run_latency, 0.95) * 1000, 1),
+            },
+        }
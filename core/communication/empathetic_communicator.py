@@ -127,7 +127,7 @@ class EmpatheticCommunicator:
             )
 
         # Step 2: Analyze sentiment
-        sentiment = await self.sentiment_analyzer.analyze(internal_msg)
+        sentiment = await self.sentiment_analyzer.analyze_async(internal_msg, job_id=job_id, client_id=client_id)
         self.logger.debug(f"Sentiment for job {job_id}: {sentiment}")
 
         # Step 3: Load conversation context
@@ -13,6 +13,7 @@ from enum import Enum
 
 from core.config.unified_config_manager import UnifiedConfigManager
 from core.ai_management.intelligent_model_manager import IntelligentModelManager
+from core.ai_management.batch_inference_server import BatchInferenceServer, get_inference_server
 from core.performance.intelligent_cache_system import IntelligentCacheSystem
 from core.security.audit_logger import AuditLogger
 
@@ -53,7 +54,8 @@ class SentimentAnalyzer:
             config: UnifiedConfigManager,
             ai_manager: IntelligentModelManager,
             cache: Optional[IntelligentCacheSystem] = None,
-            audit_logger: Optional[AuditLogger] = None
+            audit_logger: Optional[AuditLogger] = None,
+            inference_server: Optional[BatchInferenceServer] = None
     ):
         self.config = config
         self.ai_manager = ai_manager
@@ -62,6 +64,9 @@ class SentimentAnalyzer:
         self._initialized = False
         self._primary_model = None
         self._fallback_model = None
+        # Конкурентные запросы analyze_async() объединяются в батчи на сервере инференса
+        self.inference = inference_server or get_inference_server()
+        self._served_models: Dict[str, str] = {}
         self._load_models()
 
     def _load_models(self) -> None:
@@ -87,6 +92,12 @@ class SentimentAnalyzer:
                 auto_optimize=True
             )
 
+            for role, model_name, model in (("primary", primary_model_name, self._primary_model),
+                                            ("fallback", fallback_model_name, self._fallback_model)):
+                if model is not None:
+                    self._served_models[role] = f"sentiment:{model_name}"
+                    self.inference.register_pipeline(self._served_models[role], model)
+
             self._initialized = True
             logger.info("✅ SentimentAnalyzer успешно инициализирован.")
         except Exception as e:
@@ -131,31 +142,43 @@ class SentimentAnalyzer:
     def _analyze_with_model(self, text: str, model, model_name: str) -> Optional[SentimentResult]:
         """Выполняет анализ одной моделью."""
         try:
-            result = model(text)
-            if not result or len(result) == 0:
-                return None
-
-            # Обработка выхода модели
-            prediction = result[0] if isinstance(result, list) else result
-            label = prediction.get("label", "NEUTRAL")
-            confidence = float(prediction.get("score", 0.0))
-
-            normalized_label = self._normalize_label(label, model_name)
-
-            # Определяем язык (если не указан — попытка через AI или fallback)
-            language = self._detect_language(text)
-
-            return SentimentResult(
-                label=normalized_label,
-                confidence=confidence,
-                language=language,
-                raw_score=prediction.get("score"),
-                suggestions=self._generate_suggestions(normalized_label, confidence)
-            )
+            return self._build_result(text, model(text), model_name)
         except Exception as e:
             logger.warning(f"⚠️ Модель '{model_name}' не смогла проанализировать текст: {e}")
             return None
 
+    async def _analyze_batched(self, text: str, role: str) -> Optional[SentimentResult]:
+        """Анализ через сервер инференса: текст уходит в модель в составе микро-батча."""
+        try:
+            model_id = self._served_models[role]
+            return self._build_result(text, await self.inference.infer(model_id, text), model_id)
+        except Exception as e:
+            logger.warning(f"⚠️ Модель '{role}' не смогла проанализировать текст: {e}")
+            return None
+
+    def _build_result(self, text: str, result: Any, model_name: str) -> Optional[SentimentResult]:
+        """Приводит выход модели к SentimentResult."""
+        if not result:
+            return None
+
+        # Обработка выхода модели
+        prediction = result[0] if isinstance(result, list) else result
+        label = prediction.get("label", "NEUTRAL")
+        confidence = float(prediction.get("score", 0.0))
+
+        normalized_label = self._normalize_label(label, model_name)
+
+        # Определяем язык (если не указан — попытка через AI или fallback)
+        language = self._detect_language(text)
+
+        return SentimentResult(
+            label=normalized_label,
+            confidence=confidence,
+            language=language,
+            raw_score=prediction.get("score"),
+            suggestions=self._generate_suggestions(normalized_label, confidence)
+        )
+
     def _detect_language(self, text: str) -> str:
         """Определяет язык текста (упрощённо; можно заменить на langdetect или fasttext)."""
         # В продакшене — использовать отдельную модель или библиотеку
@@ -196,15 +219,9 @@ class SentimentAnalyzer:
         Анализирует тональность одного сообщения.
         Использует кэш, если текст уже анализировался.
         """
-        if not self._initialized:
-            raise RuntimeError("SentimentAnalyzer не инициализирован")
-
-        # Ключ кэширования
-        cache_key = f"sentiment:{hash(text)}"
-        cached = self.cache.get(cache_key)
+        cached = self._get_cached(text)
         if cached:
-            logger.debug("📦 Использован кэшированный результат тональности")
-            return SentimentResult(**cached)
+            return cached
 
         # Основная попытка
         result = self._analyze_with_model(text, self._primary_model, "primary")
@@ -214,6 +231,38 @@ class SentimentAnalyzer:
             logger.info("🔄 Переключение на резервную модель для анализа тональности")
             result = self._analyze_with_model(text, self._fallback_model, "fallback")
 
+        return self._finalize(text, result, job_id, client_id)
+
+    async def analyze_async(self, text: str, job_id: Optional[str] = None,
+                            client_id: Optional[str] = None) -> SentimentResult:
+        """
+        Асинхронный вариант analyze(): инференс выполняется на сервере микро-батчинга
+        вне event loop, конкурентные сообщения обрабатываются моделью одним батчем.
+        """
+        cached = self._get_cached(text)
+        if cached:
+            return cached
+
+        result = await self._analyze_batched(text, "primary")
+        if result is None and "fallback" in self._served_models:
+            logger.info("🔄 Переключение на резервную модель для анализа тональности")
+            result = await self._analyze_batched(text, "fallback")
+
+        return self._finalize(text, result, job_id, client_id)
+
+    def _get_cached(self, text: str) -> Optional[SentimentResult]:
+        if not self._initialized:
+            raise RuntimeError("SentimentAnalyzer не инициализирован")
+
+        cached = self.cache.get(f"sentiment:{hash(text)}")
+        if cached:
+            logger.debug("📦 Использован кэшированный результат тональности")
+            return SentimentResult(**cached)
+        return None
+
+    def _finalize(self, text: str, result: Optional[SentimentResult], job_id: Optional[str],
+                  client_id: Optional[str]) -> SentimentResult:
+        """Нейтральный результат по умолчанию, кэширование и аудит."""
         # Если всё ещё нет результата — возвращаем нейтральный
         if result is None:
             logger.warning("⚠️ Ни одна модель не вернула результат. Возвращаем NEUTRAL по умолчанию.")
@@ -226,7 +275,7 @@ class SentimentAnalyzer:
 
         # Сохраняем в кэш (с TTL из конфига)
         ttl = self.config.get("performance.cache.sentiment_ttl_seconds", default=3600)
-        self.cache.set(cache_key, result.__dict__, ttl=ttl)
+        self.cache.set(f"sentiment:{hash(text)}", result.__dict__, ttl=ttl)
 
         # Аудит
         self.audit_logger.log(
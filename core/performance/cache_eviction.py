@@ -0,0 +1,259 @@
+"""
+Политики вытеснения для интеллектуальной системы кэширования.
+
+Все политики обновляют своё состояние за O(1) на каждую операцию
+(вставка, доступ, удаление, выбор жертвы), поэтому вытеснение не требует
+сортировки всех записей под глобальной блокировкой кэша.
+
+Доступные политики:
+- LRU — вытесняется запись, к которой дольше всего не обращались;
+- LFU — вытесняется наименее часто используемая запись (корзины частот);
+- TinyLFU — LRU-порядок плюс частотный фильтр допуска на основе Count-Min Sketch:
+  новая запись вытесняет старую только если обращаются к ней чаще.
+"""
+
+import json
+import sys
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+# Фиксированные накладные расходы на метаданные одной записи (даты, счетчики, ключ в словаре)
+ENTRY_OVERHEAD_BYTES = 256
+
+
+def estimate_size_bytes(value: Any) -> int:
+    """
+    Оценка размера значения в байтах.
+
+    Значения кэша сохраняются на диск в JSON, поэтому основной метрикой является
+    длина UTF-8 сериализации. Для несериализуемых объектов используется
+    рекурсивный обход через sys.getsizeof.
+    """
+    try:
+        return len(json.dumps(value, ensure_ascii=False, default=str).encode('utf-8'))
+    except (TypeError, ValueError):
+        return _deep_getsizeof(value, set())
+
+
+def _deep_getsizeof(obj: Any, seen: set) -> int:
+    obj_id = id(obj)
+    if obj_id in seen:
+        return 0
+    seen.add(obj_id)
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_deep_getsizeof(k, seen) + _deep_getsizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(_deep_getsizeof(item, seen) for item in obj)
+    return size
+
+
+class EvictionPolicy:
+    """Базовый интерфейс политики вытеснения"""
+
+    name = 'base'
+
+    def record_insert(self, key: str) -> None:
+        raise NotImplementedError
+
+    def record_access(self, key: str) -> None:
+        raise NotImplementedError
+
+    def remove(self, key: str) -> None:
+        raise NotImplementedError
+
+    def select_victim(self) -> Optional[str]:
+        """Ключ-кандидат на вытеснение (без удаления из политики)"""
+        raise NotImplementedError
+
+    def admit(self, candidate: str, victim: str) -> bool:
+        """Решение о допуске новой записи ценой вытеснения victim"""
+        return True
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+
+class LRUEvictionPolicy(EvictionPolicy):
+    """Least Recently Used на OrderedDict: голова — самая старая запись"""
+
+    name = 'lru'
+
+    def __init__(self):
+        self._order: 'OrderedDict[str, None]' = OrderedDict()
+
+    def record_insert(self, key: str) -> None:
+        self._order[key] = None
+        self._order.move_to_end(key)
+
+    def record_access(self, key: str) -> None:
+        if key in self._order:
+            self._order.move_to_end(key)
+
+    def remove(self, key: str) -> None:
+        self._order.pop(key, None)
+
+    def select_victim(self) -> Optional[str]:
+        return next(iter(self._order), None)
+
+    def clear(self) -> None:
+        self._order.clear()
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+
+class LFUEvictionPolicy(EvictionPolicy):
+    """
+    Least Frequently Used с O(1) обновлениями.
+
+    Ключи сгруппированы в корзины по частоте доступа; внутри корзины порядок LRU,
+    поэтому при равной частоте вытесняется давно не использованная запись.
+    """
+
+    name = 'lfu'
+
+    def __init__(self):
+        self._freq: Dict[str, int] = {}
+        self._buckets: Dict[int, 'OrderedDict[str, None]'] = {}
+        self._min_freq = 0
+
+    def record_insert(self, key: str) -> None:
+        if key in self._freq:
+            self.record_access(key)
+            return
+        self._freq[key] = 1
+        self._buckets.setdefault(1, OrderedDict())[key] = None
+        self._min_freq = 1
+
+    def record_access(self, key: str) -> None:
+        freq = self._freq.get(key)
+        if freq is None:
+            return
+        bucket = self._buckets[freq]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[freq]
+            if self._min_freq == freq:
+                self._min_freq = freq + 1
+        self._freq[key] = freq + 1
+        self._buckets.setdefault(freq + 1, OrderedDict())[key] = None
+
+    def remove(self, key: str) -> None:
+        freq = self._freq.pop(key, None)
+        if freq is None:
+            return
+        bucket = self._buckets[freq]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[freq]
+            if self._min_freq == freq:
+                # Минимальная частота пересчитывается лениво в select_victim
+                self._min_freq = 0
+
+    def select_victim(self) -> Optional[str]:
+        if not self._freq:
+            return None
+        if self._min_freq not in self._buckets:
+            # Редкий путь: корзина минимальной частоты опустела после remove()
+            self._min_freq = min(self._buckets)
+        return next(iter(self._buckets[self._min_freq]))
+
+    def frequency(self, key: str) -> int:
+        return self._freq.get(key, 0)
+
+    def clear(self) -> None:
+        self._freq.clear()
+        self._buckets.clear()
+        self._min_freq = 0
+
+    def __len__(self) -> int:
+        return len(self._freq)
+
+
+class CountMinSketch:
+    """
+    Вероятностный счетчик частот фиксированного размера (4-битные счетчики
+    ограничены значением 15, как в TinyLFU). После sample_size инкрементов все
+    счетчики делятся пополам, чтобы старая популярность постепенно затухала.
+    """
+
+    _SEEDS = (0x9E3779B1, 0x85EBCA77, 0xC2B2AE3D, 0x27D4EB2F)
+    _MAX_COUNT = 15
+
+    def __init__(self, width: int = 4096, sample_size: Optional[int] = None):
+        self.width = max(64, width)
+        self.sample_size = sample_size or self.width * 10
+        self._rows = [[0] * self.width for _ in self._SEEDS]
+        self._additions = 0
+
+    def _indexes(self, key: Hashable):
+        # Хеш кортежа (seed, key) перемешивает все биты ключа заново для каждой строки:
+        # ключи, совпавшие в одной строке, в остальных расходятся
+        for seed in self._SEEDS:
+            yield hash((seed, key)) % self.width
+
+    def increment(self, key: Hashable) -> None:
+        for row, idx in zip(self._rows, self._indexes(key)):
+            if row[idx] < self._MAX_COUNT:
+                row[idx] += 1
+        self._additions += 1
+        if self._additions >= self.sample_size:
+            self._reset()
+
+    def estimate(self, key: Hashable) -> int:
+        return min(row[idx] for row, idx in zip(self._rows, self._indexes(key)))
+
+    def _reset(self) -> None:
+        for row in self._rows:
+            for i in range(self.width):
+                row[i] >>= 1
+        self._additions //= 2
+
+
+class TinyLFUEvictionPolicy(LRUEvictionPolicy):
+    """
+    LRU с частотным фильтром допуска (TinyLFU).
+
+    Частота ведется для всех запрошенных ключей, включая отсутствующие в кэше,
+    поэтому разовые ключи не вытесняют «горячие» записи при сканирующей нагрузке.
+    """
+
+    name = 'tinylfu'
+
+    def __init__(self, sketch_width: int = 4096):
+        super().__init__()
+        self.sketch = CountMinSketch(width=sketch_width)
+
+    def record_insert(self, key: str) -> None:
+        self.sketch.increment(key)
+        super().record_insert(key)
+
+    def record_access(self, key: str) -> None:
+        self.sketch.increment(key)
+        super().record_access(key)
+
+    def record_miss(self, key: str) -> None:
+        self.sketch.increment(key)
+
+    def admit(self, candidate: str, victim: str) -> bool:
+        return self.sketch.estimate(candidate) > self.sketch.estimate(victim)
+
+
+_POLICIES = {
+    LRUEvictionPolicy.name: LRUEvictionPolicy,
+    LFUEvictionPolicy.name: LFUEvictionPolicy,
+    TinyLFUEvictionPolicy.name: TinyLFUEvictionPolicy,
+}
+
+
+def create_eviction_policy(name: str) -> EvictionPolicy:
+    """Создание политики по имени ('lru', 'lfu', 'tinylfu')"""
+    policy_cls = _POLICIES.get(name.lower())
+    if policy_cls is None:
+        raise ValueError(f"Неизвестная политика вытеснения: {name}. Доступны: {', '.join(_POLICIES)}")
+    return policy_cls()
@@ -0,0 +1,482 @@
+"""
+Бэкенды персистентности для интеллектуальной системы кэширования.
+
+- PerFileCacheStore — исходный формат: один JSON-файл на ключ ({key}.json).
+- AppendOnlyLogCacheStore — сегментированный журнал только на дозапись:
+  значения пишутся в сегменты данных, метаданные — в компактный индексный журнал.
+  При старте читается только индекс, значения подгружаются лениво при первом
+  обращении. Изменения копятся и записываются пакетами (group commit),
+  мусор от перезаписей и удалений убирается компакцией.
+"""
+
+import json
+import os
+import struct
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+# Метаданные записи (to_dict() без значения) и функция ленивой загрузки значения
+StoredRecord = Tuple[Dict[str, Any], Callable[[], Any]]
+
+_RECORD_HEADER = struct.Struct('>I')
+
+
+class CacheStore:
+    """Базовый интерфейс хранилища записей кэша"""
+
+    name = 'base'
+
+    def load(self) -> Iterator[StoredRecord]:
+        raise NotImplementedError
+
+    def put(self, key: str, entry: Any) -> None:
+        """entry — объект с методом to_dict() (CacheEntry)"""
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+    def flush(self) -> None:
+        pass
+
+    def compact(self) -> bool:
+        return False
+
+    def close(self) -> None:
+        self.flush()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {'backend': self.name}
+
+
+class PerFileCacheStore(CacheStore):
+    """Один JSON-файл на запись; значения читаются целиком при старте"""
+
+    name = 'files'
+
+    def __init__(self, cache_dir: Path, on_error: Optional[Callable[[str], None]] = None):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._on_error = on_error or (lambda message: None)
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def load(self) -> Iterator[StoredRecord]:
+        for cache_file in self.cache_dir.glob("*.json"):
+            try:
+                with open(cache_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except Exception as e:
+                self._on_error(f"Ошибка загрузки кэша из {cache_file}: {e}")
+                # Удаление поврежденного файла
+                try:
+                    cache_file.unlink()
+                except OSError:
+                    pass
+                continue
+
+            value = data.pop('value', None)
+            yield data, (lambda v=value: v)
+
+    def put(self, key: str, entry: Any) -> None:
+        try:
+            with open(self._path(key), 'w', encoding='utf-8') as f:
+                json.dump(entry.to_dict(), f, ensure_ascii=False, indent=2)
+        except Exception as e:
+            self._on_error(f"Ошибка сохранения кэша на диск: {e}")
+
+    def delete(self, key: str) -> None:
+        try:
+            self._path(key).unlink()
+        except FileNotFoundError:
+            pass
+
+
+class AppendOnlyLogCacheStore(CacheStore):
+    """
+    Сегментированный журнал записей кэша.
+
+    Формат на диске:
+    - data-NNNNNN.seg — последовательность записей [4 байта длины][JSON значения];
+    - index.log — строки JSON: {"k", "s", "o", "l", "m"} (ключ, сегмент, смещение,
+      длина, метаданные) или {"k", "d": 1} для удаления.
+
+    Индекс пишется после fsync сегмента, поэтому ссылки на недописанные данные
+    при сбое невозможны; обрезанная последняя строка индекса игнорируется.
+    """
+
+    name = 'log'
+
+    INDEX_FILE = 'index.log'
+    SEGMENT_PATTERN = 'data-{:06d}.seg'
+
+    def __init__(self,
+                 cache_dir: Path,
+                 segment_max_bytes: int = 64 * 1024 * 1024,
+                 batch_size: int = 256,
+                 flush_interval: float = 1.0,
+                 compaction_garbage_ratio: float = 0.5,
+                 compaction_min_bytes: int = 16 * 1024 * 1024,
+                 fsync: bool = True,
+                 on_error: Optional[Callable[[str], None]] = None):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.segment_max_bytes = segment_max_bytes
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.compaction_garbage_ratio = compaction_garbage_ratio
+        self.compaction_min_bytes = compaction_min_bytes
+        self.fsync = fsync
+        self._on_error = on_error or (lambda message: None)
+
+        # key -> (segment_id, offset, length)
+        self._locations: Dict[str, Tuple[int, int, int]] = {}
+        # key -> entry (для записи) или None (для удаления), ожидающие group commit
+        self._dirty: Dict[str, Any] = {}
+        self._live_bytes = 0
+        self._total_bytes = 0
+        self._active_segment = 0
+        self._active_offset = 0
+        self._stats = {'flushes': 0, 'records_written': 0, 'compactions': 0, 'lazy_loads': 0}
+
+        self._io_lock = threading.RLock()
+        self._stop_event = threading.Event()
+        self._flush_thread: Optional[threading.Thread] = None
+        if flush_interval > 0:
+            self._flush_thread = threading.Thread(
+                target=self._flush_loop, daemon=True, name="CacheLogFlush"
+            )
+            self._flush_thread.start()
+
+    # ------------------------------------------------------------------ paths
+
+    def _segment_path(self, segment_id: int) -> Path:
+        return self.cache_dir / self.SEGMENT_PATTERN.format(segment_id)
+
+    def _index_path(self) -> Path:
+        return self.cache_dir / self.INDEX_FILE
+
+    def _existing_segments(self) -> Dict[int, int]:
+        """segment_id -> размер файла"""
+        segments = {}
+        for path in self.cache_dir.glob('data-*.seg'):
+            try:
+                segments[int(path.stem.split('-')[1])] = path.stat().st_size
+            except (ValueError, OSError):
+                continue
+        return segments
+
+    # ------------------------------------------------------------------- load
+
+    def load(self) -> Iterator[StoredRecord]:
+        """Чтение только индекса; значения подгружаются из сегментов по требованию"""
+        segments = self._existing_segments()
+        metadata: Dict[str, Dict[str, Any]] = {}
+
+        with self._io_lock:
+            index_path = self._index_path()
+            if index_path.exists():
+                with open(index_path, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        try:
+                            record = json.loads(line)
+                        except json.JSONDecodeError:
+                            # Обрезанная запись после сбоя — игнорируем
+                            continue
+                        key = record['k']
+                        if record.get('d'):
+                            self._drop_location(key)
+                            metadata.pop(key, None)
+                            continue
+                        segment_id, offset, length = record['s'], record['o'], record['l']
+                        if offset + length > segments.get(segment_id, -1):
+                            continue
+                        self._drop_location(key)
+                        self._locations[key] = (segment_id, offset, length)
+                        self._live_bytes += length
+                        metadata[key] = record['m']
+
+            self._total_bytes = sum(segments.values())
+            if segments:
+                self._active_segment = max(segments)
+                self._active_offset = segments[self._active_segment]
+            else:
+                self._active_segment, self._active_offset = 1, 0
+
+        for key, meta in metadata.items():
+            yield meta, (lambda k=key: self._read_value(k))
+
+    def _read_value(self, key: str) -> Any:
+        with self._io_lock:
+            pending = self._dirty.get(key)
+            if pending is not None:
+                return pending.value
+            location = self._locations.get(key)
+            if location is None:
+                raise KeyError(key)
+            segment_id, offset, length = location
+            with open(self._segment_path(segment_id), 'rb') as f:
+                f.seek(offset + _RECORD_HEADER.size)
+                payload = f.read(length - _RECORD_HEADER.size)
+            self._stats['lazy_loads'] += 1
+        return json.loads(payload.decode('utf-8'))
+
+    def _drop_location(self, key: str) -> None:
+        location = self._locations.pop(key, None)
+        if location is not None:
+            self._live_bytes -= location[2]
+
+    # ------------------------------------------------------------------ write
+
+    def put(self, key: str, entry: Any) -> None:
+        with self._io_lock:
+            self._dirty[key] = entry
+            should_flush = len(self._dirty) >= self.batch_size
+        if should_flush:
+            self.flush()
+
+    def delete(self, key: str) -> None:
+        with self._io_lock:
+            if key not in self._locations and key not in self._dirty:
+                return
+            self._dirty[key] = None
+            should_flush = len(self._dirty) >= self.batch_size
+        if should_flush:
+            self.flush()
+
+    def flush(self) -> None:
+        """Group commit: одна дозапись в сегмент и одна в индекс на весь пакет"""
+        with self._io_lock:
+            if not self._dirty:
+                return
+            batch, self._dirty = self._dirty, {}
+            try:
+                self._write_batch(batch)
+            except Exception as e:
+                # Возвращаем несохраненные изменения, не затирая более свежие
+                for key, entry in batch.items():
+                    self._dirty.setdefault(key, entry)
+                self._on_error(f"Ошибка записи пакета кэша в журнал: {e}")
+                return
+
+        if self._needs_compaction():
+            self.compact()
+
+    def _write_batch(self, batch: Dict[str, Any]) -> None:
+        """
+        Запись пакета: сегменты, затем индекс. Записи, которые не сериализуются
+        в JSON, удаляются из пакета (повтор их бы не исправил). При сбое пакет
+        повторяется целиком: смещения берутся из фактического конца сегмента,
+        поэтому данные неудачной попытки остаются мусором, а не ломают индекс.
+        """
+        index_lines = []
+        records = []
+        for key, entry in list(batch.items()):
+            if entry is None:
+                index_lines.append(json.dumps({'k': key, 'd': 1}, ensure_ascii=False))
+                continue
+            try:
+                meta = entry.to_dict()
+                value = meta.pop('value', None)
+                payload = json.dumps(value, ensure_ascii=False).encode('utf-8')
+                json.dumps(meta, ensure_ascii=False)
+            except Exception as e:
+                del batch[key]
+                self._on_error(f"Запись кэша {key} не сериализуется и не будет сохранена: {e}")
+                continue
+            records.append((key, meta, _RECORD_HEADER.pack(len(payload)) + payload))
+
+        new_locations: Dict[str, Tuple[int, int, int]] = {}
+        position = 0
+        while position < len(records):
+            segment_id = self._active_segment
+            with open(self._segment_path(segment_id), 'ab') as f:
+                offset = f.tell()
+                chunk = []
+                for key, meta, record in records[position:]:
+                    if offset > 0 and offset + len(record) > self.segment_max_bytes:
+                        break
+                    chunk.append(record)
+                    new_locations[key] = (segment_id, offset, len(record))
+                    index_lines.append(json.dumps(
+                        {'k': key, 's': segment_id, 'o': offset, 'l': len(record), 'm': meta},
+                        ensure_ascii=False
+                    ))
+                    offset += len(record)
+                if chunk:
+                    f.write(b''.join(chunk))
+                    if self.fsync:
+                        f.flush()
+                        os.fsync(f.fileno())
+            # Данные сегмента на диске — курсор сдвигается сразу
+            position += len(chunk)
+            if position < len(records):
+                self._active_segment, self._active_offset = segment_id + 1, 0
+            else:
+                self._active_offset = offset
+
+        if not index_lines:
+            return
+        with open(self._index_path(), 'a+b') as f:
+            # Обрезанная строка прошлой неудачной попытки не должна склеиться с новой
+            separator = b''
+            if f.seek(0, os.SEEK_END) > 0:
+                f.seek(-1, os.SEEK_END)
+                separator = b'' if f.read(1) == b'\n' else b'\n'
+            f.write(separator + ('\n'.join(index_lines) + '\n').encode('utf-8'))
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+
+        for key in batch:
+            self._drop_location(key)
+        for key, location in new_locations.items():
+            self._locations[key] = location
+            self._live_bytes += location[2]
+            self._total_bytes += location[2]
+
+        self._stats['flushes'] += 1
+        self._stats['records_written'] += len(batch)
+
+    def _flush_loop(self) -> None:
+        while not self._stop_event.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                self._on_error(f"Ошибка фонового сброса кэша: {e}")
+
+    # ------------------------------------------------------------- compaction
+
+    def _needs_compaction(self) -> bool:
+        if self._total_bytes < self.compaction_min_bytes:
+            return False
+        garbage = self._total_bytes - self._live_bytes
+        return garbage / max(self._total_bytes, 1) >= self.compaction_garbage_ratio
+
+    def compact(self) -> bool:
+        """
+        Перезапись живых записей в новые сегменты и новый индекс.
+        Значения копируются как сырые байты, без декодирования JSON.
+        """
+        with self._io_lock:
+            self._flush_pending_locked()
+            old_segments = self._existing_segments()
+            segment_id = max(old_segments, default=0) + 1
+            offset = 0
+            new_locations: Dict[str, Tuple[int, int, int]] = {}
+            metadata = self._read_index_metadata()
+            tmp_index = self._index_path().with_suffix('.compact')
+
+            out = None
+            handles: Dict[int, Any] = {}
+            created_segments = [segment_id]
+            try:
+                out = open(self._segment_path(segment_id), 'ab')
+                with open(tmp_index, 'w', encoding='utf-8') as index_out:
+                    for key, (src_segment, src_offset, length) in sorted(
+                            self._locations.items(), key=lambda item: item[1]):
+                        src = handles.get(src_segment)
+                        if src is None:
+                            src = handles[src_segment] = open(self._segment_path(src_segment), 'rb')
+                        src.seek(src_offset)
+                        record = src.read(length)
+
+                        if offset > 0 and offset + length > self.segment_max_bytes:
+                            out.close()
+                            segment_id, offset = segment_id + 1, 0
+                            created_segments.append(segment_id)
+                            out = open(self._segment_path(segment_id), 'ab')
+
+                        out.write(record)
+                        new_locations[key] = (segment_id, offset, length)
+                        index_out.write(json.dumps(
+                            {'k': key, 's': segment_id, 'o': offset, 'l': length,
+                             'm': metadata.get(key, {})},
+                            ensure_ascii=False
+                        ) + '\n')
+                        offset += length
+                    if self.fsync:
+                        index_out.flush()
+                        os.fsync(index_out.fileno())
+                out.flush()
+                if self.fsync:
+                    os.fsync(out.fileno())
+            except Exception as e:
+                self._on_error(f"Ошибка компакции журнала кэша: {e}")
+                if out is not None:
+                    out.close()
+                    out = None
+                # Недописанные сегменты не должны попасть в журнал при следующем открытии
+                for created in created_segments:
+                    self._segment_path(created).unlink(missing_ok=True)
+                tmp_index.unlink(missing_ok=True)
+                return False
+            finally:
+                if out is not None:
+                    out.close()
+                for handle in handles.values():
+                    handle.close()
+
+            # Атомарная подмена индекса; старые сегменты после этого не нужны
+            os.replace(tmp_index, self._index_path())
+            for old_segment in old_segments:
+                self._segment_path(old_segment).unlink(missing_ok=True)
+
+            self._locations = new_locations
+            self._live_bytes = self._total_bytes = sum(loc[2] for loc in new_locations.values())
+            self._active_segment, self._active_offset = segment_id, offset
+            self._stats['compactions'] += 1
+            return True
+
+    def _flush_pending_locked(self) -> None:
+        if self._dirty:
+            batch, self._dirty = self._dirty, {}
+            self._write_batch(batch)
+
+    def _read_index_metadata(self) -> Dict[str, Dict[str, Any]]:
+        """Актуальные метаданные живых ключей из индексного журнала"""
+        metadata: Dict[str, Dict[str, Any]] = {}
+        index_path = self._index_path()
+        if not index_path.exists():
+            return metadata
+        with open(index_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if record.get('d'):
+                    metadata.pop(record['k'], None)
+                else:
+                    metadata[record['k']] = record['m']
+        return metadata
+
+    # -------------------------------------------------------------- lifecycle
+
+    def close(self) -> None:
+        self._stop_event.set()
+        if self._flush_thread and self._flush_thread.is_alive():
+            self._flush_thread.join(timeout=self.flush_interval + 1)
+        self.flush()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._io_lock:
+            return {
+                'backend': self.name,
+                'live_bytes': self._live_bytes,
+                'total_bytes': self._total_bytes,
+                'pending_writes': len(self._dirty),
+                'segments': len(self._existing_segments()),
+                **self._stats,
+            }
+
+
+def create_cache_store(backend: str, cache_dir: Path, **options) -> CacheStore:
+    """Создание хранилища по имени ('files', 'log')"""
+    if backend == PerFileCacheStore.name:
+        return PerFileCacheStore(cache_dir, on_error=options.get('on_error'))
+    if backend == AppendOnlyLogCacheStore.name:
+        return AppendOnlyLogCacheStore(cache_dir, **options)
+    raise ValueError(f"Неизвестный бэкенд персистентности кэша: {backend}")
@@ -0,0 +1,273 @@
+"""
+Проверка актуальности зависимостей кэша.
+
+Файлы проверяются по отпечатку stat (mtime_ns, size, inode); хеш содержимого
+пересчитывается только если отпечаток изменился. Результат проверки каждой
+зависимости запоминается на короткое окно валидации, поэтому частые попадания
+в кэш не обращаются к файловой системе вообще.
+
+Для источников 'database' и 'api' предусмотрены подключаемые валидаторы:
+счетчики версий таблиц и ETag. Собственные валидаторы регистрируются
+через DependencyValidator.register_validator().
+"""
+
+import hashlib
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Hashable, Iterable, NamedTuple, Optional, Set, Tuple
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class FileFingerprint(NamedTuple):
+    """Дешевый отпечаток файла по данным stat"""
+    mtime_ns: int
+    size: int
+    inode: int
+
+    @classmethod
+    def of(cls, path: str) -> 'FileFingerprint':
+        st = os.stat(path)
+        return cls(st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def hash_file(path: str) -> str:
+    """MD5 содержимого файла, читаемого блоками (формат CacheDependency.content_hash)"""
+    digest = hashlib.md5()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class SourceValidator:
+    """
+    Базовый валидатор источников одного типа.
+
+    check() возвращает True, если источник изменился относительно зависимости.
+    check_many() по умолчанию вызывает check() для каждой зависимости;
+    валидаторы с пакетным доступом к источнику переопределяют его.
+    """
+
+    def check(self, dependency: Any) -> bool:
+        raise NotImplementedError
+
+    def check_many(self, dependencies: Iterable[Any]) -> Set[Tuple[str, str]]:
+        """Множество (source_id, content_hash) изменившихся зависимостей"""
+        return {
+            (dep.source_id, dep.content_hash)
+            for dep in dependencies
+            if self.check(dep)
+        }
+
+
+class FileValidator(SourceValidator):
+    """Проверка файлов: stat-отпечаток, хеш только при изменении отпечатка"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # path -> (отпечаток, хеш содержимого для этого отпечатка)
+        self._known: Dict[str, Tuple[FileFingerprint, str]] = {}
+        self.stats = {'stat_checks': 0, 'hash_computations': 0}
+
+    def current_hash(self, path: str) -> Optional[str]:
+        """Хеш файла с переиспользованием ранее вычисленного при неизменном stat"""
+        try:
+            fingerprint = FileFingerprint.of(path)
+        except OSError:
+            with self._lock:
+                self._known.pop(path, None)
+            return None
+
+        with self._lock:
+            self.stats['stat_checks'] += 1
+            known = self._known.get(path)
+        if known and known[0] == fingerprint:
+            return known[1]
+
+        try:
+            content_hash = hash_file(path)
+        except OSError:
+            return None
+        with self._lock:
+            self.stats['hash_computations'] += 1
+            self._known[path] = (fingerprint, content_hash)
+        return content_hash
+
+    def check(self, dependency: Any) -> bool:
+        current = self.current_hash(dependency.source_id)
+        return current is None or current != dependency.content_hash
+
+
+class TableVersionValidator(SourceValidator):
+    """
+    Проверка таблиц БД по счетчикам версий.
+
+    Писатели вызывают bump(table) после изменения данных (или передается
+    version_provider, читающий версию из самой БД). Зависимость хранит версию
+    таблицы в content_hash; если версия не записана, сравнивается last_modified.
+    """
+
+    def __init__(self, version_provider: Optional[Callable[[str], Optional[Hashable]]] = None):
+        self._lock = threading.Lock()
+        self._versions: Dict[str, int] = {}
+        self._modified_at: Dict[str, datetime] = {}
+        self._version_provider = version_provider
+
+    def bump(self, table: str) -> int:
+        with self._lock:
+            version = self._versions.get(table, 0) + 1
+            self._versions[table] = version
+            self._modified_at[table] = datetime.now()
+            return version
+
+    def current_version(self, table: str) -> Optional[str]:
+        if self._version_provider is not None:
+            version = self._version_provider(table)
+            return None if version is None else str(version)
+        with self._lock:
+            version = self._versions.get(table)
+        return None if version is None else str(version)
+
+    def check(self, dependency: Any) -> bool:
+        table = dependency.source_id
+        if dependency.content_hash:
+            current = self.current_version(table)
+            return current is not None and current != dependency.content_hash
+        with self._lock:
+            modified_at = self._modified_at.get(table)
+        return modified_at is not None and modified_at > dependency.last_modified
+
+
+class ETagValidator(SourceValidator):
+    """
+    Проверка API-ресурсов по ETag.
+
+    ETag может сообщаться клиентами, которые и так получают ответы от API
+    (observe), или запрашиваться через etag_fetcher (например, HEAD-запрос).
+    Без известного ETag ресурс считается неизменным.
+    """
+
+    def __init__(self, etag_fetcher: Optional[Callable[[str], Optional[str]]] = None):
+        self._lock = threading.Lock()
+        self._etags: Dict[str, str] = {}
+        self._etag_fetcher = etag_fetcher
+
+    def observe(self, endpoint: str, etag: str) -> None:
+        with self._lock:
+            self._etags[endpoint] = etag
+
+    def current_etag(self, endpoint: str) -> Optional[str]:
+        if self._etag_fetcher is not None:
+            try:
+                etag = self._etag_fetcher(endpoint)
+            except Exception:
+                etag = None
+            if etag is not None:
+                self.observe(endpoint, etag)
+                return etag
+        with self._lock:
+            return self._etags.get(endpoint)
+
+    def check(self, dependency: Any) -> bool:
+        current = self.current_etag(dependency.source_id)
+        return current is not None and current != dependency.content_hash
+
+
+class DependencyValidator:
+    """
+    Диспетчер проверок зависимостей с мемоизацией на окно валидации.
+
+    Ключ мемоизации — (source_type, source_id, content_hash): записи с одинаковой
+    зависимостью разделяют один результат проверки.
+    """
+
+    def __init__(self, validation_window: float = 1.0):
+        self.validation_window = validation_window
+        self.files = FileValidator()
+        self.tables = TableVersionValidator()
+        self.etags = ETagValidator()
+        self._validators: Dict[str, SourceValidator] = {
+            'file': self.files,
+            'database': self.tables,
+            'api': self.etags,
+        }
+        self._memo: Dict[Tuple[str, str, str], Tuple[float, bool]] = {}
+        self._lock = threading.Lock()
+        self.stats = {'checks': 0, 'memo_hits': 0, 'batch_validations': 0}
+
+    def register_validator(self, source_type: str, validator: SourceValidator) -> None:
+        with self._lock:
+            self._validators[source_type] = validator
+            self._memo.clear()
+
+    def _memo_key(self, dependency: Any) -> Tuple[str, str, str]:
+        return dependency.source_type, dependency.source_id, dependency.content_hash
+
+    def has_changed(self, dependency: Any) -> bool:
+        validator = self._validators.get(dependency.source_type)
+        if validator is None:
+            return False
+
+        memo_key = self._memo_key(dependency)
+        now = time.monotonic()
+        with self._lock:
+            self.stats['checks'] += 1
+            memo = self._memo.get(memo_key)
+            if memo and now - memo[0] < self.validation_window:
+                self.stats['memo_hits'] += 1
+                return memo[1]
+
+        try:
+            changed = validator.check(dependency)
+        except Exception:
+            changed = True
+
+        with self._lock:
+            self._memo[memo_key] = (now, changed)
+        return changed
+
+    def validate_many(self, dependencies: Iterable[Any]) -> Set[Tuple[str, str, str]]:
+        """
+        Пакетная проверка: каждая уникальная зависимость проверяется один раз,
+        валидатор получает все зависимости своего типа одним вызовом.
+
+        Returns:
+            Множество ключей (source_type, source_id, content_hash) изменившихся зависимостей
+        """
+        by_type: Dict[str, Dict[Tuple[str, str, str], Any]] = {}
+        for dep in dependencies:
+            if dep.source_type in self._validators:
+                by_type.setdefault(dep.source_type, {})[self._memo_key(dep)] = dep
+
+        changed: Set[Tuple[str, str, str]] = set()
+        now = time.monotonic()
+        results: Dict[Tuple[str, str, str], bool] = {}
+        for source_type, deps in by_type.items():
+            try:
+                changed_pairs = self._validators[source_type].check_many(deps.values())
+            except Exception:
+                changed_pairs = {(dep.source_id, dep.content_hash) for dep in deps.values()}
+            for memo_key in deps:
+                is_changed = (memo_key[1], memo_key[2]) in changed_pairs
+                results[memo_key] = is_changed
+                if is_changed:
+                    changed.add(memo_key)
+
+        with self._lock:
+            self.stats['batch_validations'] += 1
+            for memo_key, is_changed in results.items():
+                self._memo[memo_key] = (now, is_changed)
+        return changed
+
+    def prune(self, max_age: float = 600.0) -> None:
+        """Удаление устаревших результатов мемоизации"""
+        threshold = time.monotonic() - max_age
+        with self._lock:
+            self._memo = {k: v for k, v in self._memo.items() if v[0] >= threshold}
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.stats, **self.files.stats, 'memoized': len(self._memo)}
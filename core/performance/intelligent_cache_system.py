@@ -3,14 +3,23 @@
 и автоматической инвалидацией при изменении входных данных.
 """
 
-import json
-import hashlib
+import asyncio
+import inspect
 import time
 from pathlib import Path
-from typing import Dict, Any, Optional, Callable, List, Tuple
+from typing import Dict, Any, Optional, Callable, List, Set, Tuple
 from datetime import datetime, timedelta
 import threading
 
+from core.performance.cache_eviction import (
+    ENTRY_OVERHEAD_BYTES,
+    EvictionPolicy,
+    create_eviction_policy,
+    estimate_size_bytes,
+)
+from core.performance.cache_persistence import CacheStore, create_cache_store
+from core.performance.dependency_validation import DependencyValidator, SourceValidator
+
 
 class CacheDependency:
     """Зависимость кэша от источника данных"""
@@ -34,15 +43,13 @@ class CacheDependency:
         }
 
     @classmethod
-    def from_dict(cls, Dict[str, Any]
-
-    ) -> 'CacheDependency':
-    return cls(
-        source_id=data['source_id'],
-        source_type=data['source_type'],
-        last_modified=datetime.fromisoformat(data['last_modified']),
-        content_hash=data['content_hash']
-    )
+    def from_dict(cls, data: Dict[str, Any]) -> 'CacheDependency':
+        return cls(
+            source_id=data['source_id'],
+            source_type=data['source_type'],
+            last_modified=datetime.fromisoformat(data['last_modified']),
+            content_hash=data['content_hash']
+        )
 
 
 class CacheEntry:
@@ -52,14 +59,34 @@ class CacheEntry:
                  key: str,
                  value: Any,
                  ttl_seconds: int,
-                 dependencies: Optional[List[CacheDependency]] = None):
+                 dependencies: Optional[List[CacheDependency]] = None,
+                 value_loader: Optional[Callable[[], Any]] = None):
         self.key = key
-        self.value = value
+        self._value = value
+        # Ленивая загрузка значения из хранилища при первом обращении
+        self._value_loader = value_loader
         self.created_at = datetime.now()
         self.expires_at = self.created_at + timedelta(seconds=ttl_seconds)
         self.dependencies = dependencies or []
         self.access_count = 0
         self.last_accessed = self.created_at
+        self.size_bytes = estimate_size_bytes(value) + ENTRY_OVERHEAD_BYTES
+
+    @property
+    def value(self) -> Any:
+        if self._value_loader is not None:
+            self._value = self._value_loader()
+            self._value_loader = None
+        return self._value
+
+    @value.setter
+    def value(self, value: Any):
+        self._value = value
+        self._value_loader = None
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._value_loader is None
 
     def is_expired(self) -> bool:
         """Проверка истечения TTL"""
@@ -77,24 +104,92 @@ class CacheEntry:
             'expires_at': self.expires_at.isoformat(),
             'dependencies': [dep.to_dict() for dep in self.dependencies],
             'access_count': self.access_count,
-            'last_accessed': self.last_accessed.isoformat()
+            'last_accessed': self.last_accessed.isoformat(),
+            'size_bytes': self.size_bytes
         }
 
     @classmethod
-    def from_dict(cls, Dict[str, Any]
-
-    ) -> 'CacheEntry':
-    entry = cls(
-        key=data['key'],
-        value=data['value'],
-        ttl_seconds=0  # Не используется при восстановлении
-    )
-    entry.created_at = datetime.fromisoformat(data['created_at'])
-    entry.expires_at = datetime.fromisoformat(data['expires_at'])
-    entry.dependencies = [CacheDependency.from_dict(dep) for dep in data.get('dependencies', [])]
-    entry.access_count = data.get('access_count', 0)
-    entry.last_accessed = datetime.fromisoformat(data.get('last_accessed', data['created_at']))
-    return entry
+    def from_dict(cls, data: Dict[str, Any],
+                  value_loader: Optional[Callable[[], Any]] = None) -> 'CacheEntry':
+        """
+        Восстановление записи. Если передан value_loader, значение в data
+        не требуется и будет загружено при первом обращении.
+        """
+        entry = cls(
+            key=data['key'],
+            value=data.get('value'),
+            ttl_seconds=0,  # Не используется при восстановлении
+            value_loader=value_loader
+        )
+        if value_loader is not None:
+            entry.size_bytes = data.get('size_bytes') or (estimate_size_bytes(entry.value) + ENTRY_OVERHEAD_BYTES)
+        entry.created_at = datetime.fromisoformat(data['created_at'])
+        entry.expires_at = datetime.fromisoformat(data['expires_at'])
+        entry.dependencies = [CacheDependency.from_dict(dep) for dep in data.get('dependencies', [])]
+        entry.access_count = data.get('access_count', 0)
+        entry.last_accessed = datetime.fromisoformat(data.get('last_accessed', data['created_at']))
+        return entry
+
+
+class _FlightAbandoned(Exception):
+    """Вычисляющий был отменен: ожидающие повторяют поиск, один из них становится вычисляющим"""
+
+
+class _InFlightComputation:
+    """
+    Вычисление значения, выполняемое одним вызывающим для всех одновременных
+    промахов по ключу. Ожидать результат можно как из потока, так и из корутины.
+    """
+
+    def __init__(self):
+        self._done = threading.Event()
+        self._state_lock = threading.Lock()
+        self._async_waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+        self.abandoned = False
+
+    def resolve(self, value: Any = None, error: Optional[BaseException] = None, abandoned: bool = False):
+        with self._state_lock:
+            self.value, self.error, self.abandoned = value, error, abandoned
+            self._done.set()
+            waiters, self._async_waiters = self._async_waiters, []
+        for loop, future in waiters:
+            try:
+                loop.call_soon_threadsafe(self._settle, future)
+            except RuntimeError:
+                # Цикл событий ожидающего уже закрыт
+                pass
+
+    def _settle(self, future: asyncio.Future):
+        if future.done():
+            return
+        if self.abandoned:
+            future.set_exception(_FlightAbandoned())
+        elif self.error is not None:
+            future.set_exception(self.error)
+        else:
+            future.set_result(self.value)
+
+    def _result(self) -> Any:
+        if self.abandoned:
+            raise _FlightAbandoned()
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+    def wait(self) -> Any:
+        self._done.wait()
+        return self._result()
+
+    async def wait_async(self) -> Any:
+        loop = asyncio.get_running_loop()
+        with self._state_lock:
+            if self._done.is_set():
+                return self._result()
+            future = loop.create_future()
+            self._async_waiters.append((loop, future))
+        return await future
 
 
 class IntelligentCacheSystem:
@@ -103,20 +198,54 @@ class IntelligentCacheSystem:
     - Отслеживанием зависимостей от источников данных
     - Автоматической инвалидацией при изменении зависимостей
     - Адаптивным TTL на основе частоты обновления источника
-    - Поддержкой различных стратегий (LRU, LFU, TTL)
+    - Поддержкой различных стратегий (LRU, LFU, TinyLFU, TTL) с O(1) вытеснением
+    - Побайтовым учетом размера записей
+    - Выбором бэкенда персистентности: файл на запись ('files') или
+      сегментированный журнал с ленивой загрузкой значений ('log')
+    - Дешевой проверкой зависимостей (stat-отпечатки, версии таблиц, ETag)
+    - Объединением одновременных промахов по ключу (single-flight), sync и async
     """
 
+    # Доля от максимального размера, до которой очищается кэш при переполнении
+    EVICTION_LOW_WATERMARK = 0.8
+
     def __init__(self,
                  cache_dir: str = "data/cache/intelligent",
                  max_size_mb: int = 1024,
-                 default_ttl_seconds: int = 3600):
+                 default_ttl_seconds: int = 3600,
+                 eviction_policy: str = 'lfu',
+                 persistence_backend: str = 'files',
+                 persistence_options: Optional[Dict[str, Any]] = None,
+                 dependency_validator: Optional[DependencyValidator] = None):
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(parents=True, exist_ok=True)
         self.max_size_mb = max_size_mb
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
         self.default_ttl_seconds = default_ttl_seconds
         self.cache: Dict[str, CacheEntry] = {}
-        self.dependency_map: Dict[str, List[str]] = {}  # source_id -> [cache_keys]
+        self.dependency_map: Dict[str, Set[str]] = {}  # source_id -> {cache_keys}
+        self.key_sources: Dict[str, Set[str]] = {}  # cache_key -> {source_ids}
+        self._policy: EvictionPolicy = create_eviction_policy(eviction_policy)
+        self._current_size_bytes = 0
+        self._stats: Dict[str, int] = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'evicted_bytes': 0,
+            'expirations': 0,
+            'invalidations': 0,
+            'admission_rejections': 0,
+            'coalesced': 0,
+        }
         self._lock = threading.RLock()
+        self._inflight: Dict[str, _InFlightComputation] = {}
+        self.dependency_validator = dependency_validator or DependencyValidator()
+        self._store: CacheStore = create_cache_store(
+            persistence_backend,
+            self.cache_dir,
+            on_error=lambda message: self._log(message, level='WARNING'),
+            **(persistence_options or {})
+        )
         self._load_persistent_cache()
 
         # Фоновая очистка
@@ -128,6 +257,10 @@ class IntelligentCacheSystem:
         """
         Получение значения из кэша или вычисление с кэшированием.
 
+        Вычисление выполняется вне глобальной блокировки. Одновременные промахи
+        по одному ключу ожидают единственное вычисление (single-flight), запросы
+        к другим ключам при этом не блокируются.
+
         Args:
             key: Ключ кэша
             compute_func: Функция для вычисления значения при отсутствии в кэше
@@ -137,6 +270,73 @@ class IntelligentCacheSystem:
         Returns:
             Кэшированное или вычисленное значение
         """
+        while True:
+            hit, value, flight, is_leader = self._begin_lookup(key, dependencies)
+            if hit:
+                return value
+            if is_leader:
+                break
+            try:
+                return flight.wait()
+            except _FlightAbandoned:
+                continue
+
+        self._log(f"Промах кэша для ключа {key}, вычисление...")
+        start_time = time.time()
+        try:
+            value = compute_func()
+        except BaseException as e:
+            self._fail_flight(key, flight, e)
+            raise
+
+        self._complete_flight(key, flight, value, dependencies, ttl_seconds, time.time() - start_time)
+        return value
+
+    async def aget(self, key: str, compute_func: Callable[[], Any],
+                   dependencies: Optional[List[CacheDependency]] = None,
+                   ttl_seconds: Optional[int] = None) -> Any:
+        """
+        Асинхронный вариант get().
+
+        Корутинные функции вычисления ожидаются в текущем event loop, обычные
+        выполняются в пуле потоков, чтобы не блокировать цикл событий.
+        Ожидание чужого вычисления того же ключа также не блокирует цикл.
+        """
+        while True:
+            hit, value, flight, is_leader = self._begin_lookup(key, dependencies)
+            if hit:
+                return value
+            if is_leader:
+                break
+            try:
+                return await flight.wait_async()
+            except _FlightAbandoned:
+                continue
+
+        self._log(f"Промах кэша для ключа {key}, асинхронное вычисление...")
+        start_time = time.time()
+        try:
+            if asyncio.iscoroutinefunction(compute_func):
+                value = await compute_func()
+            else:
+                value = await asyncio.get_running_loop().run_in_executor(None, compute_func)
+                if inspect.isawaitable(value):
+                    value = await value
+        except BaseException as e:
+            self._fail_flight(key, flight, e)
+            raise
+
+        self._complete_flight(key, flight, value, dependencies, ttl_seconds, time.time() - start_time)
+        return value
+
+    def _begin_lookup(self, key: str, dependencies: Optional[List[CacheDependency]]
+                      ) -> Tuple[bool, Any, Optional['_InFlightComputation'], bool]:
+        """
+        Поиск в кэше и, при промахе, регистрация вычисления.
+
+        Returns:
+            (попадание, значение, вычисление, вызывающий ли выполняет вычисление)
+        """
         with self._lock:
             # Проверка наличия в кэше
             entry = self.cache.get(key)
@@ -146,47 +346,83 @@ class IntelligentCacheSystem:
                 if entry.is_expired():
                     self._log(f"Кэш для ключа {key} истек, удаляем")
                     self._remove_entry(key)
+                    self._stats['expirations'] += 1
                     entry = None
                 # Проверка инвалидации зависимостей
                 elif dependencies and entry.is_invalidated(self._check_dependency_changed):
                     self._log(f"Кэш для ключа {key} инвалидирован зависимостями, удаляем")
                     self._remove_entry(key)
+                    self._stats['invalidations'] += 1
+                    entry = None
+
+            # Ленивая загрузка значения из хранилища
+            if entry and not entry.is_loaded:
+                try:
+                    entry.value
+                except Exception as e:
+                    self._log(f"Не удалось загрузить значение для ключа {key}: {e}", level='WARNING')
+                    self._remove_entry(key)
                     entry = None
 
             # Возврат из кэша если актуален
             if entry:
                 entry.access_count += 1
                 entry.last_accessed = datetime.now()
+                self._policy.record_access(key)
+                self._stats['hits'] += 1
                 self._log(f"Попадание в кэш для ключа {key} (доступ #{entry.access_count})")
-                return entry.value
-
-            # Вычисление нового значения
-            self._log(f"Промах кэша для ключа {key}, вычисление...")
-            start_time = time.time()
-            value = compute_func()
-            compute_time = time.time() - start_time
-
-            # Сохранение в кэш
-            ttl = ttl_seconds or self._calculate_adaptive_ttl(dependencies, compute_time)
-            new_entry = CacheEntry(
-                key=key,
-                value=value,
-                ttl_seconds=ttl,
-                dependencies=dependencies
-            )
-            self._add_entry(key, new_entry)
-
-            # Регистрация зависимостей
-            if dependencies:
-                for dep in dependencies:
-                    if dep.source_id not in self.dependency_map:
-                        self.dependency_map[dep.source_id] = []
-                    if key not in self.dependency_map[dep.source_id]:
-                        self.dependency_map[dep.source_id].append(key)
-
-            self._log(
-                f"Значение для ключа {key} вычислено за {compute_time:.2f} сек и сохранено в кэш (TTL: {ttl} сек)")
-            return value
+                return True, entry.value, None, False
+
+            self._stats['misses'] += 1
+            record_miss = getattr(self._policy, 'record_miss', None)
+            if record_miss:
+                record_miss(key)
+
+            flight = self._inflight.get(key)
+            if flight is not None:
+                self._stats['coalesced'] += 1
+                self._log(f"Промах кэша для ключа {key}, ожидание текущего вычисления")
+                return False, None, flight, False
+
+            flight = self._inflight[key] = _InFlightComputation()
+            return False, None, flight, True
+
+    def _complete_flight(self, key: str, flight: '_InFlightComputation', value: Any,
+                         dependencies: Optional[List[CacheDependency]],
+                         ttl_seconds: Optional[int], compute_time: float):
+        """Сохранение вычисленного значения и пробуждение ожидающих"""
+        ttl = ttl_seconds or self._calculate_adaptive_ttl(dependencies, compute_time)
+        new_entry = CacheEntry(
+            key=key,
+            value=value,
+            ttl_seconds=ttl,
+            dependencies=dependencies
+        )
+        try:
+            with self._lock:
+                # Сохранение в кэш
+                self._add_entry(key, new_entry)
+                if self._inflight.get(key) is flight:
+                    del self._inflight[key]
+        finally:
+            flight.resolve(value=value)
+
+        self._log(
+            f"Значение для ключа {key} вычислено за {compute_time:.2f} сек и сохранено в кэш (TTL: {ttl} сек)")
+
+    def _fail_flight(self, key: str, flight: '_InFlightComputation', error: BaseException):
+        """
+        Передача ошибки вычисления всем ожидающим; значение не кэшируется.
+        Отмена вычисляющего (CancelledError, KeyboardInterrupt) не передается:
+        ожидающие повторяют поиск, и вычисление продолжает один из них.
+        """
+        with self._lock:
+            if self._inflight.get(key) is flight:
+                del self._inflight[key]
+        if isinstance(error, Exception):
+            flight.resolve(error=error)
+        else:
+            flight.resolve(abandoned=True)
 
     def _calculate_adaptive_ttl(self, dependencies: Optional[List[CacheDependency]], compute_time: float) -> int:
         """
@@ -225,121 +461,166 @@ class IntelligentCacheSystem:
             return 'normal'
 
     def _check_dependency_changed(self, dependency: CacheDependency) -> bool:
-        """Проверка изменения зависимости"""
-        # Реализация проверки для разных типов источников
-        if dependency.source_type == 'file':
-            return self._check_file_changed(dependency.source_id, dependency.content_hash)
-        elif dependency.source_type == 'database':
-            return self._check_db_changed(dependency.source_id, dependency.last_modified)
-        elif dependency.source_type == 'api':
-            return self._check_api_changed(dependency.source_id, dependency.content_hash)
-        else:
+        """Проверка изменения зависимости через подключаемые валидаторы"""
+        return self.dependency_validator.has_changed(dependency)
+
+    def register_dependency_validator(self, source_type: str, validator: SourceValidator):
+        """Подключение валидатора для типа источника ('database', 'api', собственные типы)"""
+        self.dependency_validator.register_validator(source_type, validator)
+
+    def make_file_dependency(self, filepath: str) -> CacheDependency:
+        """Зависимость от файла с текущим хешем; отпечаток stat запоминается сразу"""
+        content_hash = self.dependency_validator.files.current_hash(filepath) or ''
+        return CacheDependency(
+            source_id=filepath,
+            source_type='file',
+            last_modified=datetime.now(),
+            content_hash=content_hash
+        )
+
+    def revalidate_dependencies(self) -> int:
+        """
+        Пакетная проверка всех зависимостей кэша за один проход.
+        Проверка выполняется вне блокировки; возвращает число удаленных записей.
+        """
+        with self._lock:
+            dependencies = [dep for entry in self.cache.values() for dep in entry.dependencies]
+        if not dependencies:
+            return 0
+
+        changed = self.dependency_validator.validate_many(dependencies)
+        if not changed:
+            return 0
+
+        changed_sources = {source_id for _, source_id, _ in changed}
+        removed = 0
+        with self._lock:
+            for source_id in changed_sources:
+                for key in list(self.dependency_map.get(source_id, ())):
+                    entry = self.cache.get(key)
+                    if entry and any((dep.source_type, dep.source_id, dep.content_hash) in changed
+                                     for dep in entry.dependencies):
+                        self._remove_entry(key)
+                        self._stats['invalidations'] += 1
+                        removed += 1
+        if removed:
+            self._log(f"Пакетная проверка зависимостей: удалено {removed} записей")
+        return removed
+
+    def _add_entry(self, key: str, entry: CacheEntry, persist: bool = True) -> bool:
+        """
+        Добавление записи в кэш с управлением размером.
+
+        Место освобождается до вставки, чтобы политика не вытеснила только что
+        добавленную запись. Возвращает False, если запись не допущена в кэш.
+        """
+        if key in self.cache:
+            self._remove_entry(key)
+
+        if entry.size_bytes > self.max_size_bytes:
+            self._stats['admission_rejections'] += 1
+            self._log(f"Запись {key} ({entry.size_bytes} байт) больше лимита кэша, не кэшируется",
+                      level='WARNING')
             return False
 
-    def _check_file_changed(self, filepath: str, old_hash: str) -> bool:
-        """Проверка изменения файла через хеш содержимого"""
-        try:
-            path = Path(filepath)
-            if not path.exists():
-                return True
-
-            current_hash = hashlib.md5(path.read_bytes()).hexdigest()
-            return current_hash != old_hash
-        except Exception:
-            return True
-
-    def _check_db_changed(self, table: str, last_modified: datetime) -> bool:
-        """Проверка изменения данных в БД (упрощенно)"""
-        # В реальной системе здесь должен быть запрос к БД
-        # Для примера всегда возвращаем False (предполагаем неизменность)
-        return False
-
-    def _check_api_changed(self, endpoint: str, old_hash: str) -> bool:
-        """Проверка изменения данных через API"""
-        # В реальной системе здесь должен быть HEAD/conditional GET запрос
-        return False
-
-    def _add_entry(self, key: str, entry: CacheEntry):
-        """Добавление записи в кэш с управлением размером"""
-        self.cache[key] = entry
+        if self._current_size_bytes + entry.size_bytes > self.max_size_bytes:
+            victim = self._policy.select_victim()
+            if victim is not None and not self._policy.admit(key, victim):
+                self._stats['admission_rejections'] += 1
+                return False
+            self._evict_entries(required_bytes=entry.size_bytes)
 
-        # Проверка превышения размера кэша
-        if self._get_cache_size_mb() > self.max_size_mb:
-            self._evict_entries()
+        self.cache[key] = entry
+        self._current_size_bytes += entry.size_bytes
+        self._policy.record_insert(key)
+        self._register_dependencies(key, entry.dependencies)
 
         # Сохранение на диск для персистентности
-        self._save_entry_to_disk(key, entry)
-
-    def _remove_entry(self, key: str):
+        if persist:
+            self._save_entry_to_disk(key, entry)
+        return True
+
+    def _register_dependencies(self, key: str, dependencies: List[CacheDependency]):
+        """Регистрация записи в прямом и обратном индексах зависимостей"""
+        if not dependencies:
+            return
+        sources = self.key_sources.setdefault(key, set())
+        for dep in dependencies:
+            self.dependency_map.setdefault(dep.source_id, set()).add(key)
+            sources.add(dep.source_id)
+
+    def _unregister_dependencies(self, key: str):
+        """Удаление записи из индексов зависимостей за O(число источников записи)"""
+        for source_id in self.key_sources.pop(key, ()):
+            keys = self.dependency_map.get(source_id)
+            if keys is None:
+                continue
+            keys.discard(key)
+            if not keys:
+                del self.dependency_map[source_id]
+
+    def _remove_entry(self, key: str, delete_from_disk: bool = True):
         """Удаление записи из кэша"""
-        if key in self.cache:
-            entry = self.cache.pop(key)
-
-            # Удаление из карты зависимостей
-            for dep_list in self.dependency_map.values():
-                if key in dep_list:
-                    dep_list.remove(key)
-
-            # Удаление с диска
-            cache_file = self.cache_dir / f"{key}.json"
-            if cache_file.exists():
-                cache_file.unlink()
-
-    def _evict_entries(self):
-        """Вытеснение записей по стратегии LFU (Least Frequently Used)"""
-        # Сортировка по частоте использования (редко используемые первыми)
-        sorted_entries = sorted(
-            self.cache.items(),
-            key=lambda x: (x[1].access_count, x[1].last_accessed)
-        )
+        entry = self.cache.pop(key, None)
+        if entry is None:
+            return
+
+        self._current_size_bytes -= entry.size_bytes
+        self._policy.remove(key)
+        self._unregister_dependencies(key)
+
+        # Удаление с диска
+        if delete_from_disk:
+            self._store.delete(key)
 
-        target_size = self.max_size_mb * 0.8  # Целевой размер 80% от максимума
+    def _evict_entries(self, required_bytes: int = 0):
+        """
+        Вытеснение записей по выбранной политике, пока размер кэша вместе
+        с required_bytes не опустится до EVICTION_LOW_WATERMARK от максимума.
+        """
+        target_size = self.max_size_bytes * self.EVICTION_LOW_WATERMARK
 
-        while self._get_cache_size_mb() > target_size and sorted_entries:
-            key, _ = sorted_entries.pop(0)
+        while self.cache and self._current_size_bytes + required_bytes > target_size:
+            key = self._policy.select_victim()
+            if key is None:
+                break
+            evicted_bytes = self.cache[key].size_bytes
             self._remove_entry(key)
-            self._log(f"Вытеснена запись {key} для освобождения места в кэше")
+            self._stats['evictions'] += 1
+            self._stats['evicted_bytes'] += evicted_bytes
+            self._log(f"Вытеснена запись {key} ({evicted_bytes} байт) для освобождения места в кэше")
 
     def _get_cache_size_mb(self) -> float:
-        """Расчет текущего размера кэша в МБ"""
-        # Упрощенная оценка (в реальной системе нужно точное измерение)
-        return len(self.cache) * 0.1  # Эвристика: ~100 КБ на запись
+        """Текущий размер кэша в МБ"""
+        return self._current_size_bytes / (1024 * 1024)
 
     def _save_entry_to_disk(self, key: str, entry: CacheEntry):
         """Сохранение записи кэша на диск для персистентности"""
-        cache_file = self.cache_dir / f"{key}.json"
-
-        try:
-            with open(cache_file, 'w', encoding='utf-8') as f:
-                json.dump(entry.to_dict(), f, ensure_ascii=False, indent=2)
-        except Exception as e:
-            self._log(f"Ошибка сохранения кэша на диск: {e}", level='WARNING')
+        self._store.put(key, entry)
 
     def _load_persistent_cache(self):
         """Загрузка кэша с диска при старте"""
-        for cache_file in self.cache_dir.glob("*.json"):
-            try:
-                with open(cache_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    entry = CacheEntry.from_dict(data)
-
-                    # Проверка актуальности перед загрузкой
-                    if not entry.is_expired():
-                        self.cache[entry.key] = entry
-
-                        # Восстановление карты зависимостей
-                        for dep in entry.dependencies:
-                            if dep.source_id not in self.dependency_map:
-                                self.dependency_map[dep.source_id] = []
-                            if entry.key not in self.dependency_map[dep.source_id]:
-                                self.dependency_map[dep.source_id].append(entry.key)
-            except Exception as e:
-                self._log(f"Ошибка загрузки кэша из {cache_file}: {e}", level='WARNING')
-                # Удаление поврежденного файла
+        with self._lock:
+            for meta, value_loader in self._store.load():
                 try:
-                    cache_file.unlink()
-                except:
-                    pass
+                    entry = CacheEntry.from_dict(meta, value_loader=value_loader)
+                except Exception as e:
+                    self._log(f"Ошибка восстановления записи кэша {meta.get('key')}: {e}", level='WARNING')
+                    continue
+
+                # Проверка актуальности перед загрузкой
+                if entry.is_expired():
+                    self._store.delete(entry.key)
+                else:
+                    self._add_entry(entry.key, entry, persist=False)
+
+    def flush(self):
+        """Принудительная запись накопленных изменений в хранилище"""
+        self._store.flush()
+
+    def close(self):
+        """Сброс изменений и остановка фоновых потоков хранилища"""
+        self._store.close()
 
     def _start_cleanup_thread(self):
         """Запуск фонового потока очистки устаревших записей"""
@@ -353,34 +634,43 @@ class IntelligentCacheSystem:
                     expired_keys = [k for k, v in self.cache.items() if v.is_expired()]
                     for key in expired_keys:
                         self._remove_entry(key)
+                        self._stats['expirations'] += 1
                         self._log(f"Удалена устаревшая запись кэша: {key}")
 
+                try:
+                    self.revalidate_dependencies()
+                    self.dependency_validator.prune()
+                except Exception as e:
+                    self._log(f"Ошибка пакетной проверки зависимостей: {e}", level='WARNING')
+
         thread = threading.Thread(target=cleanup_loop, daemon=True, name="CacheCleanup")
         thread.start()
 
     def invalidate_by_source(self, source_id: str):
         """Инвалидация всех записей, зависящих от указанного источника"""
         with self._lock:
-            keys_to_invalidate = self.dependency_map.get(source_id, [])
-            for key in keys_to_invalidate[:]:  # Копия списка для безопасного удаления
+            keys_to_invalidate = list(self.dependency_map.get(source_id, ()))
+            for key in keys_to_invalidate:
                 self._remove_entry(key)
+                self._stats['invalidations'] += 1
                 self._log(f"Инвалидирована запись {key} из-за изменения источника {source_id}")
 
     def get_stats(self) -> Dict[str, Any]:
         """Получение статистики кэша"""
         with self._lock:
             total_entries = len(self.cache)
-            if total_entries == 0:
-                return {'total_entries': 0, 'hit_rate': 0.0, 'size_mb': 0.0}
-
-            total_accesses = sum(entry.access_count for entry in self.cache.values())
-            hits = total_accesses - total_entries  # Упрощенная оценка (первый доступ = промах)
-            hit_rate = hits / max(total_accesses, 1)
+            lookups = self._stats['hits'] + self._stats['misses']
 
             return {
                 'total_entries': total_entries,
-                'hit_rate': hit_rate,
+                'hit_rate': self._stats['hits'] / lookups if lookups else 0.0,
                 'size_mb': self._get_cache_size_mb(),
+                'size_bytes': self._current_size_bytes,
+                'max_size_bytes': self.max_size_bytes,
+                'eviction_policy': self._policy.name,
+                **self._stats,
+                'persistence': self._store.get_stats(),
+                'dependency_validation': self.dependency_validator.get_stats(),
                 'oldest_entry': min((e.created_at for e in self.cache.values()), default=None),
                 'most_accessed': max(((e.access_count, k) for k, e in self.cache.items()), default=(0, None))
             }
@@ -23,6 +23,9 @@ from core.monitoring.metrics_collector import MetricsCollector
 
 logger = logging.getLogger(__name__)
 
+# Model precision -> LazyModelLoader quantization ("none" loads full fp32 weights)
+PRECISION_QUANTIZATION = {"fp32": "none", "fp16": "fp16", "int8": "int8"}
+
 
 class StrategyType(Enum):
     """Available performance strategy types."""
@@ -49,6 +52,12 @@ class ExecutionMode(Enum):
     HYBRID = "hybrid"
 
 
+class InferenceBackend(Enum):
+    """Runtime that executes local model inference."""
+    PYTORCH = "pytorch"  # Eager PyTorch (GPU, or CPU when ONNX Runtime is unavailable)
+    ONNX_RUNTIME = "onnxruntime"  # ONNX export with dynamic int8 quantization on CPU
+
+
 class StrategySelector:
     """
     Dynamically selects optimal performance strategies based on real-time context.
@@ -99,6 +108,7 @@ class StrategySelector:
                 "caching": CachingStrategy,
                 "execution_mode": ExecutionMode,
                 "model_precision": "fp16" | "fp32" | "int8",
+                "inference_backend": InferenceBackend,
                 "batch_size": int,
                 "prefetch_window": int
             }
@@ -132,7 +142,8 @@ class StrategySelector:
         )
         caching = self._determine_caching_strategy(strategy_type, task_type)
         execution_mode = self._determine_execution_mode(strategy_type, active_tasks)
-        model_precision = self._determine_model_precision(gpu_available, strategy_type)
+        inference_backend = self._determine_inference_backend(gpu_available, task_type)
+        model_precision = self._determine_model_precision(gpu_available, strategy_type, inference_backend)
         batch_size = self._calculate_batch_size(strategy_type, ram_usage, gpu_available)
         prefetch_window = self._calculate_prefetch_window(strategy_type, task_type)
 
@@ -141,6 +152,7 @@ class StrategySelector:
             "caching": caching.value,
             "execution_mode": execution_mode.value,
             "model_precision": model_precision,
+            "inference_backend": inference_backend.value,
             "batch_size": batch_size,
             "prefetch_window": prefetch_window,
             "timestamp": metrics.get("timestamp", 0)
@@ -210,8 +222,25 @@ class StrategySelector:
             return ExecutionMode.HYBRID
         return ExecutionMode.PARALLEL
 
-    def _determine_model_precision(self, gpu_available: bool, strategy_type: StrategyType) -> str:
+    def _determine_inference_backend(self, gpu_available: bool, task_type: str) -> InferenceBackend:
+        """Uses ONNX Runtime for CPU inference of the models it can export."""
+        if gpu_available or not self.config.get("performance", {}).get("onnx_cpu_inference", True):
+            return InferenceBackend.PYTORCH
+        try:
+            from core.ai_management.onnx_backend import OnnxModelBackend
+        except ImportError:
+            return InferenceBackend.PYTORCH
+        if OnnxModelBackend.supports(task_type) and OnnxModelBackend.is_available():
+            return InferenceBackend.ONNX_RUNTIME
+        return InferenceBackend.PYTORCH
+
+    def _determine_model_precision(
+            self, gpu_available: bool, strategy_type: StrategyType,
+            inference_backend: InferenceBackend = InferenceBackend.PYTORCH
+    ) -> str:
         """Selects model precision for AI inference."""
+        if inference_backend == InferenceBackend.ONNX_RUNTIME:
+            return "int8"  # Dynamic int8 quantization, see select_model_quantization
         if not gpu_available:
             return "fp32"
         if strategy_type == StrategyType.MEMORY_CONSERVATIVE:
@@ -220,6 +249,14 @@ class StrategySelector:
             return "fp16"  # Best speed/accuracy tradeoff on GPU
         return "fp16"
 
+    def select_model_quantization(self, task_type: str) -> str:
+        """
+        Quantization for LazyModelLoader when the caller does not set one:
+        the precision of the strategy selected for task_type.
+        """
+        precision = self.select_strategy(task_type)["model_precision"]
+        return PRECISION_QUANTIZATION.get(precision, "none")
+
     def _calculate_batch_size(
             self, strategy_type: StrategyType, ram_usage: float, gpu_available: bool
     ) -> int:
@@ -256,5 +293,6 @@ class StrategySelector:
             "strategy_types": [s.value for s in StrategyType],
             "caching_strategies": [c.value for c in CachingStrategy],
             "execution_modes": [m.value for m in ExecutionMode],
-            "model_precisions": ["fp32", "fp16", "int8"]
+            "model_precisions": ["fp32", "fp16", "int8"],
+            "inference_backends": [b.value for b in InferenceBackend]
         }
\ No newline at end of file
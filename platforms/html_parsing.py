@@ -0,0 +1,310 @@
+"""
+Параллельный разбор HTML-страниц выдачи вне event loop.
+
+Разбор страниц BeautifulSoup в корутинах блокирует event loop на всё время
+разбора. Модуль выносит разбор в пул процессов:
+
+- ParseSpec — описание извлечения (селектор карточки заказа и правила полей),
+  неизменяемое и хешируемое, поэтому передается в процессы пула и служит ключом
+  кеша: CSS-селекторы и регулярные выражения компилируются один раз на правило
+  в каждом процессе;
+- разбор выполняет lxml (селекторы CSS -> XPath через cssselect); без lxml
+  используется BeautifulSoup с той же семантикой;
+- большие страницы разбираются потоково (HTMLPullParser): карточки извлекаются
+  по мере разбора, обработанные узлы освобождаются, а после limit карточек
+  остаток страницы не разбирается.
+
+Пост-обработка значений (цены, даты) остается за адаптерами: воркеры возвращают
+только строки, поэтому в процессы не нужно передавать методы адаптеров.
+"""
+import asyncio
+import logging
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from bs4 import BeautifulSoup
+
+try:
+    from lxml import etree
+    from lxml import html as lxml_html
+    from lxml.cssselect import CSSSelector
+    from cssselect import GenericTranslator, SelectorError
+except ImportError:  # lxml/cssselect не установлены: разбор через BeautifulSoup
+    etree = lxml_html = CSSSelector = GenericTranslator = SelectorError = None
+
+logger = logging.getLogger(__name__)
+
+# Страницы больше этого размера разбираются потоково
+STREAMING_THRESHOLD = 256 * 1024
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Селектор карточки без комбинаторов можно проверять на отдельном узле
+_COMBINATOR_PATTERN = re.compile(r"[\s>+~,]")
+
+
+@dataclass(frozen=True)
+class FieldSpec:
+    """Правило извлечения поля (аналог ScrapingRule без пост-обработки)"""
+    name: str
+    selector: Optional[str]  # None — сама карточка заказа
+    attribute: Optional[str] = 'text'  # 'text', имя атрибута или None (HTML элемента)
+    regex_pattern: Optional[str] = None
+    multiple: bool = False
+
+
+@dataclass(frozen=True)
+class ParseSpec:
+    """Описание извлечения заказов со страницы выдачи"""
+    job_selector: str
+    fields: Tuple[FieldSpec, ...]
+    limit: Optional[int] = None
+
+
+# ------------------------------------------------------------------ lxml
+
+class _CompiledField:
+    __slots__ = ("name", "select", "attribute", "regex", "multiple")
+
+    def __init__(self, field: FieldSpec):
+        self.name = field.name
+        self.select = CSSSelector(field.selector) if field.selector else None
+        self.attribute = field.attribute
+        self.regex = re.compile(field.regex_pattern) if field.regex_pattern else None
+        self.multiple = field.multiple
+
+
+class _CompiledSpec:
+    __slots__ = ("select_jobs", "match_job", "fields", "limit")
+
+    def __init__(self, spec: ParseSpec):
+        self.select_jobs = CSSSelector(spec.job_selector)
+        # Проверка отдельного узла нужна для потокового разбора
+        self.match_job = None
+        if not _COMBINATOR_PATTERN.search(spec.job_selector.strip()):
+            try:
+                self.match_job = etree.XPath(GenericTranslator().css_to_xpath(spec.job_selector, prefix="self::"))
+            except SelectorError:
+                self.match_job = None
+        self.fields = [_CompiledField(field) for field in spec.fields]
+        self.limit = spec.limit
+
+
+@lru_cache(maxsize=256)
+def _compile(spec: ParseSpec) -> _CompiledSpec:
+    return _CompiledSpec(spec)
+
+
+if etree is not None:
+    _TEXT_NODES = etree.XPath(".//text()[not(parent::script or parent::style)]")
+
+
+def _element_text(element: Any) -> str:
+    """Текст узла как у BeautifulSoup.get_text(strip=True)"""
+    return "".join(text.strip() for text in _TEXT_NODES(element))
+
+
+def _field_value(element: Any, field: _CompiledField) -> Any:
+    if field.attribute == 'text':
+        value = _element_text(element)
+    elif field.attribute:
+        value = element.get(field.attribute)
+    else:
+        value = lxml_html.tostring(element, encoding="unicode", with_tail=False)
+
+    if field.regex and value:
+        match = field.regex.search(str(value))
+        if match:
+            value = match.group(1) if match.groups() else match.group(0)
+    return value
+
+
+def _extract_job(element: Any, compiled: _CompiledSpec) -> Dict[str, Any]:
+    job: Dict[str, Any] = {}
+    for field in compiled.fields:
+        try:
+            found = field.select(element) if field.select is not None else [element]
+            if field.multiple:
+                job[field.name] = [_field_value(el, field) for el in found]
+            elif found:
+                job[field.name] = _field_value(found[0], field)
+        except Exception as e:
+            logger.debug(f"Ошибка извлечения поля {field.name}: {e}")
+    return job
+
+
+def _parse_tree(html: str, compiled: _CompiledSpec) -> List[Dict[str, Any]]:
+    root = lxml_html.fromstring(html)
+    elements = compiled.select_jobs(root)
+    if compiled.limit is not None:
+        elements = elements[:compiled.limit]
+    return [_extract_job(element, compiled) for element in elements]
+
+
+def _parse_streaming(html: str, compiled: _CompiledSpec) -> List[Dict[str, Any]]:
+    parser = etree.HTMLPullParser(events=("end",))
+    jobs: List[Dict[str, Any]] = []
+
+    for start in range(0, len(html), STREAM_CHUNK_SIZE):
+        parser.feed(html[start:start + STREAM_CHUNK_SIZE])
+        for _, element in parser.read_events():
+            if not compiled.match_job(element):
+                continue
+            jobs.append(_extract_job(element, compiled))
+            if compiled.limit is not None and len(jobs) >= compiled.limit:
+                # Остаток страницы не разбирается
+                return jobs
+            # Обработанная карточка и предыдущие узлы больше не нужны
+            element.clear(keep_tail=True)
+            parent = element.getparent()
+            if parent is not None:
+                while element.getprevious() is not None:
+                    del parent[0]
+    parser.close()
+    for _, element in parser.read_events():
+        if compiled.match_job(element):
+            jobs.append(_extract_job(element, compiled))
+    return jobs[:compiled.limit] if compiled.limit is not None else jobs
+
+
+# ------------------------------------------------------------ BeautifulSoup
+
+def _soup_field_value(element: Any, field: FieldSpec) -> Any:
+    if field.attribute == 'text':
+        value = element.get_text(strip=True)
+    elif field.attribute:
+        value = element.get(field.attribute)
+    else:
+        value = str(element)
+
+    if field.regex_pattern and value:
+        match = re.search(field.regex_pattern, str(value))
+        if match:
+            value = match.group(1) if match.groups() else match.group(0)
+    return value
+
+
+def parse_listing_soup(html: str, spec: ParseSpec) -> List[Dict[str, Any]]:
+    """Разбор через BeautifulSoup (прежняя реализация; эталон для сравнения)"""
+    soup = BeautifulSoup(html, 'html.parser')
+    elements = soup.select(spec.job_selector)
+    if spec.limit is not None:
+        elements = elements[:spec.limit]
+
+    jobs = []
+    for element in elements:
+        job: Dict[str, Any] = {}
+        for field in spec.fields:
+            try:
+                found = element.select(field.selector) if field.selector else [element]
+                if field.multiple:
+                    job[field.name] = [_soup_field_value(el, field) for el in found]
+                elif found:
+                    job[field.name] = _soup_field_value(found[0], field)
+            except Exception as e:
+                logger.debug(f"Ошибка извлечения поля {field.name}: {e}")
+        jobs.append(job)
+    return jobs
+
+
+def parse_listing(html: str, spec: ParseSpec, streaming: Optional[bool] = None) -> List[Dict[str, Any]]:
+    """
+    Извлечение полей заказов со страницы выдачи (выполняется в процессе пула).
+
+    Args:
+        streaming: Потоковый разбор; по умолчанию — для страниц больше STREAMING_THRESHOLD
+    """
+    if not html:
+        return []
+    if etree is None:
+        return parse_listing_soup(html, spec)
+
+    compiled = _compile(spec)
+    if streaming is None:
+        streaming = len(html) > STREAMING_THRESHOLD
+    if streaming and compiled.match_job is not None:
+        return _parse_streaming(html, compiled)
+    return _parse_tree(html, compiled)
+
+
+# ----------------------------------------------------------------- пул
+
+class HtmlParsingPool:
+    """
+    Пул процессов для разбора страниц.
+
+    Пример:
+        jobs = await get_html_parsing_pool().parse(html, spec)
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        """
+        Args:
+            max_workers: Число процессов (по умолчанию — число CPU, но не больше 4)
+        """
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.stats = {"pooled": 0, "inline": 0}
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def _reset_executor(self, error: Exception) -> None:
+        logger.warning(f"Пул разбора HTML недоступен, разбор в текущем процессе: {error}")
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def parse(self, html: str, spec: ParseSpec) -> List[Dict[str, Any]]:
+        """Разбор без блокировки event loop"""
+        loop = asyncio.get_running_loop()
+        try:
+            result = await loop.run_in_executor(self._get_executor(), parse_listing, html, spec)
+            self.stats["pooled"] += 1
+            return result
+        except BrokenProcessPool as e:
+            self._reset_executor(e)
+            self.stats["inline"] += 1
+            return await asyncio.to_thread(parse_listing, html, spec)
+
+    def parse_sync(self, html: str, spec: ParseSpec) -> List[Dict[str, Any]]:
+        """Разбор для синхронных клиентов (вызывающий поток ждет результат)"""
+        try:
+            result = self._get_executor().submit(parse_listing, html, spec).result()
+            self.stats["pooled"] += 1
+            return result
+        except BrokenProcessPool as e:
+            self._reset_executor(e)
+            self.stats["inline"] += 1
+            return parse_listing(html, spec)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+
+_shared_pool: Optional[HtmlParsingPool] = None
+_shared_pool_lock = threading.Lock()
+
+
+def get_html_parsing_pool() -> HtmlParsingPool:
+    """Общий для процесса пул разбора HTML (создается при первом обращении)"""
+    global _shared_pool
+    if _shared_pool is None:
+        with _shared_pool_lock:
+            if _shared_pool is None:
+                _shared_pool = HtmlParsingPool()
+    return _shared_pool
@@ -0,0 +1,684 @@
+"""
+Общий HTTP-транспорт платформенных клиентов.
+
+Раньше каждый клиент (UpworkClient, UpworkAPIWrapper, KworkAPIWrapper,
+KworkClient, KworkScraper, UniversalScraperAdapter) создавал собственную сессию:
+соединения не переиспользовались между модулями, а повторы и паузы были
+реализованы в каждом по-своему. Транспорт объединяет это:
+
+- один пул соединений httpx на event loop (и один для синхронных клиентов)
+  с keep-alive и мультиплексированием HTTP/2, если установлен h2;
+- кеш DNS с TTL поверх сетевого бэкенда httpcore (SNI и проверка сертификата
+  по-прежнему выполняются по имени хоста);
+- ограничение числа одновременных запросов к хосту (по умолчанию 10,
+  configure_host переопределяет для отдельных хостов);
+- единые повторы: экспоненциальная задержка с джиттером, учет Retry-After;
+  429 повторяется для любых методов (запрос не обработан), 502/503/504 и
+  сетевые ошибки — только для идемпотентных, если не задан retry_unsafe;
+- метрики загрузки пула и хостов: get_stats().
+
+Состояние клиента (заголовки, cookies, прокси) хранит HttpSession, сами
+соединения общие. Общие клиенты httpx cookies не сохраняют: jar сессии
+передается с запросом и применяется на каждом шаге, включая редиректы.
+"""
+import asyncio
+import ipaddress
+import logging
+import random
+import socket
+import threading
+import time
+import weakref
+from email.utils import parsedate_to_datetime
+from http.cookiejar import CookieJar
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpcore
+import httpx
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:  # без h2 httpx работает только по HTTP/1.1
+    HTTP2_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = frozenset({429, 502, 503, 504})
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+# Ошибки, после которых запрос имеет смысл повторить
+RETRYABLE_ERRORS = (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError)
+# Запрос гарантированно не был отправлен
+NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+# Расширение запроса httpx с cookies сессии (сохраняется при редиректах)
+SESSION_COOKIES_EXTENSION = "session_cookies"
+
+
+class _NoStoreCookieJar(CookieJar):
+    """Jar общих клиентов: cookies не сохраняются и не попадают в чужие сессии"""
+
+    def set_cookie(self, cookie) -> None:
+        pass
+
+    def extract_cookies(self, response, request) -> None:
+        pass
+
+
+def _send_session_cookies(request: httpx.Request) -> None:
+    cookie_jar = request.extensions.get(SESSION_COOKIES_EXTENSION)
+    if cookie_jar is not None:
+        cookie_jar.set_cookie_header(request)
+
+
+def _store_session_cookies(response: httpx.Response) -> None:
+    cookie_jar = response.request.extensions.get(SESSION_COOKIES_EXTENSION)
+    if cookie_jar is not None:
+        cookie_jar.extract_cookies(response)
+
+
+async def _send_session_cookies_async(request: httpx.Request) -> None:
+    _send_session_cookies(request)
+
+
+async def _store_session_cookies_async(response: httpx.Response) -> None:
+    _store_session_cookies(response)
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    """Пауза из заголовка Retry-After (секунды или HTTP-дата)"""
+    value = response.headers.get("Retry-After", "").strip()
+    if not value:
+        return None
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+# ------------------------------------------------------------------ DNS
+
+class DNSCache:
+    """Адреса хостов с TTL; запись сбрасывается, если ни к одному адресу не удалось подключиться"""
+
+    def __init__(self, ttl: float = 300.0, max_entries: int = 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: Dict[str, Tuple[float, List[str]]] = {}
+        self._pending: Dict[Tuple[asyncio.AbstractEventLoop, str], "asyncio.Future[List[str]]"] = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "invalidations": 0}
+
+    @staticmethod
+    def _is_ip(host: str) -> bool:
+        try:
+            ipaddress.ip_address(host)
+            return True
+        except ValueError:
+            return False
+
+    def lookup(self, host: str) -> Optional[List[str]]:
+        with self._lock:
+            entry = self._entries.get(host)
+            if entry is not None and entry[0] > time.monotonic():
+                self.stats["hits"] += 1
+                return entry[1]
+            return None
+
+    def store(self, host: str, addresses: List[str]) -> None:
+        with self._lock:
+            self.stats["misses"] += 1
+            if len(self._entries) >= self.max_entries:
+                now = time.monotonic()
+                for key in [key for key, (expires, _) in self._entries.items() if expires <= now]:
+                    del self._entries[key]
+                if len(self._entries) >= self.max_entries:
+                    self._entries.pop(next(iter(self._entries)))
+            self._entries[host] = (time.monotonic() + self.ttl, addresses)
+
+    def invalidate(self, host: str) -> None:
+        with self._lock:
+            if self._entries.pop(host, None) is not None:
+                self.stats["invalidations"] += 1
+
+    @staticmethod
+    def _unique(infos: List[Any]) -> List[str]:
+        return list(dict.fromkeys(info[4][0] for info in infos))
+
+    async def _resolve(self, host: str, port: int) -> List[str]:
+        infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        addresses = self._unique(infos)
+        self.store(host, addresses)
+        return addresses
+
+    async def resolve(self, host: str, port: int) -> List[str]:
+        """Адреса хоста; одновременные промахи по одному хосту ждут один запрос к DNS"""
+        if self._is_ip(host):
+            return [host]
+        addresses = self.lookup(host)
+        if addresses is not None:
+            return addresses
+        key = (asyncio.get_running_loop(), host)
+        task = self._pending.get(key)
+        if task is None:
+            task = self._pending[key] = asyncio.ensure_future(self._resolve(host, port))
+            task.add_done_callback(lambda _: self._pending.pop(key, None))
+        else:
+            self.stats["coalesced"] += 1
+        return await asyncio.shield(task)
+
+    def resolve_sync(self, host: str, port: int) -> List[str]:
+        if self._is_ip(host):
+            return [host]
+        addresses = self.lookup(host)
+        if addresses is None:
+            addresses = self._unique(socket.getaddrinfo(host, port, type=socket.SOCK_STREAM))
+            self.store(host, addresses)
+        return addresses
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "entries": len(self._entries)}
+
+
+class _AsyncCachingBackend(httpcore.AsyncNetworkBackend):
+    """Сетевой бэкенд httpcore, подключающийся по адресам из DNSCache"""
+
+    def __init__(self, dns_cache: DNSCache):
+        self._dns = dns_cache
+        self._backend = httpcore.AnyIOBackend()
+
+    async def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        try:
+            addresses = await self._dns.resolve(host, port)
+        except socket.gaierror as e:
+            raise httpcore.ConnectError(str(e)) from e
+        error: Optional[Exception] = None
+        for address in addresses:
+            try:
+                return await self._backend.connect_tcp(address, port, timeout=timeout, local_address=local_address,
+                                                       socket_options=socket_options)
+            except (httpcore.ConnectError, httpcore.ConnectTimeout) as e:
+                error = e
+        self._dns.invalidate(host)
+        raise error
+
+    async def connect_unix_socket(self, path, timeout=None, socket_options=None):
+        return await self._backend.connect_unix_socket(path, timeout=timeout, socket_options=socket_options)
+
+    async def sleep(self, seconds):
+        await self._backend.sleep(seconds)
+
+
+class _SyncCachingBackend(httpcore.NetworkBackend):
+    def __init__(self, dns_cache: DNSCache):
+        self._dns = dns_cache
+        self._backend = httpcore.SyncBackend()
+
+    def connect_tcp(self, host, port, timeout=None, local_address=None, socket_options=None):
+        try:
+            addresses = self._dns.resolve_sync(host, port)
+        except socket.gaierror as e:
+            raise httpcore.ConnectError(str(e)) from e
+        error: Optional[Exception] = None
+        for address in addresses:
+            try:
+                return self._backend.connect_tcp(address, port, timeout=timeout, local_address=local_address,
+                                                 socket_options=socket_options)
+            except (httpcore.ConnectError, httpcore.ConnectTimeout) as e:
+                error = e
+        self._dns.invalidate(host)
+        raise error
+
+    def connect_unix_socket(self, path, timeout=None, socket_options=None):
+        return self._backend.connect_unix_socket(path, timeout=timeout, socket_options=socket_options)
+
+    def sleep(self, seconds):
+        self._backend.sleep(seconds)
+
+
+# ------------------------------------------------------------- транспорты
+
+def _pool_options(limits: httpx.Limits, http2: bool) -> Dict[str, Any]:
+    return {
+        "ssl_context": httpx.create_ssl_context(http2=http2),
+        "max_connections": limits.max_connections,
+        "max_keepalive_connections": limits.max_keepalive_connections,
+        "keepalive_expiry": limits.keepalive_expiry,
+        "http1": True,
+        "http2": http2,
+    }
+
+
+class _AsyncPoolTransport(httpx.AsyncHTTPTransport):
+    """Транспорт httpx с пулом на кеширующем DNS-бэкенде (через прокси — стандартный пул)"""
+
+    def __init__(self, limits: httpx.Limits, http2: bool, dns_cache: DNSCache, proxy: Optional[str] = None):
+        super().__init__(http2=http2, limits=limits, proxy=httpx.Proxy(proxy) if proxy else None)
+        if proxy is None:
+            self._pool = httpcore.AsyncConnectionPool(network_backend=_AsyncCachingBackend(dns_cache),
+                                                      **_pool_options(limits, http2))
+
+    @property
+    def pool(self) -> Any:
+        return self._pool
+
+
+class _SyncPoolTransport(httpx.HTTPTransport):
+    def __init__(self, limits: httpx.Limits, http2: bool, dns_cache: DNSCache, proxy: Optional[str] = None):
+        super().__init__(http2=http2, limits=limits, proxy=httpx.Proxy(proxy) if proxy else None)
+        if proxy is None:
+            self._pool = httpcore.ConnectionPool(network_backend=_SyncCachingBackend(dns_cache),
+                                                 **_pool_options(limits, http2))
+
+    @property
+    def pool(self) -> Any:
+        return self._pool
+
+
+class _HostStats:
+    __slots__ = ("requests", "errors", "retries", "in_flight", "peak_in_flight", "latency_total")
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.latency_total = 0.0
+
+
+class _LoopState:
+    """Клиенты (по прокси) и семафоры хостов одного event loop"""
+
+    def __init__(self):
+        self.clients: Dict[Optional[str], httpx.AsyncClient] = {}
+        self.semaphores: Dict[str, asyncio.Semaphore] = {}
+
+
+# ---------------------------------------------------------------- транспорт
+
+class HttpTransport:
+    """
+    Пример:
+        transport = get_http_transport()
+        transport.configure_host("kwork.ru", max_connections=5)
+        response = await transport.request("GET", url, headers=headers)
+    """
+
+    def __init__(self,
+                 max_connections: int = 100,
+                 max_keepalive_connections: int = 20,
+                 keepalive_expiry: float = 30.0,
+                 max_connections_per_host: int = 10,
+                 http2: bool = True,
+                 dns_ttl: float = 300.0,
+                 timeout: float = 30.0,
+                 connect_timeout: float = 10.0,
+                 max_retries: int = 3,
+                 backoff_base: float = 0.5,
+                 backoff_max: float = 30.0):
+        """
+        Args:
+            max_connections: Размер пула соединений (на event loop)
+            max_keepalive_connections: Сколько простаивающих соединений держать открытыми
+            keepalive_expiry: Через сколько секунд простоя соединение закрывается
+            max_connections_per_host: Одновременных запросов к хосту по умолчанию
+            http2: Использовать HTTP/2 (если установлен h2)
+            dns_ttl: Время жизни записей кеша DNS
+            timeout: Таймаут запроса по умолчанию
+            connect_timeout: Таймаут установки соединения
+            max_retries: Повторов по умолчанию
+            backoff_base: Базовая задержка повтора (удваивается с каждой попыткой)
+            backoff_max: Максимальная задержка повтора, в т.ч. по Retry-After
+        """
+        self.limits = httpx.Limits(max_connections=max_connections,
+                                   max_keepalive_connections=max_keepalive_connections,
+                                   keepalive_expiry=keepalive_expiry)
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.max_connections_per_host = max_connections_per_host
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.dns = DNSCache(ttl=dns_ttl)
+
+        self._host_limits: Dict[str, int] = {}
+        self._host_stats: Dict[str, _HostStats] = {}
+        self._loop_states: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopState]" = \
+            weakref.WeakKeyDictionary()
+        self._sync_clients: Dict[Optional[str], httpx.Client] = {}
+        self._sync_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._transports: "weakref.WeakSet[Any]" = weakref.WeakSet()
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------ настройка
+
+    def configure_host(self, host: str, max_connections: int) -> None:
+        """Лимит одновременных запросов к хосту (применяется к новым запросам)"""
+        with self._lock:
+            if self._host_limits.get(host) == max_connections:
+                return
+            self._host_limits[host] = max_connections
+            self._sync_semaphores.pop(host, None)
+            for state in self._loop_states.values():
+                state.semaphores.pop(host, None)
+
+    def host_limit(self, host: str) -> int:
+        return self._host_limits.get(host, self.max_connections_per_host)
+
+    def session(self, headers: Optional[Dict[str, str]] = None, proxy: Optional[str] = None,
+                timeout: Optional[float] = None) -> "HttpSession":
+        """Состояние отдельного клиента (заголовки, cookies, прокси) поверх общих соединений"""
+        return HttpSession(self, headers=headers, proxy=proxy, timeout=timeout)
+
+    # ------------------------------------------------------- клиенты
+
+    def _client_options(self) -> Dict[str, Any]:
+        return {"timeout": self.timeout, "follow_redirects": True, "cookies": _NoStoreCookieJar()}
+
+    def _loop_state(self) -> _LoopState:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            state = self._loop_states.get(loop)
+            if state is None:
+                state = self._loop_states[loop] = _LoopState()
+            return state
+
+    def _async_client(self, state: _LoopState, proxy: Optional[str]) -> httpx.AsyncClient:
+        client = state.clients.get(proxy)
+        if client is None or client.is_closed:
+            transport = _AsyncPoolTransport(self.limits, self.http2, self.dns, proxy)
+            self._transports.add(transport)
+            client = state.clients[proxy] = httpx.AsyncClient(
+                transport=transport,
+                event_hooks={"request": [_send_session_cookies_async], "response": [_store_session_cookies_async]},
+                **self._client_options()
+            )
+        return client
+
+    def _async_semaphore(self, state: _LoopState, host: str) -> asyncio.Semaphore:
+        semaphore = state.semaphores.get(host)
+        if semaphore is None:
+            semaphore = state.semaphores[host] = asyncio.Semaphore(self.host_limit(host))
+        return semaphore
+
+    def _sync_client(self, proxy: Optional[str]) -> httpx.Client:
+        with self._lock:
+            client = self._sync_clients.get(proxy)
+            if client is None or client.is_closed:
+                transport = _SyncPoolTransport(self.limits, self.http2, self.dns, proxy)
+                self._transports.add(transport)
+                client = self._sync_clients[proxy] = httpx.Client(
+                    transport=transport,
+                    event_hooks={"request": [_send_session_cookies], "response": [_store_session_cookies]},
+                    **self._client_options()
+                )
+            return client
+
+    def _sync_semaphore(self, host: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            semaphore = self._sync_semaphores.get(host)
+            if semaphore is None:
+                semaphore = self._sync_semaphores[host] = threading.BoundedSemaphore(self.host_limit(host))
+            return semaphore
+
+    # -------------------------------------------------------- повторы
+
+    def _backoff(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        """Full jitter: случайная пауза до base * 2^attempt; Retry-After имеет приоритет"""
+        retry_after = _retry_after(response) if response is not None else None
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    @staticmethod
+    def _retry_status(method: str, status: int, retry_statuses: frozenset, retry_unsafe: bool) -> bool:
+        if status not in retry_statuses:
+            return False
+        return status == 429 or retry_unsafe or method in IDEMPOTENT_METHODS
+
+    @staticmethod
+    def _retry_error(method: str, error: Exception, retry_unsafe: bool) -> bool:
+        if not isinstance(error, RETRYABLE_ERRORS):
+            return False
+        return isinstance(error, NOT_SENT_ERRORS) or retry_unsafe or method in IDEMPOTENT_METHODS
+
+    # ------------------------------------------------------- метрики
+
+    def _start(self, host: str) -> Tuple[_HostStats, float]:
+        with self._lock:
+            stats = self._host_stats.get(host)
+            if stats is None:
+                stats = self._host_stats[host] = _HostStats()
+            stats.requests += 1
+            stats.in_flight += 1
+            stats.peak_in_flight = max(stats.peak_in_flight, stats.in_flight)
+        return stats, time.perf_counter()
+
+    def _finish(self, stats: _HostStats, started: float, error: bool = False) -> None:
+        with self._lock:
+            stats.in_flight -= 1
+            stats.latency_total += time.perf_counter() - started
+            if error:
+                stats.errors += 1
+
+    def _count_retry(self, stats: _HostStats) -> None:
+        with self._lock:
+            stats.retries += 1
+
+    # ------------------------------------------------------- запросы
+
+    def _build(self, client: Any, method: str, url: str, cookie_jar: Optional[httpx.Cookies],
+               kwargs: Dict[str, Any]) -> httpx.Request:
+        # Cookies подставляются и сохраняются хуками клиента на каждом шаге, включая редиректы
+        extensions = dict(kwargs.get("extensions") or {})
+        if cookie_jar is not None:
+            extensions[SESSION_COOKIES_EXTENSION] = cookie_jar
+        return client.build_request(method, url, **{**kwargs, "extensions": extensions})
+
+    async def request(self,
+                      method: str,
+                      url: str,
+                      *,
+                      proxy: Optional[str] = None,
+                      cookie_jar: Optional[httpx.Cookies] = None,
+                      retries: Optional[int] = None,
+                      retry_statuses: frozenset = RETRY_STATUSES,
+                      retry_unsafe: bool = False,
+                      **kwargs) -> httpx.Response:
+        """
+        Запрос через общий пул. Ответ возвращается с любым статусом
+        (raise_for_status — на стороне вызывающего); после исчерпания
+        повторов возвращается последний ответ или выбрасывается ошибка httpx.
+
+        Args:
+            proxy: URL прокси (для каждого прокси — свой пул)
+            cookie_jar: Cookies клиента: подставляются в запрос и обновляются из ответа
+            retries: Число повторов (по умолчанию max_retries)
+            retry_statuses: Статусы, после которых запрос повторяется
+            retry_unsafe: Повторять неидемпотентные запросы после 5xx и обрывов соединения
+            **kwargs: Аргументы httpx build_request (params, json, data, headers, timeout, ...)
+        """
+        method = method.upper()
+        retries = self.max_retries if retries is None else retries
+        state = self._loop_state()
+        client = self._async_client(state, proxy)
+        host = httpx.URL(url).host
+
+        attempt = 0
+        while True:
+            request = self._build(client, method, url, cookie_jar, kwargs)
+            async with self._async_semaphore(state, host):
+                stats, started = self._start(host)
+                response = None
+                try:
+                    # Отмена и ошибки вне httpx тоже закрывают учет запроса (in_flight)
+                    try:
+                        response = await client.send(request)
+                    finally:
+                        self._finish(stats, started, error=response is None)
+                except httpx.HTTPError as e:
+                    if attempt >= retries or not self._retry_error(method, e, retry_unsafe):
+                        raise
+                    delay = self._backoff(attempt)
+                    logger.debug(f"Повтор {method} {host} через {delay:.1f} сек: {e!r}")
+                else:
+                    if attempt >= retries or not self._retry_status(method, response.status_code,
+                                                                     retry_statuses, retry_unsafe):
+                        return response
+                    delay = self._backoff(attempt, response)
+                    logger.debug(f"Повтор {method} {host} через {delay:.1f} сек: статус {response.status_code}")
+            self._count_retry(stats)
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    def request_sync(self,
+                     method: str,
+                     url: str,
+                     *,
+                     proxy: Optional[str] = None,
+                     cookie_jar: Optional[httpx.Cookies] = None,
+                     retries: Optional[int] = None,
+                     retry_statuses: frozenset = RETRY_STATUSES,
+                     retry_unsafe: bool = False,
+                     **kwargs) -> httpx.Response:
+        """Синхронный вариант request для клиентов, работающих в потоках"""
+        method = method.upper()
+        retries = self.max_retries if retries is None else retries
+        client = self._sync_client(proxy)
+        host = httpx.URL(url).host
+
+        attempt = 0
+        while True:
+            request = self._build(client, method, url, cookie_jar, kwargs)
+            with self._sync_semaphore(host):
+                stats, started = self._start(host)
+                response = None
+                try:
+                    try:
+                        response = client.send(request)
+                    finally:
+                        self._finish(stats, started, error=response is None)
+                except httpx.HTTPError as e:
+                    if attempt >= retries or not self._retry_error(method, e, retry_unsafe):
+                        raise
+                    delay = self._backoff(attempt)
+                else:
+                    if attempt >= retries or not self._retry_status(method, response.status_code,
+                                                                     retry_statuses, retry_unsafe):
+                        return response
+                    delay = self._backoff(attempt, response)
+            self._count_retry(stats)
+            attempt += 1
+            time.sleep(delay)
+
+    # -------------------------------------------------------- статистика
+
+    def _pools(self) -> List[Any]:
+        with self._lock:
+            return [transport.pool for transport in self._transports]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Загрузка пулов соединений, хостов и кеша DNS"""
+        pools = self._pools()
+        connections = [connection for pool in pools for connection in pool.connections]
+        idle = sum(1 for connection in connections if connection.is_idle())
+        capacity = self.limits.max_connections * len(pools)
+        pool_stats = {
+            "pools": len(pools),
+            "connections": len(connections),
+            "active": len(connections) - idle,
+            "idle": idle,
+            "http2": sum(1 for connection in connections if "HTTP/2" in connection.info()),
+            "utilization": round((len(connections) - idle) / capacity, 3) if capacity else 0.0,
+        }
+
+        with self._lock:
+            hosts = {}
+            for host, stats in self._host_stats.items():
+                limit = self.host_limit(host)
+                hosts[host] = {
+                    "requests": stats.requests,
+                    "errors": stats.errors,
+                    "retries": stats.retries,
+                    "in_flight": stats.in_flight,
+                    "peak_in_flight": stats.peak_in_flight,
+                    "limit": limit,
+                    "utilization": round(stats.in_flight / limit, 3),
+                    "avg_latency_ms": round(stats.latency_total / stats.requests * 1000, 1) if stats.requests else 0.0,
+                }
+        return {"pool": pool_stats, "hosts": hosts, "dns": self.dns.get_stats(), "http2_enabled": self.http2}
+
+    # ------------------------------------------------------- закрытие
+
+    async def aclose(self) -> None:
+        """Закрытие клиентов текущего event loop"""
+        state = self._loop_state()
+        clients, state.clients = list(state.clients.values()), {}
+        for client in clients:
+            await client.aclose()
+
+    def close(self) -> None:
+        """Закрытие синхронных клиентов"""
+        with self._lock:
+            clients, self._sync_clients = list(self._sync_clients.values()), {}
+        for client in clients:
+            client.close()
+
+
+class HttpSession:
+    """
+    Заголовки, cookies и прокси отдельного клиента поверх общего транспорта
+    (замена собственной aiohttp/requests-сессии клиента).
+    """
+
+    def __init__(self, transport: HttpTransport, headers: Optional[Dict[str, str]] = None,
+                 proxy: Optional[str] = None, timeout: Optional[float] = None):
+        self.transport = transport
+        self.headers = httpx.Headers(headers or {})
+        self.cookies = httpx.Cookies()
+        self.proxy = proxy
+        self.timeout = timeout
+
+    def _options(self, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+        headers = httpx.Headers(self.headers)
+        headers.update(kwargs.pop("headers", None) or {})
+        kwargs.setdefault("proxy", self.proxy)
+        if self.timeout is not None:
+            kwargs.setdefault("timeout", self.timeout)
+        return {**kwargs, "headers": headers, "cookie_jar": self.cookies}
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        return await self.transport.request(method, url, **self._options(kwargs))
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    def request_sync(self, method: str, url: str, **kwargs) -> httpx.Response:
+        return self.transport.request_sync(method, url, **self._options(kwargs))
+
+    def get_sync(self, url: str, **kwargs) -> httpx.Response:
+        return self.request_sync("GET", url, **kwargs)
+
+    def post_sync(self, url: str, **kwargs) -> httpx.Response:
+        return self.request_sync("POST", url, **kwargs)
+
+
+_shared_transport: Optional[HttpTransport] = None
+_shared_transport_lock = threading.Lock()
+
+
+def get_http_transport() -> HttpTransport:
+    """Общий для процесса HTTP-транспорт (создается при первом обращении)"""
+    global _shared_transport
+    if _shared_transport is None:
+        with _shared_transport_lock:
+            if _shared_transport is None:
+                _shared_transport = HttpTransport()
+    return _shared_transport
@@ -0,0 +1,361 @@
+"""
+Индекс дедупликации заказов между платформами.
+
+Один и тот же заказ клиента часто публикуется на Kwork, FL, Freelance.ru и Хабре.
+Индекс находит такие копии, чтобы каждый уникальный заказ анализировался и
+оценивался один раз:
+
+- точные копии — по хешу нормализованных заголовка и описания;
+- почти-копии (перефразированные, с другим бюджетом или подписью) — по MinHash
+  словных шинглов с LSH-бандами: кандидаты берутся из корзин бандов,
+  а затем сверяется оценка сходства Жаккара.
+
+Каждая запись помнит свою каноническую копию (платформа + id заказа): повторная
+выдача того же заказа в следующем поиске не считается дубликатом, копии с других
+платформ — считаются. Индекс ограничен по числу записей (вытесняются давно не
+встречавшиеся) и по времени жизни записей, сохраняется на диск между запусками.
+Результаты анализа заказа кешируются в памяти на записи.
+"""
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STATE_PATH = "data/state/job_dedup_index.json"
+
+# 16 бандов по 4 строки: пары со сходством ~0.5 и выше почти всегда попадают в кандидаты
+NUM_PERM = 64
+LSH_BANDS = 16
+LSH_ROWS = NUM_PERM // LSH_BANDS
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+# Фиксированное зерно: сигнатуры должны совпадать между запусками процесса
+_rng = random.Random(0x5EED)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(NUM_PERM)
+]
+
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def _field(job: Any, name: str, default: Any = "") -> Any:
+    """Поле заказа: поддерживаются и словари скраперов, и объекты Job адаптеров"""
+    if isinstance(job, dict):
+        value = job.get(name, default)
+    else:
+        value = getattr(job, name, default)
+    return default if value is None else value
+
+
+def normalize_text(text: str) -> List[str]:
+    """Токены текста в нижнем регистре без пунктуации"""
+    return _TOKEN_PATTERN.findall(text.lower().replace("ё", "е"))
+
+
+def minhash_signature(tokens: List[str], shingle_size: int = 3) -> Tuple[int, ...]:
+    """MinHash-сигнатура множества словных шинглов"""
+    if len(tokens) < shingle_size:
+        shingles = {" ".join(tokens)}
+    else:
+        shingles = {" ".join(tokens[i:i + shingle_size]) for i in range(len(tokens) - shingle_size + 1)}
+    hashes = [zlib.crc32(shingle.encode("utf-8")) for shingle in shingles]
+    return tuple(
+        min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+        for a, b in _PERMUTATIONS
+    )
+
+
+def signature_similarity(left: Tuple[int, ...], right: Tuple[int, ...]) -> float:
+    """Оценка сходства Жаккара по доле совпавших позиций сигнатур"""
+    return sum(1 for x, y in zip(left, right) if x == y) / NUM_PERM
+
+
+class _DedupEntry:
+    """Каноническая копия уникального заказа"""
+
+    __slots__ = ("key", "fingerprint", "signature", "platform", "job_id",
+                 "first_seen", "last_seen", "copies", "analysis")
+
+    def __init__(self, key: str, fingerprint: str, signature: Tuple[int, ...],
+                 platform: str, job_id: str, first_seen: float, last_seen: float, copies: int = 1):
+        self.key = key
+        self.fingerprint = fingerprint
+        self.signature = signature
+        self.platform = platform
+        self.job_id = job_id
+        self.first_seen = first_seen
+        self.last_seen = last_seen
+        self.copies = copies
+        self.analysis: Any = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "fingerprint": self.fingerprint,
+            "signature": list(self.signature),
+            "platform": self.platform,
+            "job_id": self.job_id,
+            "first_seen": self.first_seen,
+            "last_seen": self.last_seen,
+            "copies": self.copies,
+        }
+
+
+class JobDedupIndex:
+    """
+    Ограниченный по памяти индекс уникальных заказов.
+
+    Пример:
+        index = get_job_dedup_index()
+        unique_jobs = index.filter_unique(jobs)
+    """
+
+    def __init__(self,
+                 state_path: Optional[str] = DEFAULT_STATE_PATH,
+                 max_entries: int = 20000,
+                 ttl_hours: float = 72.0,
+                 similarity_threshold: float = 0.8,
+                 persist_interval: float = 30.0):
+        """
+        Args:
+            state_path: Файл состояния индекса (None — без сохранения)
+            max_entries: Максимальное число уникальных заказов в индексе
+            ttl_hours: Время жизни записи с момента последней встречи заказа
+            similarity_threshold: Порог сходства для почти-копий (0.0 - 1.0)
+            persist_interval: Минимальный интервал между сохранениями состояния
+        """
+        self.state_path = Path(state_path) if state_path else None
+        self.max_entries = max_entries
+        self.ttl = ttl_hours * 3600
+        self.similarity_threshold = similarity_threshold
+        self.persist_interval = persist_interval
+
+        self._entries: "OrderedDict[str, _DedupEntry]" = OrderedDict()
+        self._by_fingerprint: Dict[str, str] = {}
+        self._by_identity: Dict[Tuple[str, str], str] = {}
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], set] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._last_persist = time.monotonic()
+        self.stats = {"seen": 0, "unique": 0, "exact_duplicates": 0, "near_duplicates": 0, "expired": 0}
+        self._load_state()
+
+    # ------------------------------------------------------------ поиск
+
+    @staticmethod
+    def _identity(job: Any) -> Optional[Tuple[str, str]]:
+        """Платформа и id заказа; None, если id неизвестен (у словарей скраперов поле job_id)"""
+        job_id = _field(job, "id") or _field(job, "job_id")
+        return (str(_field(job, "platform")), str(job_id)) if job_id else None
+
+    def _match(self, fingerprint: str, signature: Tuple[int, ...]) -> Tuple[Optional[_DedupEntry], str]:
+        key = self._by_fingerprint.get(fingerprint)
+        if key is not None:
+            return self._entries[key], "exact"
+
+        candidates = set()
+        for band in range(LSH_BANDS):
+            candidates |= self._buckets.get(self._band_key(signature, band), set())
+
+        best, best_similarity = None, self.similarity_threshold
+        for key in candidates:
+            entry = self._entries[key]
+            similarity = signature_similarity(signature, entry.signature)
+            if similarity >= best_similarity:
+                best, best_similarity = entry, similarity
+        return best, "near"
+
+    @staticmethod
+    def _band_key(signature: Tuple[int, ...], band: int) -> Tuple[int, Tuple[int, ...]]:
+        return band, signature[band * LSH_ROWS:(band + 1) * LSH_ROWS]
+
+    def check(self, job: Any) -> Optional[Dict[str, Any]]:
+        """
+        Регистрация заказа в индексе.
+
+        Returns: None для уникального заказа (или повторной выдачи канонической
+        копии), иначе сведения о канонической копии, дубликатом которой он является
+        """
+        title = str(_field(job, "title"))
+        description = str(_field(job, "description"))
+        tokens = normalize_text(f"{title} {description}")
+        fingerprint = hashlib.sha1(" ".join(tokens).encode("utf-8")).hexdigest()
+        signature = minhash_signature(tokens)
+        identity = self._identity(job)
+        now = time.time()
+
+        with self._lock:
+            self._expire(now)
+            self.stats["seen"] += 1
+            self._dirty = True
+
+            key = self._by_identity.get(identity) if identity else None
+            if key is not None:
+                # Тот же заказ той же платформы: каноническая копия, не дубликат
+                entry = self._entries[key]
+                kind = None
+            else:
+                entry, kind = self._match(fingerprint, signature)
+
+            if entry is None:
+                self._add(fingerprint, signature, identity, now)
+                self.stats["unique"] += 1
+                duplicate = None
+            else:
+                entry.last_seen = now
+                self._entries.move_to_end(entry.key)
+                if kind is None:
+                    duplicate = None
+                else:
+                    entry.copies += 1
+                    self.stats["exact_duplicates" if kind == "exact" else "near_duplicates"] += 1
+                    duplicate = {
+                        "key": entry.key,
+                        "platform": entry.platform,
+                        "job_id": entry.job_id,
+                        "match": kind,
+                    }
+
+        self._maybe_persist()
+        return duplicate
+
+    def filter_unique(self, jobs: List[Any]) -> List[Any]:
+        """Заказы без копий уже известных заказов (порядок сохраняется)"""
+        unique = [job for job in jobs if self.check(job) is None]
+        if len(unique) < len(jobs):
+            logger.info(f"Дедупликация: отброшено {len(jobs) - len(unique)} копий из {len(jobs)} заказов "
+                        f"(доля дубликатов за всё время {self.dedup_ratio:.1%})")
+        return unique
+
+    # ------------------------------------------- кеш результатов анализа
+
+    def get_analysis(self, job: Any) -> Any:
+        """Результат анализа канонической копии заказа (или None)"""
+        with self._lock:
+            identity = self._identity(job)
+            key = self._by_identity.get(identity) if identity else None
+            entry = self._entries.get(key) if key is not None else None
+            return entry.analysis if entry is not None else None
+
+    def store_analysis(self, job: Any, analysis: Any) -> None:
+        """Сохранение результата анализа на записи канонической копии заказа"""
+        with self._lock:
+            identity = self._identity(job)
+            key = self._by_identity.get(identity) if identity else None
+            if key is not None:
+                self._entries[key].analysis = analysis
+
+    # ----------------------------------------------- обслуживание индекса
+
+    def _add(self, fingerprint: str, signature: Tuple[int, ...], identity: Optional[Tuple[str, str]],
+             now: float, first_seen: Optional[float] = None, copies: int = 1) -> None:
+        key = fingerprint
+        platform, job_id = identity or ("", "")
+        entry = _DedupEntry(key, fingerprint, signature, platform, job_id, first_seen or now, now, copies)
+        self._entries[key] = entry
+        self._by_fingerprint[fingerprint] = key
+        if identity:
+            self._by_identity[identity] = key
+        for band in range(LSH_BANDS):
+            self._buckets.setdefault(self._band_key(signature, band), set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self._by_fingerprint.pop(entry.fingerprint, None)
+        if self._by_identity.get((entry.platform, entry.job_id)) == key:
+            del self._by_identity[(entry.platform, entry.job_id)]
+        for band in range(LSH_BANDS):
+            band_key = self._band_key(entry.signature, band)
+            bucket = self._buckets.get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band_key]
+
+    def _expire(self, now: float) -> None:
+        # Записи упорядочены по последней встрече: устаревшие всегда в начале
+        while self._entries:
+            entry = next(iter(self._entries.values()))
+            if now - entry.last_seen < self.ttl:
+                break
+            self._remove(entry.key)
+            self.stats["expired"] += 1
+
+    @property
+    def dedup_ratio(self) -> float:
+        """Доля отброшенных копий среди всех проверенных заказов"""
+        seen = self.stats["seen"]
+        duplicates = self.stats["exact_duplicates"] + self.stats["near_duplicates"]
+        return duplicates / seen if seen else 0.0
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "entries": len(self._entries), "dedup_ratio": round(self.dedup_ratio, 4)}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    # ------------------------------------------------------- состояние
+
+    def _load_state(self) -> None:
+        if not self.state_path or not self.state_path.exists():
+            return
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            now = time.time()
+            for item in sorted(state.get("entries", []), key=lambda item: item["last_seen"]):
+                if now - item["last_seen"] >= self.ttl:
+                    continue
+                identity = (item["platform"], item["job_id"]) if item["job_id"] else None
+                self._add(item["fingerprint"], tuple(item["signature"]), identity,
+                          item["last_seen"], first_seen=item["first_seen"], copies=item["copies"])
+        except Exception as e:
+            logger.warning(f"Не удалось загрузить индекс дедупликации заказов: {e}")
+
+    def _maybe_persist(self) -> None:
+        if self.state_path and self._dirty and time.monotonic() - self._last_persist >= self.persist_interval:
+            self.flush()
+
+    def flush(self) -> None:
+        """Сохранение индекса на диск (атомарная замена файла)"""
+        if not self.state_path:
+            return
+        with self._lock:
+            state = {"entries": [entry.to_dict() for entry in self._entries.values()]}
+            self._dirty = False
+            self._last_persist = time.monotonic()
+        try:
+            self.state_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.state_path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.state_path)
+        except Exception as e:
+            logger.warning(f"Не удалось сохранить индекс дедупликации заказов: {e}")
+
+
+_shared_index: Optional[JobDedupIndex] = None
+_shared_index_lock = threading.Lock()
+
+
+def get_job_dedup_index() -> JobDedupIndex:
+    """Общий для процесса индекс дедупликации (создается при первом обращении)"""
+    global _shared_index
+    if _shared_index is None:
+        with _shared_index_lock:
+            if _shared_index is None:
+                _shared_index = JobDedupIndex()
+    return _shared_index
@@ -16,19 +16,21 @@ Kwork API Wrapper — безопасный, отказоустойчивый и
 - Соответствия security-политике (PCI DSS, GDPR)
 """
 
-import asyncio
 import json
 import logging
 from typing import Any, Dict, List, Optional
 from urllib.parse import urljoin
 
-import aiohttp
-from aiohttp import ClientTimeout, ContentTypeError
+import httpx
 
 from core.config.unified_config_manager import UnifiedConfigManager
 from core.security.advanced_crypto_system import AdvancedCryptoSystem
 from core.monitoring.intelligent_monitoring_system import IntelligentMonitoringSystem
 from core.dependency.service_locator import ServiceLocator
+from platforms.http_transport import RETRY_STATUSES, get_http_transport
+
+# Kwork API отвечает 500 и на временные сбои
+KWORK_RETRY_STATUSES = RETRY_STATUSES | {500}
 
 # Инициализация логгера
 logger = logging.getLogger("KworkAPIWrapper")
@@ -65,24 +67,21 @@ class KworkAPIWrapper:
             logger.critical("❌ Не удалось расшифровать токен Kwork API", exc_info=True)
             raise RuntimeError("Kwork API token decryption failed") from e
 
-        self.session: Optional[aiohttp.ClientSession] = None
-        logger.info("✅ Kwork API Wrapper инициализирован")
-
-    async def __aenter__(self):
-        timeout = ClientTimeout(total=self.timeout_sec)
-        self.session = aiohttp.ClientSession(
-            timeout=timeout,
+        # Соединения — из общего транспорта, у обертки только заголовки
+        self.session = get_http_transport().session(
             headers={
                 "Authorization": f"Bearer {self.auth_token}",
                 "Content-Type": "application/json",
                 "User-Agent": "AI-Freelance-Automation/1.0"
-            }
+            },
+            timeout=self.timeout_sec,
         )
+        logger.info("✅ Kwork API Wrapper инициализирован")
+
+    async def __aenter__(self):
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.session:
-            await self.session.close()
         if exc_type:
             logger.warning(f"⚠️ Сессия Kwork API завершена с ошибкой: {exc_val}")
         else:
@@ -99,52 +98,35 @@ class KworkAPIWrapper:
         Универсальный метод для выполнения запросов с retry и мониторингом.
         """
         url = urljoin(self.base_url.rstrip("/") + "/", endpoint.lstrip("/"))
-        attempt = 0
 
-        while attempt <= self.max_retries:
+        try:
+            logger.debug(f"📡 Отправка {method.upper()} запроса на {url}")
+            # 429 и 5xx (для идемпотентных запросов) повторяются транспортом
+            resp = await self.session.request(method, url, json=data, params=params,
+                                              retries=self.max_retries, retry_statuses=KWORK_RETRY_STATUSES)
+        except httpx.HTTPError as e:
+            logger.warning(f"🌐 Сетевая ошибка при запросе к Kwork: {e}")
+            self.monitor.log_anomaly("kwork_api_network_failure", {"error": str(e)})
+            raise
+
+        # Логируем статус
+        self.monitor.log_metric("kwork_api_response_code", resp.status_code)
+
+        if resp.status_code == 200:
             try:
-                logger.debug(f"📡 Отправка {method.upper()} запроса на {url} (попытка {attempt + 1})")
-                async with self.session.request(method, url, json=data, params=params) as resp:
-                    # Логируем статус
-                    self.monitor.log_metric("kwork_api_response_code", resp.status)
-
-                    if resp.status == 200:
-                        try:
-                            result = await resp.json()
-                            logger.debug(f"✅ Успешный ответ от Kwork API: {result.get('success', True)}")
-                            return result
-                        except ContentTypeError:
-                            text = await resp.text()
-                            logger.error(f"❗ Некорректный JSON от Kwork API: {text[:200]}")
-                            raise ValueError("Invalid JSON response from Kwork API")
-
-                    elif resp.status == 429:
-                        backoff = (2 ** attempt) + 1
-                        logger.warning(f"⏳ Rate limit достигнут. Пауза {backoff} сек...")
-                        await asyncio.sleep(backoff)
-                        attempt += 1
-                        continue
-
-                    elif resp.status in (500, 502, 503, 504):
-                        logger.warning(f"☁️ Серверная ошибка Kwork API: {resp.status}")
-                        attempt += 1
-                        await asyncio.sleep(2 ** attempt)
-                        continue
-
-                    else:
-                        error_text = await resp.text()
-                        logger.error(f"🚫 Ошибка Kwork API ({resp.status}): {error_text}")
-                        raise RuntimeError(f"Kwork API error {resp.status}: {error_text}")
-
-            except aiohttp.ClientError as e:
-                logger.warning(f"🌐 Сетевая ошибка при запросе к Kwork (попытка {attempt + 1}): {e}")
-                attempt += 1
-                if attempt > self.max_retries:
-                    self.monitor.log_anomaly("kwork_api_network_failure", {"error": str(e)})
-                    raise
-                await asyncio.sleep(2 ** attempt)
-
-        raise RuntimeError("Превышено максимальное количество попыток запроса к Kwork API")
+                result = resp.json()
+                logger.debug(f"✅ Успешный ответ от Kwork API: {result.get('success', True)}")
+                return result
+            except json.JSONDecodeError:
+                logger.error(f"❗ Некорректный JSON от Kwork API: {resp.text[:200]}")
+                raise ValueError("Invalid JSON response from Kwork API")
+
+        if resp.status_code in KWORK_RETRY_STATUSES:
+            logger.warning(f"☁️ Kwork API недоступен ({resp.status_code}) после {self.max_retries} повторов")
+            raise RuntimeError("Превышено максимальное количество попыток запроса к Kwork API")
+
+        logger.error(f"🚫 Ошибка Kwork API ({resp.status_code}): {resp.text}")
+        raise RuntimeError(f"Kwork API error {resp.status_code}: {resp.text}")
 
     async def get_active_jobs(self, category: Optional[str] = None) -> List[Dict[str, Any]]:
         """
@@ -11,13 +11,13 @@ import logging
 from typing import Dict, List, Optional, Any
 from urllib.parse import urljoin
 
-import aiohttp
-from aiohttp import ClientSession, ClientResponseError, ClientTimeout
+import httpx
 
 from core.config.unified_config_manager import UnifiedConfigManager
 from core.security.advanced_crypto_system import AdvancedCryptoSystem
 from core.monitoring.intelligent_monitoring_system import IntelligentMonitoringSystem
 from core.dependency.service_locator import ServiceLocator
+from platforms.http_transport import HttpSession, get_http_transport
 
 # Инициализация логгера
 logger = logging.getLogger("KworkClient")
@@ -57,14 +57,15 @@ class KworkClient:
         if not self.platform_config:
             raise ValueError("Kwork platform configuration not found in config.")
 
-        self.session: Optional[ClientSession] = None
+        self.http = get_http_transport()
+        self.session: Optional[HttpSession] = None
         self._auth_token: Optional[str] = None
         self._user_id: Optional[str] = None
         self._is_authenticated = False
 
         # Таймауты
-        self.timeout = ClientTimeout(
-            total=self.platform_config.get("timeout", 30),
+        self.timeout = httpx.Timeout(
+            self.platform_config.get("timeout", 30),
             connect=self.platform_config.get("connect_timeout", 10),
         )
 
@@ -100,43 +101,41 @@ class KworkClient:
         try:
             creds = await self._load_auth_credentials()
             # Примечание: Kwork требует авторизацию через форму + cookies.
-            # Для автоматизации используется сессия с сохранением cookies.
-            async with aiohttp.ClientSession(timeout=self.timeout) as temp_session:
-                # Шаг 1: Получить CSRF-токен
-                login_page = await temp_session.get(f"{self.BASE_URL}/login")
-                login_page.raise_for_status()
-                text = await login_page.text()
-                # Извлечение CSRF (упрощённо; в продакшене — парсинг через BeautifulSoup или регулярки)
-                csrf_token = self._extract_csrf(text)
-
-                # Шаг 2: Отправить логин/пароль
-                login_data = {
-                    "login": creds["login"],
-                    "password": creds["password"],
-                    "csrf_token": csrf_token,
-                }
-                headers = {"Referer": f"{self.BASE_URL}/login"}
-                resp = await temp_session.post(
-                    f"{self.BASE_URL}/ajax/login", json=login_data, headers=headers
-                )
-                resp.raise_for_status()
-                result = await resp.json()
-
-                if result.get("success"):
-                    # Сохраняем cookies и создаём постоянную сессию
-                    self.session = aiohttp.ClientSession(
-                        cookies=temp_session.cookie_jar.filter_cookies(self.BASE_URL),
-                        timeout=self.timeout,
-                    )
-                    self._is_authenticated = True
-                    self._user_id = result.get("user_id")
-                    logger.info("✅ Successfully authenticated to Kwork as user %s", self._user_id)
-                    self.monitor.increment_counter(f"{self._metrics_prefix}.auth.success")
-                    return True
-                else:
-                    logger.warning("❌ Kwork login failed: %s", result.get("message"))
-                    self.monitor.increment_counter(f"{self._metrics_prefix}.auth.failure")
-                    return False
+            # Для автоматизации используется сессия с сохранением cookies
+            # (соединения — из общего транспорта).
+            temp_session = self.http.session(timeout=self.timeout)
+            # Шаг 1: Получить CSRF-токен
+            login_page = await temp_session.get(f"{self.BASE_URL}/login")
+            login_page.raise_for_status()
+            text = login_page.text
+            # Извлечение CSRF (упрощённо; в продакшене — парсинг через BeautifulSoup или регулярки)
+            csrf_token = self._extract_csrf(text)
+
+            # Шаг 2: Отправить логин/пароль
+            login_data = {
+                "login": creds["login"],
+                "password": creds["password"],
+                "csrf_token": csrf_token,
+            }
+            headers = {"Referer": f"{self.BASE_URL}/login"}
+            resp = await temp_session.post(
+                f"{self.BASE_URL}/ajax/login", json=login_data, headers=headers
+            )
+            resp.raise_for_status()
+            result = resp.json()
+
+            if result.get("success"):
+                # Сессия с cookies авторизации становится постоянной
+                self.session = temp_session
+                self._is_authenticated = True
+                self._user_id = result.get("user_id")
+                logger.info("✅ Successfully authenticated to Kwork as user %s", self._user_id)
+                self.monitor.increment_counter(f"{self._metrics_prefix}.auth.success")
+                return True
+            else:
+                logger.warning("❌ Kwork login failed: %s", result.get("message"))
+                self.monitor.increment_counter(f"{self._metrics_prefix}.auth.failure")
+                return False
 
         except Exception as e:
             logger.exception("💥 Authentication error for Kwork: %s", e)
@@ -176,9 +175,9 @@ class KworkClient:
             }
             # Эмуляция запроса к поиску (реальный URL зависит от внутренней структуры Kwork)
             url = f"{self.BASE_URL}/search"
-            async with self.session.get(url, params=params) as resp:
-                resp.raise_for_status()
-                html = await resp.text()
+            resp = await self.session.get(url, params=params)
+            resp.raise_for_status()
+            html = resp.text
 
             # Парсинг HTML → список гигов (в продакшене использовать XPath/CSS + AI-фильтрацию)
             jobs = self._parse_jobs_from_html(html)
@@ -186,7 +185,7 @@ class KworkClient:
             logger.info("Fetched %d jobs from Kwork", len(jobs))
             return jobs
 
-        except ClientResponseError as e:
+        except httpx.HTTPStatusError as e:
             logger.error("HTTP error fetching Kwork jobs: %s", e)
             self.monitor.increment_counter(f"{self._metrics_prefix}.jobs.error")
             raise
@@ -238,13 +237,13 @@ class KworkClient:
             }
             # Условный endpoint (реальный зависит от внутреннего API Kwork)
             url = f"{self.BASE_URL}/ajax/send_proposal"
-            async with self.session.post(url, json=payload) as resp:
-                resp.raise_for_status()
-                result = await resp.json()
-                success = result.get("success", False)
-                self.monitor.increment_counter(f"{self._metrics_prefix}.bids.sent", 1 if success else 0)
-                logger.info("Bid sent for job %s: %s", job_id, "✅ Success" if success else "❌ Failed")
-                return success
+            resp = await self.session.post(url, json=payload)
+            resp.raise_for_status()
+            result = resp.json()
+            success = result.get("success", False)
+            self.monitor.increment_counter(f"{self._metrics_prefix}.bids.sent", 1 if success else 0)
+            logger.info("Bid sent for job %s: %s", job_id, "✅ Success" if success else "❌ Failed")
+            return success
 
         except Exception as e:
             logger.exception("Failed to send bid to Kwork job %s: %s", job_id, e)
@@ -252,9 +251,8 @@ class KworkClient:
             return False
 
     async def close(self):
-        """Закрывает HTTP-сессию."""
+        """Сбрасывает сессию (cookies); соединения остаются в общем пуле."""
         if self.session:
-            await self.session.close()
             self.session = None
             self._is_authenticated = False
             logger.info("Kwork client session closed.")
@@ -19,14 +19,26 @@ import time
 from typing import Any, Dict, List, Optional, Set
 from urllib.parse import urljoin, urlencode
 
-import aiohttp
-from bs4 import BeautifulSoup
+import httpx
 
 from core.config.unified_config_manager import UnifiedConfigManager
 from core.security.advanced_crypto_system import AdvancedCryptoSystem
 from core.monitoring.intelligent_monitoring_system import IntelligentMonitoringSystem
 from core.performance.intelligent_cache_system import IntelligentCacheSystem
 from core.dependency.service_locator import ServiceLocator
+from platforms.rate_limiter import get_rate_limiter, quotas_from_config
+from platforms.scrape_watermarks import get_scrape_watermarks
+from platforms.html_parsing import FieldSpec, ParseSpec, get_html_parsing_pool
+from platforms.http_transport import get_http_transport
+
+# Поля карточки заказа в выдаче Kwork
+KWORK_CARD_SPEC = ParseSpec("div.wants-card", (
+    FieldSpec("href", "div.wants-card__header-title a", attribute="href"),
+    FieldSpec("title", "div.wants-card__header-title a"),
+    FieldSpec("price", "div.wants-card__price span"),
+    FieldSpec("description", "div.wants-card__description"),
+    FieldSpec("deadline", "div.wants-card__right div.text-muted"),
+))
 
 
 class KworkScraper:
@@ -61,22 +73,31 @@ class KworkScraper:
         encrypted_proxies = self.platform_config.get("encrypted_proxies", [])
         self.proxies = [self.crypto.decrypt(p) for p in encrypted_proxies] if encrypted_proxies else []
 
-        self.session: Optional[aiohttp.ClientSession] = None
+        # Общий рейт-лимитер: квота платформы и, при наличии, квоты отдельных прокси
+        self.rate_limiter = get_rate_limiter()
+        self.rate_limiter.configure("kwork", quotas_from_config(
+            self.platform_config.get("rate_limits", {"requests_per_minute": 15}), "requests"
+        ))
+        self.proxy_quotas = quotas_from_config(self.platform_config.get("proxy_rate_limits"), "requests")
+
+        # Инкрементальное сканирование: увиденные заказы и валидаторы HTTP
+        self.incremental = self.platform_config.get("incremental", True)
+        self.watermarks = get_scrape_watermarks()
+        self.html_parser = get_html_parsing_pool()
+
+        # Общий HTTP-транспорт: не больше max_connections_per_host запросов к Kwork одновременно
+        self.http = get_http_transport()
+        self.http.configure_host(httpx.URL(self.base_url).host,
+                                 max_connections=self.platform_config.get("max_connections_per_host", 5))
+        self.session = self.http.session(headers={"Accept": "text/html,application/xhtml+xml"},
+                                         timeout=self.timeout)
         self._visited_urls: Set[str] = set()
 
     async def __aenter__(self):
-        connector = aiohttp.TCPConnector(limit=20, limit_per_host=5)
-        timeout = aiohttp.ClientTimeout(total=self.timeout)
-        self.session = aiohttp.ClientSession(
-            connector=connector,
-            timeout=timeout,
-            headers={"Accept": "text/html,application/xhtml+xml"}
-        )
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.session:
-            await self.session.close()
+        pass
 
     async def _get_random_headers(self) -> Dict[str, str]:
         """Генерирует случайные заголовки для имитации реального пользователя."""
@@ -89,29 +110,56 @@ class KworkScraper:
             "Sec-Fetch-Site": "same-origin",
         }
 
-    async def _fetch_page(self, url: str, use_proxy: bool = True) -> Optional[str]:
-        """Безопасно загружает HTML-страницу с обработкой ошибок и прокси."""
+    async def _acquire_rate_limit(self, proxy: Optional[str], priority: int) -> None:
+        await self.rate_limiter.acquire("kwork", priority=priority)
+        if proxy and self.proxy_quotas:
+            proxy_key = f"kwork:proxy:{proxy}"
+            self.rate_limiter.configure(proxy_key, self.proxy_quotas)
+            await self.rate_limiter.acquire(proxy_key, priority=priority)
+
+    async def _fetch_page(self, url: str, use_proxy: bool = True, priority: int = 0,
+                          conditional: bool = False) -> Optional[str]:
+        """
+        Безопасно загружает HTML-страницу с обработкой ошибок и прокси.
+
+        При conditional=True запрос отправляется с ETag / Last-Modified прошлой
+        загрузки; если страница не изменилась (304), возвращается пустая строка.
+        """
         for attempt in range(self.max_retries):
             try:
                 headers = await self._get_random_headers()
+                if conditional:
+                    headers.update(self.watermarks.conditional_headers(url))
                 proxy = random.choice(self.proxies) if use_proxy and self.proxies else None
-
-                async with self.session.get(url, headers=headers, proxy=proxy) as resp:
-                    if resp.status == 200:
-                        html = await resp.text()
-                        self.logger.debug(f"✅ Успешно загружена страница: {url}")
-                        return html
-                    elif resp.status == 429:
-                        self.logger.warning(f"⚠️  Rate limited на {url}, пауза...")
-                        await asyncio.sleep(10 * (attempt + 1))
-                    elif resp.status >= 500:
-                        self.logger.warning(f"⚠️  Серверная ошибка {resp.status} на {url}")
-                        await asyncio.sleep(5)
-                    else:
-                        self.logger.error(f"❌ Неожиданный статус {resp.status} на {url}")
-                        break
-
-            except asyncio.TimeoutError:
+                await self._acquire_rate_limit(proxy, priority)
+
+                # Повторы — в этом цикле: следующая попытка идет через другой прокси,
+                # а 429 приостанавливает все запросы к Kwork через рейт-лимитер
+                resp = await self.session.get(url, headers=headers, proxy=proxy, retries=0)
+                if resp.status_code == 200:
+                    if conditional:
+                        self.watermarks.update_validators(url, resp.headers)
+                    self.logger.debug(f"✅ Успешно загружена страница: {url}")
+                    return resp.text
+                elif resp.status_code == 304:
+                    self.watermarks.record_not_modified()
+                    self.logger.debug(f"♻️ Страница не изменилась: {url}")
+                    return ""
+                elif resp.status_code == 429:
+                    self.logger.warning(f"⚠️  Rate limited на {url}, пауза...")
+                    # Пауза применяется ко всем запросам к Kwork через общий лимитер
+                    retry_after = resp.headers.get("Retry-After", "")
+                    self.rate_limiter.penalize(
+                        "kwork", float(retry_after) if retry_after.isdigit() else 10 * (attempt + 1)
+                    )
+                elif resp.status_code >= 500:
+                    self.logger.warning(f"⚠️  Серверная ошибка {resp.status_code} на {url}")
+                    await asyncio.sleep(5)
+                else:
+                    self.logger.error(f"❌ Неожиданный статус {resp.status_code} на {url}")
+                    break
+
+            except httpx.TimeoutException:
                 self.logger.warning(f"⏳ Таймаут при загрузке {url} (попытка {attempt + 1})")
             except Exception as e:
                 self.logger.error(f"💥 Ошибка при загрузке {url}: {e}", exc_info=True)
@@ -121,32 +169,23 @@ class KworkScraper:
         self.monitor.log_anomaly("kwork_scraper_failure", {"url": url, "attempts": self.max_retries})
         return None
 
-    def _parse_job_card(self, card: BeautifulSoup) -> Optional[Dict[str, Any]]:
-        """Парсит одну карточку заказа."""
+    def _parse_job_card(self, card: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Собирает заказ из полей карточки, извлеченных пулом разбора."""
         try:
-            title_elem = card.select_one("div.wants-card__header-title a")
-            if not title_elem:
+            href = card.get("href")
+            title = card.get("title")
+            if not href or title is None:
                 return None
 
-            job_id = title_elem.get("href", "").split("/")[-1]
-            title = title_elem.get_text(strip=True)
-            price_elem = card.select_one("div.wants-card__price span")
-            price = price_elem.get_text(strip=True) if price_elem else "N/A"
-
-            desc_elem = card.select_one("div.wants-card__description")
-            description = desc_elem.get_text(strip=True) if desc_elem else ""
-
-            deadline_elem = card.select_one("div.wants-card__right div.text-muted")
-            deadline = deadline_elem.get_text(strip=True) if deadline_elem else ""
-
+            description = card.get("description", "")
             return {
                 "platform": "kwork",
-                "job_id": job_id,
+                "job_id": self._card_job_id(card),
                 "title": title,
                 "description": description,
-                "price_raw": price,
-                "deadline_raw": deadline,
-                "url": urljoin(self.base_url, title_elem["href"]),
+                "price_raw": card.get("price", "N/A"),
+                "deadline_raw": card.get("deadline", ""),
+                "url": urljoin(self.base_url, href),
                 "scraped_at": time.time(),
                 "category": self._detect_category(title, description)
             }
@@ -154,6 +193,12 @@ class KworkScraper:
             self.logger.error(f"Ошибка парсинга карточки: {e}", exc_info=True)
             return None
 
+    @staticmethod
+    def _card_job_id(card: Dict[str, Any]) -> Optional[str]:
+        """Id заказа из ссылки карточки."""
+        href = card.get("href")
+        return href.split("/")[-1] if href else None
+
     def _detect_category(self, title: str, description: str) -> str:
         """Определяет категорию заказа по ключевым словам."""
         text = (title + " " + description).lower()
@@ -170,17 +215,30 @@ class KworkScraper:
         self,
         categories: Optional[List[str]] = None,
         min_price: Optional[float] = None,
-        max_pages: int = 5
+        max_pages: int = 5,
+        incremental: Optional[bool] = None
     ) -> List[Dict[str, Any]]:
         """
         Основной метод: собирает актуальные заказы с Kwork.
         Поддерживает фильтрацию по категориям и минимальной цене.
+
+        В инкрементальном режиме (по умолчанию, platforms.kwork.incremental)
+        возвращаются только заказы, не встречавшиеся в прошлых сканированиях:
+        известные карточки не разбираются, выдача (отсортированная по новизне)
+        дочитывается до первого известного заказа, а неизменившиеся страницы
+        не загружаются повторно благодаря условным запросам.
         """
-        self.logger.info(f"🔍 Начинаю сканирование Kwork (макс. страниц: {max_pages})")
+        incremental = self.incremental if incremental is None else incremental
+        self.logger.info(f"🔍 Начинаю сканирование Kwork (макс. страниц: {max_pages}, "
+                         f"инкрементально: {incremental})")
 
         if categories is None:
             categories = ["transcription", "translation", "copywriting"]
 
+        stream = f"kwork:{','.join(sorted(categories))}:{min_price or 0}"
+        newest_job_id = None
+        reached_known = False
+
         all_jobs = []
         seen_ids = set()
 
@@ -195,25 +253,42 @@ class KworkScraper:
             query = urlencode(search_params)
             url = f"{self.base_url}{self.search_endpoint}?{query}"
 
-            if url in self._visited_urls:
-                continue
-            self._visited_urls.add(url)
+            if not incremental:
+                if url in self._visited_urls:
+                    continue
+                self._visited_urls.add(url)
 
-            html = await self._fetch_page(url)
+            html = await self._fetch_page(url, conditional=incremental)
+            if html == "":
+                self.logger.info(f"♻️ Страница {page} не изменилась с прошлого сканирования — завершение.")
+                reached_known = True
+                break
             if not html:
                 self.logger.warning(f"Пропуск страницы {page} из-за ошибки загрузки")
                 continue
 
-            soup = BeautifulSoup(html, "html.parser")
-            cards = soup.select("div.wants-card")
+            # Разбор вне event loop, в общем пуле процессов
+            cards = await self.html_parser.parse(html, KWORK_CARD_SPEC)
 
             if not cards:
                 self.logger.info("📦 Больше заказов не найдено — завершение.")
                 break
 
+            page_new_ids = []
             for card in cards:
+                if incremental:
+                    card_id = self._card_job_id(card)
+                    if not card_id or card_id in seen_ids:
+                        continue
+                    if not self.watermarks.is_new(stream, card_id):
+                        reached_known = True
+                        continue
+                    page_new_ids.append(card_id)
+                    seen_ids.add(card_id)
+                    newest_job_id = newest_job_id or card_id
+
                 job = self._parse_job_card(card)
-                if not job or job["job_id"] in seen_ids:
+                if not job or (not incremental and job["job_id"] in seen_ids):
                     continue
 
                 # Фильтрация по категории
@@ -238,8 +313,18 @@ class KworkScraper:
             cache_key = f"kwork:jobs:page_{page}"
             await self.cache.set(cache_key, cards, ttl=300)
 
+            if incremental:
+                self.watermarks.mark_seen(stream, page_new_ids)
+                if reached_known:
+                    # Выдача отсортирована по новизне: дальше только известные заказы
+                    self.logger.info(f"🏁 Достигнут водяной знак на странице {page} — завершение.")
+                    break
+
             # Пауза между запросами
             await asyncio.sleep(random.uniform(*self.delay_range))
 
+        if incremental:
+            self.watermarks.advance(stream, newest_job_id, stopped_early=reached_known)
+
         self.logger.info(f"✅ Завершено сканирование Kwork: найдено {len(all_jobs)} релевантных заказов")
         return all_jobs
@@ -1,12 +1,20 @@
 """
 Менеджер для управления всеми платформами через универсальный адаптер
 """
+import asyncio
+import heapq
 import json
 import logging
-from typing import Dict, Any, Optional, List, Type
+import time
+from datetime import datetime
+from itertools import islice
+from typing import Dict, Any, Optional, List, Type, Tuple, Callable, Awaitable, AsyncIterator
 from pathlib import Path
 
 from platforms.universal_platform_adapter import UniversalPlatformAdapter, Job, Bid
+from platforms.job_dedup_index import get_job_dedup_index
+from platforms.scrape_watermarks import get_scrape_watermarks
+from platforms.http_transport import get_http_transport
 from platforms.fiverr.fiverr_adapter import FiverrAdapter
 from platforms.toptal.toptal_adapter import ToptalAdapter
 from platforms.linkedin_profider.linkedin_profider_adapter import LinkedInProFinderAdapter
@@ -15,6 +23,15 @@ from platforms.profi_ru.profi_ru_adapter import ProfiRuAdapter
 
 logger = logging.getLogger(__name__)
 
+# Значения по умолчанию, если в конфигурации платформы не заданы
+# request_timeout и rate_limit.max_concurrent_requests
+DEFAULT_PLATFORM_TIMEOUT = 30.0
+DEFAULT_PLATFORM_CONCURRENCY = 2
+
+
+def _budget_of(entry: Dict[str, Any]) -> float:
+    return entry["job"].budget or 0
+
 
 class PlatformManager:
     """
@@ -24,6 +41,10 @@ class PlatformManager:
     def __init__(self):
         self.platforms: Dict[str, UniversalPlatformAdapter] = {}
         self.platform_configs: Dict[str, Dict[str, Any]] = {}
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self.search_report: Dict[str, Dict[str, Any]] = {}
+        self.dedup_index = get_job_dedup_index()
+        self.watermarks = get_scrape_watermarks()
         self._load_platform_configs()
 
         logger.info("Инициализирован менеджер платформ")
@@ -50,8 +71,25 @@ class PlatformManager:
                 except Exception as e:
                     logger.error(f"Ошибка загрузки конфигурации {config_path}: {str(e)}")
 
+    def _platform_timeout(self, platform_name: str) -> float:
+        return float(self.platform_configs.get(platform_name, {}).get("request_timeout", DEFAULT_PLATFORM_TIMEOUT))
+
+    def _platform_semaphore(self, platform_name: str) -> asyncio.Semaphore:
+        """Бюджет одновременных запросов к платформе, общий для всех поисков"""
+        semaphore = self._semaphores.get(platform_name)
+        if semaphore is None:
+            rate_limit = self.platform_configs.get(platform_name, {}).get("rate_limit", {})
+            semaphore = asyncio.Semaphore(rate_limit.get("max_concurrent_requests", DEFAULT_PLATFORM_CONCURRENCY))
+            self._semaphores[platform_name] = semaphore
+        return semaphore
+
+    async def _call_platform(self, platform_name: str, operation: Callable[[], Awaitable[Any]]) -> Any:
+        """Вызов операции платформы в рамках её бюджета параллелизма и таймаута"""
+        async with self._platform_semaphore(platform_name):
+            return await asyncio.wait_for(operation(), timeout=self._platform_timeout(platform_name))
+
     async def initialize_all_platforms(self):
-        """Инициализация всех доступных платформ"""
+        """Параллельная инициализация всех доступных платформ"""
         platform_adapters = {
             "Fiverr": FiverrAdapter,
             "Toptal": ToptalAdapter,
@@ -60,59 +98,162 @@ class PlatformManager:
             "Профи.ру": ProfiRuAdapter
         }
 
-        for platform_name, adapter_class in platform_adapters.items():
+        async def init_platform(platform_name: str, adapter_class: Type[UniversalPlatformAdapter]):
             try:
                 adapter = adapter_class()
-                await adapter.initialize()
+                await self._call_platform(platform_name, adapter.initialize)
                 self.platforms[platform_name] = adapter
                 logger.info(f"Платформа '{platform_name}' инициализирована успешно")
+            except asyncio.TimeoutError:
+                logger.error(f"Таймаут инициализации платформы '{platform_name}'")
             except Exception as e:
                 logger.error(f"Ошибка инициализации платформы '{platform_name}': {str(e)}")
 
+        await asyncio.gather(*(
+            init_platform(platform_name, adapter_class)
+            for platform_name, adapter_class in platform_adapters.items()
+        ))
+
+    def _resolve_platforms(self, platforms: Optional[List[str]]) -> List[str]:
+        if platforms is None:
+            return list(self.platforms.keys())
+        resolved = []
+        for platform_name in platforms:
+            if platform_name in self.platforms:
+                resolved.append(platform_name)
+            else:
+                logger.warning(f"Платформа '{platform_name}' не инициализирована")
+        return resolved
+
+    async def _search_platform(self, platform_name: str, **search_params) -> Tuple[str, List[Dict[str, Any]]]:
+        """
+        Поиск на одной платформе. Никогда не выбрасывает исключений:
+        ошибки и таймауты попадают в отчет о задержках платформ.
+        """
+        adapter = self.platforms[platform_name]
+        started = time.monotonic()
+        status, error, entries = "ok", None, []
+        try:
+            jobs = await self._call_platform(platform_name, lambda: adapter.search_jobs(**search_params))
+            search_timestamp = datetime.now().isoformat()
+            entries = [
+                {"job": job, "platform": platform_name, "search_timestamp": search_timestamp}
+                for job in jobs
+            ]
+            logger.info(f"Найдено {len(entries)} заказов на платформе '{platform_name}'")
+        except asyncio.TimeoutError:
+            status, error = "timeout", f"превышен таймаут {self._platform_timeout(platform_name)}с"
+            logger.error(f"Таймаут поиска на платформе '{platform_name}'")
+        except Exception as e:
+            status, error = "error", str(e)
+            logger.error(f"Ошибка поиска на платформе '{platform_name}': {str(e)}")
+
+        self.search_report[platform_name] = {
+            "status": status,
+            "latency": round(time.monotonic() - started, 3),
+            "jobs_found": len(entries),
+            "error": error,
+            "timestamp": datetime.now().isoformat()
+        }
+        return platform_name, entries
+
+    async def search_jobs_stream(self,
+                                 keywords: Optional[List[str]] = None,
+                                 skills: Optional[List[str]] = None,
+                                 budget_min: Optional[float] = None,
+                                 budget_max: Optional[float] = None,
+                                 platforms: Optional[List[str]] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Глобальный поиск с выдачей результатов по мере ответа платформ.
+        Медленная платформа не задерживает результаты остальных; если потребитель
+        прекращает итерацию, незавершенные запросы отменяются.
+        Копии заказов, уже выданных с другой платформы, пропускаются.
+        """
+        search_params = dict(keywords=keywords, skills=skills, budget_min=budget_min, budget_max=budget_max)
+        tasks = [
+            asyncio.ensure_future(self._search_platform(platform_name, **search_params))
+            for platform_name in self._resolve_platforms(platforms)
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                _, entries = await next_done
+                for entry in entries:
+                    if self.dedup_index.check(entry["job"]) is None:
+                        yield entry
+        finally:
+            for task in tasks:
+                task.cancel()
+
     async def search_jobs_global(self,
                                  keywords: Optional[List[str]] = None,
                                  skills: Optional[List[str]] = None,
                                  budget_min: Optional[float] = None,
                                  budget_max: Optional[float] = None,
-                                 platforms: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+                                 platforms: Optional[List[str]] = None,
+                                 limit: Optional[int] = None) -> List[Dict[str, Any]]:
         """
-        Глобальный поиск заказов по всем платформам
+        Глобальный поиск заказов по всем платформам (параллельно)
+
+        Результаты каждой платформы сортируются отдельно и сливаются кучей
+        (heapq.merge) по убыванию бюджета; при limit слияние останавливается
+        после первых limit заказов. Копии одного заказа с разных платформ
+        отбрасываются индексом дедупликации (остается первая встреченная копия).
         """
-        if platforms is None:
-            platforms = list(self.platforms.keys())
+        search_params = dict(keywords=keywords, skills=skills, budget_min=budget_min, budget_max=budget_max)
+        results = await asyncio.gather(*(
+            self._search_platform(platform_name, **search_params)
+            for platform_name in self._resolve_platforms(platforms)
+        ))
 
-        all_jobs = []
+        runs = [sorted(entries, key=_budget_of, reverse=True) for _, entries in results if entries]
+        merged = heapq.merge(*runs, key=_budget_of, reverse=True)
+        unique = (entry for entry in merged if self.dedup_index.check(entry["job"]) is None)
+        results = list(islice(unique, limit) if limit is not None else unique)
 
-        for platform_name in platforms:
-            if platform_name not in self.platforms:
-                logger.warning(f"Платформа '{platform_name}' не инициализирована")
-                continue
+        logger.info(f"Глобальный поиск: {len(results)} уникальных заказов, "
+                    f"доля дубликатов {self.dedup_index.dedup_ratio:.1%}")
+        return results
 
-            try:
-                adapter = self.platforms[platform_name]
-                jobs = await adapter.search_jobs(
-                    keywords=keywords,
-                    skills=skills,
-                    budget_min=budget_min,
-                    budget_max=budget_max
-                )
-
-                for job in jobs:
-                    all_jobs.append({
-                        "job": job,
-                        "platform": platform_name,
-                        "search_timestamp": datetime.now().isoformat()
-                    })
-
-                logger.info(f"Найдено {len(jobs)} заказов на платформе '{platform_name}'")
+    async def scan_all_platforms(self,
+                                 on_new_jobs: Optional[Callable[[List[Dict[str, Any]]], Awaitable[Any]]] = None,
+                                 **search_params) -> List[Dict[str, Any]]:
+        """
+        Периодическое сканирование (планировщик): только заказы, которых не было
+        в прошлых сканированиях соответствующей платформы.
 
-            except Exception as e:
-                logger.error(f"Ошибка поиска на платформе '{platform_name}': {str(e)}")
+        Новые заказы передаются в on_new_jobs; отметка "просмотрено" и водяной знак
+        сдвигаются только после успешной передачи, поэтому при ошибке обработчика
+        заказы будут выданы повторно в следующем сканировании. Без обработчика
+        передачей считается возврат результата вызывающему.
+        """
+        results = await self.search_jobs_global(**search_params)
 
-        # Сортировка по бюджету (убывание)
-        all_jobs.sort(key=lambda x: x["job"].budget or 0, reverse=True)
+        new_entries = [
+            entry for entry in results
+            if self.watermarks.is_new(f"manager:{entry['platform']}", entry["job"].id)
+        ]
+        if on_new_jobs is not None and new_entries:
+            await on_new_jobs(new_entries)
+
+        for platform_name in {entry["platform"] for entry in results}:
+            stream = f"manager:{platform_name}"
+            self.watermarks.mark_seen(stream, (e["job"].id for e in new_entries if e["platform"] == platform_name))
+            self.watermarks.advance(stream)
+
+        logger.info(f"Сканирование платформ: {len(new_entries)} новых заказов из {len(results)}")
+        return new_entries
 
-        return all_jobs
+    def get_search_report(self) -> Dict[str, Dict[str, Any]]:
+        """Статус и задержка последнего поиска по каждой платформе"""
+        return dict(self.search_report)
+
+    def get_dedup_stats(self) -> Dict[str, Any]:
+        """Статистика индекса дедупликации заказов (в т.ч. доля дубликатов)"""
+        return self.dedup_index.get_stats()
+
+    def get_http_stats(self) -> Dict[str, Any]:
+        """Загрузка общего пула HTTP-соединений, хостов и кеша DNS"""
+        return get_http_transport().get_stats()
 
     async def place_bid_global(self, job: Job, bid: Bid) -> Dict[str, Any]:
         """
@@ -149,28 +290,35 @@ class PlatformManager:
             }
 
     async def get_platform_statistics(self) -> Dict[str, Any]:
-        """Получение статистики по всем платформам"""
-        stats = {}
+        """Получение статистики по всем платформам (опрос параллельный)"""
 
-        for platform_name, adapter in self.platforms.items():
+        async def platform_stats(platform_name: str, adapter: UniversalPlatformAdapter) -> Dict[str, Any]:
+            started = time.monotonic()
             try:
                 # Подсчет заказов на платформе
-                jobs = await adapter.search_jobs(page=1, per_page=1)
-
-                stats[platform_name] = {
+                jobs = await self._call_platform(platform_name, lambda: adapter.search_jobs(page=1, per_page=1))
+                return {
                     "status": "active",
                     "jobs_available": len(jobs),
                     "adapter_type": adapter.__class__.__name__,
+                    "latency": round(time.monotonic() - started, 3),
+                    "last_search": self.search_report.get(platform_name),
                     "last_updated": datetime.now().isoformat()
                 }
+            except asyncio.TimeoutError:
+                error = f"превышен таймаут {self._platform_timeout(platform_name)}с"
             except Exception as e:
-                stats[platform_name] = {
-                    "status": "error",
-                    "error": str(e),
-                    "last_updated": datetime.now().isoformat()
-                }
+                error = str(e)
+            return {
+                "status": "error",
+                "error": error,
+                "latency": round(time.monotonic() - started, 3),
+                "last_updated": datetime.now().isoformat()
+            }
 
-        return stats
+        names = list(self.platforms.keys())
+        results = await asyncio.gather(*(platform_stats(name, self.platforms[name]) for name in names))
+        return dict(zip(names, results))
 
     async def close_all_platforms(self):
         """Закрытие соединений со всеми платформами"""
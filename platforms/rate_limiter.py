@@ -0,0 +1,365 @@
+"""
+Общий рейт-лимитер запросов к платформам (GCRA) с планировщиком по приоритетам.
+
+Каждая квота (N запросов за период) хранится как одно число — теоретическое
+время прибытия (TAT) следующего запроса, поэтому проверка и резервирование
+выполняются за O(1) без списков временных меток. Квоты группируются по ключу:
+платформа, платформа+операция, прокси или аккаунт ("kwork", "kwork:proxy:1.2.3.4").
+
+Асинхронные клиенты ждут разрешения через acquire(): ожидающие запросы одного
+ключа выстраиваются в очередь по приоритету, и при освобождении квоты первым
+проходит самый приоритетный, а не первый заснувший. Синхронные клиенты
+используются через acquire_sync(), которое никогда не блокирует event loop и
+не спит дольше max_wait: вместо долгого сна выбрасывается RateLimitExceeded
+с временем, через которое стоит повторить запрос.
+
+Состояние (TAT в часах реального времени) сохраняется на диск, поэтому
+перезапуск процесса не обнуляет израсходованные квоты.
+"""
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Суффиксы ключей конфигурации rate_limits и длительность периода в секундах
+PERIOD_SUFFIXES = {
+    "per_second": 1.0,
+    "per_minute": 60.0,
+    "per_hour": 3600.0,
+    "per_day": 86400.0,
+}
+
+DEFAULT_STATE_PATH = "data/state/rate_limits.json"
+
+
+class RateLimitExceeded(RuntimeError):
+    """Квота исчерпана; повторить запрос можно через retry_after секунд"""
+
+    def __init__(self, key: str, retry_after: float):
+        super().__init__(f"Рейт-лимит '{key}' исчерпан, повтор через {retry_after:.1f} сек")
+        self.key = key
+        self.retry_after = retry_after
+
+
+class Quota:
+    """Квота GCRA: limit запросов за period секунд с пачкой до limit запросов"""
+
+    __slots__ = ("limit", "period", "interval", "tolerance", "tat")
+
+    def __init__(self, limit: int, period: float, tat: float = 0.0):
+        if limit <= 0 or period <= 0:
+            raise ValueError(f"Некорректная квота: {limit} за {period} сек")
+        self.limit = limit
+        self.period = period
+        self.interval = period / limit
+        self.tolerance = period - self.interval
+        self.tat = tat
+
+    def delay(self, now: float, cost: int = 1) -> float:
+        """Через сколько секунд запрос стоимостью cost уложится в квоту"""
+        tat = max(self.tat, now)
+        return max(0.0, tat + self.interval * (cost - 1) - self.tolerance - now)
+
+    def reserve(self, now: float, cost: int = 1) -> None:
+        self.tat = max(self.tat, now) + self.interval * cost
+
+
+def quotas_from_config(rate_limits: Optional[Dict[str, Any]], operation: str = "requests") -> List[Tuple[int, float]]:
+    """
+    Квоты из секции rate_limits конфигурации платформы:
+    {"requests_per_minute": 5, "requests_per_hour": 50} -> [(5, 60.0), (50, 3600.0)]
+    """
+    quotas = []
+    for suffix, period in PERIOD_SUFFIXES.items():
+        limit = (rate_limits or {}).get(f"{operation}_{suffix}")
+        if limit:
+            quotas.append((int(limit), period))
+    return quotas
+
+
+class _KeyScheduler:
+    """
+    Очередь ожидающих запросов одного ключа в одном event loop, упорядоченная
+    по приоритету. Future, событие и задача диспетчера принадлежат loop, поэтому
+    у каждого loop (например, у потоков с собственным asyncio.run) свой планировщик.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.waiters: List[Tuple[int, int, int, asyncio.Future]] = []  # (-priority, seq, cost, future)
+        self.task: Optional[asyncio.Task] = None
+        self.wakeup = asyncio.Event()
+
+    def wake(self) -> None:
+        """Пробуждение диспетчера из любого потока"""
+        if self.loop.is_closed():
+            return
+        try:
+            self.loop.call_soon_threadsafe(self.wakeup.set)
+        except RuntimeError:
+            pass  # loop закрылся между проверкой и вызовом
+
+
+class RateLimiter:
+    """
+    Реестр квот по ключам, общий для всех клиентов платформ процесса.
+
+    Пример:
+        limiter = get_rate_limiter()
+        limiter.configure("kwork", [(10, 60), (300, 3600)])
+        await limiter.acquire("kwork", priority=5)
+    """
+
+    def __init__(self, state_path: Optional[str] = DEFAULT_STATE_PATH,
+                 persist_interval: float = 5.0, max_wait: float = 5.0):
+        """
+        Args:
+            state_path: Файл состояния квот (None — без сохранения)
+            persist_interval: Минимальный интервал между сохранениями состояния
+            max_wait: Максимальный сон синхронного acquire_sync
+        """
+        self.state_path = Path(state_path) if state_path else None
+        self.persist_interval = persist_interval
+        self.max_wait = max_wait
+        self._quotas: Dict[str, List[Quota]] = {}
+        self._saved_tats: Dict[str, Dict[str, float]] = {}
+        self._schedulers: Dict[Tuple[str, asyncio.AbstractEventLoop], _KeyScheduler] = {}
+        self._lock = threading.Lock()
+        self._seq = itertools.count()
+        self._dirty = False
+        self._last_persist = 0.0
+        self.stats = {"granted": 0, "delayed": 0, "rejected": 0}
+        self._load_state()
+
+    # ------------------------------------------------------------ квоты
+
+    def configure(self, key: str, quotas: List[Tuple[int, float]]) -> None:
+        """
+        Задание квот ключа. Повторная настройка теми же квотами ничего не меняет,
+        поэтому её можно вызывать при каждом создании клиента.
+        """
+        with self._lock:
+            current = self._quotas.get(key)
+            if current is not None and [(q.limit, q.period) for q in current] == [tuple(q) for q in quotas]:
+                return
+            saved = self._saved_tats.get(key, {})
+            self._quotas[key] = [
+                Quota(limit, period, tat=saved.get(self._quota_id(limit, period), 0.0))
+                for limit, period in quotas
+            ]
+
+    @staticmethod
+    def _quota_id(limit: int, period: float) -> str:
+        return f"{limit}/{period:g}"
+
+    def delay(self, key: str, cost: int = 1) -> float:
+        """Время ожидания до разрешения запроса (без резервирования)"""
+        with self._lock:
+            return self._delay_locked(key, time.time(), cost)
+
+    def _delay_locked(self, key: str, now: float, cost: int) -> float:
+        return max((q.delay(now, cost) for q in self._quotas.get(key, ())), default=0.0)
+
+    def try_acquire(self, key: str, cost: int = 1) -> float:
+        """
+        Резервирование, если квота позволяет прямо сейчас.
+        Returns: 0.0 при успехе, иначе время ожидания (ничего не резервируется)
+        """
+        return self.try_acquire_all((key,), cost)[0]
+
+    def try_acquire_all(self, keys: Sequence[str], cost: int = 1) -> Tuple[float, Optional[str]]:
+        """
+        Резервирование сразу по всем ключам или ни по одному: квота одного
+        ключа не расходуется, если запрос не пропускает другой ключ.
+        Returns: (0.0, None) при успехе, иначе (время ожидания, ключ, который его требует)
+        """
+        with self._lock:
+            now = time.time()
+            wait, blocking_key = max(((self._delay_locked(key, now, cost), key) for key in keys),
+                                     default=(0.0, None))
+            if wait > 0:
+                return wait, blocking_key
+            for key in keys:
+                for quota in self._quotas.get(key, ()):
+                    quota.reserve(now, cost)
+            self.stats["granted"] += 1
+            self._dirty = True
+        self._maybe_persist()
+        return 0.0, None
+
+    def penalize(self, key: str, seconds: float) -> None:
+        """
+        Сдвиг квот ключа на seconds вперед (ответ 429 / Retry-After):
+        последующие запросы будут ждать, но никто не спит прямо сейчас.
+        """
+        with self._lock:
+            until = time.time() + seconds
+            for quota in self._quotas.get(key, ()):
+                quota.tat = max(quota.tat, until + quota.tolerance)
+            self._dirty = True
+        with self._lock:
+            schedulers = [s for (k, _), s in self._schedulers.items() if k == key]
+        for scheduler in schedulers:
+            scheduler.wake()
+        self._maybe_persist()
+
+    # ------------------------------------------------------ синхронный API
+
+    def acquire_sync(self, key: Union[str, Sequence[str]], cost: int = 1, max_wait: Optional[float] = None) -> None:
+        """
+        Разрешение для синхронного клиента. Можно передать список ключей
+        (платформа, прокси, аккаунт): квоты всех ключей резервируются вместе.
+
+        Ожидание до max_wait выполняется сном, но только вне event loop:
+        в потоке event loop и при более долгом ожидании выбрасывается RateLimitExceeded.
+        Клиенты, которым нужно дождаться квоты, передают max_wait=float('inf').
+        """
+        max_wait = self.max_wait if max_wait is None else max_wait
+        try:
+            asyncio.get_running_loop()
+            in_event_loop = True
+        except RuntimeError:
+            in_event_loop = False
+
+        keys = (key,) if isinstance(key, str) else tuple(key)
+        while True:
+            wait, blocking_key = self.try_acquire_all(keys, cost)
+            if wait <= 0:
+                return
+            if in_event_loop or wait > max_wait:
+                self.stats["rejected"] += 1
+                raise RateLimitExceeded(blocking_key, wait)
+            self.stats["delayed"] += 1
+            time.sleep(wait)
+
+    # ---------------------------------------------------- асинхронный API
+
+    async def acquire(self, key: str, priority: int = 0, cost: int = 1,
+                      timeout: Optional[float] = None) -> None:
+        """
+        Ожидание разрешения без блокировки event loop.
+
+        Пока квота исчерпана, запросы ключа ждут в очереди; при освобождении
+        квоты проходит запрос с наибольшим priority (при равенстве — ранний).
+        """
+        loop = asyncio.get_running_loop()
+        scheduler = self._schedulers.get((key, loop))
+        if (scheduler is None or not scheduler.waiters) and self.try_acquire(key, cost) == 0.0:
+            return
+
+        if scheduler is None:
+            scheduler = self._scheduler_for(key, loop)
+        future = loop.create_future()
+        heapq.heappush(scheduler.waiters, (-priority, next(self._seq), cost, future))
+        self.stats["delayed"] += 1
+        if scheduler.task is None or scheduler.task.done():
+            scheduler.task = asyncio.create_task(self._dispatch(key, scheduler), name=f"RateLimiter:{key}")
+
+        # При отмене или таймауте future отменяется, и диспетчер его пропускает
+        try:
+            if timeout is None:
+                await future
+            else:
+                await asyncio.wait_for(future, timeout=timeout)
+        except asyncio.TimeoutError:
+            self.stats["rejected"] += 1
+            raise RateLimitExceeded(key, self.delay(key, cost))
+
+    def _scheduler_for(self, key: str, loop: asyncio.AbstractEventLoop) -> _KeyScheduler:
+        with self._lock:
+            # Планировщики закрытых loop больше не нужны
+            for stale in [k for k, s in self._schedulers.items() if s.loop.is_closed()]:
+                del self._schedulers[stale]
+            scheduler = self._schedulers.get((key, loop))
+            if scheduler is None:
+                scheduler = self._schedulers[(key, loop)] = _KeyScheduler(loop)
+            return scheduler
+
+    async def _dispatch(self, key: str, scheduler: _KeyScheduler) -> None:
+        """Выдача разрешений ожидающим в порядке приоритета по мере освобождения квоты"""
+        while scheduler.waiters:
+            _, _, cost, future = scheduler.waiters[0]
+            if future.done():
+                heapq.heappop(scheduler.waiters)
+                continue
+
+            wait = self.try_acquire(key, cost)
+            if wait > 0:
+                scheduler.wakeup.clear()
+                try:
+                    await asyncio.wait_for(scheduler.wakeup.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            # Между проверкой future и резервированием нет await: квота
+            # достается именно этому (живому) запросу и не теряется
+            heapq.heappop(scheduler.waiters)
+            future.set_result(None)
+
+    # ------------------------------------------------------- состояние
+
+    def _load_state(self) -> None:
+        if not self.state_path or not self.state_path.exists():
+            return
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                self._saved_tats = json.load(f)
+        except Exception as e:
+            logger.warning(f"Не удалось загрузить состояние рейт-лимитов: {e}")
+
+    def _maybe_persist(self) -> None:
+        if self.state_path and self._dirty and time.monotonic() - self._last_persist >= self.persist_interval:
+            self.flush()
+
+    def flush(self) -> None:
+        """Сохранение состояния квот на диск (атомарная замена файла)"""
+        if not self.state_path:
+            return
+        with self._lock:
+            now = time.time()
+            for key, quotas in self._quotas.items():
+                # Сохраняются только квоты, которые ещё не восстановились полностью
+                self._saved_tats[key] = {
+                    self._quota_id(q.limit, q.period): q.tat for q in quotas if q.tat > now
+                }
+            state = {key: tats for key, tats in self._saved_tats.items() if tats}
+            self._dirty = False
+            self._last_persist = time.monotonic()
+        try:
+            self.state_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.state_path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.state_path)
+        except Exception as e:
+            logger.warning(f"Не удалось сохранить состояние рейт-лимитов: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "keys": len(self._quotas),
+            "waiting": sum(len(s.waiters) for s in list(self._schedulers.values())),
+        }
+
+
+_shared_limiter: Optional[RateLimiter] = None
+_shared_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Общий для процесса рейт-лимитер (создается при первом обращении)"""
+    global _shared_limiter
+    if _shared_limiter is None:
+        with _shared_limiter_lock:
+            if _shared_limiter is None:
+                _shared_limiter = RateLimiter()
+    return _shared_limiter
@@ -0,0 +1,226 @@
+"""
+Водяные знаки инкрементального сканирования площадок.
+
+Периодическое сканирование каждые несколько минут видит в основном уже известные
+заказы. Хранилище позволяет скраперам обрабатывать только новое:
+
+- компактное множество увиденных заказов по потоку (платформа + запрос):
+  64-битные хеши id с вытеснением самых старых;
+- водяной знак потока: последний новый заказ и время сканирования — выдача,
+  отсортированная по новизне, дочитывается только до первого известного заказа;
+- валидаторы HTTP (ETag / Last-Modified) по URL для условных запросов:
+  неизменившаяся страница возвращается как 304 без тела и разбора.
+
+Состояние сохраняется на диск, поэтому перезапуск не вызывает повторной
+обработки всей выдачи.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterable, Mapping, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STATE_PATH = "data/state/scrape_watermarks.json"
+
+
+def _job_hash(job_id: Any) -> int:
+    return int.from_bytes(hashlib.blake2b(str(job_id).encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class _StreamState:
+    """Увиденные заказы и водяной знак одного потока"""
+
+    __slots__ = ("seen", "order", "last_job_id", "last_scan_at")
+
+    def __init__(self):
+        self.seen: Set[int] = set()
+        self.order: Deque[int] = deque()
+        self.last_job_id: Optional[str] = None
+        self.last_scan_at: Optional[float] = None
+
+
+class ScrapeWatermarkStore:
+    """
+    Пример:
+        watermarks = get_scrape_watermarks()
+        headers = watermarks.conditional_headers(url)
+        new_ids = [job_id for job_id in ids if watermarks.is_new("kwork:new", job_id)]
+        watermarks.mark_seen("kwork:new", new_ids)
+    """
+
+    def __init__(self,
+                 state_path: Optional[str] = DEFAULT_STATE_PATH,
+                 max_seen_per_stream: int = 5000,
+                 max_validators: int = 1000,
+                 persist_interval: float = 10.0):
+        """
+        Args:
+            state_path: Файл состояния (None — без сохранения)
+            max_seen_per_stream: Сколько последних заказов потока помнить
+            max_validators: Сколько URL с валидаторами HTTP помнить
+            persist_interval: Минимальный интервал между сохранениями состояния
+        """
+        self.state_path = Path(state_path) if state_path else None
+        self.max_seen_per_stream = max_seen_per_stream
+        self.max_validators = max_validators
+        self.persist_interval = persist_interval
+
+        self._streams: Dict[str, _StreamState] = {}
+        self._validators: "OrderedDict[str, Dict[str, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._last_persist = time.monotonic()
+        self.stats = {"not_modified": 0, "new_jobs": 0, "known_jobs": 0, "early_stops": 0}
+        self._load_state()
+
+    # ------------------------------------------------ условные запросы
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """Заголовки If-None-Match / If-Modified-Since для ранее загруженного URL"""
+        with self._lock:
+            validators = self._validators.get(url)
+            if not validators:
+                return {}
+            headers = {}
+            if validators.get("etag"):
+                headers["If-None-Match"] = validators["etag"]
+            if validators.get("last_modified"):
+                headers["If-Modified-Since"] = validators["last_modified"]
+            return headers
+
+    def update_validators(self, url: str, response_headers: Mapping[str, str]) -> None:
+        """Запоминание ETag / Last-Modified из ответа 200"""
+        etag = response_headers.get("ETag")
+        last_modified = response_headers.get("Last-Modified")
+        with self._lock:
+            if not etag and not last_modified:
+                self._validators.pop(url, None)
+                return
+            self._validators[url] = {"etag": etag or "", "last_modified": last_modified or ""}
+            self._validators.move_to_end(url)
+            while len(self._validators) > self.max_validators:
+                self._validators.popitem(last=False)
+            self._dirty = True
+
+    def record_not_modified(self) -> None:
+        self.stats["not_modified"] += 1
+
+    # ------------------------------------------------ увиденные заказы
+
+    def _stream(self, stream: str) -> _StreamState:
+        state = self._streams.get(stream)
+        if state is None:
+            state = self._streams[stream] = _StreamState()
+        return state
+
+    def is_new(self, stream: str, job_id: Any) -> bool:
+        """Заказ еще не встречался в потоке"""
+        with self._lock:
+            is_new = _job_hash(job_id) not in self._stream(stream).seen
+        self.stats["new_jobs" if is_new else "known_jobs"] += 1
+        return is_new
+
+    def mark_seen(self, stream: str, job_ids: Iterable[Any]) -> None:
+        with self._lock:
+            state = self._stream(stream)
+            for job_id in job_ids:
+                job_hash = _job_hash(job_id)
+                if job_hash in state.seen:
+                    continue
+                state.seen.add(job_hash)
+                state.order.append(job_hash)
+                if len(state.order) > self.max_seen_per_stream:
+                    state.seen.discard(state.order.popleft())
+            self._dirty = True
+        self._maybe_persist()
+
+    def advance(self, stream: str, newest_job_id: Optional[Any] = None, stopped_early: bool = False) -> None:
+        """Фиксация завершенного сканирования потока"""
+        with self._lock:
+            state = self._stream(stream)
+            if newest_job_id is not None:
+                state.last_job_id = str(newest_job_id)
+            state.last_scan_at = time.time()
+            self._dirty = True
+        if stopped_early:
+            self.stats["early_stops"] += 1
+        self._maybe_persist()
+
+    def watermark(self, stream: str) -> Dict[str, Any]:
+        with self._lock:
+            state = self._streams.get(stream)
+            if state is None:
+                return {"last_job_id": None, "last_scan_at": None, "seen": 0}
+            return {"last_job_id": state.last_job_id, "last_scan_at": state.last_scan_at, "seen": len(state.seen)}
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "streams": len(self._streams), "validators": len(self._validators)}
+
+    # ------------------------------------------------------- состояние
+
+    def _load_state(self) -> None:
+        if not self.state_path or not self.state_path.exists():
+            return
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            for stream, item in state.get("streams", {}).items():
+                stream_state = self._stream(stream)
+                stream_state.order.extend(item.get("seen", [])[-self.max_seen_per_stream:])
+                stream_state.seen.update(stream_state.order)
+                stream_state.last_job_id = item.get("last_job_id")
+                stream_state.last_scan_at = item.get("last_scan_at")
+            self._validators.update(state.get("validators", {}))
+        except Exception as e:
+            logger.warning(f"Не удалось загрузить водяные знаки сканирования: {e}")
+
+    def _maybe_persist(self) -> None:
+        if self.state_path and self._dirty and time.monotonic() - self._last_persist >= self.persist_interval:
+            self.flush()
+
+    def flush(self) -> None:
+        """Сохранение состояния на диск (атомарная замена файла)"""
+        if not self.state_path:
+            return
+        with self._lock:
+            state = {
+                "streams": {
+                    stream: {
+                        "seen": list(item.order),
+                        "last_job_id": item.last_job_id,
+                        "last_scan_at": item.last_scan_at,
+                    }
+                    for stream, item in self._streams.items()
+                },
+                "validators": dict(self._validators),
+            }
+            self._dirty = False
+            self._last_persist = time.monotonic()
+        try:
+            self.state_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.state_path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.state_path)
+        except Exception as e:
+            logger.warning(f"Не удалось сохранить водяные знаки сканирования: {e}")
+
+
+_shared_store: Optional[ScrapeWatermarkStore] = None
+_shared_store_lock = threading.Lock()
+
+
+def get_scrape_watermarks() -> ScrapeWatermarkStore:
+    """Общее для процесса хранилище водяных знаков (создается при первом обращении)"""
+    global _shared_store
+    if _shared_store is None:
+        with _shared_store_lock:
+            if _shared_store is None:
+                _shared_store = ScrapeWatermarkStore()
+    return _shared_store
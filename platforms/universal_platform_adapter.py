@@ -14,7 +14,6 @@ import hashlib
 import base64
 from datetime import datetime, timedelta
 
-import requests
 from bs4 import BeautifulSoup
 from selenium import webdriver
 from selenium.webdriver.common.by import By
@@ -24,6 +23,9 @@ from selenium.common.exceptions import TimeoutException, NoSuchElementException
 
 from core.security.encryption_engine import EncryptionEngine
 from core.monitoring.alert_manager import AlertManager
+from platforms.html_parsing import FieldSpec, ParseSpec, get_html_parsing_pool
+from platforms.http_transport import get_http_transport
+from platforms.rate_limiter import RateLimitExceeded, get_rate_limiter, quotas_from_config
 
 
 class PlatformType(Enum):
@@ -77,7 +79,7 @@ class PlatformConfig:
         return result
 
     @classmethod
-    def from_dict(cls,  Dict[str, Any]) -> 'PlatformConfig':
+    def from_dict(cls, data: Dict[str, Any]) -> 'PlatformConfig':
         return cls(
             platform_name=data['platform_name'],
             platform_type=PlatformType(data['platform_type']),
@@ -118,7 +120,9 @@ class UniversalPlatformAdapter:
         self.sessions: Dict[str, Dict[str, Any]] = {}
         self.encryption_engine = EncryptionEngine()
         self.alert_manager = AlertManager()
-        self._rate_limiters: Dict[str, Dict[str, Any]] = {}
+        self.rate_limiter = get_rate_limiter()
+        self.html_parser = get_html_parsing_pool()
+        self.http = get_http_transport()
         self._load_platform_configs()
 
     def _load_platform_configs(self):
@@ -269,7 +273,7 @@ class UniversalPlatformAdapter:
         headers = {'Authorization': f'Bearer {api_key}'}
 
         try:
-            response = requests.get(test_url, headers=headers, timeout=10)
+            response = self.http.request_sync("GET", test_url, headers=headers, timeout=10)
             return response.status_code == 200
         except Exception as e:
             self._log(f"Ошибка проверки API ключа: {e}", level='ERROR')
@@ -283,12 +287,12 @@ class UniversalPlatformAdapter:
 
         # Проверка валидности кук через тестовый запрос
         try:
-            session = requests.Session()
+            session = self.http.session()
             for name, value in cookies.items():
                 session.cookies.set(name, value)
 
-            response = session.get(config.base_url, timeout=10)
-            return "login" not in response.url.lower() and response.status_code == 200
+            response = session.get_sync(config.base_url, timeout=10)
+            return "login" not in str(response.url).lower() and response.status_code == 200
         except Exception as e:
             self._log(f"Ошибка проверки кук: {e}", level='ERROR')
             return False
@@ -348,15 +352,15 @@ class UniversalPlatformAdapter:
     def _requests_login(self, config: PlatformConfig, credentials: Dict[str, Any]) -> bool:
         """Аутентификация через requests (для простых форм)"""
         try:
-            session = requests.Session()
+            session = self.http.session()
             login_data = {
                 'username': credentials['username'],
                 'password': credentials['password'],
                 'remember': '1'
             }
 
-            response = session.post(f"{config.base_url}/login", data=login_data, timeout=10)
-            return response.status_code == 200 and "login" not in response.url
+            response = session.post_sync(f"{config.base_url}/login", data=login_data, timeout=10)
+            return response.status_code == 200 and "login" not in str(response.url)
 
         except Exception as e:
             self._log(f"Ошибка аутентификации через requests: {e}", level='ERROR')
@@ -371,7 +375,7 @@ class UniversalPlatformAdapter:
         # Проверка токена через тестовый запрос
         headers = {'Authorization': f'Bearer {token}'}
         try:
-            response = requests.get(f"{config.base_url}/api/user", headers=headers, timeout=10)
+            response = self.http.request_sync("GET", f"{config.base_url}/api/user", headers=headers, timeout=10)
             return response.status_code == 200
         except Exception as e:
             self._log(f"Ошибка проверки токена: {e}", level='ERROR')
@@ -396,7 +400,13 @@ class UniversalPlatformAdapter:
             raise ValueError(f"Платформа {platform_name} не зарегистрирована")
 
         config = self.platforms[platform_name]
-        self._enforce_rate_limit(platform_name, 'search')
+        try:
+            self._enforce_rate_limit(platform_name, 'search')
+        except RateLimitExceeded as e:
+            # Ждать в потоке event loop нельзя: поиск пропускается до освобождения квоты
+            self._log(f"Достигнут рейт-лимит {platform_name}.search, повтор через {e.retry_after:.0f} сек",
+                      level='WARNING')
+            return []
 
         try:
             if config.platform_type == PlatformType.OFFICIAL_API:
@@ -460,31 +470,61 @@ class UniversalPlatformAdapter:
             html = driver.page_source
             driver.quit()
 
-            # Парсинг через BeautifulSoup для удобства
-            soup = BeautifulSoup(html, 'html.parser')
-            return self._parse_jobs_from_soup(soup, config)
+            return self._parse_jobs_from_html(html, config)
 
         except Exception as e:
             self._log(f"Ошибка Selenium скрапинга: {e}", level='ERROR')
             return []
 
     def _beautifulsoup_scrape(self, url: str, config: PlatformConfig) -> List[Dict[str, Any]]:
-        """Скрапинг с использованием requests + BeautifulSoup для статических страниц"""
+        """Скрапинг статических страниц: загрузка через общий HTTP-транспорт, разбор в пуле"""
         try:
             headers = {'User-Agent': config.user_agent or 'Mozilla/5.0'}
             if config.custom_headers:
                 headers.update(config.custom_headers)
 
-            response = requests.get(url, headers=headers, timeout=15)
+            response = self.http.request_sync("GET", url, headers=headers, timeout=15)
             response.raise_for_status()
 
-            soup = BeautifulSoup(response.text, 'html.parser')
-            return self._parse_jobs_from_soup(soup, config)
+            return self._parse_jobs_from_html(response.text, config)
 
         except Exception as e:
             self._log(f"Ошибка BeautifulSoup скрапинга: {e}", level='ERROR')
             return []
 
+    @staticmethod
+    def _parse_spec(config: PlatformConfig) -> ParseSpec:
+        """Правила извлечения платформы в виде, пригодном для пула разбора"""
+        fields = tuple(
+            FieldSpec(field_name, rule.selector, rule.attribute, rule.regex_pattern, rule.multiple)
+            for field_name, rule in config.scraping_rules.items()
+            if field_name != 'job_list'
+        )
+        return ParseSpec(config.scraping_rules['job_list'].selector, fields, limit=50)  # Ограничение для безопасности
+
+    def _parse_jobs_from_html(self, html: str, config: PlatformConfig) -> List[Dict[str, Any]]:
+        """
+        Извлечение данных о вакансиях из HTML по правилам конфигурации.
+        Разбор выполняется в пуле процессов, пост-обработка — здесь.
+        """
+        jobs = []
+        for job_data in self.html_parser.parse_sync(html, self._parse_spec(config)):
+            for field_name, value in job_data.items():
+                rule = config.scraping_rules[field_name]
+                if not rule.post_processor:
+                    continue
+                if rule.multiple:
+                    job_data[field_name] = [
+                        self._apply_post_processor(item, rule.post_processor) if item else item for item in value
+                    ]
+                elif value:
+                    job_data[field_name] = self._apply_post_processor(value, rule.post_processor)
+
+            if job_data:
+                jobs.append(job_data)
+
+        return jobs
+
     def _parse_jobs_from_soup(self, soup: BeautifulSoup, config: PlatformConfig) -> List[Dict[str, Any]]:
         """Извлечение данных о вакансиях из распарсенного HTML по правилам конфигурации"""
         jobs = []
@@ -510,7 +550,7 @@ class UniversalPlatformAdapter:
                 except Exception as e:
                     self._log(f"Ошибка извлечения поля {field_name}: {e}", level='DEBUG')
 
-            if job_
+            if job_data:
                 jobs.append(job_data)
 
         return jobs
@@ -644,57 +684,28 @@ class UniversalPlatformAdapter:
             'raw_data': raw_job  # Сохранение исходных данных для отладки
         }
 
-    def _generate_job_hash(self, job_ Dict[str, Any]) -> str:
+    def _generate_job_hash(self, job_data: Dict[str, Any]) -> str:
         """Генерация уникального хеша для вакансии на основе ее содержимого"""
         # Используем ключевые поля для создания стабильного хеша
         hash_data = f"{job_data.get('title', '')}|{job_data.get('description', '')[:100]}|{job_data.get('price', 0)}"
         return hashlib.md5(hash_data.encode()).hexdigest()
 
     def _enforce_rate_limit(self, platform_name: str, operation: str):
-        """Применение рейт-лимитов для предотвращения блокировок"""
-        if platform_name not in self._rate_limiters:
-            self._rate_limiters[platform_name] = {}
-
-        platform_limits = self._rate_limiters[platform_name]
-
-        if operation not in platform_limits:
-            platform_limits[operation] = {
-                'last_call': datetime.min,
-                'count': 0,
-                'window_start': datetime.now()
-            }
-
-        limit_info = platform_limits[operation]
-        config = self.platforms[platform_name]
-        rate_limits = config.rate_limits or {}
-        max_per_minute = rate_limits.get(f"{operation}_per_minute", 60)
-        max_per_hour = rate_limits.get(f"{operation}_per_hour", 1000)
-
-        now = datetime.now()
-        seconds_since_last = (now - limit_info['last_call']).total_seconds()
-
-        # Ограничение по минутному окну
-        if seconds_since_last < 60 / max_per_minute:
-            sleep_time = (60 / max_per_minute) - seconds_since_last
-            time.sleep(max(0, sleep_time))
-
-        # Сброс счетчиков по истечении окон
-        if (now - limit_info['window_start']).total_seconds() > 3600:
-            limit_info['window_start'] = now
-            limit_info['count'] = 0
-
-        # Ограничение по часовому окну
-        if limit_info['count'] >= max_per_hour:
-            sleep_until = limit_info['window_start'] + timedelta(hours=1)
-            sleep_seconds = (sleep_until - now).total_seconds()
-            if sleep_seconds > 0:
-                self._log(f"Достигнут рейт-лимит для {platform_name}.{operation}, сон {sleep_seconds:.0f} сек", level='WARNING')
-                time.sleep(sleep_seconds)
-                limit_info['window_start'] = datetime.now()
-                limit_info['count'] = 0
-
-        limit_info['last_call'] = datetime.now()
-        limit_info['count'] += 1
+        """
+        Применение рейт-лимитов для предотвращения блокировок.
+        Квоты операции ({operation}_per_minute / _per_hour) хранятся в общем
+        лимитере процесса. Синхронный вызов дожидается квоты; RateLimitExceeded
+        выбрасывается только в потоке event loop, где сон недопустим.
+        """
+        rate_limits = self.platforms[platform_name].rate_limits or {}
+        limits = {
+            f"{operation}_per_minute": 60,
+            f"{operation}_per_hour": 1000,
+            **rate_limits
+        }
+        key = f"{platform_name}:{operation}"
+        self.rate_limiter.configure(key, quotas_from_config(limits, operation))
+        self.rate_limiter.acquire_sync(key, max_wait=float('inf'))
 
     def _encrypt_session_data(self, data: Dict[str, Any]) -> str:
         """Шифрование данных сессии для безопасного хранения"""
@@ -702,7 +713,7 @@ class UniversalPlatformAdapter:
         encrypted = self.encryption_engine.encrypt(json_data.encode())
         return base64.b64encode(encrypted).decode()
 
-    def _decrypt_session_data(self, encrypted_ str) -> Dict[str, Any]:
+    def _decrypt_session_data(self, encrypted_data: str) -> Dict[str, Any]:
         """Расшифровка данных сессии"""
         try:
             decoded = base64.b64decode(encrypted_data.encode())
@@ -712,7 +723,7 @@ class UniversalPlatformAdapter:
             self._log(f"Ошибка расшифровки сессии: {e}", level='ERROR')
             return {}
 
-    def _save_session_to_disk(self, session_key: str, session_ Dict[str, Any]):
+    def _save_session_to_disk(self, session_key: str, session_data: Dict[str, Any]):
         """Сохранение сессии на диск в зашифрованном виде"""
         session_file = self.session_dir / f"{session_key}.enc"
         with open(session_file, 'w', encoding='utf-8') as f:
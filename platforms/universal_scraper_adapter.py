@@ -4,6 +4,7 @@
 Поддерживает 50+ "серых" площадок из СНГ и международного рынка.
 """
 
+import asyncio
 import json
 import re
 import time
@@ -14,8 +15,7 @@ from datetime import datetime, timedelta
 import hashlib
 import base64
 
-import requests
-from bs4 import BeautifulSoup
+import numpy as np
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
@@ -25,6 +25,27 @@ from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from core.security.encryption_engine import EncryptionEngine
 from core.monitoring.alert_manager import AlertManager
 from core.ai_management.ai_model_hub import get_ai_model_hub
+from platforms.rate_limiter import RateLimitExceeded, get_rate_limiter, quotas_from_config
+from platforms.html_parsing import FieldSpec, ParseSpec, get_html_parsing_pool
+from platforms.http_transport import get_http_transport
+
+# Ключевые слова спама/мошенничества в заголовке и описании заказа
+SPAM_KEYWORDS = (
+    'срочн', 'очень срочн', 'немедленно', 'без оплаты', 'тестовое задание',
+    'оплата после', 'предоплата', 'гарант', '100%', 'миллион', 'легко',
+    'без опыта', 'для новичков', 'за 5 минут', 'удаленная работа',
+    'заработок', 'деньги', 'оплата на карту'
+)
+
+# Все ключевые слова ищутся одним проходом по тексту: опережающая проверка
+# находит совпадения, начинающиеся в каждой позиции (в т.ч. перекрывающиеся),
+# а вложенные слова ("срочн" в "очень срочн") засчитываются через _SPAM_IMPLIED
+_SPAM_PATTERN = re.compile(
+    "(?=(" + "|".join(re.escape(kw) for kw in sorted(SPAM_KEYWORDS, key=len, reverse=True)) + "))"
+)
+_SPAM_IMPLIED = {kw: frozenset(other for other in SPAM_KEYWORDS if other in kw) for kw in SPAM_KEYWORDS}
+
+DEFAULT_AI_FILTER_BATCH_SIZE = 32
 
 
 class UniversalScraperAdapter:
@@ -152,19 +173,22 @@ class UniversalScraperAdapter:
         else:
             raise ValueError(f"Платформа '{platform_name}' не найдена в базе и не указан кастомный конфиг")
 
-        # Инициализация сессии
-        self.session = requests.Session()
+        # Инициализация сессии (заголовки и cookies; соединения — из общего транспорта)
+        self.session = get_http_transport().session()
         self._setup_session()
 
         # Загрузка учетных данных
         self.credentials = self._load_credentials()
         self.is_authenticated = False
 
-        # Статистика и рейт-лимиты
-        self.request_timestamps = []
-        self.hourly_request_count = 0
+        # Рейт-лимиты (общий лимитер процесса: квоты платформы, прокси и аккаунта)
+        self.rate_limiter = get_rate_limiter()
+        self.rate_limit_keys = self._configure_rate_limits()
         self.last_captcha_time = None
 
+        # Разбор страниц выдачи в общем пуле процессов
+        self.html_parser = get_html_parsing_pool()
+
     def _load_custom_config(self, config_path: str) -> Dict[str, Any]:
         """Загрузка кастомной конфигурации из YAML/JSON"""
         config_file = Path(config_path)
@@ -205,7 +229,6 @@ class UniversalScraperAdapter:
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
             'Accept-Language': 'ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7',
             'Accept-Encoding': 'gzip, deflate, br',
-            'Connection': 'keep-alive',
             'Upgrade-Insecure-Requests': '1',
             'Sec-Fetch-Dest': 'document',
             'Sec-Fetch-Mode': 'navigate',
@@ -218,40 +241,47 @@ class UniversalScraperAdapter:
         if self.config.get('use_proxy'):
             proxy = self._get_random_proxy()
             if proxy:
-                self.session.proxies = {'http': proxy, 'https': proxy}
+                self.session.proxy = proxy
 
-    def _enforce_rate_limits(self):
-        """Применение рейт-лимитов для избежания бана"""
-        now = datetime.now()
+    def _configure_rate_limits(self) -> List[str]:
+        """
+        Регистрация квот в общем лимитере. Квоты платформы берутся из rate_limits
+        (по умолчанию 10/мин и 100/час); для прокси и аккаунта — из
+        proxy_rate_limits и account_rate_limits, если они заданы.
+        """
+        platform_limits = {'requests_per_minute': 10, 'requests_per_hour': 100,
+                           **self.config.get('rate_limits', {})}
+        scopes = [(self.platform_name, platform_limits)]
+
+        proxy = self.session.proxy
+        if proxy and self.config.get('proxy_rate_limits'):
+            scopes.append((f"{self.platform_name}:proxy:{proxy}", self.config['proxy_rate_limits']))
+        account = self.credentials.get('username') or self.credentials.get('login')
+        if account and self.config.get('account_rate_limits'):
+            scopes.append((f"{self.platform_name}:account:{account}", self.config['account_rate_limits']))
+
+        keys = []
+        for key, limits in scopes:
+            quotas = quotas_from_config(limits, 'requests')
+            if quotas:
+                self.rate_limiter.configure(key, quotas)
+                keys.append(key)
+        return keys
 
-        # Очистка старых записей
-        self.request_timestamps = [
-            ts for ts in self.request_timestamps
-            if (now - ts).total_seconds() < 60
-        ]
+    def _enforce_rate_limits(self):
+        """
+        Применение рейт-лимитов для избежания бана (синхронный путь).
+        Вызов дожидается квоты; RateLimitExceeded выбрасывается только в потоке
+        event loop, где сон недопустим (там следует использовать asearch_jobs).
+        Квоты всех ключей резервируются вместе: отказ по одному ключу не
+        расходует квоты остальных.
+        """
+        self.rate_limiter.acquire_sync(self.rate_limit_keys, max_wait=float('inf'))
 
-        # Проверка лимита в минуту
-        per_minute_limit = self.config.get('rate_limits', {}).get('requests_per_minute', 10)
-        if len(self.request_timestamps) >= per_minute_limit:
-            sleep_time = 60 - (now - self.request_timestamps[0]).total_seconds()
-            if sleep_time > 0:
-                self._log(f"Достигнут рейт-лимит ({per_minute_limit}/мин). Сон {sleep_time:.1f} сек...",
-                          level='WARNING')
-                time.sleep(sleep_time + 1)
-
-        # Проверка лимита в час
-        per_hour_limit = self.config.get('rate_limits', {}).get('requests_per_hour', 100)
-        if self.hourly_request_count >= per_hour_limit:
-            sleep_time = 3600 - (now - self.request_timestamps[0]).total_seconds()
-            if sleep_time > 0:
-                self._log(f"Достигнут рейт-лимит ({per_hour_limit}/час). Сон {sleep_time / 60:.1f} мин...",
-                          level='CRITICAL')
-                time.sleep(sleep_time + 60)
-                self.hourly_request_count = 0
-
-        # Регистрация запроса
-        self.request_timestamps.append(now)
-        self.hourly_request_count += 1
+    async def _acquire_rate_limits(self, priority: int = 0):
+        """Асинхронное ожидание квот без блокировки event loop"""
+        for key in self.rate_limit_keys:
+            await self.rate_limiter.acquire(key, priority=priority)
 
     def authenticate(self) -> bool:
         """
@@ -287,8 +317,8 @@ class UniversalScraperAdapter:
         """Проверка активности сессии"""
         try:
             test_url = self.config.get('session_check_url', f"{self.config['base_url']}/")
-            response = self.session.get(test_url, timeout=10)
-            return response.status_code == 200 and 'login' not in response.url.lower()
+            response = self.session.get_sync(test_url, timeout=10)
+            return response.status_code == 200 and 'login' not in str(response.url).lower()
         except:
             return False
 
@@ -330,7 +360,33 @@ class UniversalScraperAdapter:
                 raise RuntimeError(f"Необходима аутентификация для поиска на {self.platform_name}")
 
         # Применение рейт-лимитов
-        self._enforce_rate_limits()
+        try:
+            self._enforce_rate_limits()
+        except RateLimitExceeded as e:
+            self._log(f"Достигнут рейт-лимит '{e.key}', повтор через {e.retry_after:.1f} сек", level='WARNING')
+            return []
+
+        return self._run_search(query, filters, max_results)
+
+    async def asearch_jobs(self,
+                           query: str = "копирайтинг дизайн программирование",
+                           filters: Optional[Dict[str, Any]] = None,
+                           max_results: int = 30,
+                           priority: int = 0) -> List[Dict[str, Any]]:
+        """
+        Асинхронный поиск: ожидание квоты не блокирует event loop, а при
+        исчерпанной квоте запросы с большим priority выполняются раньше.
+        Сам скрапинг (HTTP-клиент/Selenium) выполняется в отдельном потоке.
+        """
+        if not self.is_authenticated:
+            if not await asyncio.to_thread(self.authenticate):
+                raise RuntimeError(f"Необходима аутентификация для поиска на {self.platform_name}")
+
+        await self._acquire_rate_limits(priority)
+        return await asyncio.to_thread(self._run_search, query, filters, max_results)
+
+    def _run_search(self, query: str, filters: Optional[Dict[str, Any]], max_results: int) -> List[Dict[str, Any]]:
+        """Загрузка, парсинг и фильтрация результатов (квота уже получена)"""
 
         # Формирование URL поиска
         search_url = self._build_search_url(query, filters)
@@ -381,12 +437,12 @@ class UniversalScraperAdapter:
         return url
 
     def _scrape_with_requests(self, url: str) -> Optional[str]:
-        """Скрапинг через requests с обходом защиты"""
+        """Скрапинг через HTTP-клиент (общий пул соединений) с обходом защиты"""
         try:
             # Добавление задержки для имитации человека
             time.sleep(random.uniform(1.5, 3.5))
 
-            response = self.session.get(url, timeout=15)
+            response = self.session.get_sync(url, timeout=15)
             response.raise_for_status()
 
             # Проверка на Cloudflare/защиту
@@ -402,7 +458,7 @@ class UniversalScraperAdapter:
             return response.text
 
         except Exception as e:
-            self._log(f"Ошибка скрапинга через requests: {e}", level='ERROR')
+            self._log(f"Ошибка скрапинга через HTTP-клиент: {e}", level='ERROR')
             return None
 
     def _scrape_with_selenium(self, url: str) -> Optional[str]:
@@ -468,15 +524,28 @@ class UniversalScraperAdapter:
                 break
             last_height = new_height
 
+    def _parse_spec(self, max_results: int) -> ParseSpec:
+        """Правила извлечения из конфигурации платформы (компилируются воркерами один раз)"""
+        fields = [
+            FieldSpec('title', self.config.get('title_selector')),
+            FieldSpec('price', self.config.get('price_selector')),
+            FieldSpec('url', self.config.get('url_selector'), attribute='href'),
+            FieldSpec('raw_html', None, attribute=None),
+        ]
+        if self.config.get('description_selector'):
+            fields.append(FieldSpec('description', self.config['description_selector']))
+        if self.config.get('skills_selector'):
+            fields.append(FieldSpec('skills', self.config['skills_selector'], multiple=True))
+        return ParseSpec(self.config['job_selector'], tuple(fields), limit=max_results)
+
     def _parse_jobs_from_html(self, html: str, max_results: int = 30) -> List[Dict[str, Any]]:
-        """Парсинг заказов из HTML с применением правил конфигурации"""
-        soup = BeautifulSoup(html, 'html.parser')
-        job_elements = soup.select(self.config['job_selector'])
+        """Парсинг заказов из HTML с применением правил конфигурации (в пуле процессов)"""
+        cards = self.html_parser.parse_sync(html, self._parse_spec(max_results))
 
         jobs = []
-        for element in job_elements[:max_results]:
+        for fields in cards:
             try:
-                job = self._extract_job_data(element)
+                job = self._extract_job_data(fields)
                 if job:
                     jobs.append(job)
             except Exception as e:
@@ -484,44 +553,29 @@ class UniversalScraperAdapter:
 
         return jobs
 
-    def _extract_job_data(self, element: Any) -> Optional[Dict[str, Any]]:
-        """Извлечение данных заказа из HTML-элемента"""
+    def _extract_job_data(self, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Сборка заказа из извлеченных полей карточки"""
         # Заголовок
-        title_elem = element.select_one(self.config.get('title_selector'))
-        title = title_elem.get_text(strip=True) if title_elem else None
+        title = fields.get('title')
         if not title:
             return None
 
         # Цена
         price = 0.0
-        price_elem = element.select_one(self.config.get('price_selector'))
-        if price_elem:
-            price_text = price_elem.get_text(strip=True)
-            price = self._extract_price(price_text)
+        if fields.get('price'):
+            price = self._extract_price(fields['price'])
 
         # URL
-        url_elem = element.select_one(self.config.get('url_selector'))
-        url = url_elem['href'] if url_elem else ''
+        url = fields.get('url') or ''
         if url and not url.startswith('http'):
             url = self.config['base_url'] + url
 
         # ID заказа (хеш от заголовка + цены)
         job_id = hashlib.md5(f"{title}{price}".encode()).hexdigest()[:16]
 
-        # Описание (если есть)
-        description = ''
-        desc_selector = self.config.get('description_selector')
-        if desc_selector:
-            desc_elem = element.select_one(desc_selector)
-            if desc_elem:
-                description = desc_elem.get_text(strip=True)[:500]
-
-        # Навыки (если есть)
-        skills = []
-        skills_selector = self.config.get('skills_selector')
-        if skills_selector:
-            skills_elems = element.select(skills_selector)
-            skills = [s.get_text(strip=True) for s in skills_elems]
+        # Описание и навыки (если есть)
+        description = (fields.get('description') or '')[:500]
+        skills = fields.get('skills', [])
 
         return {
             'platform': self.platform_name,
@@ -536,7 +590,7 @@ class UniversalScraperAdapter:
             'skills': skills,
             'url': url,
             'posted_at': datetime.now().isoformat(),
-            'raw_html': str(element)[:1000]  # Для отладки
+            'raw_html': (fields.get('raw_html') or '')[:1000]  # Для отладки
         }
 
     def _extract_price(self, text: str) -> float:
@@ -581,6 +635,9 @@ class UniversalScraperAdapter:
         - Оценка реалистичности бюджета
         - Анализ качества описания ТЗ
         - Рекомендация приоритета
+
+        Модель вызывается пачками (ai_filter_batch_size в конфигурации платформы),
+        вероятность спама считается один раз на заказ, приоритет — сразу для всей выборки.
         """
         if not jobs:
             return []
@@ -592,30 +649,71 @@ class UniversalScraperAdapter:
             # Если ИИ недоступен — базовая фильтрация
             return self._basic_filter_jobs(jobs, filters)
 
-        filtered_jobs = []
+        spam_probabilities = [self._detect_spam(job) for job in jobs]
 
-        for job in jobs:
-            # Анализ описания заказа
-            analysis = model(job['description'] or job['title'])
+        # Модель анализирует только заказы, прошедшие дешевые проверки
+        candidates = [
+            (job, spam) for job, spam in zip(jobs, spam_probabilities)
+            if self._passes_basic_quality(job, spam, filters)
+        ]
+        if not candidates:
+            return []
 
-            # Фильтрация по качеству
-            is_quality = self._evaluate_job_quality(job, analysis, filters)
+        analyses = self._analyze_batch(model, [job['description'] or job['title'] for job, _ in candidates])
 
-            if is_quality:
-                # Добавление метаданных ИИ
-                job['ai_analysis'] = {
-                    'quality_score': analysis.get('score', 0.5),
-                    'sentiment': analysis.get('label', 'neutral'),
-                    'priority': self._calculate_priority(job, analysis),
-                    'spam_probability': self._detect_spam(job)
-                }
-                filtered_jobs.append(job)
+        filtered_jobs = []
+        filtered_spam = []
+        filtered_analyses = []
+        for (job, spam), analysis in zip(candidates, analyses):
+            if self._is_suspicious_sentiment(analysis):
+                continue
+            filtered_jobs.append(job)
+            filtered_spam.append(spam)
+            filtered_analyses.append(analysis)
+
+        priorities = self._calculate_priorities(filtered_jobs, filtered_analyses)
+
+        for job, spam, analysis, priority in zip(filtered_jobs, filtered_spam, filtered_analyses, priorities):
+            # Добавление метаданных ИИ
+            job['ai_analysis'] = {
+                'quality_score': analysis.get('score', 0.5),
+                'sentiment': analysis.get('label', 'neutral'),
+                'priority': float(priority),
+                'spam_probability': spam
+            }
 
         # Сортировка по приоритету
         filtered_jobs.sort(key=lambda x: x['ai_analysis']['priority'], reverse=True)
 
         return filtered_jobs
 
+    def _analyze_batch(self, model: Any, texts: List[str]) -> List[Dict[str, Any]]:
+        """
+        Анализ текстов пачками по ai_filter_batch_size.
+        Если модель не принимает список, тексты анализируются по одному.
+        """
+        batch_size = max(1, int(self.config.get('ai_filter_batch_size', DEFAULT_AI_FILTER_BATCH_SIZE)))
+        analyses: List[Dict[str, Any]] = []
+
+        for start in range(0, len(texts), batch_size):
+            chunk = texts[start:start + batch_size]
+            try:
+                results = model(chunk, batch_size=len(chunk))
+            except TypeError:
+                results = None
+            if not isinstance(results, list) or len(results) != len(chunk):
+                results = [model(text) for text in chunk]
+            analyses.extend(self._normalize_analysis(result) for result in results)
+
+        return analyses
+
+    @staticmethod
+    def _normalize_analysis(result: Any) -> Dict[str, Any]:
+        """Пайплайны могут вернуть [{'label', 'score'}] вместо словаря"""
+        if isinstance(result, list):
+            result = result[0] if result else {}
+        return result if isinstance(result, dict) else {}
+
     def _basic_filter_jobs(self, jobs: List[Dict[str, Any]], filters: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Базовая фильтрация без ИИ"""
         min_budget = filters.get('min_budget', 500) if filters else 500
@@ -627,9 +725,9 @@ class UniversalScraperAdapter:
                and not self._is_spam_basic(job)
         ]
 
-    def _evaluate_job_quality(self, job: Dict[str, Any], analysis: Dict[str, Any],
+    def _passes_basic_quality(self, job: Dict[str, Any], spam_probability: float,
                               filters: Optional[Dict[str, Any]]) -> bool:
-        """Оценка качества заказа"""
+        """Проверки качества заказа, не требующие модели"""
         # Минимальный бюджет
         min_budget = filters.get('min_budget', 500) if filters else 500
         if job['budget']['amount'] < min_budget:
@@ -641,28 +739,27 @@ class UniversalScraperAdapter:
             return False
 
         # Детектирование спама
-        if self._detect_spam(job) > 0.7:  # Вероятность спама > 70%
-            return False
-
-        # Анализ тональности (негативные заказы часто мошеннические)
-        if analysis.get('label') == 'negative' and analysis.get('score', 0) > 0.8:
+        if spam_probability > 0.7:  # Вероятность спама > 70%
             return False
 
         return True
 
+    @staticmethod
+    def _is_suspicious_sentiment(analysis: Dict[str, Any]) -> bool:
+        """Анализ тональности (негативные заказы часто мошеннические)"""
+        return analysis.get('label') == 'negative' and analysis.get('score', 0) > 0.8
+
     def _detect_spam(self, job: Dict[str, Any]) -> float:
         """Детектирование спама/мошенничества (0.0 - 1.0)"""
         title = job['title'].lower()
         description = job.get('description', '').lower()
 
-        spam_keywords = [
-            'срочн', 'очень срочн', 'немедленно', 'без оплаты', 'тестовое задание',
-            'оплата после', 'предоплата', 'гарант', '100%', 'миллион', 'легко',
-            'без опыта', 'для новичков', 'за 5 минут', 'удаленная работа',
-            'заработок', 'деньги', 'оплата на карту'
-        ]
+        # Один проход скомпилированным шаблоном по заголовку и описанию
+        hits = set()
+        for match in _SPAM_PATTERN.finditer(f"{title}\n{description}"):
+            hits |= _SPAM_IMPLIED[match.group(1)]
 
-        spam_score = sum(1 for kw in spam_keywords if kw in title or kw in description) / len(spam_keywords)
+        spam_score = len(hits) / len(SPAM_KEYWORDS)
 
         # Дополнительные факторы
         if job['budget']['amount'] < 300:  # Очень низкий бюджет
@@ -678,23 +775,23 @@ class UniversalScraperAdapter:
         spam_triggers = ['срочн', 'тестовое', 'без оплаты', 'гарант', '100%']
         return any(trigger in title for trigger in spam_triggers) or job['budget']['amount'] < 300
 
-    def _calculate_priority(self, job: Dict[str, Any], analysis: Dict[str, Any]) -> float:
-        """Расчет приоритета заказа (0.0 - 1.0)"""
-        priority = 0.0
-
-        # Бюджет (чем выше, тем выше приоритет)
-        budget = job['budget']['amount']
-        priority += min(budget / 10000, 0.4)  # Максимум 0.4 за бюджет
-
-        # Качество описания
-        desc_quality = len(job.get('description', '')) / 500
-        priority += min(desc_quality * 0.3, 0.3)
-
-        # Анализ ИИ
-        ai_score = analysis.get('score', 0.5)
-        priority += ai_score * 0.3
-
-        return min(1.0, priority)
+    @staticmethod
+    def _calculate_priorities(jobs: List[Dict[str, Any]], analyses: List[Dict[str, Any]]) -> np.ndarray:
+        """Расчет приоритетов (0.0 - 1.0) сразу для всей выборки заказов"""
+        if not jobs:
+            return np.zeros(0)
+
+        budgets = np.fromiter((job['budget']['amount'] for job in jobs), dtype=float, count=len(jobs))
+        desc_lengths = np.fromiter((len(job.get('description', '')) for job in jobs), dtype=float, count=len(jobs))
+        ai_scores = np.fromiter((analysis.get('score', 0.5) for analysis in analyses), dtype=float, count=len(jobs))
+
+        # Бюджет (максимум 0.4), качество описания (максимум 0.3) и оценка ИИ (вес 0.3)
+        priorities = (
+            np.minimum(budgets / 10000, 0.4)
+            + np.minimum(desc_lengths / 500 * 0.3, 0.3)
+            + ai_scores * 0.3
+        )
+        return np.minimum(priorities, 1.0)
 
     def submit_proposal(self, job_id: str, proposal_text: str, amount: Optional[float] = None) -> Dict[str, Any]:
         """
@@ -10,19 +10,18 @@ Upwork API Wrapper — безопасный, отказоустойчивый к
 - Интеграцию с системой мониторинга и восстановления
 """
 
-import asyncio
 import logging
 import time
 from typing import Any, Dict, Optional, List, Union
 from urllib.parse import urljoin
 
 import httpx
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 
 from core.config.unified_config_manager import UnifiedConfigManager
 from core.security.advanced_crypto_system import AdvancedCryptoSystem
 from core.monitoring.intelligent_monitoring_system import IntelligentMonitoringSystem
 from core.security.audit_logger import AuditLogger
+from platforms.http_transport import get_http_transport
 
 logger = logging.getLogger("UpworkAPIWrapper")
 
@@ -63,31 +62,28 @@ class UpworkAPIWrapper:
 
         self.access_token: Optional[str] = None
         self.token_expires_at: float = 0
-        self._http_client: Optional[httpx.AsyncClient] = None
 
-        # Инициализация HTTP-клиента
+        # Общий HTTP-транспорт (пул соединений, повторы, лимит на хост)
         self._init_http_client()
 
         logger.info("✅ Upwork API Wrapper initialized successfully")
 
     def _init_http_client(self):
-        """Инициализирует HTTP-клиент с настройками по умолчанию."""
-        timeout = httpx.Timeout(30.0, connect=10.0)
-        limits = httpx.Limits(max_connections=10, max_keepalive_connections=5)
-        self._http_client = httpx.AsyncClient(timeout=timeout, limits=limits)
+        """Подключает общий HTTP-транспорт: не больше 10 одновременных запросов к API."""
+        self.timeout = httpx.Timeout(30.0, connect=10.0)
+        self.http = get_http_transport()
+        self.http.configure_host(httpx.URL(self.BASE_URL).host, max_connections=10)
 
     async def _ensure_access_token(self):
         """Гарантирует наличие валидного access_token (обновляет при необходимости)."""
         if not self.access_token or time.time() >= self.token_expires_at - 60:
             await self._refresh_access_token()
 
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=10),
-        retry=retry_if_exception_type((httpx.HTTPError, httpx.TimeoutException)),
-    )
     async def _refresh_access_token(self):
-        """Обновляет access_token с использованием refresh_token."""
+        """
+        Обновляет access_token с использованием refresh_token.
+        Сетевые ошибки и 5xx повторяются транспортом (до 2 повторов).
+        """
         logger.debug("🔄 Refreshing Upwork access token...")
 
         data = {
@@ -98,7 +94,8 @@ class UpworkAPIWrapper:
         }
 
         try:
-            response = await self._http_client.post(self.AUTH_URL, data=data)
+            response = await self.http.request("POST", self.AUTH_URL, data=data, timeout=self.timeout,
+                                               retries=2, retry_unsafe=True)
             response.raise_for_status()
             token_data = response.json()
 
@@ -131,7 +128,10 @@ class UpworkAPIWrapper:
         params: Optional[Dict[str, Any]] = None,
         json_data: Optional[Dict[str, Any]] = None,
     ) -> Dict[str, Any]:
-        """Выполняет защищенный HTTP-запрос к Upwork API."""
+        """
+        Выполняет защищенный HTTP-запрос к Upwork API.
+        Ответы 429 повторяются транспортом с учетом Retry-After.
+        """
         await self._ensure_access_token()
 
         url = urljoin(self.BASE_URL, endpoint.lstrip("/"))
@@ -142,12 +142,13 @@ class UpworkAPIWrapper:
         }
 
         try:
-            response = await self._http_client.request(
-                method=method,
-                url=url,
+            response = await self.http.request(
+                method,
+                url,
                 headers=headers,
                 params=params,
                 json=json_data,
+                timeout=self.timeout,
             )
 
             # Логируем статус
@@ -160,11 +161,7 @@ class UpworkAPIWrapper:
             )
 
             if response.status_code == 429:
-                # Rate limit — ждем и повторяем
-                retry_after = int(response.headers.get("Retry-After", 5))
-                logger.warning(f"⚠️ Upwork rate limit hit. Retrying after {retry_after}s")
-                await asyncio.sleep(retry_after)
-                return await self._make_request(method, endpoint, params, json_data)
+                logger.warning("⚠️ Upwork rate limit hit, retries exhausted")
 
             response.raise_for_status()
             return response.json()
@@ -235,10 +232,8 @@ class UpworkAPIWrapper:
         return await self._make_request("POST", f"/messages/v3/contracts/{contract_id}/threads", json_data=payload)
 
     async def close(self):
-        """Корректное закрытие HTTP-клиента."""
-        if self._http_client:
-            await self._http_client.aclose()
-            logger.info("🔌 Upwork API client closed")
+        """Закрытие клиента (соединения принадлежат общему транспорту и остаются в пуле)."""
+        logger.info("🔌 Upwork API client closed")
 
     def __del__(self):
         # Предупреждение: не гарантируется вызов в asyncio
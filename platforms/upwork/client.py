@@ -12,12 +12,12 @@ from typing import Optional, Dict, Any, List
 from urllib.parse import urljoin
 
 import httpx
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 
 from core.config.unified_config_manager import UnifiedConfigManager
 from core.security.advanced_crypto_system import AdvancedCryptoSystem
 from core.monitoring.intelligent_monitoring_system import IntelligentMonitoringSystem
 from core.security.audit_logger import AuditLogger
+from platforms.http_transport import get_http_transport
 
 logger = logging.getLogger("UpworkClient")
 
@@ -53,7 +53,13 @@ class UpworkClient:
         # State
         self.access_token: Optional[str] = None
         self.token_expires_at: float = 0
-        self._http_client: Optional[httpx.AsyncClient] = None
+        self.http = get_http_transport()
+        self.timeout = httpx.Timeout(
+            connect=self.config.get("timeout.connect", 10.0),
+            read=self.config.get("timeout.read", 30.0),
+            write=self.config.get("timeout.write", 10.0),
+            pool=self.config.get("timeout.pool", 5.0),
+        )
         self._lock = asyncio.Lock()
 
         # Rate limiting
@@ -69,17 +75,6 @@ class UpworkClient:
             raise ValueError(f"Missing required Upwork credential: {key}")
         return self.crypto.decrypt(encrypted_value)
 
-    async def _ensure_http_client(self):
-        """Lazy initialize HTTP client."""
-        if self._http_client is None:
-            timeout = httpx.Timeout(
-                connect=self.config.get("timeout.connect", 10.0),
-                read=self.config.get("timeout.read", 30.0),
-                write=self.config.get("timeout.write", 10.0),
-                pool=self.config.get("timeout.pool", 5.0),
-            )
-            self._http_client = httpx.AsyncClient(timeout=timeout, follow_redirects=True)
-
     async def _ensure_access_token(self):
         """Ensure valid access token is available (refresh if needed)."""
         async with self._lock:
@@ -89,7 +84,6 @@ class UpworkClient:
 
     async def _refresh_access_token(self):
         """Refresh OAuth2 access token using refresh token."""
-        await self._ensure_http_client()
         try:
             data = {
                 "grant_type": "refresh_token",
@@ -97,7 +91,7 @@ class UpworkClient:
                 "client_id": self.client_id,
                 "client_secret": self.client_secret,
             }
-            response = await self._http_client.post(self.token_url, data=data)
+            response = await self.http.request("POST", self.token_url, data=data, timeout=self.timeout)
             response.raise_for_status()
             token_data = response.json()
 
@@ -120,15 +114,12 @@ class UpworkClient:
             logger.error(f"Failed to refresh Upwork token: {e}", exc_info=True)
             raise RuntimeError("Upwork authentication failed") from e
 
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=10),
-        retry=retry_if_exception_type((httpx.RequestError, httpx.HTTPStatusError)),
-    )
     async def _make_request(self, method: str, endpoint: str, **kwargs) -> httpx.Response:
-        """Make an authenticated, rate-limited, retried HTTP request."""
+        """
+        Make an authenticated, rate-limited HTTP request over the shared transport.
+        Retries (backoff with jitter, Retry-After) are handled by the transport.
+        """
         await self._ensure_access_token()
-        await self._ensure_http_client()
 
         # Enforce rate limit
         async with self._lock:
@@ -146,7 +137,8 @@ class UpworkClient:
             "Accept": "application/json",
         })
 
-        response = await self._http_client.request(method, url, headers=headers, **kwargs)
+        response = await self.http.request(method, url, headers=headers, timeout=self.timeout,
+                                           retries=self.config.get("max_retries", 2), **kwargs)
         response.raise_for_status()
 
         # Log successful API call
@@ -204,8 +196,5 @@ class UpworkClient:
         return await self.post(f"/contracts/v1/clients/{job_id}/proposals.json", json=proposal_data)
 
     async def close(self):
-        """Gracefully close HTTP client."""
-        if self._http_client:
-            await self._http_client.aclose()
-            self._http_client = None
+        """Release the client (connections belong to the shared transport and stay pooled)."""
         logger.info("UpworkClient closed.")
@@ -5,14 +5,13 @@ Upwork Job Scraper — интеллектуальный парсер заказ
 Поддерживает ML-фильтрацию, rate limiting, обход блокировок, логирование и восстановление.
 """
 
-import asyncio
 import json
 import logging
 import time
 from typing import List, Dict, Any, Optional
-from urllib.parse import urljoin
+from urllib.parse import urlencode, urljoin
 
-import aiohttp
+import httpx
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 
 from core.config.unified_config_manager import UnifiedConfigManager
@@ -20,6 +19,9 @@ from core.security.advanced_crypto_system import AdvancedCryptoSystem
 from core.monitoring.intelligent_monitoring_system import IntelligentMonitoringSystem
 from core.dependency.service_locator import ServiceLocator
 from services.storage.database_service import DatabaseService
+from platforms.rate_limiter import get_rate_limiter, quotas_from_config
+from platforms.scrape_watermarks import get_scrape_watermarks
+from platforms.http_transport import get_http_transport
 
 
 class UpworkJobScraper:
@@ -60,7 +62,19 @@ class UpworkJobScraper:
         self.access_token = None
         self.token_expires_at = 0
 
-        self.session: Optional[aiohttp.ClientSession] = None
+        # Общий рейт-лимитер процесса для запросов к API Upwork
+        self.rate_limiter = get_rate_limiter()
+        self.rate_limiter.configure("upwork:api", quotas_from_config(
+            self.platform_config.get("rate_limits", {"requests_per_minute": 40}), "requests"
+        ))
+
+        # Инкрементальное сканирование: увиденные заказы и валидаторы HTTP
+        self.incremental = self.platform_config.get("incremental", True)
+        self.watermarks = get_scrape_watermarks()
+
+        # Соединения — из общего HTTP-транспорта
+        self.http = get_http_transport()
+        self.session = self.http.session(headers={"User-Agent": "AI-Freelance-Automation/1.0"}, timeout=30)
         self._is_initialized = False
 
     def _decrypt_secret(self, key: str) -> str:
@@ -76,18 +90,12 @@ class UpworkJobScraper:
             self.logger.warning("Upwork scraping is disabled in config.")
             return
 
-        self.session = aiohttp.ClientSession(
-            headers={"User-Agent": "AI-Freelance-Automation/1.0"},
-            timeout=aiohttp.ClientTimeout(total=30)
-        )
         await self._refresh_access_token()
         self._is_initialized = True
         self.logger.info("✅ Upwork scraper initialized successfully.")
 
     async def shutdown(self):
         """Корректное завершение работы."""
-        if self.session:
-            await self.session.close()
         self._is_initialized = False
         self.logger.info("🔌 Upwork scraper shut down.")
 
@@ -105,14 +113,13 @@ class UpworkJobScraper:
         }
 
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, data=payload) as resp:
-                    if resp.status != 200:
-                        raise RuntimeError(f"Failed to refresh token: {resp.status} {await resp.text()}")
-                    data = await resp.json()
-                    self.access_token = data["access_token"]
-                    self.token_expires_at = time.time() + data["expires_in"]
-                    self.logger.debug("🔄 Upwork access token refreshed.")
+            resp = await self.http.request("POST", url, data=payload, timeout=30, retry_unsafe=True)
+            if resp.status_code != 200:
+                raise RuntimeError(f"Failed to refresh token: {resp.status_code} {resp.text}")
+            data = resp.json()
+            self.access_token = data["access_token"]
+            self.token_expires_at = time.time() + data["expires_in"]
+            self.logger.debug("🔄 Upwork access token refreshed.")
         except Exception as e:
             self.monitor.log_anomaly("upwork_auth_failure", str(e))
             raise
@@ -120,10 +127,13 @@ class UpworkJobScraper:
     @retry(
         stop=stop_after_attempt(3),
         wait=wait_exponential(multiplier=1, min=2, max=10),
-        retry=retry_if_exception_type((aiohttp.ClientError, asyncio.TimeoutError))
+        retry=retry_if_exception_type(httpx.HTTPError)
     )
-    async def _fetch_jobs_api(self, params: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """Запрос к официальному API Upwork."""
+    async def _fetch_jobs_api(self, params: Dict[str, Any], conditional: bool = False) -> List[Dict[str, Any]]:
+        """
+        Запрос к официальному API Upwork.
+        При conditional=True ответ 304 (выдача не изменилась) возвращается как пустой список.
+        """
         await self._refresh_access_token()
 
         headers = {
@@ -132,30 +142,50 @@ class UpworkJobScraper:
         }
 
         url = urljoin(self.api_base_url, "profiles/v2/search/jobs.json")
-        async with self.session.get(url, headers=headers, params=params) as resp:
-            if resp.status == 429:
-                self.logger.warning("⚠️ Rate limited by Upwork API. Backing off...")
-                await asyncio.sleep(60)
-                raise aiohttp.ClientError("Rate limited")
-            elif resp.status != 200:
-                text = await resp.text()
-                self.logger.error(f"❌ API error {resp.status}: {text}")
-                raise aiohttp.ClientError(f"HTTP {resp.status}: {text}")
-
-            data = await resp.json()
-            return data.get("jobs", [])
+        validators_key = f"{url}?{urlencode(sorted(params.items()))}"
+        if conditional:
+            headers.update(self.watermarks.conditional_headers(validators_key))
+
+        await self.rate_limiter.acquire("upwork:api")
+        # Повтор — через tenacity, чтобы снова пройти рейт-лимитер после паузы
+        resp = await self.session.get(url, headers=headers, params=params, retries=0)
+        if resp.status_code == 304:
+            self.watermarks.record_not_modified()
+            self.logger.debug("♻️ Upwork search results not modified since last scan.")
+            return []
+        elif resp.status_code == 429:
+            self.logger.warning("⚠️ Rate limited by Upwork API. Backing off...")
+            # Следующие запросы (включая повтор) дождутся окончания паузы в лимитере
+            retry_after = resp.headers.get("Retry-After", "")
+            self.rate_limiter.penalize("upwork:api", float(retry_after) if retry_after.isdigit() else 60)
+            raise httpx.HTTPStatusError("Rate limited", request=resp.request, response=resp)
+        elif resp.status_code != 200:
+            self.logger.error(f"❌ API error {resp.status_code}: {resp.text}")
+            raise httpx.HTTPStatusError(f"HTTP {resp.status_code}: {resp.text}", request=resp.request, response=resp)
+
+        data = resp.json()
+        if conditional:
+            self.watermarks.update_validators(validators_key, resp.headers)
+        return data.get("jobs", [])
 
     async def scrape_jobs(
         self,
         query: str = "",
         budget_min: Optional[float] = None,
         category: Optional[str] = None,
-        limit: int = 50
+        limit: int = 50,
+        incremental: Optional[bool] = None
     ) -> List[Dict[str, Any]]:
         """
         Основной метод сбора заказов.
         Возвращает нормализованные данные в едином формате.
+
+        В инкрементальном режиме (по умолчанию, platforms.upwork.incremental)
+        нормализуются и возвращаются только заказы новее последнего увиденного:
+        выдача отсортирована по дате, поэтому разбор останавливается на первом
+        известном заказе.
         """
+        incremental = self.incremental if incremental is None else incremental
         if not self._is_initialized:
             await self.initialize()
 
@@ -174,7 +204,9 @@ class UpworkJobScraper:
             params["budget"] = f"{budget_min}-"
 
         try:
-            raw_jobs = await self._fetch_jobs_api(params)
+            raw_jobs = await self._fetch_jobs_api(params, conditional=incremental)
+            if incremental:
+                raw_jobs = self._take_new_jobs(f"upwork:{query}:{budget_min or 0}", raw_jobs)
             normalized_jobs = self._normalize_jobs(raw_jobs)
             filtered_jobs = await self._ml_filter_jobs(normalized_jobs)
             self.logger.info(f"✅ Retrieved and filtered {len(filtered_jobs)} relevant jobs from Upwork.")
@@ -185,6 +217,23 @@ class UpworkJobScraper:
             # Fallback: попытка через headless-браузер (если плагин установлен)
             return await self._fallback_scrape(query, budget_min, category, limit)
 
+    def _take_new_jobs(self, stream: str, raw_jobs: List[Dict]) -> List[Dict]:
+        """Заказы выдачи до первого уже увиденного (выдача отсортирована по дате)."""
+        new_jobs = []
+        for job in raw_jobs:
+            if not self.watermarks.is_new(stream, job.get("id")):
+                break
+            new_jobs.append(job)
+
+        self.watermarks.mark_seen(stream, (job.get("id") for job in new_jobs))
+        self.watermarks.advance(
+            stream,
+            new_jobs[0].get("id") if new_jobs else None,
+            stopped_early=len(new_jobs) < len(raw_jobs)
+        )
+        self.logger.debug(f"🆕 {len(new_jobs)} new of {len(raw_jobs)} Upwork jobs in stream '{stream}'.")
+        return new_jobs
+
     def _normalize_jobs(self, raw_jobs: List[Dict]) -> List[Dict[str, Any]]:
         """Приведение данных к единому внутреннему формату."""
         normalized = []
@@ -166,8 +166,20 @@ class AutonomousTaskScheduler:
 
     async def _trigger_job_scraping(self):
         platform_mgr = self.services.get("platform_manager")
-        if platform_mgr:
-            await platform_mgr.scan_all_platforms()
+        freelancer = self.services.get("auto_freelancer")
+        if not platform_mgr:
+            return
+        if not freelancer:
+            # Scanning marks jobs as seen, so never scan without a consumer for them
+            logger.warning("No 'auto_freelancer' service to hand new jobs to; scraping skipped.")
+            return
+
+        async def hand_off(entries):
+            await freelancer.process_new_jobs([
+                {**vars(entry["job"]), "platform": entry["platform"]} for entry in entries
+            ])
+
+        await platform_mgr.scan_all_platforms(on_new_jobs=hand_off)
 
     async def _trigger_health_check(self):
         health_monitor = self.services.get("health_monitor")
@@ -17,6 +17,7 @@ import sys
 
 from platforms.platform_factory import PlatformFactory
 from platforms.universal_scraper_adapter import get_scraper_adapter
+from platforms.job_dedup_index import get_job_dedup_index
 from core.ai_management.ai_model_hub import get_ai_model_hub
 from core.security.encryption_engine import EncryptionEngine
 from services.notification.telegram_service import TelegramService
@@ -59,6 +60,7 @@ class HighVolumeProposalSender:
         self.ai_hub = get_ai_model_hub()
         self.encryption_engine = EncryptionEngine()
         self.telegram = TelegramService()
+        self.dedup_index = get_job_dedup_index()
 
         # Статистика
         self.stats = self._load_stats()
@@ -149,6 +151,11 @@ class HighVolumeProposalSender:
 
             print(f"✅ Найдено {len(jobs)} заказов")
 
+            # Копии заказов, уже найденных на других платформах, не анализируются повторно
+            jobs = self.dedup_index.filter_unique(jobs)
+            print(f"🧹 Уникальных заказов: {len(jobs)} "
+                  f"(доля дубликатов {self.dedup_index.dedup_ratio:.0%})")
+
             # Фильтрация и сортировка по приоритету
             prioritized_jobs = self._prioritize_jobs(jobs)
 
@@ -0,0 +1,549 @@
+# AI_FREELANCE_AUTOMATION/services/ai_services/chunked_transcription.py
+
+"""
+Chunked Transcription — параллельная транскрибация длинных записей по частям.
+
+Вместо одного вызова model.transcribe на весь файл:
+- аудио декодируется потоково (16 кГц, моно, PCM16: WAV — стандартным модулем
+  wave, остальные форматы — через ffmpeg), в памяти хранится только окно
+  в несколько минут;
+- запись режется по паузам, найденным энергетическим VAD, на части
+  ~target_chunk_sec с перекрытием overlap_sec по краям (слова на месте
+  вынужденного разреза целиком попадают в обе части);
+- части транскрибируются параллельно в пуле процессов по мере нарезки
+  (декодирование и распознавание идут одновременно);
+- сегменты и временные метки слов переводятся в абсолютное время и сшиваются:
+  из перекрытия берется то, что относится к собственному интервалу части;
+- результат каждой части сохраняется (checkpoint), поэтому повторная попытка
+  после сбоя распознает только оставшиеся части;
+- в результат входит real-time factor (время обработки / длительность записи).
+
+Функция распознавания части выполняется в процессах пула и должна быть
+импортируемой (функция модуля или functools.partial от нее); по умолчанию —
+whisper_transcribe_chunk (локальный openai-whisper на CPU). Вместо нее можно
+передать корутину transcribe_async: части распознаются в цикле событий, не
+более workers одновременно (модель сервиса или облачный API, которые нельзя
+передать в процесс пула).
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import subprocess
+import threading
+import time
+import wave
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+logger = logging.getLogger("ChunkedTranscription")
+
+SAMPLE_RATE = 16000
+FRAME_SAMPLES = 480  # кадр VAD 30 мс
+MANIFEST_FILE = "manifest.json"
+
+ChunkTranscriber = Callable[[str, Dict[str, Any]], Dict[str, Any]]
+AsyncChunkTranscriber = Callable[[str, Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+
+@dataclass
+class AudioChunk:
+    """Часть записи: собственный интервал [start_sec, end_sec) и фактически вырезанный с перекрытием"""
+    index: int
+    start_sec: float
+    end_sec: float
+    audio_start_sec: float
+    audio_end_sec: float
+
+    @property
+    def file_name(self) -> str:
+        return f"chunk_{self.index:05d}.wav"
+
+    @property
+    def result_name(self) -> str:
+        return f"chunk_{self.index:05d}.json"
+
+
+# ---------------------------------------------------------------- декодирование
+
+def probe_duration(audio_path: Union[str, Path]) -> Optional[float]:
+    """Длительность записи в секундах (заголовок WAV или ffprobe); None, если не определить"""
+    audio_path = str(audio_path)
+    try:
+        with wave.open(audio_path, "rb") as wav:
+            return wav.getnframes() / wav.getframerate()
+    except (wave.Error, EOFError):
+        pass
+    try:
+        output = subprocess.run(
+            ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "default=nw=1:nk=1", audio_path],
+            capture_output=True, text=True, timeout=30, check=True,
+        ).stdout
+        return float(output.strip())
+    except (OSError, subprocess.SubprocessError, ValueError):
+        return None
+
+
+def _is_native_wav(audio_path: str) -> bool:
+    try:
+        with wave.open(audio_path, "rb") as wav:
+            return wav.getframerate() == SAMPLE_RATE and wav.getnchannels() == 1 and wav.getsampwidth() == 2
+    except (wave.Error, EOFError):
+        return False
+
+
+def iter_pcm(audio_path: Union[str, Path], block_sec: float = 10.0) -> Iterator[np.ndarray]:
+    """Потоковое декодирование в блоки PCM16 (16 кГц, моно)"""
+    audio_path = str(audio_path)
+    block_samples = int(block_sec * SAMPLE_RATE)
+
+    if _is_native_wav(audio_path):
+        with wave.open(audio_path, "rb") as wav:
+            while True:
+                frames = wav.readframes(block_samples)
+                if not frames:
+                    return
+                yield np.frombuffer(frames, dtype="<i2")
+
+    try:
+        process = subprocess.Popen(
+            ["ffmpeg", "-nostdin", "-v", "error", "-i", audio_path,
+             "-f", "s16le", "-ac", "1", "-ar", str(SAMPLE_RATE), "-"],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        )
+    except FileNotFoundError as e:
+        raise RuntimeError("ffmpeg не найден: декодирование форматов, кроме WAV 16 кГц моно, недоступно") from e
+    try:
+        while True:
+            data = process.stdout.read(block_samples * 2)
+            if not data:
+                break
+            yield np.frombuffer(data[:len(data) // 2 * 2], dtype="<i2")
+        if process.wait() != 0:
+            raise RuntimeError(f"ffmpeg: {process.stderr.read().decode(errors='replace').strip()}")
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+
+
+def write_wav(path: Path, samples: np.ndarray) -> None:
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(SAMPLE_RATE)
+        wav.writeframes(samples.astype("<i2").tobytes())
+
+
+# -------------------------------------------------------------------- нарезка
+
+def find_silences(samples: np.ndarray, min_silence_sec: float = 0.3,
+                  margin_db: float = 10.0) -> List[Tuple[int, int]]:
+    """
+    Паузы в окне записи (энергетический VAD по кадрам 30 мс).
+
+    Порог — уровень шума окна (10-й перцентиль громкости кадров) + margin_db,
+    но не выше медианы: в окне сплошной речи паузами считаются самые тихие места.
+    Возвращает интервалы пауз в отсчетах относительно начала окна.
+    """
+    frames = len(samples) // FRAME_SAMPLES
+    if frames == 0:
+        return []
+    framed = samples[:frames * FRAME_SAMPLES].astype(np.float32).reshape(frames, FRAME_SAMPLES)
+    level_db = 10 * np.log10(np.mean(framed * framed, axis=1) + 1.0)
+    threshold = min(np.percentile(level_db, 10) + margin_db, np.median(level_db))
+    silent = level_db <= threshold
+
+    min_frames = max(1, int(min_silence_sec * SAMPLE_RATE / FRAME_SAMPLES))
+    silences = []
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], silent.astype(np.int8), [0]))))
+    for begin, end in zip(edges[::2], edges[1::2]):
+        if end - begin >= min_frames:
+            silences.append((int(begin) * FRAME_SAMPLES, int(end) * FRAME_SAMPLES))
+    return silences
+
+
+class ChunkPlanner:
+    """Нарезка потока PCM на части по паузам (в памяти — окно max_chunk_sec + перекрытие)"""
+
+    def __init__(self,
+                 target_chunk_sec: float = 300.0,
+                 min_chunk_sec: float = 120.0,
+                 max_chunk_sec: float = 420.0,
+                 overlap_sec: float = 1.0,
+                 min_silence_sec: float = 0.3):
+        self.target = int(target_chunk_sec * SAMPLE_RATE)
+        self.min = int(min_chunk_sec * SAMPLE_RATE)
+        self.max = int(max_chunk_sec * SAMPLE_RATE)
+        self.overlap = int(overlap_sec * SAMPLE_RATE)
+        self.min_silence_sec = min_silence_sec
+
+    def split(self, blocks: Iterator[np.ndarray]) -> Iterator[Tuple[AudioChunk, np.ndarray]]:
+        """Части записи с их аудио (вырезано с перекрытием по краям)"""
+        buffer = np.zeros(0, dtype=np.int16)
+        buffer_start = 0  # абсолютный номер первого отсчета буфера
+        cut_start = 0
+        index = 0
+        exhausted = False
+
+        while True:
+            need = cut_start + self.max + self.overlap
+            pending = [buffer]
+            available = buffer_start + len(buffer)
+            while not exhausted and available < need:
+                block = next(blocks, None)
+                if block is None:
+                    exhausted = True
+                else:
+                    pending.append(block)
+                    available += len(block)
+            if len(pending) > 1:
+                buffer = np.concatenate(pending)
+            total = buffer_start + len(buffer)
+            if cut_start >= total:
+                return
+
+            if exhausted and total - cut_start <= self.max:
+                cut_end = total
+            else:
+                cut_end = self._choose_cut(buffer, buffer_start, cut_start)
+
+            audio_start = max(cut_start - self.overlap, 0)
+            audio_end = min(cut_end + self.overlap, total)
+            chunk = AudioChunk(index, cut_start / SAMPLE_RATE, cut_end / SAMPLE_RATE,
+                               audio_start / SAMPLE_RATE, audio_end / SAMPLE_RATE)
+            yield chunk, buffer[audio_start - buffer_start:audio_end - buffer_start]
+
+            index += 1
+            cut_start = cut_end
+            # Отсчеты до перекрытия следующей части больше не нужны
+            drop = max(cut_start - self.overlap - buffer_start, 0)
+            buffer = buffer[drop:].copy()
+            buffer_start += drop
+
+    def _choose_cut(self, buffer: np.ndarray, buffer_start: int, cut_start: int) -> int:
+        """Середина паузы, ближайшей к целевой длине части; без пауз — разрез на max_chunk_sec"""
+        window_start = cut_start + self.min
+        window = buffer[window_start - buffer_start:cut_start + self.max - buffer_start]
+        silences = find_silences(window, self.min_silence_sec)
+        if not silences:
+            return cut_start + self.max
+        target = cut_start + self.target
+        middles = [window_start + (begin + end) // 2 for begin, end in silences]
+        return min(middles, key=lambda middle: abs(middle - target))
+
+
+# -------------------------------------------------------------------- сшивка
+
+def stitch_results(chunks: List[AudioChunk], results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Сегменты частей в абсолютном времени без повторов на перекрытиях:
+    сегмент (и слово) относится к части, в собственный интервал которой
+    попадает его середина.
+    """
+    segments: List[Dict[str, Any]] = []
+    words: List[Dict[str, Any]] = []
+    languages: Counter = Counter()
+
+    for position, (chunk, result) in enumerate(zip(chunks, results)):
+        last = position == len(chunks) - 1
+
+        def owned(start: float, end: float) -> bool:
+            middle = (start + end) / 2
+            return chunk.start_sec <= middle and (middle < chunk.end_sec or last)
+
+        if result.get("language"):
+            languages[result["language"]] += chunk.end_sec - chunk.start_sec
+        chunk_segments = result.get("segments") or []
+        if not chunk_segments and result.get("text", "").strip():
+            # Провайдер вернул только текст: часть целиком — один сегмент
+            chunk_segments = [{"start": 0.0, "end": chunk.audio_end_sec - chunk.audio_start_sec,
+                               "text": result["text"]}]
+        for segment in chunk_segments:
+            start = chunk.audio_start_sec + segment["start"]
+            end = chunk.audio_start_sec + segment["end"]
+            segment_words = [
+                {**word, "start": chunk.audio_start_sec + word["start"], "end": chunk.audio_start_sec + word["end"]}
+                for word in segment.get("words") or []
+            ]
+            kept_words = [word for word in segment_words if owned(word["start"], word["end"])]
+            if segment_words:
+                if not kept_words:
+                    continue
+                text = "".join(word["word"] for word in kept_words)
+                start, end = kept_words[0]["start"], kept_words[-1]["end"]
+            elif owned(start, end):
+                text = segment.get("text", "")
+            else:
+                continue
+            segments.append({**segment, "id": len(segments), "start": start, "end": end,
+                             "text": text, "words": kept_words or segment.get("words")})
+            words.extend(kept_words)
+
+    return {
+        "text": " ".join(segment["text"].strip() for segment in segments if segment["text"].strip()),
+        "language": languages.most_common(1)[0][0] if languages else "unknown",
+        "segments": segments,
+        "words": words,
+    }
+
+
+# ---------------------------------------------------------- распознавание части
+
+_worker_models: Dict[str, Any] = {}
+
+
+def _init_worker(threads: int) -> None:
+    """Потоки BLAS/torch процесса пула: ядра делятся между процессами без переподписки"""
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+
+def whisper_transcribe_chunk(chunk_path: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    """Распознавание части локальной моделью openai-whisper (модель загружается один раз на процесс)"""
+    try:
+        import whisper
+    except ImportError as e:
+        raise ImportError("❌ Требуется установка: pip install openai-whisper") from e
+
+    name = options.get("model", "medium")
+    if name.startswith("whisper-"):
+        name = name[len("whisper-"):]
+    model = _worker_models.get(name)
+    if model is None:
+        model = _worker_models[name] = whisper.load_model(name, device="cpu")
+
+    result = model.transcribe(chunk_path, language=options.get("language"),
+                              word_timestamps=options.get("word_timestamps", False), fp16=False)
+    return compact_result(result)
+
+
+def compact_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Только нужные поля результата Whisper: он передается из процесса пула и сохраняется в checkpoint"""
+    return {
+        "text": result["text"],
+        "language": result.get("language"),
+        "segments": [
+            {key: segment[key] for key in ("start", "end", "text", "avg_logprob", "no_speech_prob", "words")
+             if key in segment}
+            for segment in result.get("segments") or []
+        ],
+    }
+
+
+# ---------------------------------------------------------------- транскрибатор
+
+class ChunkedTranscriber:
+    """
+    Транскрибация длинных записей частями в пуле процессов с возобновлением.
+
+    Пример:
+        result = await ChunkedTranscriber(model_name="whisper-medium").transcribe("interview.mp3")
+        result["real_time_factor"]  # < 1 — быстрее реального времени
+    """
+
+    def __init__(self,
+                 transcribe_fn: ChunkTranscriber = whisper_transcribe_chunk,
+                 model_name: str = "medium",
+                 workers: Optional[int] = None,
+                 checkpoint_dir: str = "data/cache/transcription",
+                 planner: Optional[ChunkPlanner] = None,
+                 checkpoint_ttl_hours: float = 48.0,
+                 transcribe_async: Optional[AsyncChunkTranscriber] = None):
+        """
+        Args:
+            transcribe_fn: Распознавание одной части (выполняется в процессе пула)
+            model_name: Модель, передается в transcribe_fn
+            workers: Число процессов (по умолчанию — половина CPU, но не больше 4:
+                каждый процесс держит свою копию модели); с transcribe_async —
+                число одновременно распознаваемых частей
+            checkpoint_dir: Каталог результатов частей для возобновления
+            planner: Параметры нарезки
+            checkpoint_ttl_hours: Через сколько часов брошенные незавершенные задания удаляются
+            transcribe_async: Корутина распознавания части; если задана, пул процессов не используется
+        """
+        self.transcribe_fn = transcribe_fn
+        self.transcribe_async = transcribe_async
+        self.model_name = model_name
+        cpus = os.cpu_count() or 1
+        self.workers = workers or max(1, min(4, cpus // 2))
+        self.threads_per_worker = max(1, cpus // self.workers)
+        self.checkpoint_dir = Path(checkpoint_dir)
+        self.planner = planner or ChunkPlanner()
+        self.checkpoint_ttl_sec = checkpoint_ttl_hours * 3600
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._async_slots = asyncio.Semaphore(self.workers)
+        self.stats = {"jobs": 0, "chunks": 0, "resumed_chunks": 0}
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    # spawn: fork процесса с запущенными потоками torch может зависнуть
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+                        initializer=_init_worker, initargs=(self.threads_per_worker,),
+                    )
+        return self._executor
+
+    def _reset_executor(self, error: Exception) -> None:
+        logger.warning(f"Пул транскрибации недоступен, будет пересоздан: {error}")
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+    def job_dir(self, audio_path: Path, options: Dict[str, Any]) -> Path:
+        """Каталог checkpoint'ов: файл (путь, размер, mtime), параметры распознавания и нарезки"""
+        stat = audio_path.stat()
+        planner = self.planner
+        key_data = json.dumps([str(audio_path.resolve()), stat.st_size, stat.st_mtime_ns, options,
+                               planner.target, planner.min, planner.max, planner.overlap, planner.min_silence_sec],
+                              sort_keys=True)
+        return self.checkpoint_dir / hashlib.sha256(key_data.encode()).hexdigest()[:20]
+
+    async def transcribe(self,
+                         audio_path: Union[str, Path],
+                         language: Optional[str] = None,
+                         word_timestamps: bool = False) -> Dict[str, Any]:
+        """
+        Транскрибация записи. Результаты готовых частей сохраняются сразу,
+        при повторном вызове для того же файла распознаются только оставшиеся.
+
+        Returns:
+            text, language, segments (абсолютное время, со словами при word_timestamps),
+            words, duration_sec, processing_time_sec, real_time_factor, chunks, resumed_chunks
+        """
+        started = time.perf_counter()
+        audio_path = Path(audio_path)
+        options = {"model": self.model_name, "language": language, "word_timestamps": word_timestamps}
+        job_dir = self.job_dir(audio_path, options)
+        job_dir.mkdir(parents=True, exist_ok=True)
+        self._cleanup_stale(exclude=job_dir)
+
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+
+        def plan() -> None:
+            try:
+                for chunk in self._planned_chunks(audio_path, job_dir):
+                    loop.call_soon_threadsafe(queue.put_nowait, chunk)
+            finally:
+                loop.call_soon_threadsafe(queue.put_nowait, None)
+
+        # Нарезка в потоке, распознавание частей начинается по мере их готовности
+        planner = loop.run_in_executor(None, plan)
+        chunks: List[AudioChunk] = []
+        tasks: List[asyncio.Future] = []
+        while (chunk := await queue.get()) is not None:
+            chunks.append(chunk)
+            tasks.append(asyncio.ensure_future(self._transcribe_chunk(chunk, job_dir, options)))
+        planner_error: Optional[BaseException] = None
+        try:
+            await planner
+        except Exception as e:
+            planner_error = e
+        # Части, распознавание которых уже идет, дописывают checkpoint даже при сбое соседних
+        outcomes = await asyncio.gather(*tasks, return_exceptions=True)
+        failures = [outcome for outcome in outcomes if isinstance(outcome, BaseException)]
+        if planner_error or failures:
+            raise planner_error or failures[0]
+
+        results = [result for result, _ in outcomes]
+        resumed = sum(1 for _, was_resumed in outcomes if was_resumed)
+        stitched = stitch_results(chunks, results)
+        duration = chunks[-1].end_sec if chunks else 0.0
+        processing_time = time.perf_counter() - started
+
+        shutil.rmtree(job_dir, ignore_errors=True)
+        self.stats["jobs"] += 1
+        self.stats["chunks"] += len(chunks)
+        self.stats["resumed_chunks"] += resumed
+        logger.info(f"🎧 {audio_path.name}: {duration:.0f} с аудио, {len(chunks)} частей "
+                    f"({resumed} из checkpoint), RTF {processing_time / duration if duration else 0:.3f}")
+        return {
+            **stitched,
+            "duration_sec": duration,
+            "processing_time_sec": processing_time,
+            "real_time_factor": processing_time / duration if duration else 0.0,
+            "chunks": len(chunks),
+            "resumed_chunks": resumed,
+        }
+
+    def _planned_chunks(self, audio_path: Path, job_dir: Path) -> Iterator[AudioChunk]:
+        """Части записи: из манифеста прошлой попытки или нарезкой (аудио частей пишется в job_dir)"""
+        manifest_path = job_dir / MANIFEST_FILE
+        if manifest_path.exists():
+            chunks = [AudioChunk(**item) for item in json.loads(manifest_path.read_text())["chunks"]]
+            # Декодирование не нужно, если у каждой части есть результат или аудио
+            if all((job_dir / c.result_name).exists() or (job_dir / c.file_name).exists() for c in chunks):
+                yield from chunks
+                return
+
+        chunks = []
+        for chunk, samples in self.planner.split(iter_pcm(audio_path)):
+            chunks.append(chunk)
+            if not (job_dir / chunk.result_name).exists():
+                write_wav(job_dir / chunk.file_name, samples)
+            yield chunk
+        self._write_json(manifest_path, {"source": str(audio_path), "chunks": [asdict(c) for c in chunks]})
+
+    async def _transcribe_chunk(self, chunk: AudioChunk, job_dir: Path,
+                                options: Dict[str, Any]) -> Tuple[Dict[str, Any], bool]:
+        result_path = job_dir / chunk.result_name
+        if result_path.exists():
+            return json.loads(result_path.read_text()), True
+
+        loop = asyncio.get_running_loop()
+        chunk_path = job_dir / chunk.file_name
+        if self.transcribe_async is not None:
+            async with self._async_slots:
+                result = compact_result(await self.transcribe_async(str(chunk_path), options))
+        else:
+            try:
+                result = await loop.run_in_executor(self._get_executor(), self.transcribe_fn, str(chunk_path),
+                                                    options)
+            except BrokenProcessPool as e:
+                self._reset_executor(e)
+                raise
+        # Checkpoint: после сбоя эта часть не распознается повторно
+        self._write_json(result_path, result)
+        chunk_path.unlink(missing_ok=True)
+        return result, False
+
+    @staticmethod
+    def _write_json(path: Path, data: Any) -> None:
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(data, ensure_ascii=False, default=float))
+        os.replace(tmp_path, path)
+
+    def _cleanup_stale(self, exclude: Path) -> None:
+        """Удаление checkpoint'ов заданий, которые так и не были завершены"""
+        deadline = time.time() - self.checkpoint_ttl_sec
+        for job_dir in self.checkpoint_dir.iterdir():
+            try:
+                if job_dir != exclude and job_dir.is_dir() and job_dir.stat().st_mtime < deadline:
+                    shutil.rmtree(job_dir, ignore_errors=True)
+            except OSError:
+                continue
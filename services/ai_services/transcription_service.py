@@ -74,6 +74,9 @@ class TranscriptionService:
         self._initialized = False
         self._supported_providers = ["whisper", "google_stt", "deepgram"]
         self._default_provider = self.config.get("ai.transcription.provider", "whisper")
+        # Длинные записи: нарезка по паузам и параллельное распознавание частей
+        self._chunking = self.config.get("ai.transcription.chunking", {}) or {}
+        self._chunked_transcriber = None
 
         self.logger.info("Intialized TranscriptionService with provider: %s", self._default_provider)
 
@@ -156,7 +159,8 @@ class TranscriptionService:
                         "provider": provider,
                         "task_id": task_id,
                         "client_id": client_id,
-                        "file_size_mb": os.path.getsize(audio_path) / (1024 * 1024)
+                        "file_size_mb": os.path.getsize(audio_path) / (1024 * 1024),
+                        **result.get("metadata", {})
                     }
                 )
 
@@ -215,6 +219,12 @@ class TranscriptionService:
         enable_timestamps: bool
     ) -> Dict[str, Any]:
         """Запуск локальной или облачной Whisper-модели."""
+        if self._chunking.get("enabled", True):
+            from .chunked_transcription import probe_duration
+            duration = await asyncio.to_thread(probe_duration, audio_path)
+            if duration and duration >= self._chunking.get("min_duration_sec", 600):
+                return await self._run_whisper_chunked(audio_path, language, enable_timestamps)
+
         try:
             model = await self.model_manager.get_model("whisper", language=language)
             result = await model.transcribe(
@@ -232,6 +242,74 @@ class TranscriptionService:
         except Exception as e:
             raise ProviderError(f"Whisper failed: {e}")
 
+    async def _run_whisper_chunked(
+        self,
+        audio_path: Path,
+        language: Optional[str],
+        enable_timestamps: bool
+    ) -> Dict[str, Any]:
+        """
+        Длинная запись: части по паузам распознаются параллельно настроенной
+        моделью Whisper. Готовые части сохраняются, повторная попытка
+        продолжает с оставшихся.
+        """
+        try:
+            result = await self._get_chunked_transcriber().transcribe(
+                audio_path, language=language, word_timestamps=enable_timestamps
+            )
+        except Exception as e:
+            raise ProviderError(f"Chunked Whisper failed: {e}")
+
+        self.metrics.record("transcription.real_time_factor", result["real_time_factor"])
+        self.metrics.record("transcription.chunks", result["chunks"])
+        return {
+            "text": result["text"].strip(),
+            "language": result.get("language", "unknown"),
+            "confidence": self._estimate_confidence_from_segments(result["segments"]),
+            "word_timestamps": result["segments"] if enable_timestamps else None,
+            "metadata": {
+                "audio_duration_sec": result["duration_sec"],
+                "real_time_factor": result["real_time_factor"],
+                "chunks": result["chunks"],
+                "resumed_chunks": result["resumed_chunks"]
+            }
+        }
+
+    def _get_chunked_transcriber(self):
+        """
+        Транскрибатор частей. Части распознает та же модель, что и короткие
+        записи (model_manager, провайдер из конфигурации); локальный
+        openai-whisper в пуле процессов — только если задан chunking.local_model.
+        """
+        if self._chunked_transcriber is None:
+            from .chunked_transcription import ChunkPlanner, ChunkedTranscriber
+            settings = self._chunking
+            local_model = settings.get("local_model")
+            self._chunked_transcriber = ChunkedTranscriber(
+                transcribe_async=None if local_model else self._transcribe_chunk_with_model,
+                model_name=local_model or "whisper",
+                workers=settings.get("workers"),
+                checkpoint_dir=settings.get("checkpoint_dir", "data/cache/transcription"),
+                planner=ChunkPlanner(
+                    target_chunk_sec=settings.get("target_chunk_sec", 300.0),
+                    min_chunk_sec=settings.get("min_chunk_sec", 120.0),
+                    max_chunk_sec=settings.get("max_chunk_sec", 420.0),
+                    overlap_sec=settings.get("overlap_sec", 1.0),
+                    min_silence_sec=settings.get("min_silence_sec", 0.3)
+                )
+            )
+        return self._chunked_transcriber
+
+    async def _transcribe_chunk_with_model(self, chunk_path: str, options: Dict[str, Any]) -> Dict[str, Any]:
+        """Распознавание части моделью Whisper из model_manager"""
+        model = await self.model_manager.get_model("whisper", language=options.get("language"))
+        return await model.transcribe(
+            chunk_path,
+            language=options.get("language"),
+            word_timestamps=options.get("word_timestamps", False),
+            fp16=False
+        )
+
     async def _run_google_stt(self, audio_path: Path, language: Optional[str]) -> Dict[str, Any]:
         """Google Cloud Speech-to-Text (заглушка — можно расширить)."""
         raise NotImplementedError("Google STT integration not implemented yet")
@@ -251,7 +329,8 @@ class TranscriptionService:
 
     async def cleanup_temp_files(self):
         """Очистка временных файлов (вызывается из workflow_orchestrator)."""
-        # В этом сервисе временные файлы не создаются — обработка через Path
+        # Части длинных записей и их checkpoint'ы удаляются по завершении транскрибации,
+        # брошенные задания — ChunkedTranscriber по TTL
         pass
 
 
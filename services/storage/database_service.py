@@ -5,9 +5,10 @@ Implements connection pooling, retry logic, encryption-at-rest support, and self
 """
 
 import asyncio
+import json
 import logging
 import time
-from typing import Any, Dict, List, Optional, Union, AsyncGenerator
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Union, AsyncGenerator
 from contextlib import asynccontextmanager
 
 import asyncpg
@@ -18,6 +19,8 @@ from core.config.unified_config_manager import UnifiedConfigManager
 from core.security.advanced_crypto_system import AdvancedCryptoSystem
 from core.monitoring.intelligent_monitoring_system import IntelligentMonitoringSystem
 from core.dependency.service_locator import ServiceLocator
+from services.storage.query_stats import QueryStatsRegistry
+from services.storage.sqlite_pool import SQLiteConnectionPool
 
 
 class DatabaseServiceError(Exception):
@@ -35,6 +38,11 @@ class DatabaseOperationError(DatabaseServiceError):
     pass
 
 
+class StaleFencingTokenError(DatabaseOperationError):
+    """Raised when a write carries a fencing token older than the one already stored."""
+    pass
+
+
 class DatabaseService:
     """
     Unified asynchronous database service supporting multiple backends.
@@ -58,6 +66,11 @@ class DatabaseService:
         self._initialized: bool = False
         self._max_retries: int = self.config.get("database.retry_attempts", 3)
         self._retry_delay: float = self.config.get("database.retry_delay_sec", 1.0)
+        self._task_status_ready: bool = False
+        self._stream_fetch_size: int = self.config.get("database.stream_fetch_size", 500)
+        self._statement_cache_size: int = self.config.get("database.statement_cache_size", 256)
+        self._slow_query_ms: float = self.config.get("database.slow_query_ms", 200)
+        self._query_stats = QueryStatsRegistry(self.config.get("database.query_stats_max_statements", 500))
 
     async def initialize(self) -> None:
         """Initialize database connection pool or client."""
@@ -95,7 +108,9 @@ class DatabaseService:
             min_size=min_size,
             max_size=max_size,
             command_timeout=self.config.get("database.timeout_sec", 60),
-            ssl=self.config.get("database.postgresql.ssl", True)
+            ssl=self.config.get("database.postgresql.ssl", True),
+            # Per-connection LRU of prepared statements keyed by SQL text
+            statement_cache_size=self._statement_cache_size
         )
 
     async def _init_mongodb(self) -> None:
@@ -111,10 +126,17 @@ class DatabaseService:
 
     async def _init_sqlite(self) -> None:
         path = self.config.get("database.sqlite.path", "data/app.db")
-        # Ensure parent dirs exist
-        import os
-        os.makedirs(os.path.dirname(path), exist_ok=True)
-        # We'll open/close connections per operation in SQLite (no real pooling in async)
+        # Long-lived WAL connections: one queued writer, several readers
+        self._pool = SQLiteConnectionPool(
+            path,
+            readers=self.config.get("database.sqlite.readers", 4),
+            write_batch_size=self.config.get("database.sqlite.write_batch_size", 64),
+            mmap_size_mb=self.config.get("database.sqlite.mmap_size_mb", 256),
+            cache_size_mb=self.config.get("database.sqlite.cache_size_mb", 64),
+            busy_timeout_ms=self.config.get("database.sqlite.busy_timeout_ms", 5000),
+            statement_cache_size=self._statement_cache_size
+        )
+        await self._pool.open()
 
     async def close(self) -> None:
         """Gracefully close all database connections."""
@@ -122,7 +144,7 @@ class DatabaseService:
             return
 
         try:
-            if self._backend_type == "postgresql" and self._pool:
+            if self._backend_type in ("postgresql", "sqlite") and self._pool:
                 await self._pool.close()
             elif self._backend_type == "mongodb" and self._client:
                 self._client.close()
@@ -151,15 +173,15 @@ class DatabaseService:
 
     async def execute(self, query: str, *args, **kwargs) -> Any:
         """Execute a write query (INSERT/UPDATE/DELETE)."""
-        return await self._execute_with_retry(self._execute_impl, query, *args, **kwargs)
+        return await self._execute_with_retry(self._observed, query, self._execute_impl, query, *args, **kwargs)
 
     async def fetch_one(self, query: str, *args, **kwargs) -> Optional[Dict[str, Any]]:
         """Fetch a single record."""
-        return await self._execute_with_retry(self._fetch_one_impl, query, *args, **kwargs)
+        return await self._execute_with_retry(self._observed, query, self._fetch_one_impl, query, *args, **kwargs)
 
     async def fetch_all(self, query: str, *args, **kwargs) -> List[Dict[str, Any]]:
         """Fetch multiple records."""
-        return await self._execute_with_retry(self._fetch_all_impl, query, *args, **kwargs)
+        return await self._execute_with_retry(self._observed, query, self._fetch_all_impl, query, *args, **kwargs)
 
     async def insert_document(self, collection: str, document: Dict[str, Any]) -> str:
         """Insert a document (MongoDB only)."""
@@ -173,6 +195,296 @@ class DatabaseService:
             raise NotImplementedError("Document operations only supported for MongoDB.")
         return await self._execute_with_retry(self._find_documents_impl, collection, filter_query)
 
+    # === Bulk writes and streaming reads ===
+
+    async def execute_many(self, query: str, args_seq: Iterable[Sequence[Any]]) -> int:
+        """
+        Execute one write query for every argument tuple in a single round trip
+        and a single transaction. Returns the number of argument tuples.
+        """
+        args_list = [tuple(args) for args in args_seq]
+        if not args_list:
+            return 0
+        return await self._execute_with_retry(
+            self._observed, query, self._execute_many_impl, query, args_list, known_rows=len(args_list)
+        )
+
+    async def copy_records(
+        self,
+        table: str,
+        records: Iterable[Union[Sequence[Any], Dict[str, Any]]],
+        columns: Optional[Sequence[str]] = None
+    ) -> int:
+        """
+        Bulk-insert records into a table (collection for MongoDB).
+
+        Records are tuples ordered as `columns`, or dicts (then `columns` defaults
+        to the keys of all records in order of first appearance). Uses COPY on
+        PostgreSQL, executemany in one transaction on SQLite and insert_many on MongoDB
+        (documents get only the fields that are not None).
+        Returns the number of inserted records.
+
+        Bulk inserts are not retried: a batch that failed may already be partly
+        written (MongoDB inserts unordered), so the failure is raised to the caller.
+        """
+        records = list(records)
+        if not records:
+            return 0
+        if columns is None:
+            if not isinstance(records[0], dict):
+                raise ValueError("columns are required when records are not dicts")
+            columns = list(dict.fromkeys(key for record in records for key in record))
+        columns = list(columns)
+        rows = [
+            tuple(record.get(col) for col in columns) if isinstance(record, dict) else tuple(record)
+            for record in records
+        ]
+        result = await self._observed(
+            f"COPY {table} ({', '.join(columns)})",
+            self._copy_records_impl, table, columns, rows, known_rows=len(rows)
+        )
+        await self.monitor.log_metric("db.bulk_rows_written", len(rows))
+        return result
+
+    async def insert_many(self, table: str, records: List[Dict[str, Any]]) -> int:
+        """Bulk-insert a list of dict records (see copy_records)."""
+        return await self.copy_records(table, records)
+
+    async def stream(
+        self,
+        query: str,
+        *args,
+        fetch_size: Optional[int] = None
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        Iterate over query results in constant memory.
+
+        Rows are pulled from a server-side cursor (PostgreSQL) or the cursor of a
+        pooled reader connection (SQLite) in chunks of `fetch_size`. The connection
+        is held until the iteration finishes, so consume the stream promptly.
+        Streams are not retried: a failure mid-iteration is raised to the caller.
+        """
+        fetch_size = fetch_size or self._stream_fetch_size
+        # Only time spent fetching is recorded, not time spent by the consumer
+        fetch_time, total_rows, failed = 0.0, 0, False
+        try:
+            if self._backend_type == "postgresql":
+                async with self._pool.acquire() as conn:
+                    # asyncpg cursors require a transaction
+                    async with conn.transaction():
+                        started = time.perf_counter()
+                        cursor = await conn.cursor(query, *args)
+                        while True:
+                            rows = await cursor.fetch(fetch_size)
+                            fetch_time += time.perf_counter() - started
+                            if not rows:
+                                break
+                            total_rows += len(rows)
+                            for row in rows:
+                                yield dict(row)
+                            started = time.perf_counter()
+            elif self._backend_type == "sqlite":
+                async with self._pool.reader() as db:
+                    started = time.perf_counter()
+                    async with db.execute(query, args) as cursor:
+                        while True:
+                            rows = await cursor.fetchmany(fetch_size)
+                            fetch_time += time.perf_counter() - started
+                            if not rows:
+                                break
+                            total_rows += len(rows)
+                            for row in rows:
+                                yield dict(row)
+                            started = time.perf_counter()
+            else:
+                raise NotImplementedError(f"SQL streaming not supported for {self._backend_type}; use stream_documents")
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self._query_stats.record(query, fetch_time, rows=total_rows, error=failed)
+
+    async def stream_documents(
+        self,
+        collection: str,
+        filter_query: Dict[str, Any],
+        fetch_size: Optional[int] = None
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        """Iterate over matching documents in batches of `fetch_size` (MongoDB only)."""
+        if self._backend_type != "mongodb":
+            raise NotImplementedError("Document operations only supported for MongoDB.")
+        db_name = self.config.get("database.mongodb.database", "ai_freelance")
+        cursor = self._client[db_name][collection].find(filter_query, batch_size=fetch_size or self._stream_fetch_size)
+        async for doc in cursor:
+            doc["_id"] = str(doc["_id"])
+            yield doc
+
+    # === Task status with fencing ===
+
+    TASK_STATUS_TABLE = "job_task_status"
+
+    async def get_task_status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return the execution status record of a job, or None if unknown."""
+        if self._backend_type == "mongodb":
+            docs = await self.find_documents(self.TASK_STATUS_TABLE, {"_id": job_id})
+            return docs[0] if docs else None
+
+        await self._ensure_task_status_table()
+        placeholder = "$1" if self._backend_type == "postgresql" else "?"
+        row = await self.fetch_one(
+            f"SELECT job_id, status, fencing_token, details, updated_at "
+            f"FROM {self.TASK_STATUS_TABLE} WHERE job_id = {placeholder}",
+            job_id
+        )
+        if not row:
+            return None
+        details = json.loads(row.pop("details") or "{}")
+        return {**details, **row}
+
+    async def update_task_status(
+        self,
+        job_id: str,
+        status: str,
+        fencing_token: Optional[int] = None,
+        **fields: Any
+    ) -> None:
+        """
+        Upsert the execution status of a job.
+
+        When fencing_token is given, the write is applied only if it is not older
+        than the token already stored for the job; otherwise StaleFencingTokenError
+        is raised, so a worker whose lock lease expired cannot overwrite the result
+        of the worker that took the lock over. Extra fields are merged into details.
+        """
+        details = json.dumps(fields, default=str, ensure_ascii=False)
+        applied = await self._execute_with_retry(
+            self._update_task_status_impl, job_id, status, fencing_token, details
+        )
+        if not applied:
+            await self.monitor.log_metric("db.stale_fencing_token", 1)
+            raise StaleFencingTokenError(
+                f"Rejected status '{status}' for job {job_id}: fencing token {fencing_token} is stale"
+            )
+
+    async def _ensure_task_status_table(self) -> None:
+        if self._task_status_ready:
+            return
+        token_type = "BIGINT" if self._backend_type == "postgresql" else "INTEGER"
+        await self.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.TASK_STATUS_TABLE} ("
+            f"job_id TEXT PRIMARY KEY, "
+            f"status TEXT NOT NULL, "
+            f"fencing_token {token_type}, "
+            f"details TEXT NOT NULL DEFAULT '{{}}', "
+            f"updated_at TEXT NOT NULL)"
+        )
+        self._task_status_ready = True
+
+    async def _update_task_status_impl(
+        self, job_id: str, status: str, fencing_token: Optional[int], details: str
+    ) -> bool:
+        updated_at = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        table = self.TASK_STATUS_TABLE
+
+        if self._backend_type == "mongodb":
+            db_name = self.config.get("database.mongodb.database", "ai_freelance")
+            collection = self._client[db_name][table]
+            update = {"$set": {"status": status, "updated_at": updated_at, **json.loads(details)}}
+            if fencing_token is None:
+                await collection.update_one({"_id": job_id}, update, upsert=True)
+                return True
+            update["$set"]["fencing_token"] = fencing_token
+            result = await collection.update_one(
+                {"_id": job_id, "$or": [{"fencing_token": None}, {"fencing_token": {"$lte": fencing_token}}]},
+                update
+            )
+            if result.matched_count:
+                return True
+            existing = await collection.find_one({"_id": job_id}, {"_id": 1})
+            if existing:
+                return False
+            await collection.insert_one({"_id": job_id, **update["$set"]})
+            return True
+
+        await self._ensure_task_status_table()
+        if self._backend_type == "postgresql":
+            query = (
+                f"INSERT INTO {table} (job_id, status, fencing_token, details, updated_at) "
+                f"VALUES ($1, $2, $3, $4, $5) "
+                f"ON CONFLICT (job_id) DO UPDATE SET "
+                f"status = EXCLUDED.status, "
+                f"fencing_token = COALESCE(EXCLUDED.fencing_token, {table}.fencing_token), "
+                f"details = ({table}.details::jsonb || EXCLUDED.details::jsonb)::text, "
+                f"updated_at = EXCLUDED.updated_at "
+                f"WHERE EXCLUDED.fencing_token IS NULL OR {table}.fencing_token IS NULL "
+                f"OR {table}.fencing_token <= EXCLUDED.fencing_token "
+                f"RETURNING job_id"
+            )
+        else:
+            query = (
+                f"INSERT INTO {table} (job_id, status, fencing_token, details, updated_at) "
+                f"VALUES (?, ?, ?, ?, ?) "
+                f"ON CONFLICT (job_id) DO UPDATE SET "
+                f"status = excluded.status, "
+                f"fencing_token = COALESCE(excluded.fencing_token, {table}.fencing_token), "
+                f"details = json_patch({table}.details, excluded.details), "
+                f"updated_at = excluded.updated_at "
+                f"WHERE excluded.fencing_token IS NULL OR {table}.fencing_token IS NULL "
+                f"OR {table}.fencing_token <= excluded.fencing_token "
+                f"RETURNING job_id"
+            )
+        row = await self._observed(
+            query, self._execute_returning_impl, query, job_id, status, fencing_token, details, updated_at
+        )
+        return row is not None
+
+    # === Query telemetry ===
+
+    async def _observed(self, query: str, impl, *args, known_rows: Optional[int] = None, **kwargs) -> Any:
+        """Run a query implementation, recording latency, row count and errors per statement."""
+        started = time.perf_counter()
+        try:
+            result = await impl(*args, **kwargs)
+        except Exception:
+            self._query_stats.record(query, time.perf_counter() - started, error=True)
+            raise
+        elapsed = time.perf_counter() - started
+
+        rows = known_rows if known_rows is not None else self._row_count(result)
+        self._query_stats.record(query, elapsed, rows=rows)
+        if elapsed * 1000 >= self._slow_query_ms:
+            self.logger.warning(
+                f"🐢 Slow query ({elapsed * 1000:.1f} ms, {rows if rows is not None else '?'} rows): "
+                f"{QueryStatsRegistry.normalize(query)[:300]}"
+            )
+            await self.monitor.log_metric("db.slow_query", 1)
+            await self.monitor.log_metric("db.slow_query_ms", elapsed * 1000)
+        return result
+
+    @staticmethod
+    def _row_count(result: Any) -> Optional[int]:
+        if result is None:
+            return 0
+        if isinstance(result, list):
+            return len(result)
+        if isinstance(result, dict):
+            return 1
+        if isinstance(result, str):
+            # asyncpg command status, e.g. "UPDATE 3" or "INSERT 0 1"
+            tail = result.rsplit(" ", 1)[-1]
+            return int(tail) if tail.isdigit() else None
+        return None  # e.g. SQLite lastrowid
+
+    def top_queries(self, limit: int = 10, by: str = "total_ms") -> List[Dict[str, Any]]:
+        """
+        Heaviest statements by total time (or calls, mean_ms, p95_ms, max_ms, rows, errors),
+        with call counts, row counts and latency percentiles.
+        """
+        return self._query_stats.top(limit=limit, by=by)
+
+    def reset_query_stats(self) -> None:
+        self._query_stats.reset()
+
     # === Implementation methods per backend ===
 
     async def _execute_impl(self, query: str, *args) -> Any:
@@ -181,24 +493,85 @@ class DatabaseService:
                 result = await conn.execute(query, *args)
                 return result
         elif self._backend_type == "sqlite":
-            async with aiosqlite.connect(self.config.get("database.sqlite.path")) as db:
-                db.row_factory = aiosqlite.Row
-                cursor = await db.execute(query, args)
-                await db.commit()
+            async def write(conn):
+                cursor = await conn.execute(query, args)
                 return cursor.lastrowid
+            return await self._pool.write(write)
         else:
             raise NotImplementedError(f"Write operations not implemented for {self._backend_type}")
 
-    async def _fetch_one_impl(self, query: str, *args) -> Optional[Dict[str, Any]]:
+    async def _execute_returning_impl(self, query: str, *args) -> Optional[Dict[str, Any]]:
+        """Execute a write query with a RETURNING clause and commit it."""
         if self._backend_type == "postgresql":
             async with self._pool.acquire() as conn:
                 row = await conn.fetchrow(query, *args)
                 return dict(row) if row else None
         elif self._backend_type == "sqlite":
-            async with aiosqlite.connect(self.config.get("database.sqlite.path")) as db:
-                db.row_factory = aiosqlite.Row
-                cursor = await db.execute(query, args)
+            async def write(conn):
+                cursor = await conn.execute(query, args)
                 row = await cursor.fetchone()
+                await cursor.close()
+                return dict(row) if row else None
+            return await self._pool.write(write)
+        else:
+            raise NotImplementedError(f"Write operations not implemented for {self._backend_type}")
+
+    async def _execute_many_impl(self, query: str, args_list: List[tuple]) -> int:
+        if self._backend_type == "postgresql":
+            async with self._pool.acquire() as conn:
+                async with conn.transaction():
+                    await conn.executemany(query, args_list)
+            return len(args_list)
+        elif self._backend_type == "sqlite":
+            async def write(conn):
+                await conn.executemany(query, args_list)
+                return len(args_list)
+            return await self._pool.write(write)
+        else:
+            raise NotImplementedError(f"Write operations not implemented for {self._backend_type}")
+
+    async def _copy_records_impl(self, table: str, columns: List[str], rows: List[tuple]) -> int:
+        if self._backend_type == "postgresql":
+            async with self._pool.acquire() as conn:
+                await conn.copy_records_to_table(
+                    table, records=[self._to_sql_row(row) for row in rows], columns=columns
+                )
+            return len(rows)
+        elif self._backend_type == "sqlite":
+            query = (
+                f"INSERT INTO {table} ({', '.join(columns)}) "
+                f"VALUES ({', '.join('?' for _ in columns)})"
+            )
+            return await self._execute_many_impl(query, [self._to_sql_row(row) for row in rows])
+        elif self._backend_type == "mongodb":
+            db_name = self.config.get("database.mongodb.database", "ai_freelance")
+            # Missing keys of dict records are not stored as explicit nulls
+            documents = [
+                {col: value for col, value in zip(columns, row) if value is not None}
+                for row in rows
+            ]
+            result = await self._client[db_name][table].insert_many(documents, ordered=False)
+            return len(result.inserted_ids)
+        else:
+            raise NotImplementedError(f"Write operations not implemented for {self._backend_type}")
+
+    @staticmethod
+    def _to_sql_row(row: tuple) -> tuple:
+        """Serialize nested structures (e.g. job skills, budgets) to JSON text."""
+        return tuple(
+            json.dumps(value, default=str, ensure_ascii=False) if isinstance(value, (dict, list)) else value
+            for value in row
+        )
+
+    async def _fetch_one_impl(self, query: str, *args) -> Optional[Dict[str, Any]]:
+        if self._backend_type == "postgresql":
+            async with self._pool.acquire() as conn:
+                row = await conn.fetchrow(query, *args)
+                return dict(row) if row else None
+        elif self._backend_type == "sqlite":
+            async with self._pool.reader() as db:
+                async with db.execute(query, args) as cursor:
+                    row = await cursor.fetchone()
                 return dict(row) if row else None
         else:
             raise NotImplementedError(f"Fetch operations not implemented for {self._backend_type}")
@@ -209,10 +582,9 @@ class DatabaseService:
                 rows = await conn.fetch(query, *args)
                 return [dict(row) for row in rows]
         elif self._backend_type == "sqlite":
-            async with aiosqlite.connect(self.config.get("database.sqlite.path")) as db:
-                db.row_factory = aiosqlite.Row
-                cursor = await db.execute(query, args)
-                rows = await cursor.fetchall()
+            async with self._pool.reader() as db:
+                async with db.execute(query, args) as cursor:
+                    rows = await cursor.fetchall()
                 return [dict(row) for row in rows]
         else:
             raise NotImplementedError(f"Fetch operations not implemented for {self._backend_type}")
@@ -264,6 +636,7 @@ class DatabaseTransaction:
     def __init__(self, db_service: DatabaseService):
         self.db = db_service
         self._conn = None
+        self._writer_lease = None
         self._active = False
 
     async def begin(self):
@@ -272,10 +645,14 @@ class DatabaseTransaction:
             await self._conn.execute("BEGIN;")
             self._active = True
         elif self.db._backend_type == "sqlite":
-            # SQLite handles auto-commits; we simulate via manual commit control
-            self._conn = await aiosqlite.connect(self.db.config.get("database.sqlite.path"))
-            self._conn.row_factory = aiosqlite.Row
-            await self._conn.execute("BEGIN IMMEDIATE;")
+            # Borrow the pool's writer connection; queued writes wait until we finish
+            self._writer_lease = self.db._pool.writer()
+            self._conn = await self._writer_lease.__aenter__()
+            try:
+                await self._conn.execute("BEGIN IMMEDIATE;")
+            except Exception:
+                await self._finalize()
+                raise
             self._active = True
 
     async def commit(self):
@@ -297,10 +674,19 @@ class DatabaseTransaction:
             cursor = await self._conn.execute(query, args)
             return cursor.lastrowid
 
+    async def execute_many(self, query: str, args_seq: Iterable[Sequence[Any]]):
+        if not self._active:
+            raise RuntimeError("Transaction not active")
+        args_list = [tuple(args) for args in args_seq]
+        # asyncpg and aiosqlite connections share the executemany(query, args) signature
+        await self._conn.executemany(query, args_list)
+        return len(args_list)
+
     async def _finalize(self):
         if self.db._backend_type == "postgresql":
             await self.db._pool.release(self._conn)
         else:
-            await self._conn.close()
+            lease, self._writer_lease = self._writer_lease, None
+            await lease.__aexit__(None, None, None)
         self._active = False
         self._conn = None
\ No newline at end of file
@@ -0,0 +1,127 @@
+# AI_FREELANCE_AUTOMATION/services/storage/query_stats.py
+"""
+Per-statement query telemetry for DatabaseService.
+
+Statements are keyed by their SQL text with whitespace collapsed, so the same
+parametrized query issued from different call sites is aggregated together.
+Each statement keeps call/error/row counters and a fixed-bucket latency
+histogram; the number of tracked statements is bounded (least recently used
+statements are dropped first).
+"""
+
+import bisect
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+# Upper bounds of latency buckets in milliseconds; the last bucket is unbounded
+LATENCY_BUCKETS_MS = (
+    0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000
+)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram with percentile estimates."""
+
+    __slots__ = ("counts", "count", "total_ms", "max_ms")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, latency_ms: float) -> None:
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS_MS, latency_ms)] += 1
+        self.count += 1
+        self.total_ms += latency_ms
+        if latency_ms > self.max_ms:
+            self.max_ms = latency_ms
+
+    def percentile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th percentile (q in 0..100)."""
+        if not self.count:
+            return 0.0
+        rank = q / 100 * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank and bucket_count:
+                if index < len(LATENCY_BUCKETS_MS):
+                    return min(float(LATENCY_BUCKETS_MS[index]), self.max_ms)
+                return self.max_ms
+        return self.max_ms
+
+
+class QueryStats:
+    """Aggregated telemetry of one statement."""
+
+    __slots__ = ("query", "calls", "errors", "rows", "latency")
+
+    def __init__(self, query: str):
+        self.query = query
+        self.calls = 0
+        self.errors = 0
+        self.rows = 0
+        self.latency = LatencyHistogram()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "query": self.query,
+            "calls": self.calls,
+            "errors": self.errors,
+            "rows": self.rows,
+            "total_ms": round(self.latency.total_ms, 3),
+            "mean_ms": round(self.latency.total_ms / self.calls, 3) if self.calls else 0.0,
+            "p50_ms": round(self.latency.percentile(50), 3),
+            "p95_ms": round(self.latency.percentile(95), 3),
+            "p99_ms": round(self.latency.percentile(99), 3),
+            "max_ms": round(self.latency.max_ms, 3),
+        }
+
+
+class QueryStatsRegistry:
+    """Bounded registry of per-statement telemetry."""
+
+    SORT_KEYS = ("total_ms", "calls", "mean_ms", "p95_ms", "max_ms", "rows", "errors")
+
+    def __init__(self, max_statements: int = 500):
+        self.max_statements = max_statements
+        self._stats: "OrderedDict[str, QueryStats]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        return " ".join(query.split())
+
+    def record(self, query: str, elapsed_sec: float, rows: Optional[int] = None, error: bool = False) -> None:
+        key = self.normalize(query)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = QueryStats(key)
+                if len(self._stats) > self.max_statements:
+                    self._stats.popitem(last=False)
+            else:
+                self._stats.move_to_end(key)
+            stats.calls += 1
+            stats.latency.observe(elapsed_sec * 1000)
+            if error:
+                stats.errors += 1
+            if rows:
+                stats.rows += rows
+
+    def top(self, limit: int = 10, by: str = "total_ms") -> List[Dict[str, Any]]:
+        if by not in self.SORT_KEYS:
+            raise ValueError(f"Unknown sort key '{by}', expected one of {self.SORT_KEYS}")
+        with self._lock:
+            snapshot = [stats.to_dict() for stats in self._stats.values()]
+        snapshot.sort(key=lambda item: item[by], reverse=True)
+        return snapshot[:limit]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+    def __len__(self) -> int:
+        return len(self._stats)
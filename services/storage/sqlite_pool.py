@@ -0,0 +1,277 @@
+# AI_FREELANCE_AUTOMATION/services/storage/sqlite_pool.py
+"""
+SQLite connection pool for DatabaseService.
+
+SQLite allows many concurrent readers but only one writer, so the pool keeps:
+- a fixed set of long-lived read-only connections, borrowed from an idle queue
+- one dedicated writer connection fed by a serialized write queue
+
+All connections are opened in WAL mode with synchronous=NORMAL, memory-mapped
+I/O, an enlarged page cache and a bounded compiled-statement cache, which is
+effective now that connections outlive a single query. The writer drains the queue in batches and
+commits each batch as one transaction; every queued write runs inside its own
+SAVEPOINT, so a failing statement is rolled back alone and does not affect the
+other writes of its batch. Callers are resumed only after the batch commit.
+
+Transactions (DatabaseTransaction) take the writer connection exclusively
+through the same queue, so they are ordered with regular writes.
+"""
+
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, List, Optional
+
+import aiosqlite
+
+WriteOperation = Callable[[aiosqlite.Connection], Awaitable[Any]]
+
+
+class _QueuedWrite:
+    __slots__ = ("operation", "future")
+
+    def __init__(self, operation: WriteOperation, future: asyncio.Future):
+        self.operation = operation
+        self.future = future
+
+
+class _ExclusiveWriter:
+    """Queue item granting the writer connection to one caller until released."""
+    __slots__ = ("granted", "released")
+
+    def __init__(self, granted: asyncio.Future):
+        self.granted = granted
+        self.released = asyncio.Event()
+
+
+class SQLiteConnectionPool:
+    """Long-lived SQLite connections: one queued writer, many readers."""
+
+    def __init__(
+        self,
+        path: str,
+        readers: int = 4,
+        write_batch_size: int = 64,
+        mmap_size_mb: int = 256,
+        cache_size_mb: int = 64,
+        busy_timeout_ms: int = 5000,
+        statement_cache_size: int = 256
+    ):
+        self.path = path
+        self.readers = max(1, readers)
+        self.write_batch_size = max(1, write_batch_size)
+        self.mmap_size_mb = mmap_size_mb
+        self.cache_size_mb = cache_size_mb
+        self.busy_timeout_ms = busy_timeout_ms
+        self.statement_cache_size = statement_cache_size
+        self.logger = logging.getLogger("SQLiteConnectionPool")
+
+        self._writer: Optional[aiosqlite.Connection] = None
+        self._reader_pool: Optional[asyncio.Queue] = None
+        self._reader_connections: List[aiosqlite.Connection] = []
+        self._write_queue: Optional[asyncio.Queue] = None
+        self._writer_task: Optional[asyncio.Task] = None
+        self._closed = True
+        self.stats: Dict[str, int] = {"writes": 0, "write_batches": 0, "reads": 0, "write_errors": 0}
+
+    async def _connect(self, read_only: bool) -> aiosqlite.Connection:
+        # isolation_level=None: transactions are controlled explicitly by BEGIN/COMMIT;
+        # cached_statements: per-connection LRU of compiled statements keyed by SQL text
+        conn = await aiosqlite.connect(
+            self.path, isolation_level=None, cached_statements=self.statement_cache_size
+        )
+        conn.row_factory = aiosqlite.Row
+        await conn.execute("PRAGMA journal_mode=WAL")
+        await conn.execute("PRAGMA synchronous=NORMAL")
+        await conn.execute(f"PRAGMA mmap_size={self.mmap_size_mb * 1024 * 1024}")
+        await conn.execute(f"PRAGMA cache_size={-self.cache_size_mb * 1024}")
+        await conn.execute("PRAGMA temp_store=MEMORY")
+        await conn.execute(f"PRAGMA busy_timeout={self.busy_timeout_ms}")
+        if read_only:
+            await conn.execute("PRAGMA query_only=ON")
+        return conn
+
+    async def open(self) -> None:
+        if not self._closed:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # The writer goes first so that WAL mode is set before readers attach
+        self._writer = await self._connect(read_only=False)
+        self._reader_pool = asyncio.Queue()
+        for _ in range(self.readers):
+            conn = await self._connect(read_only=True)
+            self._reader_connections.append(conn)
+            self._reader_pool.put_nowait(conn)
+
+        self._write_queue = asyncio.Queue()
+        self._writer_task = asyncio.create_task(self._writer_loop(), name="SQLiteWriter")
+        self._closed = False
+        self.logger.info(f"SQLite pool opened: {self.path} (1 writer, {self.readers} readers)")
+
+    async def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        if self._writer_task:
+            # Let queued writes finish before shutting the writer down
+            await self._write_queue.join()
+            self._writer_task.cancel()
+            try:
+                await self._writer_task
+            except asyncio.CancelledError:
+                pass
+            self._writer_task = None
+        for conn in self._reader_connections:
+            await conn.close()
+        self._reader_connections.clear()
+        if self._writer:
+            await self._writer.close()
+            self._writer = None
+
+    # === Reads ===
+
+    @asynccontextmanager
+    async def reader(self) -> AsyncGenerator[aiosqlite.Connection, None]:
+        """Borrow a read-only connection."""
+        self._ensure_open()
+        conn = await self._reader_pool.get()
+        try:
+            self.stats["reads"] += 1
+            yield conn
+        finally:
+            self._reader_pool.put_nowait(conn)
+
+    # === Writes ===
+
+    async def write(self, operation: WriteOperation) -> Any:
+        """
+        Run operation(conn) on the writer connection and return its result
+        once the batch containing it has been committed.
+        """
+        self._ensure_open()
+        future = asyncio.get_running_loop().create_future()
+        self._write_queue.put_nowait(_QueuedWrite(operation, future))
+        return await future
+
+    @asynccontextmanager
+    async def writer(self) -> AsyncGenerator[aiosqlite.Connection, None]:
+        """
+        Take the writer connection exclusively (e.g. for an explicit transaction).
+        The caller is responsible for BEGIN/COMMIT on the connection.
+        """
+        self._ensure_open()
+        item = _ExclusiveWriter(asyncio.get_running_loop().create_future())
+        self._write_queue.put_nowait(item)
+        try:
+            conn = await item.granted
+        except asyncio.CancelledError:
+            item.released.set()
+            raise
+        try:
+            yield conn
+        finally:
+            item.released.set()
+
+    def _ensure_open(self) -> None:
+        if self._closed:
+            raise RuntimeError("SQLite connection pool is not open")
+
+    async def _writer_loop(self) -> None:
+        while True:
+            item = await self._write_queue.get()
+            batch = [item]
+            while (
+                len(batch) < self.write_batch_size
+                and isinstance(batch[-1], _QueuedWrite)
+                and not self._write_queue.empty()
+            ):
+                batch.append(self._write_queue.get_nowait())
+
+            exclusive = batch.pop() if isinstance(batch[-1], _ExclusiveWriter) else None
+            try:
+                if batch:
+                    await self._run_batch(batch)
+                if exclusive is not None:
+                    await self._grant_exclusive(exclusive)
+            except Exception as e:
+                # The writer task must survive any failure, otherwise the queue stalls forever
+                self.logger.error(f"SQLite writer failed: {e}", exc_info=True)
+                for queued in batch:
+                    if not queued.future.done():
+                        queued.future.set_exception(e)
+                if exclusive is not None and not exclusive.granted.done():
+                    exclusive.granted.set_exception(e)
+            finally:
+                for _ in range(len(batch) + (exclusive is not None)):
+                    self._write_queue.task_done()
+
+    async def _run_batch(self, batch: List[_QueuedWrite]) -> None:
+        conn = self._writer
+        outcomes: List[Any] = []  # (succeeded, result or exception) per queued write
+        use_savepoints = len(batch) > 1
+        try:
+            await conn.execute("BEGIN IMMEDIATE")
+            for item in batch:
+                if item.future.cancelled():
+                    outcomes.append((True, None))
+                    continue
+                if use_savepoints:
+                    await conn.execute("SAVEPOINT queued_write")
+                try:
+                    outcomes.append((True, await item.operation(conn)))
+                except Exception as e:
+                    self.stats["write_errors"] += 1
+                    if use_savepoints:
+                        await conn.execute("ROLLBACK TO queued_write")
+                    outcomes.append((False, e))
+                finally:
+                    if use_savepoints:
+                        await conn.execute("RELEASE queued_write")
+            if use_savepoints or outcomes[0][0]:
+                await conn.execute("COMMIT")
+            else:
+                await conn.execute("ROLLBACK")
+        except Exception as e:
+            self.logger.error(f"SQLite write batch of {len(batch)} failed: {e}", exc_info=True)
+            await self._rollback()
+            for item in batch:
+                if not item.future.done():
+                    item.future.set_exception(e)
+            return
+
+        self.stats["writes"] += len(batch)
+        self.stats["write_batches"] += 1
+        for item, (succeeded, result) in zip(batch, outcomes):
+            if item.future.done():
+                continue
+            if succeeded:
+                item.future.set_result(result)
+            else:
+                item.future.set_exception(result)
+
+    async def _grant_exclusive(self, item: _ExclusiveWriter) -> None:
+        if item.granted.cancelled():
+            return
+        item.granted.set_result(self._writer)
+        await item.released.wait()
+        # The holder may have left without finishing its transaction
+        await self._rollback()
+
+    async def _rollback(self) -> None:
+        """Roll back an open writer transaction; a failing ROLLBACK is logged, not raised."""
+        try:
+            if self._writer.in_transaction:
+                await self._writer.execute("ROLLBACK")
+        except Exception as e:
+            self.logger.error(f"SQLite writer ROLLBACK failed: {e}", exc_info=True)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "pending_writes": self._write_queue.qsize() if self._write_queue else 0,
+            "idle_readers": self._reader_pool.qsize() if self._reader_pool else 0,
+        }
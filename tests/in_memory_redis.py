@@ -0,0 +1,194 @@
+# AI_FREELANCE_AUTOMATION/tests/in_memory_redis.py
+"""
+Заменитель Redis в памяти процесса для локальных нагрузочных тестов.
+
+Поддерживает подмножество API redis.asyncio.Redis, используемое системой
+(строковые ключи с TTL, INCR, PEXPIRE, eval/register_script). Lua-скрипты
+не интерпретируются: их Python-эмуляции регистрируются через
+InMemoryRedis.register_script_emulation() (скрипты распределенных
+блокировок регистрируются в конце модуля).
+Каждая операция выполняется атомарно в рамках одного event loop.
+"""
+import asyncio
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from core.automation.distributed_lock import ACQUIRE_SCRIPT, EXTEND_SCRIPT, RELEASE_SCRIPT
+
+# handler(redis, keys, args) -> результат скрипта
+ScriptEmulation = Callable[["InMemoryRedis", List[str], List[Any]], Any]
+
+
+class InMemoryRedis:
+    """Однопроцессный заменитель redis.asyncio.Redis"""
+
+    _script_emulations: Dict[str, ScriptEmulation] = {}
+
+    def __init__(self, latency: float = 0.0):
+        """
+        Args:
+            latency: Искусственная задержка каждой команды (сек) для
+                     имитации сетевого round-trip при нагрузочных тестах
+        """
+        self.latency = latency
+        self._data: Dict[str, Any] = {}
+        self._expires_at: Dict[str, float] = {}
+        self.commands_processed = 0
+
+    @classmethod
+    def register_script_emulation(cls, script: str, handler: ScriptEmulation) -> None:
+        cls._script_emulations[script.strip()] = handler
+
+    # --------------------------------------------------------------- helpers
+
+    async def _roundtrip(self):
+        self.commands_processed += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        else:
+            await asyncio.sleep(0)
+
+    def _purge_if_expired(self, name: str) -> None:
+        expires_at = self._expires_at.get(name)
+        if expires_at is not None and expires_at <= time.monotonic():
+            self._data.pop(name, None)
+            self._expires_at.pop(name, None)
+
+    def get_sync(self, name: str) -> Any:
+        self._purge_if_expired(name)
+        return self._data.get(name)
+
+    def set_sync(self, name: str, value: Any, px: Optional[int] = None,
+                 nx: bool = False, xx: bool = False, keepttl: bool = False) -> bool:
+        self._purge_if_expired(name)
+        exists = name in self._data
+        if (nx and exists) or (xx and not exists):
+            return False
+        self._data[name] = value if isinstance(value, (bytes, int, list, dict)) else str(value)
+        if px is not None:
+            self._expires_at[name] = time.monotonic() + px / 1000
+        elif not keepttl:
+            self._expires_at.pop(name, None)
+        return True
+
+    def delete_sync(self, *names: str) -> int:
+        deleted = 0
+        for name in names:
+            self._purge_if_expired(name)
+            if self._data.pop(name, None) is not None:
+                deleted += 1
+            self._expires_at.pop(name, None)
+        return deleted
+
+    def pexpire_sync(self, name: str, milliseconds: int) -> bool:
+        self._purge_if_expired(name)
+        if name not in self._data:
+            return False
+        self._expires_at[name] = time.monotonic() + int(milliseconds) / 1000
+        return True
+
+    def incr_sync(self, name: str, amount: int = 1) -> int:
+        self._purge_if_expired(name)
+        value = int(self._data.get(name, 0)) + amount
+        self._data[name] = value
+        return value
+
+    # ------------------------------------------------------------ redis API
+
+    async def ping(self) -> bool:
+        await self._roundtrip()
+        return True
+
+    async def get(self, name: str) -> Any:
+        await self._roundtrip()
+        return self.get_sync(name)
+
+    async def set(self, name: str, value: Any, ex: Optional[int] = None, px: Optional[int] = None,
+                  nx: bool = False, xx: bool = False, keepttl: bool = False) -> Optional[bool]:
+        await self._roundtrip()
+        if ex is not None:
+            px = int(ex * 1000)
+        return True if self.set_sync(name, value, px=px, nx=nx, xx=xx, keepttl=keepttl) else None
+
+    async def setex(self, name: str, time_seconds: int, value: Any) -> bool:
+        await self._roundtrip()
+        return self.set_sync(name, value, px=int(time_seconds * 1000))
+
+    async def delete(self, *names: str) -> int:
+        await self._roundtrip()
+        return self.delete_sync(*names)
+
+    async def exists(self, *names: str) -> int:
+        await self._roundtrip()
+        return sum(1 for name in names if self.get_sync(name) is not None)
+
+    async def incr(self, name: str, amount: int = 1) -> int:
+        await self._roundtrip()
+        return self.incr_sync(name, amount)
+
+    async def pexpire(self, name: str, time_ms: int) -> bool:
+        await self._roundtrip()
+        return self.pexpire_sync(name, time_ms)
+
+    async def pttl(self, name: str) -> int:
+        await self._roundtrip()
+        self._purge_if_expired(name)
+        if name not in self._data:
+            return -2
+        expires_at = self._expires_at.get(name)
+        if expires_at is None:
+            return -1
+        return int((expires_at - time.monotonic()) * 1000)
+
+    async def eval(self, script: str, numkeys: int, *keys_and_args: Any) -> Any:
+        await self._roundtrip()
+        keys, args = list(keys_and_args[:numkeys]), list(keys_and_args[numkeys:])
+        return self._run_script(script, keys, args)
+
+    def register_script(self, script: str) -> Callable[..., Any]:
+        """Аналог Redis.register_script: возвращает awaitable-вызываемый объект"""
+        async def call(keys: Sequence[str] = (), args: Sequence[Any] = (), client: Any = None) -> Any:
+            await self._roundtrip()
+            return self._run_script(script, list(keys), list(args))
+        return call
+
+    def _run_script(self, script: str, keys: List[str], args: List[Any]) -> Any:
+        handler = self._script_emulations.get(script.strip())
+        if handler is None:
+            raise NotImplementedError("Lua-скрипт не зарегистрирован для InMemoryRedis")
+        return handler(self, keys, args)
+
+    async def close(self) -> None:
+        self._data.clear()
+        self._expires_at.clear()
+
+    def snapshot(self) -> Tuple[int, int]:
+        """(число ключей, число команд) — для отчетов нагрузочных тестов"""
+        for name in list(self._expires_at):
+            self._purge_if_expired(name)
+        return len(self._data), self.commands_processed
+
+
+# ------------------------------------------------ эмуляции скриптов блокировок
+
+def _emulate_acquire(redis: InMemoryRedis, keys: List[str], args: List[Any]) -> int:
+    if redis.set_sync(keys[0], args[0], px=int(args[1]), nx=True):
+        return redis.incr_sync(keys[1])
+    return 0
+
+
+def _emulate_release(redis: InMemoryRedis, keys: List[str], args: List[Any]) -> int:
+    if redis.get_sync(keys[0]) == str(args[0]):
+        return redis.delete_sync(keys[0])
+    return 0
+
+
+def _emulate_extend(redis: InMemoryRedis, keys: List[str], args: List[Any]) -> int:
+    if redis.get_sync(keys[0]) == str(args[0]):
+        return int(redis.pexpire_sync(keys[0], int(args[1])))
+    return 0
+
+
+InMemoryRedis.register_script_emulation(ACQUIRE_SCRIPT, _emulate_acquire)
+InMemoryRedis.register_script_emulation(RELEASE_SCRIPT, _emulate_release)
+InMemoryRedis.register_script_emulation(EXTEND_SCRIPT, _emulate_extend)
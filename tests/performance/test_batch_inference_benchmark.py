@@ -0,0 +1,110 @@
+# AI_FREELANCE_AUTOMATION/tests/performance/test_batch_inference_benchmark.py
+"""
+Benchmark of the micro-batching inference server (core/ai_management/batch_inference_server.py):
+throughput and latency at 1, 8 and 32 concurrent callers.
+
+- 'single': max_batch_size=1, every request is its own model call (the previous
+  behaviour of one input per call, moved off the event loop)
+- 'batched': dynamic micro-batches of up to 32 inputs with a 5 ms max wait
+
+The model is synthetic: a forward pass costs a fixed 4 ms plus 0.1 ms per input
+and releases the GIL, like a transformer pipeline on a small batch. This keeps
+the benchmark deterministic and free of model downloads while reproducing the
+cost structure that makes batching pay off.
+
+Run directly for a printed report:
+    python -m tests.performance.test_batch_inference_benchmark
+"""
+
+import asyncio
+import logging
+import time
+from typing import Dict, List
+
+import pytest
+
+from core.ai_management.batch_inference_server import BatchInferenceServer
+
+# Configure module-specific logger
+logger = logging.getLogger(__name__)
+
+MODEL_ID = "sentiment:synthetic"
+REQUESTS_PER_CALLER = 40
+
+
+def synthetic_model(texts: List[str]) -> List[Dict[str, float]]:
+    """Fixed per-call overhead plus a small per-input cost."""
+    time.sleep(0.004 + 0.0001 * len(texts))
+    return [{"label": "POSITIVE", "score": len(text) / 100} for text in texts]
+
+
+async def run_inference_benchmark(mode: str, callers: int, requests_per_caller: int = REQUESTS_PER_CALLER) -> Dict[str, float]:
+    """Each caller awaits its requests one after another, like a service handling messages."""
+    server = BatchInferenceServer(max_batch_size=1 if mode == "single" else 32, max_wait_ms=5.0)
+    server.register(MODEL_ID, synthetic_model)
+    latencies: List[float] = []
+
+    async def caller(index: int):
+        for i in range(requests_per_caller):
+            started = time.perf_counter()
+            result = await server.infer(MODEL_ID, f"message {index}-{i}")
+            latencies.append(time.perf_counter() - started)
+            assert result["label"] == "POSITIVE"
+
+    start = time.perf_counter()
+    await asyncio.gather(*(caller(index) for index in range(callers)))
+    elapsed = time.perf_counter() - start
+    stats = server.get_stats()[MODEL_ID]
+    await server.close()
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "requests_per_sec": len(latencies) / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95)] * 1000,
+        "avg_batch_size": stats["avg_batch_size"],
+    }
+
+
+@pytest.mark.asyncio
+async def test_results_are_routed_back_to_their_callers():
+    server = BatchInferenceServer(max_batch_size=8, max_wait_ms=5.0)
+    server.register(MODEL_ID, synthetic_model)
+    texts = ["x" * length for length in range(20)]
+
+    results = await server.infer_many(MODEL_ID, texts)
+    stats = server.get_stats()[MODEL_ID]
+    await server.close()
+
+    assert [result["score"] for result in results] == [length / 100 for length in range(20)]
+    assert stats["batches"] < len(texts)
+
+
+@pytest.mark.performance
+@pytest.mark.asyncio
+async def test_micro_batching_raises_throughput_under_concurrency():
+    """Batching must multiply throughput at 32 callers without hurting a lone caller much."""
+    results = {}
+    for callers in (1, 8, 32):
+        for mode in ("single", "batched"):
+            results[mode, callers] = await run_inference_benchmark(mode, callers)
+            logger.info("%s x%d: %s", mode, callers, results[mode, callers])
+
+    assert results["batched", 32]["requests_per_sec"] > 4 * results["single", 32]["requests_per_sec"]
+    assert results["batched", 8]["requests_per_sec"] > 2 * results["single", 8]["requests_per_sec"]
+    assert results["batched", 32]["avg_batch_size"] > 8
+    # A lone caller pays at most the max wait on top of the model call
+    assert results["batched", 1]["p50_ms"] < results["single", 1]["p50_ms"] + 10
+
+
+if __name__ == "__main__":
+    async def _main():
+        for callers in (1, 8, 32):
+            for mode in ("single", "batched"):
+                result = await run_inference_benchmark(mode, callers)
+                print(f"{mode:>7} x{callers:<2}: {result['requests_per_sec']:7.0f} req/s, "
+                      f"p50 {result['p50_ms']:6.1f} ms, p95 {result['p95_ms']:6.1f} ms, "
+                      f"avg batch {result['avg_batch_size']:.1f}")
+
+    asyncio.run(_main())
@@ -0,0 +1,103 @@
+# AI_FREELANCE_AUTOMATION/tests/performance/test_cache_persistence_benchmark.py
+"""
+Benchmark of IntelligentCacheSystem persistence backends.
+
+Compares the per-file JSON backend ('files') against the segmented
+append-only log ('log') on:
+- write throughput (entries/sec until everything is durable on disk)
+- cold start time (constructing a new cache over an existing directory)
+
+Run directly for a printed report:
+    python -m tests.performance.test_cache_persistence_benchmark
+"""
+
+import logging
+import tempfile
+import time
+from typing import Dict
+
+import pytest
+
+from core.performance.intelligent_cache_system import CacheEntry, IntelligentCacheSystem
+
+# Configure module-specific logger
+logger = logging.getLogger(__name__)
+
+VALUE_TEMPLATE = {
+    "job_id": None,
+    "score": 0.87,
+    "proposal": "Здравствуйте! Готов выполнить перевод в срок. " * 8,
+    "tags": ["translation", "en-ru", "technical"],
+}
+
+
+def _silent_cache(cache_dir: str, backend: str) -> IntelligentCacheSystem:
+    cache = IntelligentCacheSystem(
+        cache_dir=cache_dir,
+        max_size_mb=4096,
+        persistence_backend=backend,
+        persistence_options={"flush_interval": 0} if backend == "log" else None,
+    )
+    cache._log = lambda *args, **kwargs: None
+    return cache
+
+
+def run_persistence_benchmark(entries: int, backend: str) -> Dict[str, float]:
+    """Measure write throughput and cold start for one backend."""
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = _silent_cache(cache_dir, backend)
+
+        start = time.perf_counter()
+        with cache._lock:
+            for i in range(entries):
+                key = f"job_analysis_{i}"
+                value = dict(VALUE_TEMPLATE, job_id=i)
+                cache._add_entry(key, CacheEntry(key=key, value=value, ttl_seconds=3600))
+        cache.close()
+        write_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        restored = _silent_cache(cache_dir, backend)
+        startup_seconds = time.perf_counter() - start
+        assert len(restored.cache) == entries
+
+        start = time.perf_counter()
+        sample = [f"job_analysis_{i}" for i in range(0, entries, max(1, entries // 1000))]
+        for key in sample:
+            assert restored.get(key, lambda: None)["job_id"] is not None
+        first_read_seconds = time.perf_counter() - start
+        restored.close()
+
+    return {
+        "entries": entries,
+        "write_ops_per_sec": entries / write_seconds,
+        "startup_sec": startup_seconds,
+        "first_read_us": first_read_seconds / len(sample) * 1e6,
+    }
+
+
+@pytest.mark.performance
+@pytest.mark.parametrize("entries", [
+    10_000,
+    pytest.param(100_000, marks=pytest.mark.slow),
+])
+def test_log_backend_outperforms_per_file(entries: int):
+    """Append-only log must start faster and write faster than per-file JSON."""
+    files = run_persistence_benchmark(entries, "files")
+    log = run_persistence_benchmark(entries, "log")
+    logger.info("files: %s", files)
+    logger.info("log:   %s", log)
+
+    assert log["startup_sec"] < files["startup_sec"]
+    assert log["write_ops_per_sec"] > files["write_ops_per_sec"]
+
+
+if __name__ == "__main__":
+    # Allow direct execution for a side-by-side report
+    logging.basicConfig(level=logging.INFO)
+    print(f"{'entries':>8} {'backend':>7} {'writes/s':>10} {'startup s':>10} {'1st read us':>12}")
+    for n in (10_000, 100_000):
+        for backend_name in ("files", "log"):
+            r = run_persistence_benchmark(n, backend_name)
+            print(f"{n:>8} {backend_name:>7} {r['write_ops_per_sec']:>10.0f} "
+                  f"{r['startup_sec']:>10.3f} {r['first_read_us']:>12.1f}")
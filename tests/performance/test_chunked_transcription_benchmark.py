@@ -0,0 +1,234 @@
+# AI_FREELANCE_AUTOMATION/tests/performance/test_chunked_transcription_benchmark.py
+"""
+Benchmark of long-audio transcription (services/ai_services/chunked_transcription.py):
+real-time factor of one transcribe call on the whole file against the chunked
+pipeline, plus stitching accuracy and resume after a failed chunk.
+
+- 'whole-file': the previous behaviour, the recogniser gets the whole recording
+  in one blocking call
+- 'chunked': streaming decode, VAD split on pauses into ~30 s chunks with 1 s
+  overlap, chunks recognised in a process pool and stitched back together
+
+The fixture is a synthetic recording saved as 16 kHz WAV: "words" are tone
+bursts (each word is a frequency, 300-1000 Hz) grouped into sentences separated
+by pauses, over a low noise floor. The recogniser is synthetic too: it spends a
+fixed amount of CPU per second of audio (FFTs, like a model forward pass) and
+returns segments and word timestamps with the detected frequencies as words, so
+the stitched transcript can be checked word by word against the fixture.
+
+Run directly for a printed report:
+    python -m tests.performance.test_chunked_transcription_benchmark
+"""
+
+import asyncio
+import functools
+import logging
+import os
+import time
+import wave
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+import pytest
+
+from services.ai_services.chunked_transcription import (
+    SAMPLE_RATE, ChunkedTranscriber, ChunkPlanner,
+)
+
+# Configure module-specific logger
+logger = logging.getLogger(__name__)
+
+FREQUENCIES = list(range(300, 1001, 100))
+FFTS_PER_AUDIO_SECOND = 40
+FIXTURE_SECONDS = 600
+
+Word = Tuple[str, float, float]
+
+
+def write_fixture(path: Path, duration_sec: float = FIXTURE_SECONDS, seed: int = 0) -> List[Word]:
+    """Write the synthetic recording sentence by sentence; return the expected words."""
+    rng = np.random.default_rng(seed)
+    words: List[Word] = []
+    position = 0
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(SAMPLE_RATE)
+        while position < duration_sec * SAMPLE_RATE:
+            parts = []
+            for _ in range(rng.integers(3, 12)):
+                frequency = int(rng.choice(FREQUENCIES))
+                length = int(rng.uniform(0.25, 0.5) * SAMPLE_RATE)
+                gap = int(rng.uniform(0.08, 0.2) * SAMPLE_RATE)
+                t = np.arange(length) / SAMPLE_RATE
+                parts.append(8000 * np.sin(2 * np.pi * frequency * t))
+                parts.append(np.zeros(gap))
+                start = position + sum(len(part) for part in parts[:-2])
+                words.append((f"f{frequency}", start / SAMPLE_RATE, (start + length) / SAMPLE_RATE))
+            parts.append(np.zeros(int(rng.uniform(0.6, 1.5) * SAMPLE_RATE)))  # pause between sentences
+            sentence = np.concatenate(parts) + rng.normal(0, 30, sum(len(part) for part in parts))
+            wav.writeframes(sentence.astype("<i2").tobytes())
+            position += len(sentence)
+    return words
+
+
+def synthetic_transcribe(chunk_path: str, options: Dict[str, Any], fail_chunk: str = "") -> Dict[str, Any]:
+    """Recogniser stand-in: fixed CPU cost per audio second, tone bursts reported as words."""
+    if fail_chunk and chunk_path.endswith(fail_chunk):
+        raise RuntimeError(f"recogniser crashed on {chunk_path}")
+    with wave.open(chunk_path, "rb") as wav:
+        samples = np.frombuffer(wav.readframes(wav.getnframes()), dtype="<i2").astype(np.float32)
+
+    seconds = len(samples) // SAMPLE_RATE
+    for i in range(seconds * FFTS_PER_AUDIO_SECOND):
+        offset = (i // FFTS_PER_AUDIO_SECOND) * SAMPLE_RATE
+        np.fft.rfft(samples[offset:offset + SAMPLE_RATE])
+
+    frames = len(samples) // 160  # 10 ms
+    level = np.abs(samples[:frames * 160]).reshape(frames, 160).mean(axis=1)
+    voiced = np.concatenate(([0], (level > 1000).astype(np.int8), [0]))
+    edges = np.flatnonzero(np.diff(voiced))
+    words = []
+    for begin, end in zip(edges[::2] * 160, edges[1::2] * 160):
+        if end - begin < 0.05 * SAMPLE_RATE:
+            continue
+        spectrum = np.abs(np.fft.rfft(samples[begin:end], n=SAMPLE_RATE))
+        frequency = int(round(np.argmax(spectrum) / 100.0)) * 100
+        words.append({"word": f" f{frequency}", "start": begin / SAMPLE_RATE, "end": end / SAMPLE_RATE,
+                      "probability": 1.0})
+
+    segments: List[Dict[str, Any]] = []
+    for word in words:
+        if segments and word["start"] - segments[-1]["end"] < 0.5:
+            segments[-1]["words"].append(word)
+            segments[-1]["end"] = word["end"]
+            segments[-1]["text"] += word["word"]
+        else:
+            segments.append({"start": word["start"], "end": word["end"], "text": word["word"],
+                             "avg_logprob": -0.1, "words": [word]})
+    return {"text": "".join(segment["text"] for segment in segments), "language": "en", "segments": segments}
+
+
+def make_transcriber(directory: Path, workers: int, **kwargs) -> ChunkedTranscriber:
+    return ChunkedTranscriber(
+        transcribe_fn=kwargs.pop("transcribe_fn", synthetic_transcribe), workers=workers,
+        checkpoint_dir=str(directory / "checkpoints"),
+        planner=ChunkPlanner(target_chunk_sec=30, min_chunk_sec=15, max_chunk_sec=45, overlap_sec=1.0),
+        **kwargs,
+    )
+
+
+def assert_words_match(words: List[Dict[str, Any]], expected: List[Word]) -> None:
+    assert [word["word"].strip() for word in words] == [label for label, _, _ in expected]
+    assert max(abs(word["start"] - start) for word, (_, start, _) in zip(words, expected)) < 0.03
+
+
+def run_transcription_benchmark(directory: Path, workers: int = 4) -> Dict[str, Dict[str, float]]:
+    fixture = directory / "interview.wav"
+    expected = write_fixture(fixture)
+
+    started = time.perf_counter()
+    whole = synthetic_transcribe(str(fixture), {})
+    whole_time = time.perf_counter() - started
+    whole_words = [word for segment in whole["segments"] for word in segment["words"]]
+    assert_words_match(whole_words, expected)
+
+    transcriber = make_transcriber(directory, workers)
+    try:
+        # Warm-up: process start-up is paid once per service, not per recording
+        warmup = directory / "warmup.wav"
+        write_fixture(warmup, duration_sec=5, seed=1)
+        asyncio.run(transcriber.transcribe(warmup, word_timestamps=True))
+        result = asyncio.run(transcriber.transcribe(fixture, word_timestamps=True))
+    finally:
+        transcriber.shutdown()
+    assert_words_match(result["words"], expected)
+
+    return {
+        "whole-file": {"processing_sec": whole_time, "real_time_factor": whole_time / FIXTURE_SECONDS, "chunks": 1},
+        "chunked": {"processing_sec": result["processing_time_sec"],
+                    "real_time_factor": result["real_time_factor"], "chunks": result["chunks"]},
+    }
+
+
+def test_stitching_and_resume_after_failed_chunk(tmp_path):
+    fixture = tmp_path / "call.wav"
+    expected = write_fixture(fixture, duration_sec=120)
+
+    failing = make_transcriber(tmp_path, workers=2,
+                               transcribe_fn=functools.partial(synthetic_transcribe, fail_chunk="chunk_00002.wav"))
+    try:
+        with pytest.raises(RuntimeError, match="chunk_00002"):
+            asyncio.run(failing.transcribe(fixture, word_timestamps=True))
+    finally:
+        failing.shutdown()
+    job_dir = failing.job_dir(fixture, {"model": "medium", "language": None, "word_timestamps": True})
+    assert (job_dir / "manifest.json").exists() and (job_dir / "chunk_00002.wav").exists()
+
+    resumed = make_transcriber(tmp_path, workers=2)
+    try:
+        result = asyncio.run(resumed.transcribe(fixture, word_timestamps=True))
+    finally:
+        resumed.shutdown()
+    # Only the failed chunk is recognised again
+    assert result["resumed_chunks"] == result["chunks"] - 1
+    assert_words_match(result["words"], expected)
+    assert not job_dir.exists()
+    assert all(segment["start"] <= later["start"] for segment, later in zip(result["segments"], result["segments"][1:]))
+
+
+def test_async_recogniser_runs_on_the_event_loop(tmp_path):
+    fixture = tmp_path / "call.wav"
+    expected = write_fixture(fixture, duration_sec=120)
+    active, peak = 0, 0
+
+    async def recognise(chunk_path: str, options: Dict[str, Any]) -> Dict[str, Any]:
+        # Stands in for the service model or a cloud API call
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        try:
+            return await asyncio.to_thread(synthetic_transcribe, chunk_path, options)
+        finally:
+            active -= 1
+
+    transcriber = make_transcriber(tmp_path, workers=2, transcribe_async=recognise)
+    result = asyncio.run(transcriber.transcribe(fixture, word_timestamps=True))
+
+    assert_words_match(result["words"], expected)
+    assert transcriber._executor is None
+    assert result["chunks"] > 2 and peak == 2
+
+
+def test_text_only_chunk_results_are_stitched(tmp_path):
+    fixture = tmp_path / "call.wav"
+    write_fixture(fixture, duration_sec=60)
+
+    async def recognise(chunk_path: str, options: Dict[str, Any]) -> Dict[str, Any]:
+        return {"text": f" text of {Path(chunk_path).stem} ", "language": "en"}
+
+    result = asyncio.run(make_transcriber(tmp_path, workers=2, transcribe_async=recognise).transcribe(fixture))
+
+    assert result["text"] == " ".join(f"text of chunk_{i:05d}" for i in range(result["chunks"]))
+    assert result["language"] == "en"
+
+
+@pytest.mark.performance
+@pytest.mark.skipif((os.cpu_count() or 1) < 4, reason="needs at least 4 CPUs")
+def test_chunked_pipeline_lowers_real_time_factor(tmp_path):
+    results = run_transcription_benchmark(tmp_path)
+    for mode, result in results.items():
+        logger.info("%s: %s", mode, result)
+
+    assert results["chunked"]["chunks"] >= 10
+    assert results["chunked"]["real_time_factor"] < 0.5 * results["whole-file"]["real_time_factor"]
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode, result in run_transcription_benchmark(Path(tmp)).items():
+            print(f"{mode:>10}: {result['processing_sec']:6.2f} s for {FIXTURE_SECONDS} s of audio, "
+                  f"RTF {result['real_time_factor']:.4f}, {result['chunks']} chunk(s)")
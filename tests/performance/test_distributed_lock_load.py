@@ -0,0 +1,123 @@
+# AI_FREELANCE_AUTOMATION/tests/performance/test_distributed_lock_load.py
+"""
+Load test of the job lock subsystem (LockManager + DistributedLock).
+
+Several LockManager instances share one InMemoryRedis to simulate worker
+processes contending for the same jobs. Verifies:
+- mutual exclusion: no two holders of a job at the same time
+- fencing tokens grow strictly monotonically per job
+- the watchdog keeps leases alive for holders that outlive the lease
+- throughput (lock acquisitions/sec) under contention
+
+Run directly for a printed report:
+    python -m tests.performance.test_distributed_lock_load
+"""
+
+import asyncio
+import logging
+import random
+import time
+from typing import Dict
+
+import pytest
+
+from core.automation.distributed_lock import LockAcquisitionTimeout, LockManager
+from tests.in_memory_redis import InMemoryRedis
+
+# Configure module-specific logger
+logger = logging.getLogger(__name__)
+
+
+async def run_lock_load(workers: int = 400, processes: int = 4, jobs: int = 5,
+                        lease_timeout: float = 0.3, long_holds: int = 3,
+                        redis_latency: float = 0.0005) -> Dict[str, float]:
+    """Run contended critical sections and collect correctness/throughput metrics."""
+    redis = InMemoryRedis(latency=redis_latency)
+    managers = [
+        LockManager(redis, lease_timeout=lease_timeout, wait_timeout=30, retry_interval=0.005)
+        for _ in range(processes)
+    ]
+    holders: Dict[str, int] = {}
+    last_token: Dict[str, int] = {}
+    metrics = {"violations": 0, "token_regressions": 0, "lost_leases": 0}
+    long_holders = set(random.sample(range(workers), long_holds))
+
+    async def worker(index: int):
+        job_id = f"job-{index % jobs}"
+        async with managers[index % processes].lock(job_id) as lease:
+            holders[job_id] = holders.get(job_id, 0) + 1
+            if holders[job_id] > 1:
+                metrics["violations"] += 1
+            if lease.fencing_token <= last_token.get(job_id, 0):
+                metrics["token_regressions"] += 1
+            last_token[job_id] = lease.fencing_token
+
+            # Long holders outlive the lease: only the watchdog keeps it alive
+            await asyncio.sleep(lease_timeout * 1.7 if index in long_holders else random.uniform(0, 0.005))
+
+            if lease.is_lost:
+                metrics["lost_leases"] += 1
+            holders[job_id] -= 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(i) for i in range(workers)))
+    elapsed = time.perf_counter() - start
+
+    stats = [manager.get_stats() for manager in managers]
+    for manager in managers:
+        await manager.watchdog.stop()
+
+    return {
+        **metrics,
+        "acquired": sum(s["acquired"] for s in stats),
+        "redis_attempts": sum(s["redis_attempts"] for s in stats),
+        "watchdog_extensions": sum(s["watchdog_extensions"] for s in stats),
+        "acquisitions_per_sec": workers / elapsed,
+    }
+
+
+@pytest.mark.performance
+@pytest.mark.asyncio
+async def test_lock_mutual_exclusion_under_load():
+    """No overlapping holders, monotonic fencing tokens, no lost leases."""
+    result = await run_lock_load()
+    logger.info("lock load: %s", result)
+
+    assert result["violations"] == 0
+    assert result["token_regressions"] == 0
+    assert result["lost_leases"] == 0
+    assert result["acquired"] == 400
+    assert result["watchdog_extensions"] > 0
+
+
+@pytest.mark.performance
+@pytest.mark.asyncio
+async def test_lock_wait_is_bounded():
+    """Contended acquisition fails with LockAcquisitionTimeout instead of hanging."""
+    redis = InMemoryRedis()
+    owner, contender = LockManager(redis, lease_timeout=5), LockManager(redis, lease_timeout=5)
+
+    async with owner.lock("job-1"):
+        start = time.perf_counter()
+        with pytest.raises(LockAcquisitionTimeout):
+            async with contender.lock("job-1", wait_timeout=0.2):
+                pass
+        assert time.perf_counter() - start < 1.0
+
+        # Same-process contention is resolved locally without touching Redis
+        with pytest.raises(LockAcquisitionTimeout):
+            async with owner.lock("job-1", wait_timeout=0):
+                pass
+
+    async with contender.lock("job-1", wait_timeout=0.2) as lease:
+        assert lease.fencing_token == 2
+
+
+if __name__ == "__main__":
+    # Allow direct execution for a throughput report
+    logging.basicConfig(level=logging.INFO)
+    for latency in (0.0, 0.0005, 0.002):
+        r = asyncio.run(run_lock_load(redis_latency=latency))
+        print(f"latency={latency * 1000:.1f}ms acq/s={r['acquisitions_per_sec']:.0f} "
+              f"attempts={r['redis_attempts']} violations={r['violations']} "
+              f"extensions={r['watchdog_extensions']}")
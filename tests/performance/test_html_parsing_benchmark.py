@@ -0,0 +1,148 @@
+# AI_FREELANCE_AUTOMATION/tests/performance/test_html_parsing_benchmark.py
+"""
+Benchmark of listing page parsing: jobs/sec of the inline BeautifulSoup parser
+against the pooled lxml parser (platforms/html_parsing.py).
+
+- 'inline': the previous behaviour, BeautifulSoup(html, 'html.parser') run
+  directly inside the coroutine, blocking the event loop
+- 'pooled': HtmlParsingPool, pages parsed in worker processes with selectors
+  compiled once per ParseSpec
+
+Fixture pages (Kwork-like listings) are generated deterministically, saved to a
+temporary directory and read back, so both modes parse identical bytes. Besides
+throughput the benchmark reports the worst event loop stall while parsing.
+
+Run directly for a printed report:
+    python -m tests.performance.test_html_parsing_benchmark
+"""
+
+import asyncio
+import logging
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import pytest
+
+from platforms.html_parsing import FieldSpec, HtmlParsingPool, ParseSpec, parse_listing, parse_listing_soup
+
+# Configure module-specific logger
+logger = logging.getLogger(__name__)
+
+# Same rules as KWORK_CARD_SPEC in platforms/kwork/scraper.py
+KWORK_CARD_SPEC = ParseSpec("div.wants-card", (
+    FieldSpec("href", "div.wants-card__header-title a", attribute="href"),
+    FieldSpec("title", "div.wants-card__header-title a"),
+    FieldSpec("price", "div.wants-card__price span"),
+    FieldSpec("description", "div.wants-card__description"),
+    FieldSpec("deadline", "div.wants-card__right div.text-muted"),
+))
+
+WORDS = ("перевод", "статья", "сайт", "текст", "логотип", "аудио", "SEO", "рерайт", "дизайн", "бот")
+
+
+def _render_card(rng: random.Random, job_id: int) -> str:
+    title = " ".join(rng.choice(WORDS) for _ in range(6))
+    description = " ".join(rng.choice(WORDS) for _ in range(60))
+    return (
+        '<div class="wants-card"><div class="wants-card__header">'
+        f'<div class="wants-card__header-title"><a href="/projects/{job_id}">{title}</a></div></div>'
+        f'<div class="wants-card__price"><span>{rng.randint(5, 500) * 100} ₽</span></div>'
+        f'<div class="wants-card__description">{description}<script>track({job_id})</script></div>'
+        f'<div class="wants-card__right"><div class="text-muted">Осталось: {rng.randint(1, 72)} ч</div></div>'
+        '</div>'
+    )
+
+
+def save_fixture_pages(directory: Path, pages: int = 8, cards_per_page: int = 200) -> List[Path]:
+    """Write deterministic listing pages to disk and return their paths."""
+    rng = random.Random(42)
+    paths = []
+    for page in range(pages):
+        cards = "".join(_render_card(rng, page * cards_per_page + i) for i in range(cards_per_page))
+        path = directory / f"kwork_listing_{page}.html"
+        path.write_text(f"<html><head><title>Kwork</title></head><body><div class='wants'>{cards}</div></body></html>",
+                        encoding="utf-8")
+        paths.append(path)
+    return paths
+
+
+async def _measure_loop_stall(stop: asyncio.Event) -> float:
+    """Worst delay of a 5 ms heartbeat while the benchmark runs."""
+    worst = 0.0
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(0.005)
+        worst = max(worst, time.perf_counter() - started - 0.005)
+    return worst
+
+
+async def run_parsing_benchmark(mode: str, pages: List[str], pool: HtmlParsingPool = None) -> Dict[str, float]:
+    """Parse all pages concurrently in one mode and measure jobs/sec."""
+    async def inline(html: str):
+        return parse_listing_soup(html, KWORK_CARD_SPEC)
+
+    parse = inline if mode == "inline" else (lambda html: pool.parse(html, KWORK_CARD_SPEC))
+
+    stop = asyncio.Event()
+    heartbeat = asyncio.create_task(_measure_loop_stall(stop))
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    results = await asyncio.gather(*(parse(html) for html in pages))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    stall = await heartbeat
+
+    jobs = sum(len(cards) for cards in results)
+    return {"jobs": jobs, "jobs_per_sec": jobs / elapsed, "max_loop_stall_ms": stall * 1000}
+
+
+def _load_pages() -> List[str]:
+    with tempfile.TemporaryDirectory() as tmp:
+        return [path.read_text(encoding="utf-8") for path in save_fixture_pages(Path(tmp))]
+
+
+def test_pooled_parser_matches_inline_parser():
+    """lxml and streaming extraction must return exactly what BeautifulSoup did."""
+    html = _load_pages()[0]
+    expected = parse_listing_soup(html, KWORK_CARD_SPEC)
+
+    assert len(expected) == 200
+    assert parse_listing(html, KWORK_CARD_SPEC, streaming=False) == expected
+    assert parse_listing(html, KWORK_CARD_SPEC, streaming=True) == expected
+
+
+@pytest.mark.performance
+@pytest.mark.asyncio
+async def test_pooled_parser_outperforms_inline():
+    """The pooled parser must parse more jobs/sec and keep the event loop responsive."""
+    pages = _load_pages()
+    pool = HtmlParsingPool(max_workers=2)
+    try:
+        await pool.parse(pages[0], KWORK_CARD_SPEC)  # warm up worker processes
+        before = await run_parsing_benchmark("inline", pages)
+        after = await run_parsing_benchmark("pooled", pages, pool)
+    finally:
+        pool.shutdown()
+    logger.info("inline: %s", before)
+    logger.info("pooled: %s", after)
+
+    assert after["jobs"] == before["jobs"]
+    assert after["jobs_per_sec"] > before["jobs_per_sec"]
+    assert after["max_loop_stall_ms"] < before["max_loop_stall_ms"]
+
+
+if __name__ == "__main__":
+    async def _main():
+        pages = _load_pages()
+        pool = HtmlParsingPool()
+        await pool.parse(pages[0], KWORK_CARD_SPEC)
+        for mode in ("inline", "pooled"):
+            result = await run_parsing_benchmark(mode, pages, pool)
+            print(f"{mode:>7}: {result['jobs']} jobs, {result['jobs_per_sec']:.0f} jobs/s, "
+                  f"max event loop stall {result['max_loop_stall_ms']:.1f} ms")
+        pool.shutdown()
+
+    asyncio.run(_main())
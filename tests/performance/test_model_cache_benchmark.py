@@ -0,0 +1,158 @@
+# AI_FREELANCE_AUTOMATION/tests/performance/test_model_cache_benchmark.py
+"""
+Benchmark of the on-disk model cache (core/ai_management/mmap_model_cache.py):
+load time and peak RSS of the previous format against the memory-mapped one.
+
+- 'legacy': torch.save of the weights into a BytesIO, the whole blob encrypted
+  with AES-GCM; loading reads the file, decrypts it in memory and torch.loads
+  the plaintext (the format the model hub and lazy loader used to write)
+- 'mmap': safetensors layout mapped into memory, tensors share pages with the file
+- 'mmap-encrypted': the same file encrypted in 4 MiB chunks, decrypted
+  chunk by chunk into the tensors
+
+Every load runs in a fresh interpreter so ru_maxrss reflects that load only.
+The weights are synthetic (256 MiB of float32) to avoid model downloads.
+
+Run directly for a printed report:
+    python -m tests.performance.test_model_cache_benchmark
+"""
+
+import io
+import json
+import logging
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict
+
+import pytest
+
+torch = pytest.importorskip("torch")
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+from core.ai_management.mmap_model_cache import IntegrityError, MappedStateDict, save_state_dict
+
+# Configure module-specific logger
+logger = logging.getLogger(__name__)
+
+KEY = bytes(range(32))
+TENSORS = 32
+TENSOR_ELEMENTS = 2 * 1024 * 1024  # 8 MiB of float32 each
+
+LOAD_SCRIPT = """
+import io, json, resource, sys, time
+import torch
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from core.ai_management.mmap_model_cache import MappedStateDict
+
+mode, path, key = sys.argv[1], sys.argv[2], bytes.fromhex(sys.argv[3])
+baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+started = time.perf_counter()
+if mode == "legacy":
+    with open(path, "rb") as f:
+        blob = f.read()
+    plain = AESGCM(key).decrypt(blob[:12], blob[12:], None)
+    state = torch.load(io.BytesIO(plain), map_location="cpu")
+    del blob, plain
+else:
+    state = dict(MappedStateDict(path, key if mode == "mmap-encrypted" else None))
+opened = time.perf_counter() - started
+checksum = sum(float(tensor.sum()) for tensor in state.values())
+loaded = time.perf_counter() - started
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({"open_sec": opened, "load_sec": loaded, "peak_rss_mb": (peak - baseline) / 1024,
+                  "checksum": checksum}))
+"""
+
+
+def synthetic_weights(tensors: int = TENSORS, elements: int = TENSOR_ELEMENTS) -> Dict[str, "torch.Tensor"]:
+    generator = torch.Generator().manual_seed(0)
+    weights = {f"layer{i}.weight": torch.rand(elements, generator=generator) for i in range(tensors)}
+    weights["embed.bias"] = torch.arange(10, dtype=torch.float16)
+    weights["step"] = torch.tensor(7, dtype=torch.int64)
+    return weights
+
+
+def write_legacy(path: Path, weights: Dict[str, "torch.Tensor"]) -> None:
+    buffer = io.BytesIO()
+    torch.save(weights, buffer)
+    nonce = os.urandom(12)
+    path.write_bytes(nonce + AESGCM(KEY).encrypt(nonce, buffer.getvalue(), None))
+
+
+def measure_load(mode: str, path: Path) -> Dict[str, float]:
+    root = Path(__file__).resolve().parents[2]
+    output = subprocess.run(
+        [sys.executable, "-c", LOAD_SCRIPT, mode, str(path), KEY.hex()],
+        cwd=root, env={**os.environ, "PYTHONPATH": str(root)},
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run_cache_benchmark(directory: Path) -> Dict[str, Dict[str, float]]:
+    weights = synthetic_weights()
+    paths = {
+        "legacy": directory / "model.pt.enc",
+        "mmap": directory / "model.safetensors",
+        "mmap-encrypted": directory / "model.safetensors.enc",
+    }
+    write_legacy(paths["legacy"], weights)
+    save_state_dict(str(paths["mmap"]), weights)
+    save_state_dict(str(paths["mmap-encrypted"]), weights, encryption_key=KEY)
+    del weights
+    return {mode: measure_load(mode, path) for mode, path in paths.items()}
+
+
+@pytest.mark.parametrize("key", [None, KEY], ids=["plain", "encrypted"])
+def test_round_trip_and_tamper_detection(tmp_path, key):
+    weights = synthetic_weights(tensors=3, elements=1000)
+    weights["empty"] = torch.empty(0, 4)
+    weights["bf16"] = torch.ones(3, 5, dtype=torch.bfloat16)
+    path = tmp_path / "weights.safetensors"
+    save_state_dict(str(path), weights, metadata={"model_id": "synthetic"}, encryption_key=key, chunk_size=1024)
+
+    loaded = MappedStateDict(str(path), key)
+    assert loaded.metadata["model_id"] == "synthetic"
+    assert set(loaded) == set(weights)
+    for name, tensor in weights.items():
+        assert loaded[name].dtype == tensor.dtype and torch.equal(loaded[name], tensor)
+
+    # Flip one byte inside the data of the first stored tensor
+    header_len = int.from_bytes(path.read_bytes()[:8], "little")
+    with open(path, "r+b") as f:
+        f.seek(8 + header_len + 100)
+        byte = f.read(1)
+        f.seek(-1, os.SEEK_CUR)
+        f.write(bytes([byte[0] ^ 0xFF]))
+    tampered = MappedStateDict(str(path), key)
+    with pytest.raises(InvalidTag if key else IntegrityError):
+        for name in tampered:
+            tampered[name]
+
+
+@pytest.mark.performance
+def test_mmap_cache_cuts_peak_memory_and_load_time(tmp_path):
+    """The mapped format must avoid the multiple in-memory copies of the legacy blob."""
+    results = run_cache_benchmark(tmp_path)
+    for mode, result in results.items():
+        logger.info("%s: %s", mode, result)
+
+    assert len({round(result["checksum"], 1) for result in results.values()}) == 1
+    legacy = results["legacy"]
+    assert results["mmap"]["peak_rss_mb"] < 0.5 * legacy["peak_rss_mb"]
+    assert results["mmap-encrypted"]["peak_rss_mb"] < 0.6 * legacy["peak_rss_mb"]
+    # Opening the mapped file only reads the header and hashes tensors on access
+    assert results["mmap"]["load_sec"] < legacy["load_sec"]
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode, result in run_cache_benchmark(Path(tmp)).items():
+            print(f"{mode:>15}: open {result['open_sec'] * 1000:7.1f} ms, "
+                  f"load+touch {result['load_sec'] * 1000:7.1f} ms, "
+                  f"peak RSS +{result['peak_rss_mb']:6.1f} MiB")
@@ -0,0 +1,194 @@
+# AI_FREELANCE_AUTOMATION/tests/performance/test_onnx_backend_benchmark.py
+"""
+Benchmark of the ONNX Runtime CPU backend (core/ai_management/onnx_backend.py)
+against eager PyTorch: accuracy delta and latency.
+
+- 'eager': the transformers model in fp32 on CPU (what LazyModelLoader loaded before)
+- 'onnx-fp32': the same weights exported to ONNX, tuned ONNX Runtime session
+- 'onnx-int8': the export with dynamically quantized int8 weights
+
+Accuracy is measured on the model outputs themselves: label agreement and the
+largest probability change for the classifier, cosine similarity of the
+sentence embeddings for the encoder. The models are small randomly initialised
+BERTs written to a temp directory with a generated vocabulary, so no model
+downloads are needed; they are sized (4 layers, hidden 256, 128 tokens) so that
+matrix multiplications dominate, as in real sentiment and embedding models.
+
+Run directly for a printed report:
+    python -m tests.performance.test_onnx_backend_benchmark
+"""
+
+import logging
+import statistics
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import pytest
+
+torch = pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+pytest.importorskip("onnxruntime")
+pytest.importorskip("optimum.onnxruntime")
+import numpy as np
+
+from core.ai_management.onnx_backend import OnnxModelBackend
+
+# Configure module-specific logger
+logger = logging.getLogger(__name__)
+
+WORDS = [f"word{i}" for i in range(500)]
+ROUNDS = 20
+
+
+def make_texts(count: int = 32) -> List[str]:
+    rng = np.random.default_rng(0)
+    return [" ".join(rng.choice(WORDS, size=100)) for _ in range(count)]
+
+
+def write_tiny_bert(directory: Path, classifier: bool) -> str:
+    """Random BERT with a word-level vocabulary saved in the Hugging Face layout."""
+    directory.mkdir(parents=True, exist_ok=True)
+    vocab = directory / "vocab.txt"
+    vocab.write_text("\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + WORDS))
+    config = transformers.BertConfig(vocab_size=len(WORDS) + 5, hidden_size=256, num_hidden_layers=4,
+                                     num_attention_heads=4, intermediate_size=1024, max_position_embeddings=256,
+                                     num_labels=3)
+    torch.manual_seed(0)
+    model_class = transformers.BertForSequenceClassification if classifier else transformers.BertModel
+    model_class(config).eval().save_pretrained(str(directory))
+    transformers.BertTokenizer(str(vocab)).save_pretrained(str(directory))
+    return str(directory)
+
+
+def eager_classifier(model_path: str) -> Callable[[List[str]], np.ndarray]:
+    tokenizer = transformers.AutoTokenizer.from_pretrained(model_path)
+    model = transformers.AutoModelForSequenceClassification.from_pretrained(model_path).eval()
+
+    def predict(texts: List[str]) -> np.ndarray:
+        with torch.no_grad():
+            logits = model(**tokenizer(texts, padding=True, truncation=True, max_length=128,
+                                       return_tensors="pt")).logits
+        return torch.softmax(logits, dim=-1).numpy()
+    return predict
+
+
+def onnx_classifier(backend: OnnxModelBackend, model_path: str, quantize: bool) -> Callable[[List[str]], np.ndarray]:
+    classifier = backend.load(model_path, "classification", quantize=quantize)
+
+    def predict(texts: List[str]) -> np.ndarray:
+        inputs = classifier.tokenizer(texts, padding=True, truncation=True, max_length=128, return_tensors="np")
+        logits = np.asarray(classifier.model(**inputs).logits)
+        exp = np.exp(logits - logits.max(axis=-1, keepdims=True))
+        return exp / exp.sum(axis=-1, keepdims=True)
+    return predict
+
+
+def eager_encoder(model_path: str) -> Callable[[List[str]], np.ndarray]:
+    tokenizer = transformers.AutoTokenizer.from_pretrained(model_path)
+    model = transformers.AutoModel.from_pretrained(model_path).eval()
+
+    def encode(texts: List[str]) -> np.ndarray:
+        inputs = tokenizer(texts, padding=True, truncation=True, max_length=128, return_tensors="pt")
+        with torch.no_grad():
+            hidden = model(**inputs).last_hidden_state
+        mask = inputs["attention_mask"].unsqueeze(-1).float()
+        return ((hidden * mask).sum(1) / mask.sum(1)).numpy()
+    return encode
+
+
+def onnx_encoder(backend: OnnxModelBackend, model_path: str, quantize: bool) -> Callable[[List[str]], np.ndarray]:
+    encoder = backend.load(model_path, "embeddings", quantize=quantize)
+    encoder.max_seq_length = 128
+    return lambda texts: encoder.encode(texts, batch_size=len(texts))
+
+
+def latency_ms(run: Callable[[List[str]], np.ndarray], texts: List[str], rounds: int = ROUNDS) -> Dict[str, float]:
+    run(texts)  # warm-up: session initialisation and allocator growth
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        run(texts)
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {"p50_ms": statistics.median(samples), "p95_ms": samples[int(0.95 * (len(samples) - 1))]}
+
+
+def cosine(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return (a * b).sum(axis=1) / (np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1))
+
+
+def run_onnx_benchmark(directory: Path) -> Dict[str, Dict[str, Dict[str, float]]]:
+    backend = OnnxModelBackend(cache_dir=str(directory / "onnx"))
+    texts = make_texts()
+    classifier_path = write_tiny_bert(directory / "classifier", classifier=True)
+    encoder_path = write_tiny_bert(directory / "encoder", classifier=False)
+    report: Dict[str, Dict[str, Dict[str, float]]] = {"classification": {}, "embeddings": {}}
+
+    reference = eager_classifier(classifier_path)
+    expected = reference(texts)
+    report["classification"]["eager"] = latency_ms(reference, texts)
+    for mode, quantize in (("onnx-fp32", False), ("onnx-int8", True)):
+        predict = onnx_classifier(backend, classifier_path, quantize)
+        probs = predict(texts)
+        report["classification"][mode] = {
+            **latency_ms(predict, texts),
+            "label_agreement": float((probs.argmax(-1) == expected.argmax(-1)).mean()),
+            "max_prob_delta": float(np.abs(probs - expected).max()),
+        }
+
+    reference = eager_encoder(encoder_path)
+    expected = reference(texts)
+    report["embeddings"]["eager"] = latency_ms(reference, texts)
+    for mode, quantize in (("onnx-fp32", False), ("onnx-int8", True)):
+        encode = onnx_encoder(backend, encoder_path, quantize)
+        report["embeddings"][mode] = {
+            **latency_ms(encode, texts),
+            "min_cosine": float(cosine(encode(texts), expected).min()),
+        }
+    return report
+
+
+def test_int8_export_is_cached_and_smaller(tmp_path):
+    backend = OnnxModelBackend(cache_dir=str(tmp_path / "onnx"))
+    model_path = write_tiny_bert(tmp_path / "classifier", classifier=True)
+
+    target = backend.export(model_path, "classification")
+    assert backend.export(model_path, "classification") == target
+    assert (target / "onnx_manifest.json").exists()
+    # int8 weights take about a quarter of the fp32 graph
+    assert backend.size_bytes(model_path, "classification") < 0.4 * backend.size_bytes(
+        model_path, "classification", quantize=False)
+
+    result = backend.load(model_path, "classification")(["word1 word2 word3"])
+    assert result[0]["label"] in {"LABEL_0", "LABEL_1", "LABEL_2"}
+
+
+@pytest.mark.performance
+def test_onnx_int8_is_faster_than_eager_with_small_accuracy_delta(tmp_path):
+    report = run_onnx_benchmark(tmp_path)
+    for task, modes in report.items():
+        for mode, result in modes.items():
+            logger.info("%s %s: %s", task, mode, result)
+
+    classification, embeddings = report["classification"], report["embeddings"]
+    # The fp32 export is numerically the same model
+    assert classification["onnx-fp32"]["max_prob_delta"] < 1e-3
+    assert embeddings["onnx-fp32"]["min_cosine"] > 0.9999
+    # Dynamic int8 quantization changes the outputs only slightly
+    assert classification["onnx-int8"]["label_agreement"] >= 0.9
+    assert classification["onnx-int8"]["max_prob_delta"] < 0.1
+    assert embeddings["onnx-int8"]["min_cosine"] > 0.98
+    for modes in (classification, embeddings):
+        assert modes["onnx-int8"]["p50_ms"] < modes["eager"]["p50_ms"]
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for task, modes in run_onnx_benchmark(Path(tmp)).items():
+            for mode, result in modes.items():
+                accuracy = ", ".join(f"{key} {value:.4f}" for key, value in result.items() if not key.endswith("_ms"))
+                print(f"{task:>14} {mode:>9}: p50 {result['p50_ms']:7.1f} ms, p95 {result['p95_ms']:7.1f} ms"
+                      + (f", {accuracy}" if accuracy else ""))
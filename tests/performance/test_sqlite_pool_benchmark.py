@@ -0,0 +1,158 @@
+# AI_FREELANCE_AUTOMATION/tests/performance/test_sqlite_pool_benchmark.py
+"""
+Benchmark of the SQLite backend of DatabaseService: ops/sec before and after pooling.
+
+- 'per_connection': the previous behaviour, a fresh aiosqlite.connect per call
+  with a commit per write (default rollback journal)
+- 'pool': SQLiteConnectionPool (WAL, queued batched writer, reader pool)
+
+Workload: concurrent bid/status updates (upserts) interleaved with point reads.
+
+Run directly for a printed report:
+    python -m tests.performance.test_sqlite_pool_benchmark
+"""
+
+import asyncio
+import logging
+import os
+import tempfile
+import time
+from typing import Dict
+
+import aiosqlite
+import pytest
+
+from services.storage.sqlite_pool import SQLiteConnectionPool
+
+# Configure module-specific logger
+logger = logging.getLogger(__name__)
+
+SCHEMA = "CREATE TABLE IF NOT EXISTS bids (job_id TEXT PRIMARY KEY, status TEXT, amount REAL)"
+UPSERT = (
+    "INSERT INTO bids (job_id, status, amount) VALUES (?, ?, ?) "
+    "ON CONFLICT (job_id) DO UPDATE SET status = excluded.status, amount = excluded.amount"
+)
+SELECT = "SELECT job_id, status, amount FROM bids WHERE job_id = ?"
+
+
+async def _per_connection_ops(path: str, workers: int, ops_per_worker: int) -> None:
+    async def execute(query, args):
+        async with aiosqlite.connect(path) as db:
+            db.row_factory = aiosqlite.Row
+            cursor = await db.execute(query, args)
+            await db.commit()
+            return cursor.lastrowid
+
+    async def fetch_one(query, args):
+        async with aiosqlite.connect(path) as db:
+            db.row_factory = aiosqlite.Row
+            cursor = await db.execute(query, args)
+            return await cursor.fetchone()
+
+    await execute(SCHEMA, ())
+
+    async def worker(w: int):
+        for i in range(ops_per_worker):
+            job_id = f"job-{w}-{i % 50}"
+            if i % 2:
+                await fetch_one(SELECT, (job_id,))
+            else:
+                await execute(UPSERT, (job_id, "submitted", float(i)))
+
+    await asyncio.gather(*(worker(w) for w in range(workers)))
+
+
+async def _pool_ops(path: str, workers: int, ops_per_worker: int) -> Dict[str, int]:
+    pool = SQLiteConnectionPool(path, readers=4)
+    await pool.open()
+
+    async def execute(query, args):
+        async def write(conn):
+            cursor = await conn.execute(query, args)
+            return cursor.lastrowid
+        return await pool.write(write)
+
+    async def fetch_one(query, args):
+        async with pool.reader() as db:
+            async with db.execute(query, args) as cursor:
+                return await cursor.fetchone()
+
+    await execute(SCHEMA, ())
+
+    async def worker(w: int):
+        for i in range(ops_per_worker):
+            job_id = f"job-{w}-{i % 50}"
+            if i % 2:
+                await fetch_one(SELECT, (job_id,))
+            else:
+                await execute(UPSERT, (job_id, "submitted", float(i)))
+
+    await asyncio.gather(*(worker(w) for w in range(workers)))
+    stats = pool.get_stats()
+    await pool.close()
+    return stats
+
+
+async def run_sqlite_benchmark(mode: str, workers: int = 16, ops_per_worker: int = 100) -> Dict[str, float]:
+    """Measure ops/sec of the mixed read/write workload for one mode."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        start = time.perf_counter()
+        stats = {}
+        if mode == "per_connection":
+            await _per_connection_ops(path, workers, ops_per_worker)
+        else:
+            stats = await _pool_ops(path, workers, ops_per_worker)
+        elapsed = time.perf_counter() - start
+
+    return {
+        "ops": workers * ops_per_worker,
+        "ops_per_sec": workers * ops_per_worker / elapsed,
+        "write_batches": stats.get("write_batches", 0),
+    }
+
+
+@pytest.mark.performance
+@pytest.mark.asyncio
+async def test_pool_outperforms_per_connection():
+    """The pooled backend must sustain more ops/sec than connect-per-call."""
+    before = await run_sqlite_benchmark("per_connection")
+    after = await run_sqlite_benchmark("pool")
+    logger.info("per_connection: %s", before)
+    logger.info("pool:           %s", after)
+
+    assert after["ops_per_sec"] > before["ops_per_sec"]
+    # Concurrent writes must be grouped into fewer commits
+    assert after["write_batches"] < after["ops"] / 2
+
+
+@pytest.mark.asyncio
+async def test_pool_isolates_failing_write_in_batch():
+    """A failing queued write is rolled back alone; its batch neighbours commit."""
+    with tempfile.TemporaryDirectory() as tmp:
+        pool = SQLiteConnectionPool(os.path.join(tmp, "t.db"), readers=2)
+        await pool.open()
+        await pool.write(lambda conn: conn.execute(SCHEMA))
+
+        async def insert(job_id):
+            return await pool.write(lambda conn: conn.execute(UPSERT, (job_id, "new", 1.0)))
+
+        async def broken():
+            return await pool.write(lambda conn: conn.execute("INSERT INTO missing VALUES (1)"))
+
+        results = await asyncio.gather(insert("a"), broken(), insert("b"), return_exceptions=True)
+        assert isinstance(results[1], aiosqlite.Error)
+
+        async with pool.reader() as db:
+            async with db.execute("SELECT job_id FROM bids ORDER BY job_id") as cursor:
+                assert [row["job_id"] for row in await cursor.fetchall()] == ["a", "b"]
+        await pool.close()
+
+
+if __name__ == "__main__":
+    # Allow direct execution for a before/after report
+    logging.basicConfig(level=logging.INFO)
+    print(f"{'mode':>15} {'ops':>6} {'ops/s':>10} {'batches':>8}")
+    for mode_name in ("per_connection", "pool"):
+        r = asyncio.run(run_sqlite_benchmark(mode_name))
+        print(f"{mode_name:>15} {r['ops']:>6} {r['ops_per_sec']:>10.0f} {r['write_batches']:>8}")
@@ -0,0 +1,85 @@
+# AI_FREELANCE_AUTOMATION/tests/unit/test_cache_eviction.py
+"""
+Unit tests for cache eviction policies in core/performance/cache_eviction.py.
+Verifies victim selection order, O(1) bookkeeping and TinyLFU admission.
+"""
+
+import pytest
+
+from core.performance.cache_eviction import (
+    CountMinSketch,
+    LFUEvictionPolicy,
+    LRUEvictionPolicy,
+    TinyLFUEvictionPolicy,
+    create_eviction_policy,
+    estimate_size_bytes,
+)
+
+
+def test_lru_evicts_least_recently_used():
+    policy = LRUEvictionPolicy()
+    for key in ("a", "b", "c"):
+        policy.record_insert(key)
+    policy.record_access("a")
+
+    assert policy.select_victim() == "b"
+    policy.remove("b")
+    assert policy.select_victim() == "c"
+    assert len(policy) == 2
+
+
+def test_lfu_evicts_least_frequently_used_with_lru_tiebreak():
+    policy = LFUEvictionPolicy()
+    for key in ("a", "b", "c"):
+        policy.record_insert(key)
+    policy.record_access("a")
+    policy.record_access("c")
+
+    assert policy.select_victim() == "b"
+    policy.remove("b")
+    # a and c have equal frequency, a was promoted first
+    assert policy.select_victim() == "a"
+    assert policy.frequency("c") == 2
+
+
+def test_lfu_recovers_min_frequency_after_remove():
+    policy = LFUEvictionPolicy()
+    policy.record_insert("a")
+    policy.record_insert("b")
+    policy.record_access("b")
+    policy.remove("a")
+
+    assert policy.select_victim() == "b"
+
+
+def test_tinylfu_rejects_cold_candidate():
+    policy = TinyLFUEvictionPolicy()
+    policy.record_insert("hot")
+    for _ in range(5):
+        policy.record_access("hot")
+
+    assert not policy.admit("cold", "hot")
+    for _ in range(10):
+        policy.record_miss("cold")
+    assert policy.admit("cold", "hot")
+
+
+def test_count_min_sketch_rows_hash_independently():
+    sketch = CountMinSketch(width=4096)
+    for _ in range(10):
+        sketch.increment(0)
+
+    # Same low 12 bits as the hot key: must not collide with it in every row
+    assert sketch.estimate(0) == 10
+    assert [sketch.estimate(4096 * j) for j in range(1, 200)] == [0] * 199
+
+
+def test_create_eviction_policy_unknown_name():
+    assert create_eviction_policy("LRU").name == "lru"
+    with pytest.raises(ValueError):
+        create_eviction_policy("random")
+
+
+def test_estimate_size_bytes_counts_utf8():
+    assert estimate_size_bytes("абв") == len('"абв"'.encode("utf-8"))
+    assert estimate_size_bytes({"k": [1, 2, 3]}) > 0
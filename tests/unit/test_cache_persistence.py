@@ -0,0 +1,73 @@
+# AI_FREELANCE_AUTOMATION/tests/unit/test_cache_persistence.py
+"""
+Unit tests for the append-only log backend in core/performance/cache_persistence.py.
+A flush that fails part way (segment written, index not; one of two segments
+written) is retried without corrupting the index, and entries that cannot be
+encoded are dropped instead of blocking every later flush.
+"""
+
+import pytest
+
+from core.performance import cache_persistence
+from core.performance.cache_persistence import AppendOnlyLogCacheStore
+from core.performance.intelligent_cache_system import CacheEntry
+
+
+def make_store(path, errors, **kwargs):
+    return AppendOnlyLogCacheStore(path, flush_interval=0, on_error=errors.append, **kwargs)
+
+
+def reload_values(path):
+    store = AppendOnlyLogCacheStore(path, flush_interval=0)
+    values = {meta['key']: load() for meta, load in store.load()}
+    store.close()
+    return values
+
+
+@pytest.mark.parametrize("failing_fsync", [1, 2, 3])
+def test_partly_failed_flush_is_retried_without_corrupting_the_index(tmp_path, monkeypatch, failing_fsync):
+    errors = []
+    # Two 76-byte records per segment: "b" fills the first segment, "c" and "d" go to a second one
+    store = make_store(tmp_path, errors, segment_max_bytes=160)
+    store.load()
+    store.put("a", CacheEntry("a", "value-a" * 10, 3600))
+    store.flush()
+
+    fsync = cache_persistence.os.fsync
+    calls = []
+
+    def flaky_fsync(fd):
+        calls.append(fd)
+        if len(calls) == failing_fsync:
+            raise OSError("disk full")
+        fsync(fd)
+
+    monkeypatch.setattr(cache_persistence.os, "fsync", flaky_fsync)
+    for key in ("b", "c", "d"):
+        store.put(key, CacheEntry(key, f"value-{key}" * 10, 3600))
+    store.flush()
+    assert errors and "disk full" in errors[0]
+
+    # Newer values replace the re-queued ones, so stale offsets would read the old bytes
+    for key in ("b", "c", "d", "e"):
+        store.put(key, CacheEntry(key, f"fresh-{key}" * 10, 3600))
+    store.flush()
+    store.close()
+
+    assert len(errors) == 1
+    expected = {"a": "value-a" * 10, **{key: f"fresh-{key}" * 10 for key in "bcde"}}
+    assert reload_values(tmp_path) == expected
+
+
+def test_unencodable_entry_is_dropped_and_the_rest_persisted(tmp_path):
+    errors = []
+    store = make_store(tmp_path, errors)
+    store.load()
+    store.put("bad", CacheEntry("bad", object(), 3600))
+    store.put("good", CacheEntry("good", {"score": 0.9}, 3600))
+    store.flush()
+
+    assert len(errors) == 1 and "bad" in errors[0]
+    assert store.get_stats()['pending_writes'] == 0
+    store.close()
+    assert reload_values(tmp_path) == {"good": {"score": 0.9}}
@@ -0,0 +1,100 @@
+# AI_FREELANCE_AUTOMATION/tests/unit/test_cache_single_flight.py
+"""
+Unit tests for single-flight computation in core/performance/intelligent_cache_system.py.
+Concurrent misses of one key share a single compute call; a failed leader
+passes its error to the waiters, a cancelled leader hands the work to a waiter.
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+import pytest_asyncio
+
+from core.performance.intelligent_cache_system import IntelligentCacheSystem
+
+
+@pytest_asyncio.fixture
+async def cache(tmp_path):
+    cache = IntelligentCacheSystem(cache_dir=str(tmp_path / "cache"))
+    yield cache
+    cache.close()
+
+
+@pytest.fixture
+def sync_cache(tmp_path):
+    cache = IntelligentCacheSystem(cache_dir=str(tmp_path / "cache"))
+    yield cache
+    cache.close()
+
+
+def test_concurrent_sync_misses_compute_once(sync_cache):
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.1)
+        return "value"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(sync_cache.get("k", compute))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["value"] * 8
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_async_misses_compute_once(cache):
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "value"
+
+    results = await asyncio.gather(*(cache.aget("k", compute) for _ in range(8)))
+
+    assert results == ["value"] * 8
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_leader_failure_reaches_waiters_and_is_not_cached(cache):
+    async def compute():
+        await asyncio.sleep(0.05)
+        raise ValueError("source unavailable")
+
+    results = await asyncio.gather(*(cache.aget("k", compute) for _ in range(3)), return_exceptions=True)
+
+    assert all(isinstance(result, ValueError) for result in results)
+
+    async def recovered():
+        return "fresh"
+
+    assert await cache.aget("k", recovered) == "fresh"
+
+
+@pytest.mark.asyncio
+async def test_cancelled_leader_promotes_a_waiter(cache):
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.1)
+        return "value"
+
+    leader = asyncio.create_task(cache.aget("k", compute))
+    await asyncio.sleep(0.01)
+    waiter = asyncio.create_task(cache.aget("k", compute))
+    await asyncio.sleep(0.01)
+    leader.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+    assert await waiter == "value"
+    assert len(calls) == 2
@@ -0,0 +1,125 @@
+# AI_FREELANCE_AUTOMATION/tests/unit/test_deliverable_graph.py
+"""
+Unit tests for parallel deliverable execution in core/automation/deliverable_graph.py.
+Covers overlapping independent branches, the per-service concurrency cap,
+per-deliverable timeouts, partial results after a failed branch and
+stopping the graph when the order lease is lost.
+"""
+
+import asyncio
+
+import pytest
+
+from core.automation.deliverable_graph import (
+    DeliverableGraph,
+    DeliverableNode,
+    ServiceConcurrencyLimiter,
+)
+
+
+def sleeper(delay, result=None, log=None):
+    async def run(inputs):
+        if log is not None:
+            log.append(("start", inputs))
+        await asyncio.sleep(delay)
+        return result if result is not None else inputs
+    return run
+
+
+@pytest.mark.asyncio
+async def test_independent_branches_overlap_and_dependents_get_inputs():
+    graph = DeliverableGraph(ServiceConcurrencyLimiter())
+    graph.add(DeliverableNode("copywriting", "copywriting", sleeper(0.2, "text")))
+    graph.add(DeliverableNode("translation", "translation", sleeper(0.2, "перевод")))
+    graph.add(DeliverableNode("editing", "copywriting", sleeper(0.0), depends_on=("copywriting", "translation")))
+
+    report = await graph.run()
+
+    assert report.success
+    # Both 0.2 s branches ran at the same time
+    assert report.wall_time < 0.35
+    assert report.results["editing"] == {"copywriting": "text", "translation": "перевод"}
+
+
+@pytest.mark.asyncio
+async def test_service_cap_is_shared_by_all_nodes_of_a_service():
+    limiter = ServiceConcurrencyLimiter({"copywriting": 2})
+    active, peak = 0, 0
+
+    async def tracked(inputs):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.05)
+        active -= 1
+        return "ok"
+
+    graph = DeliverableGraph(limiter)
+    for i in range(5):
+        graph.add(DeliverableNode(f"text-{i}", "copywriting", tracked))
+    graph.add(DeliverableNode("translation", "translation", sleeper(0.05, "ok")))
+
+    report = await graph.run()
+
+    assert report.success and peak == 2
+    assert limiter.utilization()["copywriting"] == {"active": 0, "limit": 2}
+
+
+@pytest.mark.asyncio
+async def test_deliverable_timeout_does_not_affect_other_branches():
+    graph = DeliverableGraph(ServiceConcurrencyLimiter(), default_timeout=5)
+    graph.add(DeliverableNode("slow", "translation", sleeper(5, "late"), timeout=0.05))
+    graph.add(DeliverableNode("fast", "copywriting", sleeper(0.1, "done")))
+
+    report = await graph.run()
+
+    assert report.outcomes["slow"].status == "timeout"
+    assert report.results == {"fast": "done"}
+    assert report.wall_time < 1
+
+
+@pytest.mark.asyncio
+async def test_failed_branch_skips_dependents_and_keeps_partial_results():
+    async def broken(inputs):
+        raise RuntimeError("translation API unavailable")
+
+    graph = DeliverableGraph(ServiceConcurrencyLimiter())
+    graph.add(DeliverableNode("translation", "translation", broken))
+    graph.add(DeliverableNode("editing", "copywriting", sleeper(0), depends_on=("translation",)))
+    graph.add(DeliverableNode("copywriting", "copywriting", sleeper(0.05, "text")))
+
+    report = await graph.run()
+
+    assert report.partial and not report.success
+    assert report.results == {"copywriting": "text"}
+    assert report.outcomes["translation"].status == "failed"
+    assert "translation API unavailable" in report.outcomes["translation"].error
+    assert report.outcomes["editing"].status == "skipped"
+    assert report.to_dict()["deliverables"]["editing"]["status"] == "skipped"
+
+
+@pytest.mark.asyncio
+async def test_lease_loss_stops_the_graph():
+    lease_lost = asyncio.Event()
+    started = []
+    graph = DeliverableGraph(ServiceConcurrencyLimiter())
+    graph.add(DeliverableNode("copywriting", "copywriting", sleeper(0.01, "text")))
+    graph.add(DeliverableNode("translation", "translation", sleeper(10, "late")))
+    graph.add(DeliverableNode("editing", "copywriting", sleeper(0, log=started), depends_on=("translation",)))
+
+    asyncio.get_running_loop().call_later(0.1, lease_lost.set)
+    report = await asyncio.wait_for(graph.run(stop=lease_lost), timeout=2)
+
+    assert report.results == {"copywriting": "text"}
+    assert report.outcomes["translation"].status == "cancelled"
+    assert report.outcomes["editing"].status == "cancelled"
+    assert started == []
+
+
+def test_cyclic_dependencies_are_rejected():
+    graph = DeliverableGraph(ServiceConcurrencyLimiter())
+    graph.add(DeliverableNode("a", "copywriting", sleeper(0), depends_on=("b",)))
+    graph.add(DeliverableNode("b", "copywriting", sleeper(0), depends_on=("a",)))
+
+    with pytest.raises(ValueError, match="Циклическая"):
+        asyncio.run(graph.run())
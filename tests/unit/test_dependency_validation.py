@@ -0,0 +1,174 @@
+# AI_FREELANCE_AUTOMATION/tests/unit/test_dependency_validation.py
+"""
+Unit tests for cache dependency validation in core/performance/dependency_validation.py.
+Covers the per-source rules (file fingerprint, table version, ETag), memoization
+within the validation window and how validator failures are reported.
+"""
+
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from core.performance.dependency_validation import (
+    DependencyValidator,
+    ETagValidator,
+    FileValidator,
+    SourceValidator,
+    TableVersionValidator,
+    hash_file,
+)
+from core.performance.intelligent_cache_system import CacheDependency
+
+
+def file_dependency(path) -> CacheDependency:
+    return CacheDependency(str(path), 'file', datetime.now(), hash_file(str(path)))
+
+
+def test_file_unchanged_is_not_rehashed(tmp_path):
+    path = tmp_path / "input.json"
+    path.write_text('{"a": 1}')
+    validator = FileValidator()
+    dependency = file_dependency(path)
+
+    assert not validator.check(dependency)
+    assert not validator.check(dependency)
+    assert validator.stats == {'stat_checks': 2, 'hash_computations': 1}
+
+
+def test_file_content_change_is_detected(tmp_path):
+    path = tmp_path / "input.json"
+    path.write_text('{"a": 1}')
+    validator = FileValidator()
+    dependency = file_dependency(path)
+    assert not validator.check(dependency)
+
+    path.write_text('{"a": 2, "b": 3}')
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+    assert validator.check(dependency)
+
+
+def test_touched_file_with_same_content_is_unchanged(tmp_path):
+    path = tmp_path / "input.json"
+    path.write_text('{"a": 1}')
+    validator = FileValidator()
+    dependency = file_dependency(path)
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+    assert not validator.check(dependency)
+    assert validator.stats['hash_computations'] == 1
+
+
+def test_missing_file_counts_as_changed(tmp_path):
+    path = tmp_path / "input.json"
+    path.write_text("x")
+    dependency = file_dependency(path)
+    path.unlink()
+
+    assert FileValidator().current_hash(str(path)) is None
+    assert FileValidator().check(dependency)
+
+
+def test_table_version_rule():
+    tables = TableVersionValidator()
+    version = tables.bump("jobs")
+    dependency = CacheDependency("jobs", 'database', datetime.now(), str(version))
+
+    assert not tables.check(dependency)
+    tables.bump("jobs")
+    assert tables.check(dependency)
+    # Unknown table: no version to compare against
+    assert not tables.check(CacheDependency("clients", 'database', datetime.now(), "1"))
+
+
+def test_table_without_recorded_version_compares_last_modified():
+    tables = TableVersionValidator()
+    dependency = CacheDependency("jobs", 'database', datetime.now() - timedelta(minutes=1), "")
+
+    assert not tables.check(dependency)
+    tables.bump("jobs")
+    assert tables.check(dependency)
+
+
+def test_table_version_provider_is_used():
+    versions = {"jobs": 7}
+    tables = TableVersionValidator(version_provider=versions.get)
+    dependency = CacheDependency("jobs", 'database', datetime.now(), "7")
+
+    assert not tables.check(dependency)
+    versions["jobs"] = 8
+    assert tables.check(dependency)
+
+
+def test_etag_rule_and_failing_fetcher_falls_back_to_observed():
+    def fetcher(endpoint):
+        raise ConnectionError("HEAD failed")
+
+    etags = ETagValidator(etag_fetcher=fetcher)
+    dependency = CacheDependency("/api/jobs", 'api', datetime.now(), '"v1"')
+
+    assert not etags.check(dependency)  # nothing known: unchanged
+    etags.observe("/api/jobs", '"v1"')
+    assert not etags.check(dependency)
+    etags.observe("/api/jobs", '"v2"')
+    assert etags.check(dependency)
+
+
+def test_results_are_memoized_within_window():
+    etags = ETagValidator()
+    validator = DependencyValidator(validation_window=60.0)
+    validator.register_validator('api', etags)
+    dependency = CacheDependency("/api/jobs", 'api', datetime.now(), '"v1"')
+
+    assert not validator.has_changed(dependency)
+    etags.observe("/api/jobs", '"v2"')
+    # Still inside the window: the memoized answer is returned
+    assert not validator.has_changed(dependency)
+    assert validator.get_stats()['memo_hits'] == 1
+
+    validator.prune(max_age=0.0)
+    assert validator.has_changed(dependency)
+
+
+def test_unknown_source_type_is_never_changed():
+    validator = DependencyValidator()
+    assert not validator.has_changed(CacheDependency("x", 'config', datetime.now(), "h"))
+    assert validator.validate_many([CacheDependency("x", 'config', datetime.now(), "h")]) == set()
+
+
+class _BrokenValidator(SourceValidator):
+    def check(self, dependency):
+        raise RuntimeError("source unreachable")
+
+
+def test_failing_validator_reports_dependency_as_changed():
+    validator = DependencyValidator()
+    validator.register_validator('queue', _BrokenValidator())
+    dependency = CacheDependency("jobs-queue", 'queue', datetime.now(), "h")
+
+    assert validator.has_changed(dependency)
+    assert validator.validate_many([dependency]) == {('queue', "jobs-queue", "h")}
+
+
+def test_base_validator_requires_check():
+    with pytest.raises(NotImplementedError):
+        SourceValidator().check(CacheDependency("x", 'file', datetime.now(), "h"))
+
+
+def test_validate_many_checks_each_unique_dependency_once(tmp_path):
+    path = tmp_path / "input.json"
+    path.write_text("x")
+    validator = DependencyValidator()
+    fresh = file_dependency(path)
+    stale = CacheDependency(str(path), 'file', datetime.now(), "0" * 32)
+
+    changed = validator.validate_many([fresh, fresh, stale])
+
+    assert changed == {('file', str(path), "0" * 32)}
+    assert validator.get_stats()['hash_computations'] == 1
+    # Batch results are memoized for has_changed()
+    assert validator.has_changed(stale) and not validator.has_changed(fresh)
+    assert validator.get_stats()['memo_hits'] == 2
@@ -0,0 +1,144 @@
+# AI_FREELANCE_AUTOMATION/tests/unit/test_http_transport.py
+"""
+Unit tests for the shared HTTP transport in platforms/http_transport.py.
+Runs against a local HTTP server and verifies retry policy, per-host limits,
+cookie handling, DNS caching and pool metrics.
+"""
+
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from platforms.http_transport import HttpTransport
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    calls = {}
+
+    def _reply(self, status: int, headers=None, body: bytes = b"ok"):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self):
+        count = self.calls[self.path] = self.calls.get(self.path, 0) + 1
+        if self.path == "/flaky" and count == 1:
+            return self._reply(503, {"Retry-After": "0"})
+        if self.path == "/down":
+            return self._reply(503)
+        if self.path == "/login":
+            return self._reply(200, {"Set-Cookie": "sid=42; Path=/"})
+        if self.path == "/login-redirect":
+            return self._reply(302, {"Set-Cookie": "sid=7; Path=/", "Location": "/me"})
+        if self.path == "/me":
+            return self._reply(200, body=(self.headers.get("Cookie") or "").encode())
+        if self.path == "/slow":
+            time.sleep(0.05)
+        return self._reply(200)
+
+    do_GET = do_POST = _handle
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    _Handler.calls = {}
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://localhost:{httpd.server_address[1]}"
+    httpd.shutdown()
+
+
+def test_idempotent_requests_are_retried(server):
+    transport = HttpTransport(backoff_base=0.01)
+    response = transport.request_sync("GET", f"{server}/flaky")
+
+    assert response.status_code == 200
+    assert transport.get_stats()["hosts"]["localhost"]["retries"] == 1
+    transport.close()
+
+
+def test_unsafe_requests_are_not_retried_on_server_errors(server):
+    transport = HttpTransport(backoff_base=0.01)
+
+    assert transport.request_sync("POST", f"{server}/down").status_code == 503
+    assert _Handler.calls["/down"] == 1
+    assert transport.request_sync("POST", f"{server}/down", retries=2, retry_unsafe=True).status_code == 503
+    assert _Handler.calls["/down"] == 4
+    transport.close()
+
+
+def test_session_keeps_cookies_and_headers(server):
+    transport = HttpTransport()
+    session = transport.session(headers={"User-Agent": "test-agent"})
+    session.get_sync(f"{server}/login")
+
+    assert session.get_sync(f"{server}/me").text == "sid=42"
+    transport.close()
+
+
+def test_sessions_sharing_transport_do_not_share_cookies(server):
+    transport = HttpTransport()
+    logged_in = transport.session()
+    anonymous = transport.session()
+    logged_in.get_sync(f"{server}/login")
+
+    assert anonymous.get_sync(f"{server}/me").text == ""
+    assert logged_in.get_sync(f"{server}/me").text == "sid=42"
+    transport.close()
+
+
+@pytest.mark.asyncio
+async def test_async_sessions_do_not_share_cookies_and_keep_them_on_redirects(server):
+    transport = HttpTransport()
+    first = transport.session()
+    second = transport.session()
+
+    # The cookie set by the redirect response is sent to the redirect target
+    assert (await first.get(f"{server}/login-redirect")).text == "sid=7"
+    assert (await second.get(f"{server}/me")).text == ""
+    assert (await first.get(f"{server}/me")).text == "sid=7"
+    assert (await transport.request("GET", f"{server}/me")).text == ""
+
+
+@pytest.mark.asyncio
+async def test_per_host_limit_and_pool_metrics(server):
+    transport = HttpTransport()
+    transport.configure_host("localhost", max_connections=3)
+
+    responses = await asyncio.gather(*(transport.request("GET", f"{server}/slow") for _ in range(12)))
+    stats = transport.get_stats()
+
+    assert all(response.status_code == 200 for response in responses)
+    assert stats["hosts"]["localhost"]["peak_in_flight"] == 3
+    assert stats["hosts"]["localhost"]["limit"] == 3
+    # Connections are reused: no more than the host limit are opened
+    assert 0 < stats["pool"]["connections"] <= 3
+    assert stats["pool"]["active"] == 0
+    # Concurrent connections to one host share a single DNS lookup
+    assert stats["dns"]["misses"] == 1
+    assert stats["dns"]["hits"] + stats["dns"]["coalesced"] == stats["pool"]["connections"] - 1
+    await transport.aclose()
+
+
+@pytest.mark.asyncio
+async def test_cancelled_request_is_not_left_in_flight(server):
+    transport = HttpTransport()
+    task = asyncio.create_task(transport.request("GET", f"{server}/slow"))
+    await asyncio.sleep(0.02)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    host = transport.get_stats()["hosts"]["localhost"]
+    assert host["in_flight"] == 0 and host["errors"] == 1
+    await transport.aclose()
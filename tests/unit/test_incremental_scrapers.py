@@ -0,0 +1,144 @@
+# AI_FREELANCE_AUTOMATION/tests/unit/test_incremental_scrapers.py
+"""
+Unit tests for incremental scraping in platforms/kwork/scraper.py and
+platforms/upwork/scraper.py: conditional requests with stored ETag /
+Last-Modified, 304 handling and stopping at the first already seen job.
+"""
+
+import asyncio
+import logging
+
+import pytest
+
+from platforms.rate_limiter import RateLimiter
+from platforms.scrape_watermarks import ScrapeWatermarkStore
+
+
+class FakeResponse:
+    def __init__(self, status_code, text="", headers=None, payload=None):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers or {}
+        self.request = None
+        self._payload = payload
+
+    def json(self):
+        return self._payload
+
+
+class FakeSession:
+    """Serves queued responses and records the request headers."""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    async def get(self, url, headers=None, **kwargs):
+        self.requests.append((url, dict(headers or {})))
+        return self.responses.pop(0)
+
+
+class FakeCache:
+    async def set(self, key, value, ttl=None):
+        pass
+
+
+class FakeParser:
+    """Cards are encoded in the page text as comma-separated job ids."""
+
+    async def parse(self, html, spec):
+        return [
+            {"href": f"/projects/{job_id}", "title": f"Нужен перевод текста {job_id}",
+             "description": "Перевод статьи с английского", "price": "1000"}
+            for job_id in html.split(",") if job_id
+        ]
+
+
+def make_kwork(responses):
+    module = pytest.importorskip("platforms.kwork.scraper")
+    scraper = module.KworkScraper.__new__(module.KworkScraper)
+    scraper.logger = logging.getLogger("test.kwork")
+    scraper.base_url = "https://kwork.ru"
+    scraper.search_endpoint = "/projects"
+    scraper.user_agents = ["test-agent"]
+    scraper.delay_range = [0, 0]
+    scraper.max_retries = 1
+    scraper.proxies = []
+    scraper.proxy_quotas = []
+    scraper.rate_limiter = RateLimiter(state_path=None)
+    scraper.incremental = True
+    scraper.watermarks = ScrapeWatermarkStore(state_path=None)
+    scraper.html_parser = FakeParser()
+    scraper.cache = FakeCache()
+    scraper.session = FakeSession(responses)
+    scraper._visited_urls = set()
+    return scraper
+
+
+def make_upwork(responses):
+    module = pytest.importorskip("platforms.upwork.scraper")
+    scraper = module.UpworkJobScraper.__new__(module.UpworkJobScraper)
+    scraper.logger = logging.getLogger("test.upwork")
+    scraper.api_base_url = "https://www.upwork.com/api/"
+    scraper.access_token = "token"
+    scraper.token_expires_at = float("inf")
+    scraper.rate_limiter = RateLimiter(state_path=None)
+    scraper.incremental = True
+    scraper.enabled = True
+    scraper._is_initialized = True
+    scraper.watermarks = ScrapeWatermarkStore(state_path=None)
+    scraper.session = FakeSession(responses)
+
+    async def no_ml_filter(jobs):
+        return jobs
+    scraper._ml_filter_jobs = no_ml_filter
+    return scraper
+
+
+def test_kwork_sends_validators_and_stops_on_304():
+    scraper = make_kwork([
+        FakeResponse(200, "3,2,1", headers={"ETag": '"v1"'}),
+        FakeResponse(304),
+    ])
+
+    first = asyncio.run(scraper.scrape_jobs(categories=["translation"], max_pages=1))
+    assert [job["job_id"] for job in first] == ["3", "2", "1"]
+    assert "If-None-Match" not in scraper.session.requests[0][1]
+
+    second = asyncio.run(scraper.scrape_jobs(categories=["translation"], max_pages=3))
+    assert second == []
+    # The unchanged first page ends the scan: no further pages are requested
+    assert len(scraper.session.requests) == 2
+    assert scraper.session.requests[1][1]["If-None-Match"] == '"v1"'
+
+
+def test_kwork_stops_paginating_at_first_known_job():
+    scraper = make_kwork([
+        FakeResponse(200, "2,1"),
+        FakeResponse(200, "4,3"),
+        FakeResponse(200, "2,1"),
+        FakeResponse(200, "0"),
+    ])
+    asyncio.run(scraper.scrape_jobs(categories=["translation"], max_pages=1))
+
+    jobs = asyncio.run(scraper.scrape_jobs(categories=["translation"], max_pages=5))
+
+    assert [job["job_id"] for job in jobs] == ["4", "3"]
+    # Page 2 starts with known jobs, page 3 is never fetched
+    assert len(scraper.session.requests) == 3
+
+
+def test_upwork_returns_only_jobs_newer_than_last_seen():
+    scraper = make_upwork([
+        FakeResponse(200, headers={"ETag": '"a"'}, payload={"jobs": [{"id": "2"}, {"id": "1"}]}),
+        FakeResponse(200, headers={"ETag": '"b"'}, payload={"jobs": [{"id": "3"}, {"id": "2"}, {"id": "1"}]}),
+        FakeResponse(304),
+    ])
+
+    assert [job["job_id"] for job in asyncio.run(scraper.scrape_jobs(query="python"))] == ["2", "1"]
+    assert [job["job_id"] for job in asyncio.run(scraper.scrape_jobs(query="python"))] == ["3"]
+    assert asyncio.run(scraper.scrape_jobs(query="python")) == []
+
+    sent = [headers.get("If-None-Match") for _, headers in scraper.session.requests]
+    assert sent == [None, '"a"', '"b"']
+    assert scraper.watermarks.get_stats()["not_modified"] == 1
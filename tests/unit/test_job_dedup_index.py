@@ -0,0 +1,77 @@
+# AI_FREELANCE_AUTOMATION/tests/unit/test_job_dedup_index.py
+"""
+Unit tests for the cross-platform job deduplication index in platforms/job_dedup_index.py.
+Verifies exact and near-duplicate detection, canonical copies, expiry, the size
+bound and persistence across restarts.
+"""
+
+import time
+
+from platforms.job_dedup_index import JobDedupIndex
+
+DESCRIPTION = (
+    "Нужно разработать интернет-магазин на Django с каталогом товаров, корзиной, "
+    "оплатой через ЮKassa и личным кабинетом покупателя. Дизайн готов в Figma, "
+    "требуется адаптивная верстка и интеграция с 1С для выгрузки остатков."
+)
+
+
+def make_job(platform, job_id, title="Интернет-магазин на Django", description=DESCRIPTION):
+    return {"platform": platform, "id": job_id, "title": title, "description": description}
+
+
+def test_exact_and_near_copies_from_other_platforms_are_duplicates():
+    index = JobDedupIndex(state_path=None)
+
+    assert index.check(make_job("kwork", "1")) is None
+    exact = index.check(make_job("fl", "77", title="ИНТЕРНЕТ-МАГАЗИН на Django!"))
+    near = index.check(make_job("habr", "9", description=DESCRIPTION + " Бюджет обсуждается."))
+
+    assert exact["match"] == "exact" and exact["platform"] == "kwork"
+    assert near["match"] == "near" and near["job_id"] == "1"
+    assert index.check(make_job("fl", "5", title="Логотип для кофейни", description="Нарисовать логотип")) is None
+    assert index.get_stats()["dedup_ratio"] == 0.5
+
+
+def test_canonical_copy_is_not_a_duplicate_and_keeps_analysis():
+    index = JobDedupIndex(state_path=None)
+    job = make_job("kwork", "1")
+
+    assert index.check(job) is None
+    index.store_analysis(job, {"relevance": 0.9})
+    assert index.check(make_job("kwork", "1")) is None
+    assert index.get_analysis(job) == {"relevance": 0.9}
+
+
+
+def test_scraper_job_is_identified_by_job_id():
+    index = JobDedupIndex(state_path=None)
+    # Scrapers emit job_id instead of id
+    job = {"platform": "kwork", "job_id": "1", "title": "Интернет-магазин на Django", "description": DESCRIPTION}
+
+    assert index.check(job) is None
+    index.store_analysis(job, {"relevance": 0.9})
+    assert index.check(dict(job)) is None
+    assert index.get_analysis(job) == {"relevance": 0.9}
+
+def test_index_is_bounded_and_entries_expire():
+    index = JobDedupIndex(state_path=None, max_entries=2, ttl_hours=1)
+    for job_id in range(3):
+        index.check(make_job("kwork", str(job_id), title=f"Заказ {job_id}", description=f"Уникальный текст {job_id}"))
+    assert len(index) == 2
+
+    for entry in index._entries.values():
+        entry.last_seen = time.time() - 7200
+    index.check(make_job("fl", "new", title="Новый заказ", description="Совсем другой"))
+    assert len(index) == 1
+    assert index.get_stats()["expired"] == 2
+
+
+def test_index_survives_restart(tmp_path):
+    state_path = str(tmp_path / "dedup.json")
+    index = JobDedupIndex(state_path=state_path)
+    index.check(make_job("kwork", "1"))
+    index.flush()
+
+    restarted = JobDedupIndex(state_path=state_path)
+    assert restarted.check(make_job("fl", "2"))["platform"] == "kwork"
@@ -0,0 +1,105 @@
+# AI_FREELANCE_AUTOMATION/tests/unit/test_job_filtering.py
+"""
+Unit tests for AI job filtering in platforms/universal_scraper_adapter.py.
+Verifies single-pass spam matching against a per-keyword scan, batched model
+calls with the per-text fallback and vectorised priorities.
+"""
+
+import pytest
+
+pytest.importorskip("bs4")
+pytest.importorskip("selenium")
+
+from platforms.universal_scraper_adapter import SPAM_KEYWORDS, UniversalScraperAdapter
+
+
+def make_adapter(batch_size=2, model=None):
+    # Filtering does not touch the network, so the heavy __init__ is skipped
+    adapter = UniversalScraperAdapter.__new__(UniversalScraperAdapter)
+    adapter.config = {"ai_filter_batch_size": batch_size}
+    adapter.ai_hub = type("Hub", (), {"get_model": staticmethod(lambda **kwargs: model)})()
+    return adapter
+
+
+def make_job(title, description, amount=5000):
+    return {"title": title, "description": description, "budget": {"amount": amount}}
+
+
+def linear_spam_score(job):
+    """Reference: the per-keyword scan the single-pass pattern replaced."""
+    text = f"{job['title'].lower()}\n{job.get('description', '').lower()}"
+    score = sum(1 for keyword in SPAM_KEYWORDS if keyword in text) / len(SPAM_KEYWORDS)
+    if job['budget']['amount'] < 300:
+        score += 0.3
+    if len(job['title']) < 15:
+        score += 0.2
+    return min(1.0, score)
+
+
+class BatchModel:
+    def __init__(self, accepts_lists=True):
+        self.accepts_lists = accepts_lists
+        self.calls = []
+
+    def __call__(self, texts, batch_size=None):
+        if isinstance(texts, list):
+            if not self.accepts_lists:
+                raise TypeError("single text only")
+            self.calls.append(len(texts))
+            return [{"label": "negative" if "мошенник" in text else "positive", "score": 0.9} for text in texts]
+        self.calls.append(1)
+        return [{"label": "positive", "score": 0.6}]
+
+
+@pytest.mark.parametrize("title, description, amount", [
+    ("Очень срочно нужен сайт", "Очень срочная задача, предоплата, гарантия 100% результата", 5000),
+    ("Лендинг", "Заработок и деньги без опыта, оплата на карту за 5 минут", 200),
+    ("Разработка интернет-магазина", "Нужен каталог, корзина и интеграция с оплатой", 40000),
+])
+def test_single_pass_spam_matches_linear_scan(title, description, amount):
+    job = make_job(title, description, amount)
+    assert make_adapter()._detect_spam(job) == pytest.approx(linear_spam_score(job))
+
+
+def test_analyze_batch_chunks_and_falls_back_per_text():
+    batched = BatchModel()
+    texts = [f"text {i}" for i in range(5)]
+    assert len(make_adapter(batch_size=2)._analyze_batch(batched, texts)) == 5
+    assert batched.calls == [2, 2, 1]
+
+    single = BatchModel(accepts_lists=False)
+    analyses = make_adapter(batch_size=2)._analyze_batch(single, texts)
+    assert single.calls == [1] * 5
+    assert analyses[0] == {"label": "positive", "score": 0.6}
+
+
+def test_priorities_match_single_job_formula():
+    jobs = [make_job("A", "x" * 100, 2000), make_job("B", "x" * 900, 9000), make_job("C", "", 50000)]
+    analyses = [{"score": 0.2}, {}, {"score": 1.0}]
+
+    priorities = UniversalScraperAdapter._calculate_priorities(jobs, analyses)
+
+    expected = [
+        min(min(job["budget"]["amount"] / 10000, 0.4) + min(len(job["description"]) / 500 * 0.3, 0.3)
+            + analysis.get("score", 0.5) * 0.3, 1.0)
+        for job, analysis in zip(jobs, analyses)
+    ]
+    assert list(priorities) == pytest.approx(expected)
+
+
+def test_ai_filter_drops_cheap_rejects_before_the_model_and_sorts_by_priority():
+    model = BatchModel()
+    adapter = make_adapter(batch_size=2, model=model)
+    good = make_job("Разработка интернет-магазина", "Нужен каталог товаров, корзина, личный кабинет и оплата", 30000)
+    better = make_job("Мобильное приложение для доставки", "Приложение под iOS и Android с картой курьеров " * 3,
+                      90000)
+    scam = make_job("Интеграция платежей", "Работа для честных людей, мошенник не пройдет проверку заказчика", 30000)
+    cheap = make_job("Разработка интернет-магазина", "Нужен каталог товаров, корзина, личный кабинет и оплата", 100)
+    short = make_job("Разработка интернет-магазина", "Коротко", 30000)
+
+    result = adapter._ai_filter_jobs([good, scam, cheap, short, better], {"min_budget": 500})
+
+    assert result == [better, good]
+    # Only the three jobs that passed the cheap checks reached the model, in batches of 2
+    assert model.calls == [2, 1]
+    assert set(better["ai_analysis"]) == {"quality_score", "sentiment", "priority", "spam_probability"}
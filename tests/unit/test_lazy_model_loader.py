@@ -0,0 +1,97 @@
+# AI_FREELANCE_AUTOMATION/tests/unit/test_lazy_model_loader.py
+"""
+Unit tests for concurrent loading in core/ai_management/lazy_model_loader.py.
+Model loading from source is replaced by a slow fake so the tests verify
+single-flight loads, non-blocking loads of other models, async loading and
+phase-based prefetch without downloading real models.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from types import SimpleNamespace
+
+import pytest
+
+from core.ai_management.lazy_model_loader import LazyModelLoader, current_task_phase
+from core.ai_management.model_residency_manager import ModelResidencyManager
+
+
+@pytest.fixture
+def loader(tmp_path, monkeypatch):
+    monkeypatch.setattr(LazyModelLoader, "_start_memory_monitor", lambda self: None)
+    monkeypatch.setattr(LazyModelLoader, "_cache_to_disk_async", lambda self, *args: None)
+    monkeypatch.setattr(LazyModelLoader, "_ensure_memory_available", lambda self, *args: None)
+
+    instance = LazyModelLoader(cache_dir=str(tmp_path), residency=ModelResidencyManager(ram_budget_bytes=1 << 40))
+    instance.source_loads = []
+    load_times = {"big-llm": 0.3, "embedder": 0.05}
+
+    def fake_source(model_path, task_type, quantization, provider):
+        instance.source_loads.append(model_path)
+        instance.source_quantization = quantization
+        time.sleep(load_times.get(model_path, 0.1))
+        return f"model:{model_path}"
+
+    instance._load_model_from_source = fake_source
+    return instance
+
+
+def test_concurrent_calls_share_one_load(loader):
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: loader.load_model("embedder", "embedder", "embeddings"), range(8)))
+
+    assert results == ["model:embedder"] * 8
+    assert loader.source_loads == ["embedder"]
+    stats = loader.get_model_stats("embedder")
+    assert stats["cold_loads"] == 1
+    assert stats["single_flight_waits"] + stats["cache_hits"] == 7
+
+
+def test_loading_one_model_does_not_block_others(loader):
+    loader.load_model("embedder", "embedder", "embeddings")
+
+    big = threading.Thread(target=loader.load_model, args=("big-llm", "big-llm", "text_generation"))
+    big.start()
+    time.sleep(0.05)
+    started = time.perf_counter()
+    assert loader.load_model("embedder", "embedder", "embeddings") == "model:embedder"
+    assert time.perf_counter() - started < 0.05  # served while big-llm is still loading
+    big.join()
+
+    report = loader.get_load_report()["embedder"]
+    assert report["cold_loads"] == 1 and report["cache_hits"] == 1
+    assert report["cache_hit_avg_ms"] < report["cold_load_avg_sec"] * 1000
+
+
+@pytest.mark.asyncio
+async def test_async_load_and_phase_prefetch(loader):
+    token = current_task_phase.set("execution")
+    try:
+        model = await loader.aload_model("embedder", "embedder", "embeddings")
+    finally:
+        current_task_phase.reset(token)
+    assert model == "model:embedder"
+    assert loader.phase_models["execution"]["embedder"]["task_type"] == "embeddings"
+
+    loader.loaded_models.clear()
+    futures = loader.prefetch_for_phase("execution")
+    assert len(futures) == 1
+    wait(futures)
+    assert "embedder" in loader.loaded_models
+    assert loader.get_model_stats("embedder")["prefetched"] == 1
+    assert loader.prefetch_for_phase("execution") == []  # already loaded
+
+
+def test_default_quantization_comes_from_strategy_selector(loader):
+    assert loader.default_quantization("sentiment") == "none"
+
+    loader.strategy_selector = SimpleNamespace(
+        select_model_quantization=lambda task_type: "int8" if task_type == "sentiment" else "none")
+    loader.load_model("classifier", "classifier", "sentiment")
+    assert loader.source_quantization == "int8"
+    assert loader.get_model_stats("classifier")["quantization"] == "int8"
+
+    # An explicit value wins over the selector
+    loader.load_model("classifier-full", "classifier-full", "sentiment", quantization="none")
+    assert loader.source_quantization == "none"
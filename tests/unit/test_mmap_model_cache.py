@@ -0,0 +1,103 @@
+# AI_FREELANCE_AUTOMATION/tests/unit/test_mmap_model_cache.py
+"""
+Unit tests for the weights file of core/ai_management/mmap_model_cache.py.
+Covers the encrypted round trip, detection of corrupted tensor data and
+strict assembly of a module from the memory-mapped tensors.
+"""
+
+import struct
+
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("cryptography")
+
+from cryptography.exceptions import InvalidTag
+
+from core.ai_management.mmap_model_cache import (
+    IntegrityError,
+    MappedStateDict,
+    assign_state_dict,
+    save_state_dict,
+)
+
+KEY = bytes(range(32))
+
+
+def sample_tensors():
+    torch.manual_seed(0)
+    return {
+        "weight": torch.randn(64, 32),
+        "bias": torch.randn(64),
+        "steps": torch.arange(10, dtype=torch.int64),
+    }
+
+
+def test_encrypted_round_trip(tmp_path):
+    path = str(tmp_path / "model.safetensors.enc")
+    tensors = sample_tensors()
+    # Small chunks: every tensor spans several encrypted blocks
+    save_state_dict(path, tensors, encryption_key=KEY, chunk_size=256)
+
+    state = MappedStateDict(path, encryption_key=KEY)
+    assert set(state) == set(tensors)
+    for name, tensor in tensors.items():
+        assert torch.equal(state[name], tensor)
+    state.close()
+
+    with pytest.raises(ValueError):
+        MappedStateDict(path)
+    with pytest.raises(InvalidTag):
+        MappedStateDict(path, encryption_key=bytes(32))["weight"]
+
+
+def test_corrupted_tensor_fails_hash_check(tmp_path):
+    path = str(tmp_path / "model.safetensors")
+    save_state_dict(path, {"weight": torch.ones(16, 16)})
+    with open(path, "r+b") as f:
+        header_len = struct.unpack("<Q", f.read(8))[0]
+        f.seek(8 + header_len + 5)
+        f.write(b"\xff")
+
+    state = MappedStateDict(path)
+    with pytest.raises(IntegrityError):
+        state["weight"]
+    # The check can be turned off explicitly
+    assert MappedStateDict(path, verify="none")["weight"].shape == (16, 16)
+    with pytest.raises(IntegrityError):
+        MappedStateDict(path, verify="eager")
+
+
+def test_module_is_assembled_from_mapped_tensors(tmp_path):
+    path = str(tmp_path / "model.safetensors")
+    source = torch.nn.Linear(32, 64)
+    save_state_dict(path, dict(source.state_dict()))
+
+    module = torch.nn.Linear(32, 64)
+    state = MappedStateDict(path)
+    assign_state_dict(module, state)
+
+    assert torch.equal(module.weight, source.weight)
+    # The parameter is the mapped tensor itself, not a copy
+    assert module.weight.data_ptr() == state["weight"].data_ptr()
+    assert module.weight.requires_grad
+
+
+def test_missing_tensor_is_rejected(tmp_path):
+    path = str(tmp_path / "model.safetensors")
+    save_state_dict(path, {"weight": torch.zeros(64, 32)})
+
+    module = torch.nn.Linear(32, 64)
+    original = module.weight
+    with pytest.raises(IntegrityError, match="bias"):
+        assign_state_dict(module, MappedStateDict(path))
+    # Nothing is replaced when the key sets differ
+    assert module.weight is original
+
+
+def test_wrong_shape_is_rejected(tmp_path):
+    path = str(tmp_path / "model.safetensors")
+    save_state_dict(path, {"weight": torch.zeros(32, 32), "bias": torch.zeros(64)})
+
+    with pytest.raises(IntegrityError, match="weight"):
+        assign_state_dict(torch.nn.Linear(32, 64), MappedStateDict(path))
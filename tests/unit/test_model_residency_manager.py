@@ -0,0 +1,87 @@
+# AI_FREELANCE_AUTOMATION/tests/unit/test_model_residency_manager.py
+"""
+Unit tests for core/ai_management/model_residency_manager.py: cost-aware
+eviction under a shared memory budget, pinning of models with in-flight
+requests and eviction notifications for every loader holding a model.
+Models are plain objects with explicit footprints and the clock is manual.
+"""
+
+import pytest
+
+from core.ai_management.model_residency_manager import ModelResidencyManager
+
+MB = 1024 * 1024
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return _Clock()
+
+
+@pytest.fixture
+def residency(clock):
+    return ModelResidencyManager(ram_budget_bytes=1000 * MB, reuse_horizon_sec=600, clock=clock)
+
+
+def test_eviction_prefers_cheap_large_and_rarely_used_models(residency, clock):
+    evicted = []
+    residency.admit("llm", object(), load_time_sec=40.0, owner="a", ram_bytes=500 * MB,
+                    on_evict=lambda model: evicted.append("llm"))
+    residency.admit("embedder", object(), load_time_sec=2.0, owner="a", ram_bytes=300 * MB,
+                    on_evict=lambda model: evicted.append("embedder"))
+    for _ in range(20):
+        clock.now += 10
+        residency.touch("llm")
+        residency.touch("embedder")
+
+    residency.admit("whisper", object(), load_time_sec=10.0, owner="b", ram_bytes=400 * MB)
+
+    # Both are equally hot, the embedder is far cheaper to reload per byte
+    assert evicted == ["embedder"]
+    dashboard = residency.get_dashboard()
+    assert [row["key"] for row in dashboard["models"]] == ["whisper", "llm"]
+    assert dashboard["ram_used_mb"] == 900
+    assert dashboard["recent_evictions"][0]["reason"] == "budget"
+
+
+def test_pinned_models_survive_and_over_budget_admission_is_reported(residency):
+    residency.admit("translator", object(), load_time_sec=1.0, owner="a", ram_bytes=800 * MB)
+
+    with residency.pin("translator") as model:
+        assert model is not None
+        assert residency.reserve(400 * MB) is False
+        residency.admit("summarizer", object(), load_time_sec=1.0, owner="b", ram_bytes=400 * MB)
+        assert residency.is_resident("translator")
+        rows = {row["key"]: row for row in residency.get_dashboard()["models"]}
+        assert rows["translator"]["pinned"] and not rows["summarizer"]["pinned"]
+
+    assert residency.stats["over_budget_admissions"] == 1
+    assert residency.reserve(0) is True  # released pin makes the translator evictable again
+    assert not residency.is_resident("translator")
+
+
+def test_shared_model_is_reused_and_released_by_every_owner(residency, clock):
+    model = object()
+    holders = {"lazy": model, "hub": model}
+
+    def drop(owner):
+        return lambda evicted: holders.pop(owner) if holders.get(owner) is evicted else None
+
+    residency.admit("text_generation:gpt2:none", model, load_time_sec=5.0, owner="lazy", ram_bytes=100 * MB,
+                    on_evict=drop("lazy"))
+    assert residency.get("text_generation:gpt2:none", owner="hub", on_evict=drop("hub")) is model
+    assert residency.stats["shared_hits"] == 1
+
+    clock.now += 6000  # idle for ten horizons
+    assert residency.trim() == ["text_generation:gpt2:none"]
+    assert holders == {}
+    assert residency.get("text_generation:gpt2:none") is None
+    assert residency.known_footprint("text_generation:gpt2:none") == (100 * MB, 0)
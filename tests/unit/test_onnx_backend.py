@@ -0,0 +1,67 @@
+# AI_FREELANCE_AUTOMATION/tests/unit/test_onnx_backend.py
+"""
+Unit tests for export coordination in core/ai_management/onnx_backend.py.
+The export and quantization steps are replaced by fakes that publish their
+directory the way the real ones do (os.replace of a staging directory), so
+the tests check that concurrent int8 and fp32 loads of one model share a
+single fp32 export without ONNX Runtime installed.
+"""
+
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from core.ai_management.onnx_backend import OnnxModelBackend
+
+
+def make_backend(tmp_path):
+    backend = OnnxModelBackend(cache_dir=str(tmp_path), intra_op_threads=1)
+    backend.exports = []
+
+    def publish(target: Path, name: str) -> None:
+        staging = Path(tempfile.mkdtemp(prefix=".staging-", dir=target.parent.parent))
+        (staging / name).write_text("graph")
+        time.sleep(0.1)
+        # Fails with "Directory not empty" if another export already published target
+        os.replace(staging, target)
+
+    def fake_export(model_path, task_type, target):
+        backend.exports.append(model_path)
+        publish(target, "model.onnx")
+
+    def fake_quantize(source, target):
+        assert (source / "model.onnx").exists()
+        publish(target, "model_quantized.onnx")
+
+    backend._export_fp32 = fake_export
+    backend._quantize_dir = fake_quantize
+    return backend
+
+
+def test_concurrent_int8_and_fp32_exports_share_one_fp32_export(tmp_path):
+    backend = make_backend(tmp_path)
+    start = threading.Barrier(4)
+
+    def export(quantize):
+        start.wait()
+        return backend.export("bert-tiny", "sentiment", quantize=quantize)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(export, [True, False, True, False]))
+
+    assert backend.exports == ["bert-tiny"]
+    assert results[0] == backend.model_dir("bert-tiny", "sentiment", quantize=True)
+    assert results[1] == backend.model_dir("bert-tiny", "sentiment", quantize=False)
+    assert (results[0] / "model_quantized.onnx").exists()
+
+
+def test_different_models_export_independently(tmp_path):
+    backend = make_backend(tmp_path)
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        list(pool.map(lambda path: backend.export(path, "sentiment", quantize=False), ["a", "b"]))
+
+    assert sorted(backend.exports) == ["a", "b"]
@@ -0,0 +1,116 @@
+# AI_FREELANCE_AUTOMATION/tests/unit/test_platform_manager.py
+"""
+Unit tests for concurrent platform calls in platforms/platform_manager.py.
+Fake adapters with fixed delays show that a hanging platform is cut off by
+its timeout without delaying the others, that the stream yields results in
+arrival order, that the global search keeps budget order across platforms
+and that per-platform latency is reported.
+"""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+platform_manager = pytest.importorskip("platforms.platform_manager")
+
+from platforms.job_dedup_index import JobDedupIndex
+from platforms.scrape_watermarks import ScrapeWatermarkStore
+
+
+class FakeAdapter:
+    def __init__(self, jobs=(), delay=0.0):
+        self.jobs = list(jobs)
+        self.delay = delay
+        self.calls = 0
+
+    async def search_jobs(self, **params):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return self.jobs
+
+
+def make_job(platform, job_id, budget):
+    # Distinct words per job: the dedup index must not merge unrelated jobs
+    words = " ".join(f"{platform}{job_id}w{i}" for i in range(8))
+    return SimpleNamespace(id=job_id, platform=platform, title=f"Заказ {job_id}", description=words, budget=budget)
+
+
+def make_manager(adapters, timeouts=None):
+    manager = platform_manager.PlatformManager.__new__(platform_manager.PlatformManager)
+    manager.platforms = dict(adapters)
+    manager.platform_configs = {name: {"request_timeout": timeout} for name, timeout in (timeouts or {}).items()}
+    manager._semaphores = {}
+    manager.search_report = {}
+    manager.dedup_index = JobDedupIndex(state_path=None)
+    manager.watermarks = ScrapeWatermarkStore(state_path=None)
+    return manager
+
+
+@pytest.mark.asyncio
+async def test_hanging_platform_is_cut_off_without_delaying_others():
+    manager = make_manager(
+        {"hang": FakeAdapter([make_job("hang", "1", 100)], delay=30),
+         "fast": FakeAdapter([make_job("fast", "2", 50)])},
+        timeouts={"hang": 0.2, "fast": 5},
+    )
+
+    started = time.monotonic()
+    results = await manager.search_jobs_global()
+
+    assert time.monotonic() - started < 1
+    assert [entry["job"].id for entry in results] == ["2"]
+    report = manager.get_search_report()
+    assert report["hang"]["status"] == "timeout"
+    assert report["fast"]["status"] == "ok" and report["fast"]["latency"] < 0.1
+
+
+@pytest.mark.asyncio
+async def test_stream_yields_results_in_arrival_order():
+    manager = make_manager({
+        "slow": FakeAdapter([make_job("slow", "1", 10)], delay=0.3),
+        "instant": FakeAdapter([make_job("instant", "2", 10)]),
+        "medium": FakeAdapter([make_job("medium", "3", 10)], delay=0.1),
+    })
+
+    started = time.monotonic()
+    arrivals = []
+    async for entry in manager.search_jobs_stream():
+        arrivals.append((entry["platform"], time.monotonic() - started))
+
+    assert [platform for platform, _ in arrivals] == ["instant", "medium", "slow"]
+    # The first result is not held back by the slowest platform
+    assert arrivals[0][1] < 0.1
+
+
+@pytest.mark.asyncio
+async def test_global_search_merges_platforms_by_budget():
+    manager = make_manager({
+        "a": FakeAdapter([make_job("a", "a1", 300), make_job("a", "a2", 5000), make_job("a", "a3", 40)]),
+        "b": FakeAdapter([make_job("b", "b1", 1200), make_job("b", "b2", 90)], delay=0.05),
+        "c": FakeAdapter([make_job("c", "c1", 2500)]),
+    })
+
+    results = await manager.search_jobs_global()
+    assert [entry["job"].budget for entry in results] == [5000, 2500, 1200, 300, 90, 40]
+
+    limited = await make_manager(dict(manager.platforms)).search_jobs_global(limit=2)
+    assert [entry["job"].id for entry in limited] == ["a2", "c1"]
+
+
+@pytest.mark.asyncio
+async def test_statistics_are_polled_concurrently_with_latency():
+    manager = make_manager({
+        "a": FakeAdapter([make_job("a", "1", 10)], delay=0.2),
+        "b": FakeAdapter([], delay=0.2),
+        "hang": FakeAdapter([], delay=30),
+    }, timeouts={"hang": 0.2})
+
+    started = time.monotonic()
+    stats = await manager.get_platform_statistics()
+
+    assert time.monotonic() - started < 0.35
+    assert stats["a"]["status"] == "active" and stats["a"]["jobs_available"] == 1
+    assert 0.2 <= stats["a"]["latency"] < 0.35
+    assert stats["hang"]["status"] == "error" and "таймаут" in stats["hang"]["error"]
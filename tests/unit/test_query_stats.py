@@ -0,0 +1,49 @@
+# AI_FREELANCE_AUTOMATION/tests/unit/test_query_stats.py
+"""
+Unit tests for per-statement query telemetry in services/storage/query_stats.py.
+Verifies statement aggregation, percentile estimates, ranking and the size bound.
+"""
+
+import pytest
+
+from services.storage.query_stats import LatencyHistogram, QueryStatsRegistry
+
+
+def test_statements_are_aggregated_by_normalized_sql():
+    registry = QueryStatsRegistry()
+    registry.record("SELECT *  FROM jobs\n WHERE id = ?", 0.002, rows=1)
+    registry.record("SELECT * FROM jobs WHERE id = ?", 0.004, rows=1)
+    registry.record("SELECT * FROM jobs WHERE id = ?", 0.001, error=True)
+
+    [stats] = registry.top()
+    assert stats["query"] == "SELECT * FROM jobs WHERE id = ?"
+    assert stats["calls"] == 3
+    assert stats["errors"] == 1
+    assert stats["rows"] == 2
+    assert stats["total_ms"] == pytest.approx(7.0)
+
+
+def test_histogram_percentiles_use_bucket_bounds():
+    histogram = LatencyHistogram()
+    for _ in range(90):
+        histogram.observe(0.8)
+    for _ in range(10):
+        histogram.observe(120.0)
+
+    assert histogram.percentile(50) == 1
+    assert histogram.percentile(99) == 120.0
+    assert histogram.max_ms == 120.0
+
+
+def test_top_ranks_by_requested_key_and_registry_is_bounded():
+    registry = QueryStatsRegistry(max_statements=2)
+    registry.record("SELECT 1", 0.001)
+    registry.record("SELECT 2", 0.050)
+    for _ in range(5):
+        registry.record("SELECT 3", 0.001)
+
+    assert len(registry) == 2  # "SELECT 1" was the least recently used
+    assert registry.top(1)[0]["query"] == "SELECT 2"
+    assert registry.top(1, by="calls")[0]["query"] == "SELECT 3"
+    with pytest.raises(ValueError):
+        registry.top(by="unknown")
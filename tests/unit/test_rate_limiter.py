@@ -0,0 +1,121 @@
+# AI_FREELANCE_AUTOMATION/tests/unit/test_rate_limiter.py
+"""
+Unit tests for the shared platform rate limiter in platforms/rate_limiter.py.
+Verifies GCRA quotas, priority scheduling, non-blocking sync behaviour and
+persistence of quota state across restarts.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from platforms.rate_limiter import RateLimiter, RateLimitExceeded, quotas_from_config
+
+
+def test_quotas_from_config_parses_known_periods():
+    assert quotas_from_config({"requests_per_minute": 5, "requests_per_hour": 50, "bids_per_day": 3}) == [
+        (5, 60.0), (50, 3600.0)
+    ]
+    assert quotas_from_config({"bids_per_day": 3}, "bids") == [(3, 86400.0)]
+
+
+def test_burst_then_paced_by_strictest_quota():
+    limiter = RateLimiter(state_path=None)
+    limiter.configure("kwork", [(3, 60.0), (100, 3600.0)])
+
+    assert [limiter.try_acquire("kwork") for _ in range(3)] == [0.0, 0.0, 0.0]
+    # Burst of 3 is used up: the next slot opens after one emission interval (20 s)
+    assert limiter.try_acquire("kwork") == pytest.approx(20.0, abs=0.5)
+
+
+def test_sync_acquire_never_sleeps_for_long_waits():
+    limiter = RateLimiter(state_path=None, max_wait=1.0)
+    limiter.configure("upwork:api", [(1, 3600.0)])
+    limiter.acquire_sync("upwork:api")
+
+    started = time.monotonic()
+    with pytest.raises(RateLimitExceeded) as exc_info:
+        limiter.acquire_sync("upwork:api")
+    assert time.monotonic() - started < 0.5
+    assert exc_info.value.retry_after > 3000
+
+
+def test_sync_acquire_waits_when_allowed_outside_event_loop():
+    limiter = RateLimiter(state_path=None, max_wait=0.0)
+    limiter.configure("fl", [(1, 0.2)])
+    limiter.acquire_sync("fl")
+
+    started = time.monotonic()
+    limiter.acquire_sync("fl", max_wait=float("inf"))
+    assert 0.1 < time.monotonic() - started < 1.0
+
+
+def test_waiting_works_from_several_event_loops():
+    limiter = RateLimiter(state_path=None)
+    limiter.configure("kwork", [(1, 0.05)])
+
+    async def burst():
+        await asyncio.gather(*(limiter.acquire("kwork") for _ in range(3)))
+
+    # Each asyncio.run creates a new loop; the per-key scheduler must not stay bound to the first one
+    asyncio.run(burst())
+    asyncio.run(burst())
+    assert limiter.get_stats()["waiting"] == 0
+
+
+@pytest.mark.asyncio
+async def test_waiters_are_granted_by_priority():
+    limiter = RateLimiter(state_path=None)
+    limiter.configure("habr", [(1, 0.05)])
+    await limiter.acquire("habr")
+
+    granted = []
+
+    async def request(name, priority):
+        await limiter.acquire("habr", priority=priority)
+        granted.append(name)
+
+    await asyncio.gather(request("low", 0), request("high", 10), request("mid", 5))
+    assert granted == ["high", "mid", "low"]
+
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiters_do_not_lose_quota():
+    limiter = RateLimiter(state_path=None)
+    limiter.configure("habr", [(1, 0.1)])
+    await limiter.acquire("habr")
+
+    waiter = asyncio.create_task(limiter.acquire("habr"))
+    await asyncio.sleep(0.01)
+    waiter.cancel()
+    await asyncio.sleep(0.15)
+
+    # Nobody was waiting when the slot opened: it must still be available
+    assert limiter.try_acquire("habr") == 0.0
+
+
+def test_multi_key_acquire_is_all_or_nothing():
+    limiter = RateLimiter(state_path=None)
+    limiter.configure("kwork", [(1, 3600.0)])
+    limiter.configure("proxy:1", [(1, 3600.0)])
+    limiter.acquire_sync("proxy:1")
+
+    with pytest.raises(RateLimitExceeded) as exc_info:
+        limiter.acquire_sync(["kwork", "proxy:1"], max_wait=1.0)
+    assert exc_info.value.key == "proxy:1"
+    # The rejected request did not burn the platform quota
+    assert limiter.try_acquire("kwork") == 0.0
+
+def test_quota_state_survives_restart(tmp_path):
+    state_path = tmp_path / "rate_limits.json"
+    limiter = RateLimiter(state_path=str(state_path), persist_interval=0)
+    limiter.configure("profi", [(2, 3600.0)])
+    limiter.try_acquire("profi")
+    limiter.try_acquire("profi")
+    limiter.flush()
+
+    restarted = RateLimiter(state_path=str(state_path))
+    restarted.configure("profi", [(2, 3600.0)])
+    assert restarted.delay("profi") > 1000
@@ -0,0 +1,47 @@
+# AI_FREELANCE_AUTOMATION/tests/unit/test_scrape_watermarks.py
+"""
+Unit tests for incremental scraping state in platforms/scrape_watermarks.py.
+Verifies the bounded seen-set, HTTP validators for conditional requests and
+persistence across restarts.
+"""
+
+from platforms.scrape_watermarks import ScrapeWatermarkStore
+
+
+def test_seen_set_is_per_stream_and_bounded():
+    store = ScrapeWatermarkStore(state_path=None, max_seen_per_stream=3)
+    store.mark_seen("kwork:new", ["1", "2", "3", "4"])
+
+    assert not store.is_new("kwork:new", "4")
+    assert store.is_new("kwork:new", "1")  # evicted as the oldest
+    assert store.is_new("upwork:python", "4")
+    assert store.watermark("kwork:new")["seen"] == 3
+
+
+def test_conditional_headers_follow_response_validators():
+    store = ScrapeWatermarkStore(state_path=None)
+    url = "https://kwork.ru/projects?page=1"
+    assert store.conditional_headers(url) == {}
+
+    store.update_validators(url, {"ETag": '"abc"', "Last-Modified": "Wed, 14 Oct 2026 10:00:00 GMT"})
+    assert store.conditional_headers(url) == {
+        "If-None-Match": '"abc"',
+        "If-Modified-Since": "Wed, 14 Oct 2026 10:00:00 GMT",
+    }
+
+    store.update_validators(url, {})
+    assert store.conditional_headers(url) == {}
+
+
+def test_state_survives_restart(tmp_path):
+    state_path = str(tmp_path / "watermarks.json")
+    store = ScrapeWatermarkStore(state_path=state_path)
+    store.mark_seen("kwork:new", ["42"])
+    store.advance("kwork:new", "42")
+    store.update_validators("https://kwork.ru/projects", {"ETag": "v1"})
+    store.flush()
+
+    restarted = ScrapeWatermarkStore(state_path=state_path)
+    assert not restarted.is_new("kwork:new", "42")
+    assert restarted.watermark("kwork:new")["last_job_id"] == "42"
+    assert restarted.conditional_headers("https://kwork.ru/projects") == {"If-None-Match": "v1"}
@@ -0,0 +1,81 @@
+# AI_FREELANCE_AUTOMATION/tests/unit/test_service_handlers.py
+"""
+Unit tests for the worker handler registry in core/automation/service_handlers.py.
+Verifies that service instances are created and warmed up once, reused across
+tasks, and that startup reports and per-handler metrics are collected.
+"""
+
+import asyncio
+
+import pytest
+
+from core.automation.service_handlers import ServiceHandlerRegistry
+
+
+class _ModelManager:
+    def __init__(self):
+        self.loaded = []
+
+    async def get_model(self, name):
+        self.loaded.append(name)
+        return object()
+
+
+class _Service:
+    created = 0
+
+    def __init__(self):
+        type(self).created += 1
+        self.model_manager = _ModelManager()
+        self.initialized = 0
+
+    async def initialize(self):
+        await asyncio.sleep(0.01)
+        self.initialized += 1
+
+    async def process(self, text: str):
+        if text == "bad":
+            raise ValueError(text)
+        return text.upper()
+
+
+@pytest.mark.asyncio
+async def test_instances_are_warmed_once_and_reused():
+    _Service.created = 0
+    registry = ServiceHandlerRegistry()
+    registry.register("echo", _Service, lambda s, p: s.process(**p),
+                      warmup=lambda s: s.initialize(), models=["tiny-model"])
+
+    report = await registry.warm_up()
+    results = await asyncio.gather(*(registry.dispatch("echo", {"text": "hi"}) for _ in range(5)))
+
+    assert results == ["HI"] * 5
+    assert _Service.created == 1
+    assert report[0]["warm"] and report[0]["service"] == "_Service"
+    assert list(report[0]["models"]) == ["tiny-model"]
+    assert "tiny-model" in registry.format_startup_report()
+
+
+@pytest.mark.asyncio
+async def test_failed_warmup_is_retried_on_first_task_and_errors_are_counted():
+    attempts = []
+
+    def factory():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("model server is down")
+        return _Service()
+
+    registry = ServiceHandlerRegistry()
+    registry.register("echo", factory, lambda s, p: s.process(**p))
+
+    report = await registry.warm_up()
+    assert not report[0]["warm"] and "model server is down" in report[0]["error"]
+
+    assert await registry.dispatch("echo", {"text": "ok"}) == "OK"
+    with pytest.raises(ValueError):
+        await registry.dispatch("echo", {"text": "bad"})
+
+    stats = registry.get_stats()["echo"]
+    assert (stats["calls"], stats["errors"], stats["throughput_per_min"]) == (2, 1, 2)
+    assert stats["warm"]
@@ -0,0 +1,70 @@
+# AI_FREELANCE_AUTOMATION/tests/unit/test_sqlite_pool.py
+"""
+Unit tests for the SQLite connection pool in services/storage/sqlite_pool.py.
+Verifies that a failing ROLLBACK neither kills the writer task nor leaves
+queued writes and exclusive writers waiting forever.
+"""
+
+import asyncio
+
+import pytest
+import pytest_asyncio
+
+from services.storage.sqlite_pool import SQLiteConnectionPool
+
+
+@pytest_asyncio.fixture
+async def pool(tmp_path):
+    pool = SQLiteConnectionPool(str(tmp_path / "test.db"), readers=1, write_batch_size=1)
+    await pool.open()
+    await pool.write(lambda conn: conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY)"))
+    yield pool
+    await pool.close()
+
+
+def fail_rollbacks(pool):
+    """Make every ROLLBACK on the writer connection raise."""
+    execute = pool._writer.execute
+
+    async def patched(sql, *args, **kwargs):
+        if sql.startswith("ROLLBACK"):
+            raise RuntimeError("disk I/O error during rollback")
+        return await execute(sql, *args, **kwargs)
+
+    pool._writer.execute = patched
+    return execute
+
+
+async def insert(conn, item_id):
+    await conn.execute("INSERT INTO items (id) VALUES (?)", (item_id,))
+    return item_id
+
+
+@pytest.mark.asyncio
+async def test_failed_rollback_resolves_write_and_keeps_writer_alive(pool):
+    restore = fail_rollbacks(pool)
+
+    async def broken(conn):
+        raise ValueError("bad statement")
+
+    with pytest.raises(RuntimeError, match="rollback"):
+        await asyncio.wait_for(pool.write(broken), timeout=5)
+    assert not pool._writer_task.done()
+
+    pool._writer.execute = restore
+    await pool._writer.execute("ROLLBACK")
+    assert await asyncio.wait_for(pool.write(lambda conn: insert(conn, 1)), timeout=5) == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_rollback_after_exclusive_writer_keeps_queue_moving(pool):
+    fail_rollbacks(pool)
+
+    async with pool.writer() as conn:
+        await conn.execute("BEGIN IMMEDIATE")
+        await conn.execute("INSERT INTO items (id) VALUES (2)")
+        # Leaves without COMMIT: the pool rolls back, and the ROLLBACK fails
+
+    await asyncio.sleep(0.05)
+    assert not pool._writer_task.done()
+    assert pool.get_stats()["pending_writes"] == 0
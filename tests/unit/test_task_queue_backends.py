@@ -0,0 +1,76 @@
+# AI_FREELANCE_AUTOMATION/tests/unit/test_task_queue_backends.py
+"""
+Unit tests for the durable task queue backends in core/automation/task_queue_backends.py.
+Verifies idempotent enqueue, batch claims in priority order, visibility timeouts
+with redelivery, ack/nack receipts and lease extension.
+"""
+
+import asyncio
+
+import pytest
+import pytest_asyncio
+
+from core.automation.task_queue_backends import InMemoryTaskQueue, SQLiteTaskQueue, create_task_queue_backend
+
+
+def _task(task_id: str, priority: int = 0, **extra):
+    return {"task_id": task_id, "type": "copywriting", "payload": {}, "priority": priority, **extra}
+
+
+@pytest_asyncio.fixture(params=["memory", "sqlite"])
+async def queue(request, tmp_path):
+    backend = InMemoryTaskQueue() if request.param == "memory" else SQLiteTaskQueue(str(tmp_path / "tasks.db"))
+    await backend.open()
+    yield backend
+    await backend.close()
+
+
+@pytest.mark.asyncio
+async def test_enqueue_is_idempotent_and_claims_by_priority(queue):
+    assert await queue.enqueue(_task("low", priority=1))
+    assert await queue.enqueue(_task("high", priority=9))
+    assert not await queue.enqueue(_task("low", priority=5))
+
+    claimed = await queue.claim(10, visibility_timeout=30)
+    assert [item.task_spec["task_id"] for item in claimed] == ["high", "low"]
+    assert await queue.claim(10, visibility_timeout=30) == []  # hidden while claimed
+
+    await queue.ack([item.receipt for item in claimed])
+    assert await queue.depth() == 0
+    assert queue.get_stats()["duplicates"] == 1
+
+
+@pytest.mark.asyncio
+async def test_unacked_tasks_are_redelivered_and_stale_receipts_ignored(queue):
+    await queue.enqueue(_task("t1"))
+    first = (await queue.claim(1, visibility_timeout=0.05))[0]
+    await asyncio.sleep(0.1)
+
+    second = (await queue.claim(1, visibility_timeout=30))[0]
+    assert second.deliveries == 2
+    await queue.ack([first.receipt])  # the lease expired, this ack belongs to nobody
+    assert await queue.depth() == 1
+
+    await queue.ack([second.receipt])
+    assert await queue.depth() == 0
+
+
+@pytest.mark.asyncio
+async def test_nack_with_delay_and_lease_extension(queue):
+    await queue.enqueue(_task("retry-me"))
+    await queue.enqueue(_task("long"))
+    long, retry = sorted(await queue.claim(2, visibility_timeout=0.1), key=lambda item: item.task_spec["task_id"])
+
+    await queue.nack(retry.receipt, {**retry.task_spec, "retry_count": 1}, delay=0.05)
+    await queue.extend([long.receipt], visibility_timeout=30)
+    await asyncio.sleep(0.15)
+
+    claimed = await queue.claim(10, visibility_timeout=30)
+    assert [item.task_spec["task_id"] for item in claimed] == ["retry-me"]
+    assert claimed[0].task_spec["retry_count"] == 1
+
+
+def test_worker_without_queue_config_keeps_local_queue():
+    assert create_task_queue_backend() is None
+    assert create_task_queue_backend({}) is None
+    assert isinstance(create_task_queue_backend({"backend": "memory"}), InMemoryTaskQueue)
@@ -0,0 +1,80 @@
+# AI_FREELANCE_AUTOMATION/tests/unit/test_task_scheduler.py
+"""
+Unit tests for the worker scheduling core in core/automation/task_scheduler.py.
+Verifies priority ordering with aging, per-type concurrency limits,
+backpressure, delayed retries and the dead-letter queue.
+"""
+
+import asyncio
+
+import pytest
+
+from core.automation.task_scheduler import TaskScheduler
+
+
+def _task(task_id: str, task_type: str = "copywriting", priority: int = 0, **extra):
+    return {"task_id": task_id, "type": task_type, "payload": {}, "priority": priority, **extra}
+
+
+@pytest.mark.asyncio
+async def test_priority_order_with_aging():
+    scheduler = TaskScheduler(dead_letter_path=None, aging_interval=0.05)
+    await scheduler.put(_task("old-low", priority=1))
+    await asyncio.sleep(0.2)  # waited 4 aging intervals: effective priority 5
+    await scheduler.put(_task("urgent", priority=9))
+    await scheduler.put(_task("new-low", priority=3))
+
+    order = [(await scheduler.get(timeout=0.1))["task_id"] for _ in range(3)]
+    assert order == ["urgent", "old-low", "new-low"]
+
+
+@pytest.mark.asyncio
+async def test_type_concurrency_limit_skips_to_other_types():
+    scheduler = TaskScheduler(dead_letter_path=None, type_concurrency={"transcription": 1})
+    await scheduler.put(_task("t1", "transcription", priority=9))
+    await scheduler.put(_task("t2", "transcription", priority=9))
+    await scheduler.put(_task("c1", "copywriting", priority=1))
+
+    first = await scheduler.get(timeout=0.1)
+    second = await scheduler.get(timeout=0.1)
+    assert (first["task_id"], second["task_id"]) == ("t1", "c1")
+    assert await scheduler.get(timeout=0.05) is None  # t2 waits for the transcription slot
+
+    await scheduler.task_done(first)
+    assert (await scheduler.get(timeout=0.1))["task_id"] == "t2"
+
+
+@pytest.mark.asyncio
+async def test_bounded_queue_applies_backpressure():
+    scheduler = TaskScheduler(dead_letter_path=None, max_queue_size=1)
+    await scheduler.put(_task("a"))
+    with pytest.raises(asyncio.QueueFull):
+        await scheduler.put(_task("b"), timeout=0.05)
+
+    producer = asyncio.create_task(scheduler.put(_task("b")))
+    await asyncio.sleep(0.01)
+    assert not producer.done()
+    await scheduler.get(timeout=0.1)
+    await asyncio.wait_for(producer, 1.0)
+    assert scheduler.get_stats()["backpressure_waits"] == 2
+
+
+@pytest.mark.asyncio
+async def test_retries_are_delayed_then_dead_lettered(tmp_path):
+    scheduler = TaskScheduler(dead_letter_path=str(tmp_path / "dlq.jsonl"), retry_base_delay=0.05)
+    await scheduler.put(_task("flaky", max_retries=1))
+
+    task = await scheduler.get(timeout=0.1)
+    await scheduler.task_done(task)
+    assert await scheduler.retry(task, RuntimeError("boom"))
+    assert await scheduler.get(timeout=0.01) is None  # not runnable before the backoff delay
+    task = await scheduler.get(timeout=0.5)
+    assert task["retry_count"] == 1
+
+    await scheduler.task_done(task)
+    assert not await scheduler.retry(task, RuntimeError("boom"))
+    assert [r["task"]["task_id"] for r in scheduler.dead_letters()] == ["flaky"]
+
+    assert await scheduler.replay_dead_letters() == 1
+    assert scheduler.dead_letters() == []
+    assert (await scheduler.get(timeout=0.1))["retry_count"] == 0
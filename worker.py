@@ -16,7 +16,7 @@ import logging
 import signal
 import sys
 import traceback
-from typing import Optional, Dict, Any, Callable
+from typing import Optional, Dict, Any, List
 from pathlib import Path
 
 # Add project root to path for imports
@@ -28,6 +28,13 @@ from core.config.unified_config_manager import UnifiedConfigManager
 from core.security.audit_logger import AuditLogger
 from core.monitoring.intelligent_monitoring_system import IntelligentMonitoringSystem
 from core.emergency_recovery import EmergencyRecovery
+from core.automation.task_scheduler import TaskScheduler
+from core.automation.task_queue_backends import TaskQueueBackend, create_task_queue_backend
+from core.automation.service_handlers import ServiceHandlerRegistry, build_default_registry
+
+# How often queue metrics are reported, seconds
+METRICS_INTERVAL = 30.0
+CLAIM_POLL_INTERVAL = 1.0
 
 
 class FreelanceWorker:
@@ -40,8 +47,22 @@ class FreelanceWorker:
         self.logger = logging.getLogger("FreelanceWorker")
         self.running = False
         self.shutdown_event = asyncio.Event()
-        self.task_queue: asyncio.Queue[Dict[str, Any]] = asyncio.Queue()
+        # Priority queue with per-type concurrency limits, backpressure and a DLQ
+        self.task_queue = TaskScheduler()
         self.active_tasks: Dict[str, asyncio.Task] = {}
+        self._last_metrics_report = 0.0
+
+        # Durable queue shared by worker processes (None = in-process queue only).
+        # Claimed tasks are fed into task_queue; receipts are kept until ack/nack.
+        self.queue_backend: Optional[TaskQueueBackend] = None
+        self.visibility_timeout = 300.0
+        self.claim_batch_size = 16
+        self.prefetch = 32
+        self._receipts: Dict[str, str] = {}
+        self._background_tasks: List[asyncio.Task] = []
+
+        # One service instance per task type, created and warmed up at startup
+        self.handlers = ServiceHandlerRegistry()
 
         # Core services (lazy-loaded via ServiceLocator)
         self.config: Optional[UnifiedConfigManager] = None
@@ -85,6 +106,35 @@ class FreelanceWorker:
             self.monitor = ServiceLocator.get_service("monitoring")
             self.recovery = ServiceLocator.get_service("emergency_recovery")
 
+            # Per-type concurrency limits, e.g. {"transcription": 1, "copywriting": 8}
+            if self.config:
+                for task_type, limit in (self.config.get("worker.concurrency", {}) or {}).items():
+                    self.task_queue.set_concurrency(task_type, limit)
+
+            # Durable queue backend, e.g. {"backend": "sqlite", "path": "data/queue/tasks.db"}
+            queue_options = (self.config.get("worker.queue", {}) if self.config else {}) or {}
+            self.queue_backend = create_task_queue_backend(queue_options)
+            if self.queue_backend:
+                self.visibility_timeout = float(queue_options.get("visibility_timeout", self.visibility_timeout))
+                self.claim_batch_size = int(queue_options.get("claim_batch_size", self.claim_batch_size))
+                self.prefetch = int(queue_options.get("prefetch", self.prefetch))
+                await self.queue_backend.open()
+                self.logger.info(f"Durable task queue: {type(self.queue_backend).__name__}")
+
+            # Task handlers; models listed in worker.preload_models are loaded at startup,
+            # e.g. {"transcription": ["whisper-medium"], "translation": ["nllb-200"]}
+            locator = ServiceLocator()
+
+            def locate(name: str) -> Any:
+                return locator.get_service(name) if locator.has_service(name) else None
+
+            worker_config = (self.config.get("worker", {}) if self.config else {}) or {}
+            self.handlers = build_default_registry(
+                self.config, locate, preload_models=worker_config.get("preload_models", {})
+            )
+            await self.handlers.warm_up(worker_config.get("warm_services", self.handlers.task_types))
+            self.logger.info(self.handlers.format_startup_report())
+
             self.logger.info("✅ Core services initialized successfully.")
         except Exception as e:
             self.logger.critical(f"💥 Failed to initialize core services: {e}", exc_info=True)
@@ -97,7 +147,7 @@ class FreelanceWorker:
         self.shutdown_event.set()
 
         # Cancel all active tasks
-        for task_id, task in self.active_tasks.items():
+        for task_id, task in list(self.active_tasks.items()):
             if not task.done():
                 self.logger.info(f"Canceling task {task_id}...")
                 task.cancel()
@@ -106,11 +156,29 @@ class FreelanceWorker:
                 except asyncio.CancelledError:
                     pass
 
+        for task in self._background_tasks:
+            task.cancel()
+        await asyncio.gather(*self._background_tasks, return_exceptions=True)
+
+        await self.handlers.shutdown()
+
+        # Claimed but unstarted tasks go back to the durable queue for other workers
+        if self.queue_backend:
+            for task_id, receipt in list(self._receipts.items()):
+                await self.queue_backend.nack(receipt)
+            self._receipts.clear()
+            await self.queue_backend.close()
+
         self.logger.info("Worker shutdown complete.")
 
-    async def enqueue_task(self, task_spec: Dict[str, Any]):
+    async def enqueue_task(self, task_spec: Dict[str, Any], timeout: Optional[float] = None) -> bool:
         """
         Enqueue a new task for processing.
+        With a durable queue backend the task is persisted and picked up by any
+        worker process; a task whose idempotency key (task_id by default) was
+        already enqueued is skipped and False is returned.
+        Without one, blocks while the in-process queue is full (backpressure) and
+        raises asyncio.QueueFull if no room frees up within `timeout` seconds.
         Expected format:
         {
             "task_id": "uuid4",
@@ -121,8 +189,14 @@ class FreelanceWorker:
             "max_retries": 3
         }
         """
-        await self.task_queue.put(task_spec)
+        if self.queue_backend:
+            if not await self.queue_backend.enqueue(task_spec):
+                self.logger.info(f"Duplicate task skipped: {task_spec['task_id']}")
+                return False
+        else:
+            await self.task_queue.put(task_spec, timeout=timeout)
         self.logger.debug(f"Task enqueued: {task_spec['task_id']} ({task_spec['type']})")
+        return True
 
     async def _process_task(self, task_spec: Dict[str, Any]) -> bool:
         """Process a single task based on its type."""
@@ -132,37 +206,16 @@ class FreelanceWorker:
 
         self.logger.info(f"🚀 Starting task {task_id} of type '{task_type}'")
 
-        try:
-            # Route to appropriate handler
-            handler: Optional[Callable] = None
-            if task_type == "transcription":
-                from services.ai_services.transcription_service import TranscriptionService
-                handler = TranscriptionService.process
-            elif task_type == "translation":
-                from services.ai_services.translation_service import TranslationService
-                handler = TranslationService.process
-            elif task_type == "copywriting":
-                from services.ai_services.copywriting_service import CopywritingService
-                handler = CopywritingService.process
-            elif task_type == "communication":
-                from core.communication.empathetic_communicator import EmpatheticCommunicator
-                handler = EmpatheticCommunicator.send_message
-            elif task_type == "payment":
-                from core.payment.enhanced_payment_processor import EnhancedPaymentProcessor
-                handler = EnhancedPaymentProcessor.process_payment
-            elif task_type == "quality_check":
-                from core.automation.quality_controller import QualityController
-                handler = QualityController.run_quality_check
-            else:
-                self.logger.error(f"Unknown task type: {task_type}")
-                return False
+        if not self.handlers.has(task_type):
+            self.logger.error(f"Unknown task type: {task_type}")
+            await self.task_queue.dead_letter(task_spec, ValueError(f"Unknown task type: {task_type}"))
+            return False
 
-            if handler:
-                result = await handler(payload)
-                self.logger.info(f"✅ Task {task_id} completed successfully.")
-                return True
-            else:
-                return False
+        try:
+            # Warm, long-lived service instance shared by all tasks of this type
+            await self.handlers.dispatch(task_type, payload)
+            self.logger.info(f"✅ Task {task_id} completed successfully.")
+            return True
 
         except Exception as e:
             retry_count = task_spec.get("retry_count", 0)
@@ -173,10 +226,8 @@ class FreelanceWorker:
                 exc_info=True
             )
 
-            if retry_count < max_retries:
-                task_spec["retry_count"] = retry_count + 1
-                await self.enqueue_task(task_spec)
-                self.logger.info(f"🔁 Retrying task {task_id} (attempt {retry_count + 2})")
+            # Delayed retry with exponential backoff; exhausted tasks go to the DLQ
+            if await self._retry_task(task_spec, e):
                 return False
             else:
                 self.logger.critical(f"💀 Task {task_id} permanently failed after {max_retries} retries.")
@@ -185,29 +236,135 @@ class FreelanceWorker:
                     await self.recovery.handle_task_failure(task_spec, e)
                 return False
 
+    async def _retry_task(self, task_spec: Dict[str, Any], error: BaseException) -> bool:
+        """
+        Schedule a delayed retry. Tasks from the durable queue are returned to it
+        (nack with backoff), so the retry survives a worker crash and may run on
+        another worker. Returns False when retries are exhausted (task is dead-lettered).
+        """
+        task_id = task_spec["task_id"]
+        if task_id not in self._receipts:
+            return await self.task_queue.retry(task_spec, error)
+
+        retry_count = task_spec.get("retry_count", 0)
+        if retry_count >= task_spec.get("max_retries", 3):
+            await self.task_queue.dead_letter(task_spec, error)
+            return False
+        delay = self.task_queue.retry_delay(retry_count)
+        await self.queue_backend.nack(
+            self._receipts.pop(task_id), {**task_spec, "retry_count": retry_count + 1}, delay=delay
+        )
+        self.logger.info(f"Task {task_id} returned to the queue, retry in {delay:.1f}s")
+        return True
+
+    async def _run_task(self, task_spec: Dict[str, Any]) -> bool:
+        """Run a task and release its type slot as soon as it finishes."""
+        try:
+            return await self._process_task(task_spec)
+        except asyncio.CancelledError:
+            # Interrupted by shutdown: hand the task back instead of acknowledging it
+            receipt = self._receipts.pop(task_spec["task_id"], None)
+            if receipt:
+                await self.queue_backend.nack(receipt)
+            raise
+        finally:
+            self.active_tasks.pop(task_spec["task_id"], None)
+            await self.task_queue.task_done(task_spec)
+            # Completed or dead-lettered: remove from the durable queue
+            receipt = self._receipts.pop(task_spec["task_id"], None)
+            if receipt:
+                await self.queue_backend.ack([receipt])
+
+    async def _claim_loop(self):
+        """Claim batches from the durable queue into the local scheduler."""
+        while not self.shutdown_event.is_set():
+            claimed = []
+            try:
+                free = self.prefetch - len(self._receipts)
+                if free > 0:
+                    claimed = await self.queue_backend.claim(min(free, self.claim_batch_size), self.visibility_timeout)
+                for item in claimed:
+                    task_spec = item.task_spec
+                    # Repeatedly redelivered without ack or nack: the task crashes its worker
+                    if item.deliveries > task_spec.get("max_retries", 3) + 1:
+                        self.logger.critical(f"💀 Task {task_spec['task_id']} redelivered {item.deliveries} times")
+                        await self.task_queue.dead_letter(
+                            task_spec, RuntimeError(f"Redelivered {item.deliveries} times without completion")
+                        )
+                        await self.queue_backend.ack([item.receipt])
+                        continue
+                    self._receipts[task_spec["task_id"]] = item.receipt
+                    await self.task_queue.put(task_spec)
+            except Exception as e:
+                self.logger.error(f"Failed to claim tasks from the durable queue: {e}", exc_info=True)
+
+            if not claimed:
+                try:
+                    await asyncio.wait_for(self.shutdown_event.wait(), CLAIM_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _lease_loop(self):
+        """Extend visibility of claimed tasks so long-running ones are not redelivered."""
+        interval = self.visibility_timeout / 3
+        while not self.shutdown_event.is_set():
+            try:
+                await asyncio.wait_for(self.shutdown_event.wait(), interval)
+            except asyncio.TimeoutError:
+                pass
+            receipts = list(self._receipts.values())
+            if receipts and not self.shutdown_event.is_set():
+                try:
+                    await self.queue_backend.extend(receipts, self.visibility_timeout)
+                except Exception as e:
+                    self.logger.error(f"Failed to extend task leases: {e}")
+
+    def _report_metrics(self):
+        """Periodically publish queue depth and latency metrics."""
+        now = asyncio.get_running_loop().time()
+        if now - self._last_metrics_report < METRICS_INTERVAL:
+            return
+        self._last_metrics_report = now
+
+        stats = self.task_queue.get_stats()
+        self.logger.info(
+            f"📊 Queue depth {stats['depth']} (delayed {stats['delayed']}), running {stats['running']}, "
+            f"wait p95 {stats['wait_ms']['p95']} ms, dead-lettered {stats['dead_lettered']}"
+        )
+        if self.monitor:
+            try:
+                self.monitor.record_metric("worker.queue_depth", stats["depth"])
+                self.monitor.record_metric("worker.queue_wait_p95_ms", stats["wait_ms"]["p95"])
+                self.monitor.record_metric("worker.task_run_p95_ms", stats["run_ms"]["p95"])
+                self.monitor.record_metric("worker.dead_lettered", stats["dead_lettered"])
+                for task_type, handler_stats in self.handlers.get_stats().items():
+                    if not handler_stats["calls"]:
+                        continue
+                    self.monitor.record_metric(f"worker.handler.{task_type}.p95_ms", handler_stats["latency_ms"]["p95"])
+                    self.monitor.record_metric(f"worker.handler.{task_type}.per_min", handler_stats["throughput_per_min"])
+                    self.monitor.record_metric(f"worker.handler.{task_type}.errors", handler_stats["errors"])
+                if self.queue_backend:
+                    backend_stats = self.queue_backend.get_stats()
+                    self.monitor.record_metric("worker.queue_claimed", backend_stats["claimed"])
+                    self.monitor.record_metric("worker.queue_redelivered", backend_stats["redelivered"])
+            except Exception as e:
+                self.logger.debug(f"Failed to report queue metrics: {e}")
+
     async def _worker_loop(self):
         """Main task processing loop."""
         while not self.shutdown_event.is_set():
             try:
-                # Wait for task with timeout to allow periodic checks
-                task_spec = await asyncio.wait_for(self.task_queue.get(), timeout=5.0)
-                task_id = task_spec["task_id"]
-
-                # Create and track task
-                task = asyncio.create_task(self._process_task(task_spec))
-                self.active_tasks[task_id] = task
-
-                # Cleanup finished tasks
-                finished = {tid for tid, t in self.active_tasks.items() if t.done()}
-                for tid in finished:
-                    try:
-                        await self.active_tasks[tid]
-                    except Exception:
-                        pass  # Already logged in _process_task
-                    del self.active_tasks[tid]
+                # Highest-priority task whose type has a free concurrency slot;
+                # the timeout allows periodic shutdown checks
+                task_spec = await self.task_queue.get(timeout=5.0)
+                self._report_metrics()
+                if task_spec is None:
+                    continue
+
+                # Create and track task (removed from tracking when it finishes)
+                task = asyncio.create_task(self._run_task(task_spec))
+                self.active_tasks[task_spec["task_id"]] = task
 
-            except asyncio.TimeoutError:
-                continue  # No task available, check shutdown flag
             except Exception as e:
                 self.logger.error(f"Unexpected error in worker loop: {e}", exc_info=True)
                 if self.recovery:
@@ -223,6 +380,12 @@ class FreelanceWorker:
         if self.monitor:
             asyncio.create_task(self.monitor.report_worker_heartbeat("freelance_worker"))
 
+        if self.queue_backend:
+            self._background_tasks = [
+                asyncio.create_task(self._claim_loop(), name="TaskClaimLoop"),
+                asyncio.create_task(self._lease_loop(), name="TaskLeaseLoop"),
+            ]
+
         try:
             await self._worker_loop()
         except Exception as e: